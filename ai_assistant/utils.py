@@ -1,16 +1,13 @@
 from tasks.models import Task
+from analytics.stats import owner_stats
 from datetime import datetime, timedelta
 
 def analyze_productivity(user):
-    tasks = Task.objects.filter(project__owner=user)
-    completed = tasks.filter(status="done").count()
-    total = tasks.count()
-
-    productivity = round((completed / total) * 100, 2) if total > 0 else 0
+    stats = owner_stats(user)
     return {
-        "total_tasks": total,
-        "completed_tasks": completed,
-        "productivity": productivity,
+        "total_tasks": stats["total"],
+        "completed_tasks": stats["completed"],
+        "productivity": stats["completion_rate"],
     }
 
 def suggest_tasks(user):
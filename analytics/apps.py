@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class AnalyticsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'analytics'
+
+    def ready(self):
+        import analytics.rollups
+        import analytics.timers
+        import analytics.stats
+        import analytics.productivity
+        import analytics.leaderboard
@@ -0,0 +1,260 @@
+"""
+Team leaderboard: per-user task and productivity totals by day, week, month
+and over all time.
+
+``LeaderboardEntry`` keeps one row per (granularity, user, period) with the
+tasks assigned to the user that were created in the period, those completed
+in it (by ``Task.completed_at``) and the sum and count of their
+productivity scores. The completion rate and average productivity are stored
+next to the counts, and indexed per period, so a top N is read as the first
+N index entries whatever the size of the team.
+
+Receivers apply every task or productivity metric save/delete as the
+difference between its old and new contribution, upserting the touched rows
+with one statement; a status change moves a handful of counters.
+``rebuild_leaderboard`` (the ``rebuild_leaderboard`` command) recomputes the
+table with grouped queries per granularity, e.g. after imports that bypass
+the model signals.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.apps import apps as global_apps
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count, DateField, QuerySet, Sum
+from django.db.models.functions import Trunc
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete
+from django.utils import timezone
+
+from projects.models import Project
+from tasks.models import Task
+from .models import LeaderboardEntry, ProductivityMetrics
+from .stats import DONE_STATUSES
+
+GRANULARITIES = ('day', 'week', 'month', 'all')
+ALL_TIME = date(1970, 1, 1)  # period_start of the 'all' rows
+REBUILD_BATCH_SIZE = 2000
+UPSERT_BATCH_SIZE = 500
+
+# top() orderings, each matching one index on LeaderboardEntry
+ORDERINGS = {
+    'rate': ('-completion_rate', '-tasks_completed'),
+    'completed': ('-tasks_completed', '-completion_rate'),
+    'productivity': ('-productivity', '-score_count'),
+}
+
+# Counter fields of a contribution, in order
+COUNTERS = ('tasks_assigned', 'tasks_completed', 'score_sum', 'score_count')
+
+
+def period_start(day, granularity):
+    """First day of the day, week (from Monday), month or all-time period containing ``day``."""
+    if granularity == 'day':
+        return day
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return ALL_TIME
+
+
+def _local_date(moment):
+    return timezone.localdate(moment) if timezone.is_aware(moment) else moment.date()
+
+
+def _shares():
+    return defaultdict(lambda: [0, 0, 0.0, 0])
+
+
+def task_row(task):
+    return task.assigned_to_id, task.status, task.created_at, task.completed_at
+
+
+def task_shares(rows):
+    """``{(granularity, user_id, period_start): counters}`` for ``(assignee, status, created, completed)`` rows."""
+    shares = _shares()
+    for assignee_id, status, created_at, completed_at in rows:
+        if assignee_id is None or created_at is None:
+            continue
+        created = _local_date(created_at)
+        for granularity in GRANULARITIES:
+            shares[(granularity, assignee_id, period_start(created, granularity))][0] += 1
+        if status in DONE_STATUSES and completed_at is not None:
+            completed = _local_date(completed_at)
+            for granularity in GRANULARITIES:
+                shares[(granularity, assignee_id, period_start(completed, granularity))][1] += 1
+    return shares
+
+
+def metric_shares(rows):
+    """The same for ``(user_id, date, productivity_score)`` rows of ``ProductivityMetrics``."""
+    shares = _shares()
+    for user_id, day, score in rows:
+        for granularity in GRANULARITIES:
+            share = shares[(granularity, user_id, period_start(day, granularity))]
+            share[2] += score
+            share[3] += 1
+    return shares
+
+
+def snapshot(tasks):
+    """Contribution of ``tasks`` as they are now; pass it to ``tasks_changed`` after changing them."""
+    return task_shares(task_row(task) for task in tasks)
+
+
+def _rate(completed, assigned):
+    return completed * 100.0 / assigned if assigned > 0 else 0.0
+
+
+def _average(total, count):
+    return total / count if count > 0 else 0.0
+
+
+def _upsert(changes, batch_size=UPSERT_BATCH_SIZE):
+    table = connection.ops.quote_name(LeaderboardEntry._meta.db_table)
+    columns = ('granularity', 'user_id', 'period_start', *COUNTERS, 'completion_rate', 'productivity')
+    new = {field: f"{table}.{field} + excluded.{field}" for field in COUNTERS}
+    assignments = [f"{field} = {new[field]}" for field in COUNTERS] + [
+        f"completion_rate = CASE WHEN {new['tasks_assigned']} > 0"
+        f" THEN ({new['tasks_completed']}) * 100.0 / ({new['tasks_assigned']}) ELSE 0 END",
+        f"productivity = CASE WHEN {new['score_count']} > 0"
+        f" THEN ({new['score_sum']}) / ({new['score_count']}) ELSE 0 END",
+    ]
+    rows = [
+        (
+            granularity, user_id, connection.ops.adapt_datefield_value(start), assigned, completed, score, scored,
+            _rate(completed, assigned), _average(score, scored),
+        )
+        for (granularity, user_id, start), (assigned, completed, score, scored) in changes
+    ]
+    with connection.cursor() as cursor:
+        for offset in range(0, len(rows), batch_size):
+            batch = rows[offset:offset + batch_size]
+            placeholders = ', '.join([f"({', '.join(['%s'] * len(columns))})"] * len(batch))
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES {placeholders}"
+                f" ON CONFLICT (granularity, user_id, period_start) DO UPDATE SET {', '.join(assignments)}",
+                [value for row in batch for value in row],
+            )
+
+
+def apply_changes(previous, current):
+    """Move the leaderboard from the ``previous`` contribution of some records to their ``current`` one."""
+    changes, empty = [], (0, 0, 0.0, 0)
+    for key in previous.keys() | current.keys():
+        delta = [now - before for now, before in zip(current.get(key, empty), previous.get(key, empty))]
+        if any(delta):
+            changes.append((key, delta))
+    if not changes:
+        return
+    _upsert(changes)
+    emptied = {user_id for (_, user_id, _), delta in changes if min(delta) < 0}
+    if emptied:
+        LeaderboardEntry.objects.filter(
+            user_id__in=emptied, tasks_assigned__lte=0, tasks_completed__lte=0, score_count__lte=0
+        ).delete()
+
+
+def tasks_changed(tasks, before=None):
+    """Apply changes made to ``tasks`` without model signals; ``before`` is their earlier ``snapshot``."""
+    apply_changes(before or {}, snapshot(tasks))
+
+
+def top(granularity='all', day=None, limit=5, order='rate', **filters):
+    """The best ``limit`` entries of the period containing ``day`` (default today), ordered by ``ORDERINGS[order]``."""
+    start = period_start(day or timezone.localdate(), granularity)
+    entries = LeaderboardEntry.objects.filter(granularity=granularity, period_start=start, **filters)
+    return list(entries.select_related('user').order_by(*ORDERINGS[order])[:limit])
+
+
+def _origin_model(origin):
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+def task_saved(sender, instance, created, **kwargs):
+    previous = {}
+    if not created:
+        # Stashed by tasks.graph before the save
+        previous = task_shares([(
+            getattr(instance, '_previous_assignee_id', None), getattr(instance, '_previous_status', None),
+            instance.created_at, getattr(instance, '_previous_completed_at', None),
+        )])
+    apply_changes(previous, snapshot([instance]))
+
+
+def task_deleted(sender, instance, origin=None, **kwargs):
+    # Tasks only cascade from their project, which takes them off in project_deleting
+    if _origin_model(origin) not in (Project, get_user_model()):
+        apply_changes(snapshot([instance]), {})
+
+
+def project_deleting(sender, instance, **kwargs):
+    tasks = Task.objects.filter(project=instance).values_list('assigned_to_id', 'status', 'created_at', 'completed_at')
+    apply_changes(task_shares(tasks), {})
+
+
+def remember_metric(sender, instance, **kwargs):
+    instance._previous_leaderboard = {}
+    if not instance._state.adding:
+        previous = sender.objects.filter(pk=instance.pk).values_list('user_id', 'date', 'productivity_score')
+        instance._previous_leaderboard = metric_shares(previous)
+
+
+def metric_saved(sender, instance, created, **kwargs):
+    previous = {} if created else getattr(instance, '_previous_leaderboard', {})
+    apply_changes(previous, metric_shares([(instance.user_id, instance.date, instance.productivity_score)]))
+
+
+def metric_deleted(sender, instance, origin=None, **kwargs):
+    # The rows of a deleted user go with it
+    if _origin_model(origin) is not get_user_model():
+        apply_changes(metric_shares([(instance.user_id, instance.date, instance.productivity_score)]), {})
+
+
+post_save.connect(task_saved, sender=Task, dispatch_uid='leaderboard_task_saved')
+post_delete.connect(task_deleted, sender=Task, dispatch_uid='leaderboard_task_deleted')
+pre_delete.connect(project_deleting, sender=Project, dispatch_uid='leaderboard_project_deleting')
+pre_save.connect(remember_metric, sender=ProductivityMetrics, dispatch_uid='leaderboard_metric_pre_save')
+post_save.connect(metric_saved, sender=ProductivityMetrics, dispatch_uid='leaderboard_metric_saved')
+post_delete.connect(metric_deleted, sender=ProductivityMetrics, dispatch_uid='leaderboard_metric_deleted')
+
+
+def _period(field, granularity):
+    return Trunc(field, granularity, output_field=DateField())
+
+
+def rebuild_leaderboard(batch_size=REBUILD_BATCH_SIZE, apps=global_apps):
+    """
+    Recompute every leaderboard row from the tasks and productivity metrics;
+    returns the number of rows written. ``apps`` is the model registry to read,
+    so the ``analytics`` migration that fills the table can pass its own.
+    """
+    totals = _shares()
+    tasks = apps.get_model('tasks', 'Task').objects.filter(assigned_to__isnull=False).order_by()
+    completed = tasks.filter(status__in=DONE_STATUSES, completed_at__isnull=False)
+    metrics = apps.get_model('analytics', 'ProductivityMetrics').objects.order_by()
+    for granularity in GRANULARITIES:
+        sources = (
+            (tasks, 'assigned_to_id', 'created_at', {'count': Count('pk')}),
+            (completed, 'assigned_to_id', 'completed_at', {'count': Count('pk')}),
+            (metrics, 'user_id', 'date', {'score': Sum('productivity_score'), 'count': Count('pk')}),
+        )
+        for position, (rows, user_field, date_field, aggregates) in enumerate(sources):
+            if granularity == 'all':
+                grouped = rows.values(user_field).annotate(**aggregates)
+            else:
+                grouped = rows.annotate(period=_period(date_field, granularity)).values(user_field, 'period').annotate(
+                    **aggregates
+                )
+            for row in grouped:
+                share = totals[(granularity, row[user_field], row.get('period', ALL_TIME))]
+                if position == 2:
+                    share[2] += row['score']
+                    share[3] += row['count']
+                else:
+                    share[position] += row['count']
+    with transaction.atomic():
+        apps.get_model('analytics', 'LeaderboardEntry').objects.all().delete()
+        _upsert(totals.items(), batch_size)
+    return len(totals)
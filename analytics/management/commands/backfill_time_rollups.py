@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from analytics.models import TimeRollup
+from analytics.rollups import REBUILD_BATCH_SIZE, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the hourly and daily time rollups from every TimeEntry and TimeTracking row.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=REBUILD_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        before = TimeRollup.objects.count()
+        written = rebuild_rollups(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Replaced {before} rollup row(s) with {written}."))
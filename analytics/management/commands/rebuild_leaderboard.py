@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from analytics.models import LeaderboardEntry
+from analytics.leaderboard import REBUILD_BATCH_SIZE, rebuild_leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the daily, weekly, monthly and all-time leaderboard from every task and productivity metric.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=REBUILD_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        before = LeaderboardEntry.objects.count()
+        written = rebuild_leaderboard(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Replaced {before} leaderboard row(s) with {written}."))
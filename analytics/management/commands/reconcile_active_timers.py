@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from analytics.timers import reconcile_timers
+
+
+class Command(BaseCommand):
+    help = 'Rewrites the cached active-timer registry from the running TimeTracking and TimeEntry rows.'
+
+    def handle(self, *args, **options):
+        running = reconcile_timers()
+        self.stdout.write(self.style.SUCCESS(f"Registry rebuilt: {running} timer(s) running."))
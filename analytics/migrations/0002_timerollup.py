@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-17 05:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('projects', '0005_project_updated_at'),
+        ('tasks', '0013_task_progress_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimeRollup',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('granularity', models.CharField(choices=[('hour', 'ساعة'), ('day', 'يوم')], max_length=4, verbose_name='الدقة')),
+                ('period_start', models.DateTimeField(verbose_name='بداية الفترة')),
+                ('minutes', models.IntegerField(default=0, verbose_name='الدقائق')),
+                ('entries', models.IntegerField(default=0, verbose_name='عدد السجلات')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='time_rollups', to='projects.project', verbose_name='المشروع')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='time_rollups', to='tasks.task', verbose_name='المهمة')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='time_rollups', to=settings.AUTH_USER_MODEL, verbose_name='المستخدم')),
+            ],
+            options={
+                'verbose_name': 'مجموع وقت',
+                'verbose_name_plural': 'مجاميع الوقت',
+                'indexes': [models.Index(fields=['user', 'granularity', 'period_start'], name='analytics_t_user_id_0fe8bd_idx'), models.Index(fields=['project', 'granularity', 'period_start'], name='analytics_t_project_b1886a_idx')],
+                'constraints': [models.UniqueConstraint(fields=('granularity', 'user', 'task', 'project', 'period_start'), name='unique_time_rollup')],
+            },
+        ),
+    ]
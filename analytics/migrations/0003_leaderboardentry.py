@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_timerollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('granularity', models.CharField(choices=[('day', 'يوم'), ('week', 'أسبوع'), ('month', 'شهر'), ('all', 'كل الفترات')], max_length=5, verbose_name='الدقة')),
+                ('period_start', models.DateField(verbose_name='بداية الفترة')),
+                ('tasks_assigned', models.IntegerField(default=0, verbose_name='المهام المسندة')),
+                ('tasks_completed', models.IntegerField(default=0, verbose_name='المهام المكتملة')),
+                ('completion_rate', models.FloatField(default=0.0, verbose_name='معدل الإنجاز')),
+                ('score_sum', models.FloatField(default=0.0, verbose_name='مجموع نقاط الإنتاجية')),
+                ('score_count', models.IntegerField(default=0, verbose_name='عدد مقاييس الإنتاجية')),
+                ('productivity', models.FloatField(default=0.0, verbose_name='متوسط الإنتاجية')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL, verbose_name='المستخدم')),
+            ],
+            options={
+                'verbose_name': 'ترتيب مستخدم',
+                'verbose_name_plural': 'لوحة الترتيب',
+                'indexes': [models.Index(fields=['granularity', 'period_start', '-completion_rate', '-tasks_completed'], name='leaderboard_by_rate'), models.Index(fields=['granularity', 'period_start', '-tasks_completed', '-completion_rate'], name='leaderboard_by_completed'), models.Index(fields=['granularity', 'period_start', '-productivity', '-score_count'], name='leaderboard_by_productivity')],
+                'constraints': [models.UniqueConstraint(fields=('granularity', 'user', 'period_start'), name='unique_leaderboard_entry')],
+            },
+        ),
+    ]
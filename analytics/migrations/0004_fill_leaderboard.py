@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+def fill_leaderboard(apps, schema_editor):
+    # Count what an existing install already holds; receivers keep the table current from here on
+    from analytics.leaderboard import rebuild_leaderboard
+    rebuild_leaderboard(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_leaderboardentry'),
+        ('tasks', '0015_task_completed_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_leaderboard, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def fill_time_rollups(apps, schema_editor):
+    # Sum what an existing install already tracked; receivers keep the rollups current from here on
+    from analytics.rollups import rebuild_rollups
+    rebuild_rollups(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_fill_leaderboard'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_time_rollups, migrations.RunPython.noop),
+    ]
@@ -77,6 +77,75 @@ class TimeTracking(models.Model):
         verbose_name_plural = "تتبع الوقت"
         ordering = ['-start_time']
 
+class TimeRollup(models.Model):
+    """مجاميع الوقت المسجل لكل ساعة ويوم، تحدث تلقائيا (see analytics.rollups)"""
+    GRANULARITY_CHOICES = [
+        ('hour', 'ساعة'),
+        ('day', 'يوم'),
+    ]
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='time_rollups', verbose_name="المستخدم")
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='time_rollups', verbose_name="المهمة")
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='time_rollups', verbose_name="المشروع")
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES, verbose_name="الدقة")
+    period_start = models.DateTimeField(verbose_name="بداية الفترة")
+    minutes = models.IntegerField(default=0, verbose_name="الدقائق")
+    entries = models.IntegerField(default=0, verbose_name="عدد السجلات")
+
+    class Meta:
+        verbose_name = "مجموع وقت"
+        verbose_name_plural = "مجاميع الوقت"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['granularity', 'user', 'task', 'project', 'period_start'], name='unique_time_rollup'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'granularity', 'period_start']),
+            models.Index(fields=['project', 'granularity', 'period_start']),
+        ]
+
+class LeaderboardEntry(models.Model):
+    """مجاميع كل مستخدم لكل يوم وأسبوع وشهر، تحدث تلقائيا (see analytics.leaderboard)"""
+    GRANULARITY_CHOICES = [
+        ('day', 'يوم'),
+        ('week', 'أسبوع'),
+        ('month', 'شهر'),
+        ('all', 'كل الفترات'),
+    ]
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_entries', verbose_name="المستخدم")
+    granularity = models.CharField(max_length=5, choices=GRANULARITY_CHOICES, verbose_name="الدقة")
+    period_start = models.DateField(verbose_name="بداية الفترة")
+    tasks_assigned = models.IntegerField(default=0, verbose_name="المهام المسندة")
+    tasks_completed = models.IntegerField(default=0, verbose_name="المهام المكتملة")
+    completion_rate = models.FloatField(default=0.0, verbose_name="معدل الإنجاز")
+    score_sum = models.FloatField(default=0.0, verbose_name="مجموع نقاط الإنتاجية")
+    score_count = models.IntegerField(default=0, verbose_name="عدد مقاييس الإنتاجية")
+    productivity = models.FloatField(default=0.0, verbose_name="متوسط الإنتاجية")
+
+    class Meta:
+        verbose_name = "ترتيب مستخدم"
+        verbose_name_plural = "لوحة الترتيب"
+        constraints = [
+            models.UniqueConstraint(fields=['granularity', 'user', 'period_start'], name='unique_leaderboard_entry'),
+        ]
+        # One per ordering of analytics.leaderboard.top, so the top N rows are read in index order
+        indexes = [
+            models.Index(
+                fields=['granularity', 'period_start', '-completion_rate', '-tasks_completed'],
+                name='leaderboard_by_rate',
+            ),
+            models.Index(
+                fields=['granularity', 'period_start', '-tasks_completed', '-completion_rate'],
+                name='leaderboard_by_completed',
+            ),
+            models.Index(
+                fields=['granularity', 'period_start', '-productivity', '-score_count'],
+                name='leaderboard_by_productivity',
+            ),
+        ]
+
 class PerformanceIndicator(models.Model):
     """مؤشرات الأداء"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -0,0 +1,162 @@
+"""
+Per-user daily totals behind ``AnalyticsReportViewSet.productivity_report``.
+
+For every day a partial records the user's productivity metrics (tasks
+completed, time spent, score sum and count) and the tasks assigned to them
+that were created or completed that day. Any date range is summed from those
+partials, so overlapping ranges share work instead of each missing the cache.
+
+Partials are cached a month at a time under a per-user version. Writes to the
+user's tasks, time tracking or productivity metrics bump that version after
+commit, so a report reflects a finished task on the next request.
+"""
+import calendar
+import time
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.signals import post_save, post_delete
+
+from tasks.models import Task
+from .models import ProductivityMetrics, TimeTracking
+from .stats import DONE_STATUSES
+
+PARTIALS_TIMEOUT = 60 * 60 * 24 * 7  # 1 week; writes move to a new version
+
+# Per-day fields: metrics tasks_completed, time_spent, score sum, score count,
+# then assigned tasks created and completed
+EMPTY_DAY = (0, timedelta(), 0.0, 0, 0, 0)
+
+
+def _version_key(user_id):
+    return f"productivity_version_{user_id}"
+
+
+def version(user_id):
+    key = _version_key(user_id)
+    current = cache.get(key)
+    if current is None:
+        # Start from the clock so a lost counter never returns to an old value
+        cache.add(key, time.time_ns(), None)
+        current = cache.get(key)
+    return current
+
+
+def invalidate(*user_ids):
+    """Drop the cached partials of ``user_ids`` once the current transaction commits."""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if user_ids:
+        transaction.on_commit(lambda: _bump(user_ids))
+
+
+def _bump(user_ids):
+    for user_id in user_ids:
+        version(user_id)
+        cache.incr(_version_key(user_id))
+
+
+def _month(day):
+    return day.replace(day=1)
+
+
+def _months(start, end):
+    """First day of every month from ``start`` to ``end``."""
+    first, last = start.year * 12 + start.month - 1, end.year * 12 + end.month - 1
+    return [date(index // 12, index % 12 + 1, 1) for index in range(first, last + 1)]
+
+
+def _month_end(month):
+    return month.replace(day=calendar.monthrange(month.year, month.month)[1])
+
+
+def _add(day, values, partials):
+    partials[day] = tuple(a + b for a, b in zip(partials.get(day, EMPTY_DAY), values))
+
+
+def _build_partials(user_id, start, end):
+    """``{day: partial}`` for the days from ``start`` to ``end`` with any activity."""
+    partials = {}
+    metrics = ProductivityMetrics.objects.filter(user_id=user_id, date__range=(start, end))
+    for row in metrics.order_by().values('date').annotate(
+        tasks=Sum('tasks_completed'), spent=Sum('time_spent'),
+        score=Sum('productivity_score'), scored=Count('pk'),
+    ):
+        _add(row['date'], (row['tasks'], row['spent'] or timedelta(), row['score'], row['scored'], 0, 0), partials)
+    assigned = Task.objects.filter(assigned_to_id=user_id).order_by()
+    for day, count in assigned.filter(created_at__date__range=(start, end)).values_list(
+        'created_at__date'
+    ).annotate(count=Count('pk')):
+        _add(day, (0, timedelta(), 0.0, 0, count, 0), partials)
+    for day, count in assigned.filter(status__in=DONE_STATUSES, completed_at__date__range=(start, end)).values_list(
+        'completed_at__date'
+    ).annotate(count=Count('pk')):
+        _add(day, (0, timedelta(), 0.0, 0, 0, count), partials)
+    return partials
+
+
+def daily_partials(user_id, start, end):
+    """``{day: partial}`` for the user's active days from ``start`` to ``end``, from cached months."""
+    months = _months(start, end)
+    prefix = f"productivity_{user_id}_{version(user_id)}_"
+    cached = cache.get_many([prefix + month.isoformat() for month in months])
+    missing = [month for month in months if prefix + month.isoformat() not in cached]
+    if missing:
+        # One pass over the span of the missing months, split back per month
+        built = _build_partials(user_id, missing[0], _month_end(missing[-1]))
+        fresh = {month: {} for month in missing}
+        for day, partial in built.items():
+            if _month(day) in fresh:
+                fresh[_month(day)][day] = partial
+        cache.set_many({prefix + month.isoformat(): days for month, days in fresh.items()}, PARTIALS_TIMEOUT)
+        cached.update((prefix + month.isoformat(), days) for month, days in fresh.items())
+    return {
+        day: partial
+        for month in months
+        for day, partial in cached[prefix + month.isoformat()].items()
+        if start <= day <= end
+    }
+
+
+def totals(user_id, start, end):
+    """The user's productivity figures from ``start`` to ``end``, both included."""
+    summed = EMPTY_DAY
+    for partial in daily_partials(user_id, start, end).values():
+        summed = tuple(a + b for a, b in zip(summed, partial))
+    tasks, spent, score, scored, created, completed = summed
+    return {
+        'metric_tasks_completed': tasks,
+        'time_spent': spent,
+        'productivity_score': score / scored if scored else 0,
+        'tasks_created': created,
+        'tasks_completed': completed,
+    }
+
+
+def tasks_changed(tasks, previous=None):
+    """Invalidate the assignees of ``tasks``; ``previous`` maps pk to the old ``(project_id, assigned_to_id)``."""
+    invalidate(
+        *(task.assigned_to_id for task in tasks),
+        *(assignee_id for _, assignee_id in (previous or {}).values()),
+    )
+
+
+def task_saved(sender, instance, **kwargs):
+    # The previous assignee is stashed by tasks.graph before the save
+    invalidate(instance.assigned_to_id, getattr(instance, '_previous_assignee_id', None))
+
+
+def task_deleted(sender, instance, **kwargs):
+    invalidate(instance.assigned_to_id)
+
+
+def user_record_changed(sender, instance, **kwargs):
+    invalidate(instance.user_id)
+
+
+post_save.connect(task_saved, sender=Task, dispatch_uid='productivity_task_saved')
+post_delete.connect(task_deleted, sender=Task, dispatch_uid='productivity_task_deleted')
+for model in (TimeTracking, ProductivityMetrics):
+    post_save.connect(user_record_changed, sender=model, dispatch_uid=f'productivity_{model.__name__}_saved')
+    post_delete.connect(user_record_changed, sender=model, dispatch_uid=f'productivity_{model.__name__}_deleted')
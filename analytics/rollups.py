@@ -0,0 +1,230 @@
+"""
+Hourly and daily rollups of tracked time.
+
+Every ``tasks.TimeEntry`` and ``analytics.TimeTracking`` with a duration adds
+its minutes to ``TimeRollup`` rows keyed by (user, task, project, hour) and
+(user, task, project, day). A timer that spans several hours or days is
+spread over them in proportion to the overlap. Receivers apply each
+save/delete as the difference between the old and new contribution, so
+stopping a timer or editing an entry touches a handful of rollup rows.
+Reports then sum at most one row per bucket instead of scanning raw entries.
+
+Running timers contribute nothing until they stop. A task moving to another
+project takes its rollup rows with it in one update. ``rebuild_rollups``
+(the ``backfill_time_rollups`` command) recomputes the whole table from the
+raw rows, e.g. after bulk imports that bypass the model signals.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.apps import apps as global_apps
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import F, QuerySet, Sum
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.utils import timezone
+
+from projects.models import Project
+from tasks.models import Task, TimeEntry
+from .models import TimeTracking, TimeRollup
+
+GRANULARITIES = ('hour', 'day')
+REBUILD_BATCH_SIZE = 2000
+
+
+def bucket_start(moment, granularity):
+    """Start of the hour or day (in the current time zone) containing ``moment``."""
+    local = timezone.localtime(moment)
+    if granularity == 'hour':
+        return local.replace(minute=0, second=0, microsecond=0)
+    return timezone.make_aware(datetime.combine(local.date(), time.min))
+
+
+def next_bucket(start, granularity):
+    if granularity == 'hour':
+        return start + timedelta(hours=1)
+    return timezone.make_aware(datetime.combine(start.date() + timedelta(days=1), time.min))
+
+
+def split_minutes(start, end, minutes, granularity):
+    """
+    Spread ``minutes`` over the buckets ``[start, end)`` overlaps.
+
+    Shares are proportional to the overlap and rounded cumulatively, so they
+    always add up to ``minutes``. Without a usable ``end`` everything goes to
+    the bucket containing ``start``.
+    """
+    first = bucket_start(start, granularity)
+    if end is None or end <= start:
+        return {first: minutes}
+    total = (end - start).total_seconds()
+    shares, covered, allocated = {}, 0.0, 0
+    bucket = first
+    while bucket < end:
+        following = next_bucket(bucket, granularity)
+        covered += (min(end, following) - max(start, bucket)).total_seconds()
+        share = round(minutes * covered / total) - allocated
+        if share:
+            shares[bucket] = share
+        allocated += share
+        bucket = following
+    return shares
+
+
+def _time_entry_source(entry):
+    return entry.user_id, entry.task_id, entry.start_time, entry.end_time, entry.duration_minutes
+
+
+def _time_tracking_source(tracking):
+    minutes = int(tracking.duration.total_seconds() / 60) if tracking.duration is not None else None
+    return tracking.user_id, tracking.task_id, tracking.start_time, tracking.end_time, minutes
+
+
+# model -> function returning (user_id, task_id, start, end, minutes or None while running)
+ROLLUP_SOURCES = {
+    TimeEntry: _time_entry_source,
+    TimeTracking: _time_tracking_source,
+}
+
+
+def contribution(instance, project_id=None):
+    """``{(granularity, user_id, task_id, project_id, bucket): minutes}`` for one time record."""
+    return _split(ROLLUP_SOURCES[type(instance)](instance), project_id)
+
+
+def _split(source, project_id=None):
+    user_id, task_id, start, end, minutes = source
+    if not minutes or start is None:
+        return {}
+    if project_id is None:
+        project_id = Task.objects.filter(pk=task_id).values_list('project_id', flat=True).first()
+    shares = {}
+    for granularity in GRANULARITIES:
+        for bucket, share in split_minutes(start, end, minutes, granularity).items():
+            shares[(granularity, user_id, task_id, project_id, bucket)] = share
+    return shares
+
+
+def _key_filter(key):
+    granularity, user_id, task_id, project_id, bucket = key
+    return {
+        'granularity': granularity, 'user_id': user_id, 'task_id': task_id,
+        'project_id': project_id, 'period_start': bucket,
+    }
+
+
+def apply_changes(previous, current):
+    """Move the rollups from the ``previous`` contribution of a record to its ``current`` one."""
+    changes = defaultdict(lambda: [0, 0])
+    for key, minutes in previous.items():
+        changes[key][0] -= minutes
+        changes[key][1] -= 1
+    for key, minutes in current.items():
+        changes[key][0] += minutes
+        changes[key][1] += 1
+    for key, (minutes, entries) in changes.items():
+        if not minutes and not entries:
+            continue
+        rows = TimeRollup.objects.filter(**_key_filter(key))
+        if not rows.update(minutes=F('minutes') + minutes, entries=F('entries') + entries):
+            try:
+                with transaction.atomic():
+                    TimeRollup.objects.create(**_key_filter(key), minutes=minutes, entries=entries)
+            except IntegrityError:
+                # Created concurrently by another save
+                rows.update(minutes=F('minutes') + minutes, entries=F('entries') + entries)
+        if entries < 0:
+            rows.filter(entries__lte=0).delete()
+
+
+def tasks_changed(tasks, previous=None):
+    """Move the rollups of ``tasks`` that changed project; ``previous`` maps pk to the old ``(project_id, assigned_to_id)``."""
+    moved = defaultdict(list)
+    for task in tasks:
+        project_id = (previous or {}).get(task.pk, (None, None))[0]
+        if project_id is not None and project_id != task.project_id:
+            moved[task.project_id].append(task.pk)
+    for project_id, task_ids in moved.items():
+        TimeRollup.objects.filter(task_id__in=task_ids).update(project_id=project_id)
+
+
+def task_saved(sender, instance, created, **kwargs):
+    # The previous project is stashed by tasks.graph before the save
+    if not created:
+        tasks_changed([instance], {instance.pk: (getattr(instance, '_previous_project_id', None), None)})
+
+
+def remember_contribution(sender, instance, **kwargs):
+    instance._previous_time_rollup = {}
+    if not instance._state.adding:
+        previous = sender.objects.filter(pk=instance.pk).select_related('task').first()
+        if previous is not None:
+            instance._previous_time_rollup = contribution(previous, previous.task.project_id)
+
+
+def time_saved(sender, instance, created, **kwargs):
+    previous = {} if created else getattr(instance, '_previous_time_rollup', {})
+    apply_changes(previous, contribution(instance))
+
+
+def time_deleted(sender, instance, origin=None, **kwargs):
+    # Rollups of a deleted task, project or user go with it through their own cascade
+    if (origin.model if isinstance(origin, QuerySet) else type(origin)) in (Task, Project, get_user_model()):
+        return
+    apply_changes(contribution(instance), {})
+
+
+post_save.connect(task_saved, sender=Task, dispatch_uid='time_rollup_task_saved')
+for model in ROLLUP_SOURCES:
+    pre_save.connect(remember_contribution, sender=model, dispatch_uid=f'time_rollup_pre_save_{model.__name__}')
+    post_save.connect(time_saved, sender=model, dispatch_uid=f'time_rollup_post_save_{model.__name__}')
+    post_delete.connect(time_deleted, sender=model, dispatch_uid=f'time_rollup_post_delete_{model.__name__}')
+
+
+def rebuild_rollups(batch_size=REBUILD_BATCH_SIZE, apps=global_apps):
+    """
+    Recompute every rollup row from the raw time records; returns the number
+    of rows written. ``apps`` is the model registry to read, so the
+    ``analytics`` migration that fills the table can pass its own.
+    """
+    TimeRollup = apps.get_model('analytics', 'TimeRollup')
+    totals = defaultdict(lambda: [0, 0])
+    for model, source in ROLLUP_SOURCES.items():
+        records = apps.get_model(model._meta.label).objects.select_related('task').order_by()
+        for record in records.iterator(chunk_size=batch_size):
+            for key, minutes in _split(source(record), record.task.project_id).items():
+                totals[key][0] += minutes
+                totals[key][1] += 1
+    rows = [
+        TimeRollup(**_key_filter(key), minutes=minutes, entries=entries)
+        for key, (minutes, entries) in totals.items()
+    ]
+    with transaction.atomic():
+        TimeRollup.objects.all().delete()
+        TimeRollup.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+REPORT_GROUPS = {
+    'period': 'period_start',
+    'task': 'task_id',
+    'project': 'project_id',
+    'user': 'user_id',
+}
+
+
+def time_report(start, end, granularity='day', group_by='period', **filters):
+    """
+    Tracked minutes from the rollups for buckets starting in ``[start, end)``.
+
+    ``filters`` narrow the rows (``user``, ``project``, ``task``...). Returns
+    ``(total_minutes, [{'key': ..., 'minutes': ...}, ...])`` grouped by
+    ``group_by``, one of ``REPORT_GROUPS``.
+    """
+    field = REPORT_GROUPS[group_by]
+    rows = TimeRollup.objects.filter(
+        granularity=granularity, period_start__gte=start, period_start__lt=end, **filters
+    )
+    grouped = rows.values(field).order_by(field).annotate(total=Sum('minutes'))
+    result = [{'key': row[field], 'minutes': row['total']} for row in grouped]
+    return sum(row['minutes'] for row in result), result
@@ -82,6 +82,7 @@ class ProductivityReportSerializer(serializers.Serializer):
     total_time = serializers.DurationField()
     average_time_per_task = serializers.DurationField()
     productivity_score = serializers.FloatField()
+    last_month_completed = serializers.IntegerField()
     period_start = serializers.DateField()
     period_end = serializers.DateField()
 
@@ -0,0 +1,232 @@
+"""
+Task statistics shared by every dashboard.
+
+Each scope (a user's visible tasks, the projects they own, the tasks assigned
+to them, one project, or the whole workspace) is counted with one
+conditional-aggregation query over just its tasks: by status, overdue and
+completion period. The per-project breakdown of the overall view is one
+grouped query.
+
+Results are cached per scope under the versions of what they read: the
+workspace, each project, each assignee and each owner's set of projects. Task
+and project writes bump only the versions they touch after commit, so a task
+moving in one project leaves every other project's and user's figures cached;
+a membership change alters the projects a developer's key is made of. Keys
+also carry today's date, since overdue and period counts move at midnight.
+"""
+import hashlib
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, QuerySet
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.utils import timezone
+
+from projects.models import Project
+from projects.utils import visible_project_ids
+from tasks.models import Task, DONE_STATUSES
+
+PENDING_STATUSES = ('todo', 'pending')
+ACTIVE_PROJECT_STATUSES = ('active', 'in_progress')
+COUNT_FIELDS = (
+    'total', 'pending', 'in_progress', 'completed', 'overdue',
+    'completed_this_month', 'completed_last_month',
+)
+STATS_TIMEOUT = 60 * 60 * 24  # 1 day; writes move to a new version
+WORKSPACE = 'workspace'
+
+
+def _version_key(scope):
+    return f"task_stats_version_{scope}"
+
+
+def versions(scopes):
+    """The current version of each of ``scopes``, in order."""
+    keys = [_version_key(scope) for scope in scopes]
+    current = cache.get_many(keys)
+    missing = [key for key in keys if key not in current]
+    if missing:
+        # Start from the clock so a lost counter never returns to an old value
+        started = time.time_ns()
+        for key in missing:
+            cache.add(key, started, None)
+        current.update(cache.get_many(missing))
+    return [current[key] for key in keys]
+
+
+def version(scope=WORKSPACE):
+    return versions([scope])[0]
+
+
+def invalidate(project_ids=(), assignee_ids=(), owner_ids=()):
+    """Drop the workspace figures and those of the given scopes once the current transaction commits."""
+    scopes = {WORKSPACE}
+    for prefix, ids in (('project', project_ids), ('assignee', assignee_ids), ('owner', owner_ids)):
+        scopes.update(f'{prefix}_{pk}' for pk in ids if pk is not None)
+    transaction.on_commit(lambda: _bump(sorted(scopes)))
+
+
+def _bump(scopes):
+    versions(scopes)
+    for scope in scopes:
+        cache.incr(_version_key(scope))
+
+
+def tasks_changed(tasks, previous=None):
+    """Invalidate the scopes holding ``tasks``; ``previous`` maps pk to the old ``(project_id, assigned_to_id)``."""
+    placements = {(task.project_id, task.assigned_to_id) for task in tasks}
+    placements.update((previous or {}).values())
+    invalidate(
+        project_ids={project_id for project_id, _ in placements},
+        assignee_ids={assignee_id for _, assignee_id in placements},
+    )
+
+
+def _counts(today):
+    month_ago, two_months_ago = today - timedelta(days=30), today - timedelta(days=60)
+    done = Q(status__in=DONE_STATUSES)
+    return {
+        'total': Count('pk'),
+        'pending': Count('pk', filter=Q(status__in=PENDING_STATUSES)),
+        'in_progress': Count('pk', filter=Q(status='in_progress')),
+        'completed': Count('pk', filter=done),
+        'overdue': Count('pk', filter=Q(due_date__lt=today) & ~done),
+        'completed_this_month': Count('pk', filter=done & Q(completed_at__date__gte=month_ago)),
+        'completed_last_month': Count('pk', filter=done & Q(completed_at__date__range=(two_months_ago, month_ago))),
+    }
+
+
+def _cached(name, scopes, build):
+    today = timezone.localdate()
+    stamp = hashlib.md5(repr(list(zip(scopes, versions(scopes)))).encode()).hexdigest()
+    key = f"task_stats_{name}_{stamp}_{today.isoformat()}"
+    value = cache.get(key)
+    if value is None:
+        value = build(today)
+        cache.set(key, value, STATS_TIMEOUT)
+    return value
+
+
+def summarize(counts):
+    """Counts (a ``COUNT_FIELDS`` tuple) as a dict with the completion rate and month-over-month change."""
+    stats = dict(zip(COUNT_FIELDS, counts))
+    total, this_month, last_month = stats['total'], stats['completed_this_month'], stats['completed_last_month']
+    stats['completion_rate'] = round(stats['completed'] / total * 100, 2) if total else 0
+    if last_month:
+        stats['change_percent'] = round((this_month - last_month) / last_month * 100)
+    else:
+        stats['change_percent'] = 100 if this_month else 0
+    return stats
+
+
+def count_tasks(tasks, today):
+    """Summarized counts of the ``tasks`` queryset, in one query."""
+    counts = tasks.order_by().aggregate(**_counts(today))
+    return summarize(tuple(counts[field] for field in COUNT_FIELDS))
+
+
+def workspace_stats():
+    """Every task, plus project totals; what admins and managers see."""
+    def build(today):
+        stats = count_tasks(Task.objects.all(), today)
+        projects = Project.objects.aggregate(
+            total=Count('pk'), active=Count('pk', filter=Q(status__in=ACTIVE_PROJECT_STATUSES))
+        )
+        stats['projects'], stats['active_projects'] = projects['total'], projects['active']
+        return stats
+    return _cached(WORKSPACE, [WORKSPACE], build)
+
+
+def project_stats(project_id):
+    return _cached(
+        f'project_{project_id}', [f'project_{project_id}'],
+        lambda today: count_tasks(Task.objects.filter(project_id=project_id), today),
+    )
+
+
+def owned_project_ids(user):
+    """Ids of the projects ``user`` owns, cached until one of them is created, deleted or handed over."""
+    key = f"task_stats_owned_{user.pk}_{version(f'owner_{user.pk}')}"
+    project_ids = cache.get(key)
+    if project_ids is None:
+        project_ids = sorted(Project.objects.filter(owner_id=user.pk).values_list('pk', flat=True))
+        cache.set(key, project_ids, STATS_TIMEOUT)
+    return project_ids
+
+
+def owner_stats(user):
+    """Tasks in the projects ``user`` owns."""
+    owned = owned_project_ids(user)
+
+    def build(today):
+        stats = count_tasks(Task.objects.filter(project_id__in=owned), today)
+        stats['projects'] = len(owned)
+        return stats
+    return _cached(f'owner_{user.pk}', [f'project_{pk}' for pk in owned], build)
+
+
+def assignee_stats(user):
+    return _cached(
+        f'assignee_{user.pk}', [f'assignee_{user.pk}'],
+        lambda today: count_tasks(Task.objects.filter(assigned_to_id=user.pk), today),
+    )
+
+
+def user_stats(user):
+    """The tasks ``user`` can see, by role, as the task list scopes them."""
+    profile = getattr(user, 'profile', None)
+    if profile and profile.has_role('admin', 'manager'):
+        return workspace_stats()
+    if profile and profile.has_role('developer'):
+        visible = visible_project_ids(user)
+        tasks = Task.objects.filter(Q(project_id__in=visible) | Q(assigned_to_id=user.pk))
+        return _cached(
+            f'developer_{user.pk}', [f'project_{pk}' for pk in visible] + [f'assignee_{user.pk}'],
+            lambda today: count_tasks(tasks, today),
+        )
+    return owner_stats(user)
+
+
+def project_breakdown():
+    """``[(project_id, name, stats)]`` for every project, including those without tasks."""
+    def build(today):
+        rows = Task.objects.order_by().values('project_id').annotate(**_counts(today))
+        per_project = {row['project_id']: tuple(row[field] for field in COUNT_FIELDS) for row in rows}
+        empty = (0,) * len(COUNT_FIELDS)
+        return [
+            (pk, name, summarize(per_project.get(pk, empty)))
+            for pk, name in Project.objects.values_list('pk', 'name')
+        ]
+    return _cached('projects', [WORKSPACE], build)
+
+
+def task_saved(sender, instance, **kwargs):
+    # The previous placement is stashed by tasks.graph before the save
+    previous = (getattr(instance, '_previous_project_id', None), getattr(instance, '_previous_assignee_id', None))
+    tasks_changed([instance], {instance.pk: previous})
+
+
+def task_deleted(sender, instance, origin=None, **kwargs):
+    # A deleted project invalidates its tasks' scopes once, in project_deleting
+    if (origin.model if isinstance(origin, QuerySet) else type(origin)) is not Project:
+        tasks_changed([instance])
+
+
+def project_saved(sender, instance, **kwargs):
+    # The previous owner is stashed by projects.signals before the save
+    invalidate(
+        project_ids=[instance.pk], owner_ids=[instance.owner_id, getattr(instance, '_previous_owner_id', None)]
+    )
+
+
+def project_deleting(sender, instance, **kwargs):
+    assignee_ids = Task.objects.filter(project=instance).values_list('assigned_to_id', flat=True).distinct()
+    invalidate(project_ids=[instance.pk], assignee_ids=set(assignee_ids), owner_ids=[instance.owner_id])
+
+
+post_save.connect(task_saved, sender=Task, dispatch_uid='task_stats_task_saved')
+post_delete.connect(task_deleted, sender=Task, dispatch_uid='task_stats_task_deleted')
+post_save.connect(project_saved, sender=Project, dispatch_uid='task_stats_project_saved')
+pre_delete.connect(project_deleting, sender=Project, dispatch_uid='task_stats_project_deleted')
@@ -1,3 +1,342 @@
+from datetime import datetime, timedelta
 from django.test import TestCase
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APIClient
+from projects.models import Project
+from tasks.models import Subtask, Task, TimeEntry
+from .models import LeaderboardEntry, ProductivityMetrics, TimeTracking, TimeRollup
+from .leaderboard import period_start, rebuild_leaderboard, top
+from .productivity import totals
+from .rollups import rebuild_rollups
+from .timers import active_timer
+from .stats import owner_stats, project_stats, user_stats, workspace_stats
+from .utils import get_overall_stats
 
-# Create your tests here.
+User = get_user_model()
+
+
+class TimeRollupTest(TestCase):
+    """Test the hourly and daily time rollups and the report that reads them."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='rollups@example.com', password='testpass123')
+        self.user.profile.role = 'developer'
+        self.user.profile.save()
+        self.project = Project.objects.create(name='Rollups', owner=self.user)
+        self.task = Task.objects.create(title='Tracked', project=self.project)
+        self.start = timezone.make_aware(datetime(2026, 3, 9, 23, 30))
+
+    def rollups(self, granularity):
+        rows = TimeRollup.objects.filter(granularity=granularity).order_by('period_start')
+        return [(row.period_start.hour, row.minutes, row.entries) for row in rows]
+
+    def snapshot(self):
+        return sorted(TimeRollup.objects.values_list(
+            'granularity', 'user_id', 'task_id', 'project_id', 'period_start', 'minutes', 'entries'
+        ))
+
+    def test_rollups_follow_entries_and_timers(self):
+        entry = TimeEntry.objects.create(
+            task=self.task, user=self.user, start_time=self.start, end_time=self.start + timedelta(minutes=90)
+        )
+        # 23:30-01:00 spreads over two hours and two days
+        self.assertEqual(self.rollups('hour'), [(23, 30, 1), (0, 60, 1)])
+        self.assertEqual(self.rollups('day'), [(0, 30, 1), (0, 60, 1)])
+
+        tracking = TimeTracking.objects.create(task=self.task, user=self.user, start_time=self.start)
+        self.assertEqual(self.rollups('hour'), [(23, 30, 1), (0, 60, 1)])  # still running
+        tracking.end_time = self.start + timedelta(minutes=20)
+        tracking.duration = tracking.end_time - tracking.start_time
+        tracking.is_active = False
+        tracking.save()
+        self.assertEqual(self.rollups('hour'), [(23, 50, 2), (0, 60, 1)])
+
+        entry.end_time = self.start + timedelta(minutes=30)
+        entry.save()
+        self.assertEqual(self.rollups('hour'), [(23, 50, 2)])
+        incremental = self.snapshot()
+        self.assertEqual(rebuild_rollups(), 2)
+        self.assertEqual(self.snapshot(), incremental)
+
+        entry.delete()
+        tracking.delete()
+        self.assertFalse(TimeRollup.objects.exists())
+
+    def test_rollups_follow_a_task_to_another_project(self):
+        TimeEntry.objects.create(
+            task=self.task, user=self.user, start_time=self.start, end_time=self.start + timedelta(minutes=90)
+        )
+        other = Project.objects.create(name='Elsewhere', owner=self.user)
+        self.task.project = other
+        self.task.save()
+        self.assertEqual(set(TimeRollup.objects.values_list('project_id', flat=True)), {other.pk})
+        incremental = self.snapshot()
+        rebuild_rollups()
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_report_endpoint(self):
+        for day in range(3):
+            began = self.start + timedelta(days=day)
+            TimeEntry.objects.create(
+                task=self.task, user=self.user, start_time=began, end_time=began + timedelta(minutes=20)
+            )
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/analytics/api/time-tracking/report/', {
+            'start_date': '2026-03-09', 'end_date': '2026-03-10',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_minutes'], 40)
+        self.assertEqual([row['minutes'] for row in response.data['results']], [20, 20])
+
+        response = client.get('/analytics/api/time-tracking/report/', {
+            'start_date': '2026-03-01', 'end_date': '2026-03-31', 'group_by': 'task',
+        })
+        self.assertEqual(response.data['results'], [{'key': self.task.pk, 'minutes': 60}])
+
+        response = client.get('/analytics/api/time-tracking/report/', {
+            'start_date': '2026-01-01', 'end_date': '2026-03-31', 'granularity': 'hour',
+        })
+        self.assertEqual(response.status_code, 400)
+
+
+class ActiveTimerRegistryTest(TestCase):
+    """Test the cached registry behind start_tracking / stop_tracking / active_tracking."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='timers@example.com', password='testpass123')
+        self.user.profile.role = 'developer'
+        self.user.profile.save()
+        self.task = Task.objects.create(title='Timed', project=Project.objects.create(name='Timers', owner=self.user))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_one_timer_per_user_without_polling_queries(self):
+        url = '/analytics/api/time-tracking/'
+        with self.captureOnCommitCallbacks(execute=True):
+            started = self.client.post(f'{url}start_tracking/', {'task': str(self.task.pk)})
+        self.assertEqual(started.status_code, 201)
+        # A registry that missed the start (another process's cache) does not let a second timer through
+        key = f'active_timer_{self.user.pk}'
+        registered = cache.get(key)
+        cache.set(key, {}, None)
+        again = self.client.post(f'{url}start_tracking/', {'task': str(self.task.pk)})
+        self.assertEqual(again.status_code, 400)
+        cache.set(key, registered, None)
+
+        with self.assertNumQueries(0):
+            active = self.client.get(f'{url}active_tracking/')
+        self.assertEqual(active.data['id'], started.data['id'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"{url}{started.data['id']}/stop_tracking/")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(f'{url}active_tracking/').data, {'message': 'No active time tracking'})
+
+    def test_empty_cache_reconciles_from_database(self):
+        entry = TimeEntry.objects.create(
+            task=self.task, user=self.user, start_time=timezone.now(), is_running=True
+        )
+        idle = User.objects.create_user(email='idle@example.com', password='testpass123')
+        cache.clear()
+        self.assertEqual(active_timer(self.user.pk)['id'], entry.pk)
+        with self.assertNumQueries(0):
+            self.assertIsNone(active_timer(idle.pk))
+
+
+class TaskStatsTest(TestCase):
+    """Test the shared stats service behind the dashboard endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(email='stats-owner@example.com', password='testpass123')
+        self.developer = User.objects.create_user(email='stats-dev@example.com', password='testpass123')
+        self.developer.profile.role = 'developer'
+        self.developer.profile.save()
+        self.project = Project.objects.create(name='Stats', owner=self.owner)
+        self.other = Project.objects.create(name='Other', owner=self.developer)
+        Project.objects.create(name='Empty', owner=self.owner)
+        yesterday = timezone.localdate() - timedelta(days=1)
+        Task.objects.create(title='Late', project=self.project, due_date=yesterday)
+        Task.objects.create(title='Done', project=self.project, status='done', assigned_to=self.developer)
+        Task.objects.create(title='Busy', project=self.other, status='in_progress')
+
+    def test_each_scope_counts_only_its_tasks(self):
+        with self.assertNumQueries(7):  # one per scope; workspace and owner also read their projects
+            workspace = workspace_stats()
+            mine = owner_stats(self.owner)
+            project = project_stats(self.project.pk)
+            overall = get_overall_stats()
+        with self.assertNumQueries(0):
+            owner_stats(self.owner)
+            get_overall_stats()
+        self.assertEqual((workspace['total'], workspace['completed'], workspace['overdue']), (3, 1, 1))
+        self.assertEqual((workspace['projects'], workspace['active_projects']), (3, 3))
+        self.assertEqual((mine['total'], mine['pending'], mine['completion_rate']), (2, 1, 50.0))
+        self.assertEqual((project['total'], project['overdue']), (2, 1))
+        self.assertEqual(overall['projects_count'], 3)
+        self.assertEqual(overall['avg_completion_rate'], 16.67)
+        # Developer: their projects plus the task assigned to them elsewhere
+        self.assertEqual(user_stats(self.developer)['total'], 2)
+
+    def test_task_writes_invalidate(self):
+        self.assertEqual(workspace_stats()['in_progress'], 1)
+        self.assertEqual(project_stats(self.other.pk)['total'], 1)
+        self.assertEqual(owner_stats(self.owner)['total'], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(title='Started', project=self.project, status='in_progress')
+        self.assertEqual(workspace_stats()['in_progress'], 2)
+        self.assertEqual(owner_stats(self.owner)['total'], 3)
+        # Another project's figures stay cached
+        with self.assertNumQueries(0):
+            project_stats(self.other.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.delete()
+        workspace = workspace_stats()
+        self.assertEqual((workspace['in_progress'], workspace['projects']), (1, 2))
+
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.get('/analytics/api/stats/')
+        self.assertEqual(response.data['tasks']['total'], 3)
+        self.assertEqual(response.data['team']['performance'][0]['rate'], 100)
+
+
+class ProductivityReportTest(TestCase):
+    """Test the productivity report and the per-day partials it is summed from."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='productivity@example.com', password='testpass123')
+        self.user.profile.role = 'manager'
+        self.user.profile.save()
+        self.project = Project.objects.create(name='Productivity', owner=self.user)
+        self.today = timezone.localdate()
+        for days_ago, score in ((1, 60.0), (3, 80.0)):
+            ProductivityMetrics.objects.create(
+                user=self.user, date=self.today - timedelta(days=days_ago),
+                time_spent=timedelta(hours=2), productivity_score=score,
+            )
+        Task.objects.create(title='Open', project=self.project, assigned_to=self.user)
+        Task.objects.create(title='Shipped', project=self.project, assigned_to=self.user, status='done')
+
+    def test_ranges_share_cached_partials(self):
+        week = totals(self.user.pk, self.today - timedelta(days=7), self.today)
+        self.assertEqual((week['tasks_created'], week['tasks_completed']), (2, 1))
+        self.assertEqual((week['time_spent'], week['productivity_score']), (timedelta(hours=4), 70.0))
+        with self.assertNumQueries(0):
+            overlapping = totals(self.user.pk, self.today - timedelta(days=2), self.today)
+        self.assertEqual((overlapping['time_spent'], overlapping['productivity_score']), (timedelta(hours=2), 60.0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.get(title='Open')
+            task.status = 'done'
+            task.save()
+        self.assertEqual(totals(self.user.pk, self.today, self.today)['tasks_completed'], 2)
+
+    def test_report_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = '/analytics/api/reports/productivity_report/'
+        response = client.get(url, {'start_date': self.today - timedelta(days=7), 'end_date': self.today})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['completion_rate'], 50.0)
+        self.assertEqual(response.data['total_time'], '04:00:00')
+        self.assertEqual(response.data['period_end'], self.today.isoformat())
+        for start, end in (
+            ('yesterday', self.today),
+            (self.today, self.today - timedelta(days=1)),
+            ('2000-01-01', '2025-01-01'),
+        ):
+            self.assertEqual(client.get(url, {'start_date': start, 'end_date': end}).status_code, 400)
+        # The last month of the calendar has no month after it
+        response = client.get(url, {'start_date': '9999-01-01', 'end_date': '9999-12-31'})
+        self.assertEqual((response.status_code, response.data['total_tasks']), (200, 0))
+
+
+class LeaderboardTest(TestCase):
+    """Test the incrementally maintained leaderboard against a full rebuild."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(email='leader-owner@example.com', password='testpass123')
+        self.owner.profile.role = 'admin'
+        self.owner.profile.save()
+        self.first = User.objects.create_user(email='leader-first@example.com', password='testpass123')
+        self.second = User.objects.create_user(email='leader-second@example.com', password='testpass123')
+        self.project = Project.objects.create(name='Leaderboard', owner=self.owner)
+        self.today = timezone.localdate()
+
+    def rows(self):
+        return sorted(LeaderboardEntry.objects.values_list(
+            'granularity', 'user_id', 'period_start', 'tasks_assigned', 'tasks_completed',
+            'completion_rate', 'score_count', 'productivity',
+        ))
+
+    def test_incremental_updates_match_rebuild(self):
+        shipped = Task.objects.create(title='Shipped', project=self.project, assigned_to=self.first)
+        Task.objects.create(title='Open', project=self.project, assigned_to=self.first)
+        moved = Task.objects.create(title='Moved', project=self.project, assigned_to=self.first, status='done')
+        shipped.status = 'done'
+        shipped.save()
+        moved.assigned_to = self.second
+        moved.save()
+        Task.objects.create(title='Dropped', project=self.project, assigned_to=self.second).delete()
+        metric = ProductivityMetrics.objects.create(user=self.second, date=self.today, productivity_score=40.0)
+        metric.productivity_score = 90.0
+        metric.save()
+
+        [first] = top('month', order='completed', user=self.first)
+        self.assertEqual((first.tasks_assigned, first.tasks_completed, first.completion_rate), (2, 1, 50.0))
+        self.assertEqual(first.period_start, self.today.replace(day=1))
+        self.assertEqual(top('week', order='productivity')[0].productivity, 90.0)
+        incremental = self.rows()
+        self.assertEqual(len(incremental), 8)  # two users, four granularities
+        rebuild_leaderboard()
+        self.assertEqual(self.rows(), incremental)
+
+        self.project.delete()
+        self.assertEqual(
+            list(LeaderboardEntry.objects.values_list('user_id', 'tasks_assigned', 'score_count').distinct()),
+            [(self.second.pk, 0, 1)],
+        )
+
+    def test_rollup_updates_keep_the_completion_period(self):
+        task = Task.objects.create(title='Shipped', project=self.project, assigned_to=self.first, status='done')
+        self.assertIsNotNone(task.completed_at)
+        earlier = timezone.now() - timedelta(days=40)
+        Task.objects.filter(pk=task.pk).update(created_at=earlier, completed_at=earlier, updated_at=earlier)
+        rebuild_leaderboard()
+        # Adding a subtask bumps updated_at through tasks.progress, without signals
+        Subtask.objects.create(parent_task=task, title='Follow-up')
+        task.refresh_from_db()
+        self.assertEqual(task.completed_at, earlier)
+        task.title = 'Renamed'
+        task.save()
+        incremental = self.rows()
+        rebuild_leaderboard()
+        self.assertEqual(self.rows(), incremental)
+
+    def test_dashboard_and_team_performance_read_the_leaderboard(self):
+        Task.objects.create(title='Done', project=self.project, assigned_to=self.first, status='done')
+        Task.objects.create(title='Half', project=self.project, assigned_to=self.second, status='done')
+        Task.objects.create(title='Open', project=self.project, assigned_to=self.second)
+        ProductivityMetrics.objects.create(user=self.owner, date=self.today, productivity_score=75.0)
+
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        performance = client.get('/analytics/api/stats/').data['team']['performance']
+        self.assertEqual([(row['email'], row['rate']) for row in performance], [
+            ('leader-first@example.com', 100), ('leader-second@example.com', 50),
+        ])
+        response = client.get('/analytics/api/reports/team_performance/', {
+            'start_date': self.today - timedelta(days=7), 'end_date': self.today, 'period': 'week',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['email'], row['productivity']) for row in response.data['top_performers']],
+            [('leader-owner@example.com', 75.0)],
+        )
+        self.assertEqual(period_start(self.today, 'week').weekday(), 0)
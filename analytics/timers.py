@@ -0,0 +1,135 @@
+"""
+Registry of running timers in the shared cache.
+
+The database stays the source of truth: an active ``TimeTracking`` or a
+running ``tasks.TimeEntry``. Each user's cache entry holds the description of
+their running timer, or ``NO_TIMER`` when nothing runs, so polling the timer
+widget is answered without a query. Receivers write the new state through
+once the change commits. When the cache comes up empty (first start, restart,
+flush), the first lookup reconciles every user from the database in a few
+queries (at most once per ``RECONCILE_INTERVAL``); a user evicted later is
+reloaded on their own.
+
+The registry only serves polling. ``start_tracking`` checks the database for
+a running timer, under ``timer_lock``: a per-user ``cache.add``, atomic on the
+shared backend, so two tabs cannot both pass the check and start one.
+"""
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from tasks.models import TimeEntry
+from .models import TimeTracking
+from .serializers import TimeTrackingSerializer
+
+ACTIVE_TIMER_TIMEOUT = 60 * 60 * 24  # 1 day; writes refresh it
+TIMER_LOCK_TIMEOUT = 10  # seconds, in case a worker dies holding the lock
+NO_TIMER = {}
+SYNCED_KEY = 'active_timers_synced'
+RECONCILE_INTERVAL = 60  # seconds; a cache that evicts the marker must not trigger a full rebuild per poll
+
+
+class TimerBusy(Exception):
+    """Another request is starting a timer for the same user."""
+
+
+def _timer_key(user_id):
+    return f"active_timer_{user_id}"
+
+
+def describe(instance):
+    """What ``active_tracking`` returns for a running timer."""
+    if isinstance(instance, TimeTracking):
+        return {**TimeTrackingSerializer(instance).data, 'source': 'time_tracking'}
+    return {
+        'id': instance.pk,
+        'task': instance.task_id,
+        'task_title': instance.task.title,
+        'start_time': instance.start_time.isoformat(),
+        'description': instance.description,
+        'is_active': True,
+        'source': 'time_entry',
+    }
+
+
+def _running(**filters):
+    """``{user_id: description}`` for the running timers matching ``filters``; time tracking wins."""
+    running = {}
+    sources = (
+        TimeEntry.objects.filter(is_running=True, end_time__isnull=True, **filters).select_related('task'),
+        TimeTracking.objects.filter(is_active=True, **filters).select_related('user', 'task__project'),
+    )
+    for rows in sources:
+        for timer in rows.order_by('start_time'):
+            running[timer.user_id] = describe(timer)
+    return running
+
+
+def reconcile_timers():
+    """Rewrite every user's registry entry from the database; returns the number of running timers."""
+    running = _running()
+    user_ids = get_user_model().objects.values_list('pk', flat=True)
+    cache.set_many(
+        {_timer_key(user_id): running.get(user_id, NO_TIMER) for user_id in user_ids.iterator()},
+        ACTIVE_TIMER_TIMEOUT,
+    )
+    cache.set(SYNCED_KEY, True, ACTIVE_TIMER_TIMEOUT)
+    return len(running)
+
+
+def refresh_timer(user_id):
+    timer = _running(user_id=user_id).get(user_id, NO_TIMER)
+    cache.set(_timer_key(user_id), timer, ACTIVE_TIMER_TIMEOUT)
+    return timer
+
+
+def active_timer(user_id):
+    """The running timer of a user as described by ``describe``, or ``None``."""
+    timer = cache.get(_timer_key(user_id))
+    if timer is None:
+        if cache.get(SYNCED_KEY) is None and cache.add('active_timers_reconciling', True, RECONCILE_INTERVAL):
+            reconcile_timers()
+            timer = cache.get(_timer_key(user_id))
+        if timer is None:
+            timer = refresh_timer(user_id)
+    return timer or None
+
+
+@contextmanager
+def timer_lock(user_id):
+    key = f"active_timer_lock_{user_id}"
+    if not cache.add(key, True, TIMER_LOCK_TIMEOUT):
+        raise TimerBusy
+    try:
+        yield
+    finally:
+        cache.delete(key)
+
+
+def _is_running(instance):
+    if isinstance(instance, TimeTracking):
+        return instance.is_active
+    return instance.is_running and instance.end_time is None
+
+
+def timer_saved(sender, instance, **kwargs):
+    if _is_running(instance):
+        timer = describe(instance)
+        transaction.on_commit(
+            lambda: cache.set(_timer_key(instance.user_id), timer, ACTIVE_TIMER_TIMEOUT)
+        )
+    else:
+        # The user may still have another timer running from before the registry
+        transaction.on_commit(lambda: refresh_timer(instance.user_id))
+
+
+def timer_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: refresh_timer(instance.user_id))
+
+
+for model in (TimeTracking, TimeEntry):
+    post_save.connect(timer_saved, sender=model, dispatch_uid=f'active_timer_post_save_{model.__name__}')
+    post_delete.connect(timer_deleted, sender=model, dispatch_uid=f'active_timer_post_delete_{model.__name__}')
@@ -1,45 +1,27 @@
-from datetime import datetime, timedelta
-from tasks.models import Task
-from projects.models import Project
+from .stats import owner_stats, project_stats, project_breakdown
 
-def get_user_stats(user):
-    tasks = Task.objects.filter(project__owner=user)
-    total = tasks.count()
-    done = tasks.filter(status="done").count()
-    overdue = tasks.filter(status="todo", due_date__lt=datetime.now()).count()
-    
-    completion_rate = round((done / total) * 100, 2) if total > 0 else 0
 
+def _summary(stats):
     return {
-        "total_tasks": total,
-        "completed_tasks": done,
-        "overdue_tasks": overdue,
-        "completion_rate": completion_rate
+        "total_tasks": stats["total"],
+        "completed_tasks": stats["completed"],
+        "overdue_tasks": stats["overdue"],
+        "completion_rate": stats["completion_rate"]
     }
 
-def get_project_stats(project):
-    tasks = Task.objects.filter(project=project)
-    total = tasks.count()
-    done = tasks.filter(status="done").count()
-    overdue = tasks.filter(status="todo", due_date__lt=datetime.now()).count()
-    rate = round((done / total) * 100, 2) if total > 0 else 0
+def get_user_stats(user):
+    return _summary(owner_stats(user))
 
-    return {
-        "project_name": project.name,
-        "total_tasks": total,
-        "completed_tasks": done,
-        "overdue_tasks": overdue,
-        "completion_rate": rate
-    }
+def get_project_stats(project):
+    return {"project_name": project.name, **_summary(project_stats(project.pk))}
 
 def get_overall_stats():
-    projects = Project.objects.all()
-    summary = [get_project_stats(p) for p in projects]
+    summary = [{"project_name": name, **_summary(stats)} for _, name, stats in project_breakdown()]
     avg_completion = 0
     if summary:
         avg_completion = round(sum(s["completion_rate"] for s in summary) / len(summary), 2)
     return {
-        "projects_count": projects.count(),
+        "projects_count": len(summary),
         "avg_completion_rate": avg_completion,
         "projects": summary
     }
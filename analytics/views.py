@@ -3,13 +3,13 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.views import APIView
-from django.db.models import Q, Sum, Avg, Count
+from django.db.models import Q, Avg, Count
 from django.utils import timezone
 from django.views.decorators.cache import cache_page
 from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from datetime import timedelta, date
+from datetime import datetime, time, timedelta, date
 from .models import (
     AnalyticsReport, ProductivityMetrics, TimeTracking, 
     PerformanceIndicator, DashboardWidget
@@ -21,12 +21,23 @@ from .serializers import (
     TeamPerformanceSerializer
 )
 from users.permissions import RolePermission
+from .timers import TimerBusy, active_timer, timer_lock
+from .productivity import totals as productivity_totals
+from .leaderboard import top as leaderboard_top
+from .stats import workspace_stats, version as stats_version
+from smart_task_manager.conditional import conditional_response, fingerprint
 from projects.models import Project
 from tasks.models import Task
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
 
 User = get_user_model()
 
+# Longest range the hourly time report accepts
+HOURLY_REPORT_MAX_DAYS = 31
+# Longest range the productivity report accepts
+PRODUCTIVITY_REPORT_MAX_DAYS = 366
+
 class AnalyticsReportViewSet(viewsets.ModelViewSet):
     """ViewSet for analytics reports."""
     serializer_class = AnalyticsReportSerializer
@@ -47,7 +58,7 @@ class AnalyticsReportViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def productivity_report(self, request):
-        """تقرير الإنتاجية with Caching"""
+        """تقرير الإنتاجية, summed from cached per-day partials (see analytics.productivity)"""
         user = request.user
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
@@ -57,48 +68,39 @@ class AnalyticsReportViewSet(viewsets.ModelViewSet):
                 {'error': 'start_date and end_date are required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        try:
+            start_date, end_date = date.fromisoformat(start_date), date.fromisoformat(end_date)
+        except ValueError:
+            return Response(
+                {'error': 'start_date and end_date must be YYYY-MM-DD dates'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if end_date < start_date:
+            return Response(
+                {'error': 'start_date must not be after end_date'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if (end_date - start_date).days >= PRODUCTIVITY_REPORT_MAX_DAYS:
+            return Response(
+                {'error': f'Productivity reports cover at most {PRODUCTIVITY_REPORT_MAX_DAYS} days'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # ✅ Try to get from cache first (simple in-memory caching)
-        cache_key = f"productivity_{user.id}_{start_date}_{end_date}"
-        from django.core.cache import cache
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(cached_data)
-        
-        # حساب مقاييس الإنتاجية
-        metrics = ProductivityMetrics.objects.filter(
-            user=user,
-            date__range=[start_date, end_date]
-        )
-        
-        total_tasks = metrics.aggregate(total=Sum('tasks_completed'))['total'] or 0
-        total_time = metrics.aggregate(total=Sum('time_spent'))['total'] or timedelta()
-        avg_productivity = metrics.aggregate(avg=Avg('productivity_score'))['avg'] or 0
-        
-        # حساب المهام المكتملة
-        completed_tasks = Task.objects.filter(
-            assigned_to=user,
-            status='completed',
-            updated_at__date__range=[start_date, end_date]
-        ).count()
+        # مقاييس الإنتاجية والمهام المنشأة والمكتملة خلال الفترة
+        period = productivity_totals(user.pk, start_date, end_date)
+        completed_tasks = period['tasks_completed']
+        total_assigned_tasks = period['tasks_created']
+        total_time = period['time_spent']
         
         # حساب معدل الإنجاز
-        total_assigned_tasks = Task.objects.filter(
-            assigned_to=user,
-            created_at__date__range=[start_date, end_date]
-        ).count()
-        
         completion_rate = (completed_tasks / total_assigned_tasks * 100) if total_assigned_tasks > 0 else 0
         
         # حساب متوسط الوقت لكل مهمة
         avg_time_per_task = total_time / completed_tasks if completed_tasks > 0 else timedelta()
         
         # إحصائيات للمقارنة (الشهر الماضي كمثال)
-        last_month_completed = Task.objects.filter(
-            assigned_to=user,
-            status='completed',
-            updated_at__date__range=[date.today() - timedelta(days=60), date.today() - timedelta(days=30)]
-        ).count()
+        today = timezone.localdate()
+        last_month = productivity_totals(user.pk, today - timedelta(days=60), today - timedelta(days=30))
         
         report_data = {
             'user': {
@@ -112,14 +114,12 @@ class AnalyticsReportViewSet(viewsets.ModelViewSet):
             'completion_rate': round(completion_rate, 2),
             'total_time': total_time,
             'average_time_per_task': avg_time_per_task,
-            'productivity_score': round(avg_productivity, 2),
-            'last_month_completed': last_month_completed,
-            'period': f"{start_date} to {end_date}",
+            'productivity_score': round(period['productivity_score'], 2),
+            'last_month_completed': last_month['tasks_completed'],
+            'period_start': start_date,
+            'period_end': end_date,
         }
         
-        # Cache the result for 5 minutes
-        cache.set(cache_key, report_data, 300)
-        
         serializer = ProductivityReportSerializer(report_data)
         return Response(serializer.data)
     
@@ -194,19 +194,33 @@ class AnalyticsReportViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def team_performance(self, request):
-        """أداء الفريق"""
+        """أداء الفريق; top performers are ranked over the ``period`` (day, week, month or all, default month) containing end_date"""
         user = request.user
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
+        period = request.query_params.get('period', 'month')
         
         if not start_date or not end_date:
             return Response(
                 {'error': 'start_date and end_date are required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        try:
+            start_date, end_date = date.fromisoformat(start_date), date.fromisoformat(end_date)
+        except ValueError:
+            return Response(
+                {'error': 'start_date and end_date must be YYYY-MM-DD dates'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if period not in ('day', 'week', 'month', 'all'):
+            return Response(
+                {'error': 'period must be one of day, week, month, all'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         # الحصول على المشاريع التي يديرها المستخدم
-        if user.profile.has_role('admin'):
+        is_admin = user.profile.has_role('admin')
+        if is_admin:
             projects = Project.objects.all()
         else:
             projects = Project.objects.filter(owner=user)
@@ -242,13 +256,16 @@ class AnalyticsReportViewSet(viewsets.ModelViewSet):
             date__range=[start_date, end_date]
         ).aggregate(avg=Avg('productivity_score'))['avg'] or 0
         
-        # أفضل الأداء
-        top_performers = team_members.annotate(
-            productivity=Avg('productivitymetrics__productivity_score')
-        ).order_by('-productivity')[:5]
+        # أفضل الأداء, read in order from the leaderboard
+        team_filter = {} if is_admin else {'user__in': team_members}
+        top_performers = []
+        for entry in leaderboard_top(period, end_date, order='productivity', score_count__gt=0, **team_filter):
+            entry.user.productivity = entry.productivity
+            top_performers.append(entry.user)
         
         report_data = {
-            'team_name': f"فريق {user.get_full_name()}",
+            # CustomUser has no get_full_name()
+            'team_name': f"فريق {user.first_name} {user.last_name}".strip(),
             'total_members': total_members,
             'active_members': active_members,
             'total_projects': total_projects,
@@ -262,7 +279,7 @@ class AnalyticsReportViewSet(viewsets.ModelViewSet):
                     'email': p.email,
                     'first_name': p.first_name,
                     'last_name': p.last_name,
-                    'full_name': p.get_full_name(),
+                    'full_name': f"{p.first_name} {p.last_name}".strip(),
                     'productivity': p.productivity
                 } for p in top_performers
             ],
@@ -331,18 +348,6 @@ class TimeTrackingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check if there's already active tracking
-        active = TimeTracking.objects.filter(
-            user=request.user,
-            is_active=True
-        ).first()
-        
-        if active:
-            return Response(
-                {'error': 'Stop current tracking before starting new one'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
         try:
             task = Task.objects.get(id=task_id)
         except Task.DoesNotExist:
@@ -351,14 +356,29 @@ class TimeTrackingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Create new tracking
-        tracking = TimeTracking.objects.create(
-            user=request.user,
-            task=task,
-            start_time=timezone.now(),
-            description=description,
-            is_active=True
-        )
+        # One running timer per user: the database decides, the lock keeps two
+        # concurrent starts from both getting through the check
+        try:
+            with timer_lock(request.user.pk):
+                if TimeTracking.objects.filter(user=request.user, is_active=True).exists():
+                    return Response(
+                        {'error': 'Stop current tracking before starting new one'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                
+                # Create new tracking
+                tracking = TimeTracking.objects.create(
+                    user=request.user,
+                    task=task,
+                    start_time=timezone.now(),
+                    description=description,
+                    is_active=True
+                )
+        except TimerBusy:
+            return Response(
+                {'error': 'A timer is already being started'},
+                status=status.HTTP_409_CONFLICT
+            )
         
         serializer = self.get_serializer(tracking)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -384,16 +404,60 @@ class TimeTrackingViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def active_tracking(self, request):
         """التتبع النشط"""
-        user = request.user
-        active_tracking = TimeTracking.objects.filter(
-            user=user, is_active=True
-        ).first()
-        
-        if active_tracking:
-            serializer = self.get_serializer(active_tracking)
-            return Response(serializer.data)
+        timer = active_timer(request.user.pk)
+        if timer:
+            return Response(timer)
         else:
             return Response({'message': 'No active time tracking'})
+    
+    @action(detail=False, methods=['get'])
+    def report(self, request):
+        """Tracked time between start_date and end_date, read from the hourly/daily rollups."""
+        from django.utils.dateparse import parse_date
+        from .rollups import REPORT_GROUPS, time_report
+        
+        start_date = parse_date(request.query_params.get('start_date') or '')
+        end_date = parse_date(request.query_params.get('end_date') or '')
+        if not start_date or not end_date or end_date < start_date:
+            return Response(
+                {'error': 'start_date and end_date (YYYY-MM-DD, start <= end) are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        granularity = request.query_params.get('granularity', 'day')
+        group_by = request.query_params.get('group_by', 'period')
+        if granularity not in ('day', 'hour') or group_by not in REPORT_GROUPS:
+            return Response(
+                {'error': f"granularity must be day or hour, group_by one of {', '.join(REPORT_GROUPS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if granularity == 'hour' and (end_date - start_date).days >= HOURLY_REPORT_MAX_DAYS:
+            return Response(
+                {'error': f'Hourly reports cover at most {HOURLY_REPORT_MAX_DAYS} days'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        filters = {'user': request.user}
+        user_id = request.query_params.get('user')
+        if user_id and request.user.profile.has_role('admin', 'manager'):
+            filters = {'user_id': user_id} if user_id != 'all' else {}
+        project_id = request.query_params.get('project')
+        if project_id:
+            filters['project_id'] = project_id
+        
+        start = timezone.make_aware(datetime.combine(start_date, time.min))
+        end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+        try:
+            total, rows = time_report(start, end, granularity, group_by, **filters)
+        except (ValueError, ValidationError):
+            return Response({'error': 'Invalid user or project id'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'start_date': start_date,
+            'end_date': end_date,
+            'granularity': granularity,
+            'group_by': group_by,
+            'total_minutes': total,
+            'results': rows,
+        })
 
 class PerformanceIndicatorViewSet(viewsets.ModelViewSet):
     """ViewSet لمؤشرات الأداء"""
@@ -525,61 +589,25 @@ class DashboardStatsApiView(APIView):
     permission_classes = [AllowAny]  # Allow all to fix loading issue
     
     def get(self, request):
-        from tasks.models import Task
-        from projects.models import Project
-        from django.contrib.auth import get_user_model
-        from datetime import datetime, timedelta
-        
-        User = get_user_model()
-        user = request.user
-        
-        # Get date range
-        today = datetime.now().date()
-        month_ago = today - timedelta(days=30)
-        two_months_ago = today - timedelta(days=60)
-        
-        # Tasks stats
-        all_tasks = Task.objects.all()
-        total_tasks = all_tasks.count()
-        completed_tasks = all_tasks.filter(status__in=['done', 'completed']).count()
-        in_progress_tasks = all_tasks.filter(status='in_progress').count()
-        overdue_tasks = all_tasks.filter(due_date__lt=today).exclude(status__in=['done', 'completed']).count()
-        
-        # Last month comparison
-        last_month_completed = all_tasks.filter(
-            status__in=['done', 'completed'],
-            updated_at__date__range=[two_months_ago, month_ago]
-        ).count()
-        this_month_completed = all_tasks.filter(
-            status__in=['done', 'completed'],
-            updated_at__date__gte=month_ago
-        ).count()
-        
-        # Calculate change percentage
-        if last_month_completed > 0:
-            change_percent = round(((this_month_completed - last_month_completed) / last_month_completed) * 100)
-        else:
-            change_percent = 100 if this_month_completed > 0 else 0
-        
-        # Completion rate
-        completion_rate = round((completed_tasks / total_tasks * 100)) if total_tasks > 0 else 0
-        
-        # Projects stats
-        all_projects = Project.objects.all()
-        total_projects = all_projects.count()
-        active_projects = all_projects.filter(status__in=['active', 'in_progress']).count()
+        # Task and project counts are versioned by analytics.stats; overdue counts
+        # and month windows also depend on the date
+        fingerprints = [
+            (timezone.localdate(),),
+            (stats_version(),),
+            fingerprint(User.objects.all(), 'date_joined', active=Count('pk', filter=Q(is_active=True))),
+        ]
+        return conditional_response(request, fingerprints, lambda: self.build_stats(request))
+
+    def build_stats(self, request):
+        workspace = workspace_stats()
         
         # Team stats
         total_members = User.objects.filter(is_active=True).count()
         
-        # Team performance (top performers)
+        # Team performance (top performers), read in order from the all-time leaderboard
         team_performance = []
-        users = User.objects.filter(is_active=True)[:10]
-        for u in users:
-            user_tasks = Task.objects.filter(assigned_to=u)
-            user_total = user_tasks.count()
-            user_completed = user_tasks.filter(status__in=['done', 'completed']).count()
-            rate = round((user_completed / user_total * 100)) if user_total > 0 else 0
+        for entry in leaderboard_top('all', order='rate', user__is_active=True, tasks_assigned__gt=0):
+            u = entry.user
             
             # Get user name safely
             user_name = u.email.split('@')[0]
@@ -588,32 +616,28 @@ class DashboardStatsApiView(APIView):
             elif hasattr(u, 'first_name') and u.first_name:
                 user_name = f"{u.first_name} {getattr(u, 'last_name', '')}".strip() or user_name
             
-            if user_total > 0:
-                team_performance.append({
-                    'id': u.id,
-                    'name': user_name,
-                    'email': u.email,
-                    'role': getattr(u, 'role', 'member'),
-                    'tasks': user_total,
-                    'completed': user_completed,
-                    'rate': rate
-                })
-        
-        # Sort by rate descending
-        team_performance.sort(key=lambda x: x['rate'], reverse=True)
+            team_performance.append({
+                'id': u.id,
+                'name': user_name,
+                'email': u.email,
+                'role': getattr(u, 'role', 'member'),
+                'tasks': entry.tasks_assigned,
+                'completed': entry.tasks_completed,
+                'rate': round(entry.completion_rate)
+            })
         
         return Response({
             'tasks': {
-                'total': total_tasks,
-                'completed': completed_tasks,
-                'in_progress': in_progress_tasks,
-                'overdue': overdue_tasks,
-                'completion_rate': completion_rate,
-                'change_percent': change_percent
+                'total': workspace['total'],
+                'completed': workspace['completed'],
+                'in_progress': workspace['in_progress'],
+                'overdue': workspace['overdue'],
+                'completion_rate': round(workspace['completion_rate']),
+                'change_percent': workspace['change_percent']
             },
             'projects': {
-                'total': total_projects,
-                'active': active_projects
+                'total': workspace['projects'],
+                'active': workspace['active_projects']
             },
             'team': {
                 'total_members': total_members,
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['room', '-created_at', '-id'], name='chat_chatme_room_id_4ed80a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chatnotification',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='chat_chatno_user_id_660669_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:42
+
+import tasks.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_chat_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='attachment',
+            field=models.FileField(blank=True, null=True, storage=tasks.storage.attachment_storage, upload_to='chat_attachments/', verbose_name='مرفق'),
+        ),
+    ]
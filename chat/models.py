@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 import uuid
+from tasks.storage import attachment_storage
 
 User = get_user_model()
 
@@ -49,7 +50,7 @@ class ChatMessage(models.Model):
         default='text',
         verbose_name="نوع الرسالة"
     )
-    attachment = models.FileField(upload_to='chat_attachments/', null=True, blank=True, verbose_name="مرفق")
+    attachment = models.FileField(upload_to='chat_attachments/', storage=attachment_storage, null=True, blank=True, verbose_name="مرفق")
     reply_to = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, verbose_name="رد على")
     is_edited = models.BooleanField(default=False, verbose_name="تم التعديل")
     is_deleted = models.BooleanField(default=False, verbose_name="تم الحذف")
@@ -60,6 +61,9 @@ class ChatMessage(models.Model):
         verbose_name = "رسالة دردشة"
         verbose_name_plural = "رسائل الدردشة"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['room', '-created_at', '-id']),
+        ]
 
 class MessageReaction(models.Model):
     """نموذج تفاعلات الرسائل"""
@@ -100,6 +104,9 @@ class ChatNotification(models.Model):
         verbose_name_plural = "إشعارات الدردشة"
         unique_together = ['user', 'message']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id']),
+        ]
 
 
 
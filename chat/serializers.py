@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from tasks.mentions import resolve_mentions, notify_mentions
 from .models import ChatRoom, ChatMessage, MessageReaction, ChatNotification
 
 
@@ -17,6 +18,28 @@ def display_name(user):
     username = getattr(user, 'username', '') or ''
     return username or 'Member'
 
+def notify_message_mentions(message, member_ids=None):
+    """Notify users @mentioned in a message who can read its room (see tasks.mentions)."""
+    room = message.room
+    mentioned = resolve_mentions(message.content)
+    if not mentioned:
+        return []
+    if member_ids is None:
+        member_ids = set(room.members.values_list('id', flat=True))
+    mentioned = [
+        user for user in mentioned
+        if user.pk != message.sender_id
+        and (room.room_type == 'team' or user.pk in member_ids or user.pk == room.created_by_id)
+    ]
+    if mentioned:
+        notify_mentions(
+            mentioned,
+            f"You were mentioned in {room.name} by {message.sender.email}",
+            subject=f"Mentioned in {room.name}",
+        )
+    return mentioned
+
+
 class ChatRoomSerializer(serializers.ModelSerializer):
     """سيرياليزر غرف الدردشة"""
     created_by_email = serializers.CharField(source='created_by.email', read_only=True)
@@ -184,11 +207,11 @@ class MessageCreateSerializer(serializers.ModelSerializer):
         
         # إنشاء إشعارات للأعضاء الآخرين
         room = message.room
-        for member in room.members.exclude(id=message.sender.id):
-            ChatNotification.objects.create(
-                user=member,
-                room=room,
-                message=message
-            )
+        member_ids = set(room.members.values_list('id', flat=True))
+        ChatNotification.objects.bulk_create([
+            ChatNotification(user_id=member_id, room=room, message=message)
+            for member_id in member_ids if member_id != message.sender_id
+        ])
         
+        notify_message_mentions(message, member_ids)
         return message
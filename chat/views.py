@@ -7,9 +7,13 @@ from .models import ChatRoom, ChatMessage, MessageReaction, ChatNotification
 from .serializers import (
     ChatRoomSerializer, ChatRoomCreateSerializer,
     ChatMessageSerializer, MessageCreateSerializer,
-    MessageReactionSerializer, ChatNotificationSerializer
+    MessageReactionSerializer, ChatNotificationSerializer,
+    notify_message_mentions
 )
 from users.permissions import RolePermission
+from smart_task_manager.pagination import KeysetPagination
+from tasks.downloads import serve_file
+from django.http import Http404
 from django.contrib.auth import get_user_model
 from django.views.generic import TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -185,6 +189,7 @@ class ChatMessageViewSet(viewsets.ModelViewSet):
     # Allow any authenticated user to send/read team messages
     permission_classes = [IsAuthenticated]
     allowed_roles = ['admin', 'manager', 'developer', 'client']
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         room_id = self.request.query_params.get('room')
@@ -202,6 +207,22 @@ class ChatMessageViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         serializer.save(sender=self.request.user)
+
+    @action(detail=True, methods=['get'])
+    def attachment(self, request, pk=None):
+        """تنزيل مرفق الرسالة لمن يستطيع رؤية الغرفة"""
+        user = request.user
+        message = ChatMessage.objects.filter(
+            Q(room__members=user) | Q(room__created_by=user) | Q(room__room_type='team'),
+            pk=pk,
+            is_deleted=False,
+        ).exclude(attachment='').exclude(attachment__isnull=True).first()
+        if message is None:
+            raise Http404('Attachment not found.')
+        return serve_file(
+            request, message.attachment.storage, message.attachment.name,
+            as_attachment=request.query_params.get('inline') != '1',
+        )
     
     @action(detail=True, methods=['post'])
     def react(self, request, pk=None):
@@ -246,6 +267,7 @@ class ChatMessageViewSet(viewsets.ModelViewSet):
             content=content,
             reply_to=original_message
         )
+        notify_message_mentions(reply_message)
         
         serializer = self.get_serializer(reply_message)
         return Response(serializer.data)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from core.search_index import reindex
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index from every task, project, comment and chat message.'
+
+    def handle(self, *args, **options):
+        counts = reindex()
+        summary = ', '.join(f"{count} {kind}(s)" for kind, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Indexed {sum(counts.values())} document(s): {summary}."))
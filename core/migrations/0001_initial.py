@@ -0,0 +1,81 @@
+# Generated by Django 5.2.7 on 2026-10-17 05:37
+
+from django.db import migrations, models
+
+FTS_TABLE = 'core_searchdocument_fts'
+
+SQLITE_INDEX = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, body, content='core_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER core_searchdocument_ai AFTER INSERT ON core_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    f"""CREATE TRIGGER core_searchdocument_ad AFTER DELETE ON core_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    f"""CREATE TRIGGER core_searchdocument_au AFTER UPDATE OF title, body ON core_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+]
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS core_searchdocument_au',
+    'DROP TRIGGER IF EXISTS core_searchdocument_ad',
+    'DROP TRIGGER IF EXISTS core_searchdocument_ai',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+POSTGRESQL_INDEX = [
+    """CREATE INDEX core_searchdocument_text_idx ON core_searchdocument USING gin ((
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(body, '')), 'B')
+    ))""",
+]
+POSTGRESQL_DROP = ['DROP INDEX IF EXISTS core_searchdocument_text_idx']
+
+
+def _run(schema_editor, statements):
+    statements = statements.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_text_index(apps, schema_editor):
+    """FTS5 table kept by triggers on SQLite, a GIN index on PostgreSQL; other databases scan."""
+    _run(schema_editor, {'sqlite': SQLITE_INDEX, 'postgresql': POSTGRESQL_INDEX})
+
+
+def drop_text_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_DROP, 'postgresql': POSTGRESQL_DROP})
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('task', 'Task'), ('project', 'Project'), ('comment', 'Comment'), ('message', 'Chat message')], max_length=10)),
+                ('object_id', models.UUIDField()),
+                ('title', models.CharField(blank=True, max_length=255)),
+                ('body', models.TextField(blank=True)),
+                ('project_id', models.UUIDField(blank=True, null=True)),
+                ('assignee_id', models.BigIntegerField(blank=True, null=True)),
+                ('room_id', models.UUIDField(blank=True, null=True)),
+                ('parent_id', models.UUIDField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project_id'], name='core_search_project_b72389_idx'), models.Index(fields=['room_id'], name='core_search_room_id_73c45d_idx'), models.Index(fields=['parent_id'], name='core_search_parent__83141f_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_document')],
+            },
+        ),
+        migrations.RunPython(create_text_index, drop_text_index),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+def fill_search_index(apps, schema_editor):
+    # Index what an existing install already holds; receivers keep it current from here on
+    from core.search_index import reindex
+    reindex(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('chat', '0003_alter_chatmessage_attachment'),
+        ('projects', '0005_project_updated_at'),
+        ('tasks', '0015_task_completed_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
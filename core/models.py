@@ -1,3 +1,41 @@
 from django.db import models
 
-# Create your models here.
+
+class SearchDocument(models.Model):
+    """
+    One searchable object (task, project, comment or chat message) for ``core.search``.
+
+    ``project``, ``assignee`` and ``room`` copy the fields access is checked on,
+    so results can be scoped inside the full-text query. The text index itself
+    lives outside the ORM (see ``core.search_index``).
+    """
+    KIND_CHOICES = (
+        ('task', 'Task'),
+        ('project', 'Project'),
+        ('comment', 'Comment'),
+        ('message', 'Chat message'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.UUIDField()
+    title = models.CharField(max_length=255, blank=True)
+    body = models.TextField(blank=True)
+    project_id = models.UUIDField(null=True, blank=True)
+    assignee_id = models.BigIntegerField(null=True, blank=True)
+    room_id = models.UUIDField(null=True, blank=True)
+    # The task a comment belongs to, so comments follow it between projects
+    parent_id = models.UUIDField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+        indexes = [
+            models.Index(fields=['project_id']),
+            models.Index(fields=['room_id']),
+            models.Index(fields=['parent_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
@@ -2,54 +2,80 @@ from django.http import JsonResponse
 from django.db.models import Q
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from tasks.models import Task
+from tasks.models import Task, Comment
 from projects.models import Project
+from projects.utils import visible_project_ids
+from chat.models import ChatRoom, ChatMessage
 from django.contrib.auth import get_user_model
+from .search_index import Scope, search
+from . import typeahead
 
 User = get_user_model()
 
+MAX_LIMIT = 50
+
+
+def _ranked(model, ids, *related):
+    """Objects for ``ids`` in ranking order, loaded with one query."""
+    objects = model.objects.select_related(*related).in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
+
+
+def _task_scope(user, profile):
+    """The tasks (and their comments) the user may see, as in the task views."""
+    if profile and hasattr(profile, 'has_role') and profile.has_role('admin', 'manager'):
+        return Scope(project_ids=None)
+    if profile and profile.has_role('developer'):
+        return Scope(project_ids=visible_project_ids(user), assignee_id=user.pk)
+    return Scope(project_ids=list(Project.objects.filter(owner=user).values_list('id', flat=True)))
+
+
+def _room_scope(user):
+    rooms = ChatRoom.objects.filter(Q(members=user) | Q(created_by=user) | Q(room_type='team'))
+    return Scope(room_ids=list(rooms.values_list('id', flat=True).distinct()))
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def global_search(request):
     """
-    Global search across tasks, projects, and users.
+    Global search across tasks, projects, comments, chat messages and users.
     Query params:
-    - q: search query
-    - type: filter by type (task, project, user, all)
+    - q: search query (every word must match, as a prefix)
+    - type: filter by type (task, project, comment, message, user, all)
     - limit: max results per type (default 5)
+
+    Tasks, projects, comments and messages come ranked from the full-text index
+    (see core.search_index), already scoped to what the user may see.
     """
     query = request.GET.get('q', '').strip()
     search_type = request.GET.get('type', 'all')
-    limit = int(request.GET.get('limit', 5))
-    
+    try:
+        limit = min(max(int(request.GET.get('limit', 5)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = 5
+
     if not query or len(query) < 2:
         return JsonResponse({'results': [], 'message': 'Query too short'})
-    
+
     results = {
         'tasks': [],
         'projects': [],
+        'comments': [],
+        'messages': [],
         'users': [],
         'total': 0
     }
-    
+
     user = request.user
     profile = getattr(user, 'profile', None)
-    
+    task_scope = None
+    if search_type in ['all', 'task', 'comment']:
+        task_scope = _task_scope(user, profile)
+
     # Search Tasks
     if search_type in ['all', 'task']:
-        tasks_qs = Task.objects.select_related('assigned_to', 'project').filter(
-            Q(title__icontains=query) | 
-            Q(description__icontains=query)
-        )
-        
-        # Apply RBAC filtering
-        if not (profile and hasattr(profile, 'has_role') and profile.has_role('admin', 'manager')):
-            if profile and profile.has_role('developer'):
-                tasks_qs = tasks_qs.filter(Q(assigned_to=user) | Q(project__owner=user))
-            else:
-                tasks_qs = tasks_qs.filter(project__owner=user)
-        
-        for task in tasks_qs[:limit]:
+        for task in _ranked(Task, search(query, 'task', task_scope, limit), 'assigned_to', 'project'):
             results['tasks'].append({
                 'id': task.id,
                 'title': task.title,
@@ -59,19 +85,14 @@ def global_search(request):
                 'assigned_to': task.assigned_to.email if task.assigned_to else None,
                 'url': f'/tasks/?task={task.id}'
             })
-    
+
     # Search Projects
     if search_type in ['all', 'project']:
-        projects_qs = Project.objects.select_related('owner').filter(
-            Q(name__icontains=query) | 
-            Q(description__icontains=query)
-        )
-        
-        # Apply RBAC filtering
-        if not (profile and hasattr(profile, 'has_role') and profile.has_role('admin', 'manager')):
-            projects_qs = projects_qs.filter(Q(owner=user) | Q(members=user))
-        
-        for project in projects_qs.distinct()[:limit]:
+        if profile and hasattr(profile, 'has_role') and profile.has_role('admin', 'manager'):
+            project_scope = Scope(project_ids=None)
+        else:
+            project_scope = Scope(project_ids=visible_project_ids(user))
+        for project in _ranked(Project, search(query, 'project', project_scope, limit), 'owner'):
             results['projects'].append({
                 'id': project.id,
                 'name': project.name,
@@ -79,15 +100,37 @@ def global_search(request):
                 'owner': project.owner.email if project.owner else None,
                 'url': f'/projects/{project.id}/'
             })
-    
+
+    # Search Comments (visible wherever their task is)
+    if search_type in ['all', 'comment']:
+        for comment in _ranked(Comment, search(query, 'comment', task_scope, limit), 'task', 'author'):
+            results['comments'].append({
+                'id': comment.id,
+                'content': comment.content[:100],
+                'task': comment.task.title,
+                'author': comment.author.email if comment.author else None,
+                'url': f'/tasks/?task={comment.task_id}'
+            })
+
+    # Search Chat Messages (rooms the user can read)
+    if search_type in ['all', 'message']:
+        for message in _ranked(ChatMessage, search(query, 'message', _room_scope(user), limit), 'room', 'sender'):
+            results['messages'].append({
+                'id': message.id,
+                'content': message.content[:100],
+                'room': message.room.name,
+                'sender': message.sender.email,
+                'url': f'/chat/rooms/{message.room_id}/'
+            })
+
     # Search Users (only for admins/managers)
     if search_type in ['all', 'user'] and profile and profile.has_role('admin', 'manager'):
         users_qs = User.objects.filter(
-            Q(email__icontains=query) | 
-            Q(first_name__icontains=query) | 
+            Q(email__icontains=query) |
+            Q(first_name__icontains=query) |
             Q(last_name__icontains=query)
         )
-        
+
         for u in users_qs[:limit]:
             results['users'].append({
                 'id': u.id,
@@ -96,7 +139,33 @@ def global_search(request):
                 'role': getattr(getattr(u, 'profile', None), 'role', 'member'),
                 'url': f'/profile/{u.email}/'
             })
-    
-    results['total'] = len(results['tasks']) + len(results['projects']) + len(results['users'])
-    
+
+    results['total'] = sum(len(found) for key, found in results.items() if key != 'total')
+
     return JsonResponse(results)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_suggestions(request):
+    """
+    Typeahead suggestions for the search box, from the in-memory prefix index
+    (see core.typeahead). The full global_search runs when the query is submitted.
+    Query params:
+    - q: text typed so far (every word matches as a prefix)
+    - limit: max suggestions (default 5, at most 10)
+    - seq: client request counter, echoed back so responses to superseded
+      keystrokes can be dropped
+    """
+    query = request.GET.get('q', '').strip()
+    seq = request.GET.get('seq')
+    try:
+        limit = min(max(int(request.GET.get('limit', 5)), 1), typeahead.MAX_LIMIT)
+    except ValueError:
+        limit = 5
+
+    results = [
+        {'type': entry.kind, 'id': entry.id, 'label': entry.label, 'url': entry.url}
+        for entry in typeahead.suggest(request.user, query, limit)
+    ]
+    return JsonResponse({'query': query, 'seq': seq, 'results': results})
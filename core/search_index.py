@@ -0,0 +1,285 @@
+"""
+Full-text index behind ``core.search.global_search``.
+
+Tasks, projects, comments and chat messages are copied into ``SearchDocument``
+rows together with the fields access depends on (project, assignee, chat
+room). On SQLite an external-content FTS5 table over ``title``/``body`` is
+kept current by triggers; on PostgreSQL a GIN index covers the weighted
+``tsvector`` of the same columns (see the ``core`` migrations). ``search``
+matches, scopes and ranks in a single query, so cost follows the number of
+matching documents rather than the size of the tables. Other databases fall
+back to ``icontains``.
+
+Receivers keep the documents in step with saves and deletes; the bulk task
+operations index their rows explicitly. ``reindex`` (the ``reindex_search``
+command) rebuilds everything with one set-based insert per kind.
+"""
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.apps import apps as global_apps
+from django.db import connection, transaction
+from django.db.models import Q, QuerySet
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+
+from chat.models import ChatRoom, ChatMessage
+from projects.models import Project
+from tasks.models import Task, Comment
+from .models import SearchDocument
+
+FTS_TABLE = 'core_searchdocument_fts'
+TITLE_WEIGHT = 10.0
+MAX_TERMS = 8
+BATCH_SIZE = 2000
+DOCUMENT_FIELDS = ['title', 'body', 'project_id', 'assignee_id', 'room_id', 'parent_id', 'updated_at']
+PG_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(d.title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(d.body, '')), 'B')"
+)
+
+_TERM = re.compile(r'\w+')
+
+
+def task_document(task):
+    return SearchDocument(
+        kind='task', object_id=task.pk, title=task.title, body=task.description,
+        project_id=task.project_id, assignee_id=task.assigned_to_id,
+    )
+
+
+def project_document(project):
+    return SearchDocument(
+        kind='project', object_id=project.pk, title=project.name, body=project.description,
+        project_id=project.pk,
+    )
+
+
+def comment_document(comment):
+    task = comment.task
+    return SearchDocument(
+        kind='comment', object_id=comment.pk, body=comment.content,
+        project_id=task.project_id, assignee_id=task.assigned_to_id, parent_id=task.pk,
+    )
+
+
+def message_document(message):
+    if message.is_deleted:
+        return None
+    return SearchDocument(kind='message', object_id=message.pk, body=message.content, room_id=message.room_id)
+
+
+# model -> function building its document (None when it should not be searchable)
+DOCUMENT_BUILDERS = {
+    Task: task_document,
+    Project: project_document,
+    Comment: comment_document,
+    ChatMessage: message_document,
+}
+
+
+def _kind(model):
+    return {Task: 'task', Project: 'project', Comment: 'comment', ChatMessage: 'message'}[model]
+
+
+def index_objects(objects):
+    """Insert or refresh the documents of ``objects`` (all of one model) with one upsert."""
+    documents, hidden = [], []
+    for obj in objects:
+        document = DOCUMENT_BUILDERS[type(obj)](obj)
+        if document is None:
+            hidden.append(obj.pk)
+        else:
+            documents.append(document)
+    if documents:
+        SearchDocument.objects.bulk_create(
+            documents, batch_size=BATCH_SIZE,
+            update_conflicts=True, unique_fields=['kind', 'object_id'], update_fields=DOCUMENT_FIELDS,
+        )
+    if hidden:
+        SearchDocument.objects.filter(kind=_kind(type(objects[0])), object_id__in=hidden).delete()
+
+
+def _origin_model(origin):
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+def index_tasks(tasks, previous=None):
+    """
+    Refresh the documents of ``tasks``; ``previous`` maps task pk to its
+    ``(project_id, assigned_to_id)`` before the write, so the comments of moved
+    or reassigned tasks follow them (one UPDATE per new placement).
+    """
+    index_objects(tasks)
+    moved = defaultdict(list)
+    for task in tasks:
+        placement = (task.project_id, task.assigned_to_id)
+        if previous and previous.get(task.pk, placement) != placement:
+            moved[placement].append(task.pk)
+    for (project_id, assignee_id), task_ids in moved.items():
+        SearchDocument.objects.filter(kind='comment', parent_id__in=task_ids).update(
+            project_id=project_id, assignee_id=assignee_id
+        )
+
+
+def document_saved(sender, instance, created=False, **kwargs):
+    if sender is Task and not created:
+        # Stashed by tasks.graph before the save
+        previous = (getattr(instance, '_previous_project_id', None), getattr(instance, '_previous_assignee_id', None))
+        index_tasks([instance], {instance.pk: previous})
+    else:
+        index_objects([instance])
+
+
+def document_deleted(sender, instance, origin=None, **kwargs):
+    parent = _origin_model(origin)
+    if sender is Project:
+        # Takes the project's tasks and comments with it
+        SearchDocument.objects.filter(project_id=instance.pk).delete()
+    elif sender is Task and parent is not Project:
+        SearchDocument.objects.filter(
+            Q(kind='task', object_id=instance.pk) | Q(kind='comment', parent_id=instance.pk)
+        ).delete()
+    elif sender is Comment and parent not in (Task, Project):
+        SearchDocument.objects.filter(kind='comment', object_id=instance.pk).delete()
+    elif sender is ChatMessage and parent is not ChatRoom:
+        SearchDocument.objects.filter(kind='message', object_id=instance.pk).delete()
+    elif sender is ChatRoom:
+        SearchDocument.objects.filter(room_id=instance.pk).delete()
+
+
+for model in DOCUMENT_BUILDERS:
+    post_save.connect(document_saved, sender=model, dispatch_uid=f'search_post_save_{model.__name__}')
+for model in (*DOCUMENT_BUILDERS, ChatRoom):
+    post_delete.connect(document_deleted, sender=model, dispatch_uid=f'search_post_delete_{model.__name__}')
+
+
+@dataclass
+class Scope:
+    """
+    What a user may find: documents in ``project_ids``, assigned to ``assignee_id``
+    or posted in ``room_ids``. ``None`` means every project (or room).
+    """
+    project_ids: list = field(default_factory=list)
+    assignee_id: int = None
+    room_ids: list = field(default_factory=list)
+
+
+def search_terms(query):
+    return _TERM.findall(query.lower())[:MAX_TERMS]
+
+
+def _prep(name, values):
+    column = SearchDocument._meta.get_field(name)
+    return [column.get_db_prep_value(value, connection) for value in values]
+
+
+def _scope_sql(scope):
+    clauses, params = [], []
+    for name, ids in (('project_id', scope.project_ids), ('room_id', scope.room_ids)):
+        if ids is None:
+            clauses.append(f'd.{name} IS NOT NULL')
+        elif ids:
+            clauses.append(f"d.{name} IN ({', '.join(['%s'] * len(ids))})")
+            params.extend(_prep(name, ids))
+    if scope.assignee_id is not None:
+        clauses.append('d.assignee_id = %s')
+        params.append(scope.assignee_id)
+    return ' OR '.join(clauses), params
+
+
+def search(query, kind, scope, limit):
+    """
+    Object ids of the ``kind`` documents matching every word of ``query`` (as a
+    prefix) within ``scope``, best match first.
+    """
+    terms = search_terms(query)
+    scope_sql, scope_params = _scope_sql(scope)
+    if not terms or not scope_sql or limit < 1:
+        return []
+    vendor = connection.vendor
+    if vendor == 'sqlite':
+        sql = (
+            f'SELECT d.object_id FROM {FTS_TABLE} JOIN core_searchdocument d ON d.id = {FTS_TABLE}.rowid '
+            f'WHERE {FTS_TABLE} MATCH %s AND d.kind = %s AND ({scope_sql}) '
+            f'ORDER BY bm25({FTS_TABLE}, {TITLE_WEIGHT}, 1.0) LIMIT %s'
+        )
+        match = ' '.join(f'"{term}"*' for term in terms)
+    elif vendor == 'postgresql':
+        sql = (
+            f"SELECT d.object_id FROM core_searchdocument d, to_tsquery('simple', %s) q "
+            f'WHERE {PG_VECTOR} @@ q AND d.kind = %s AND ({scope_sql}) '
+            f'ORDER BY ts_rank({PG_VECTOR}, q) DESC LIMIT %s'
+        )
+        match = ' & '.join(f'{term}:*' for term in terms)
+    else:
+        documents = SearchDocument.objects.filter(kind=kind).extra(where=[scope_sql], params=scope_params)
+        for term in terms:
+            documents = documents.filter(Q(title__icontains=term) | Q(body__icontains=term))
+        return list(documents.values_list('object_id', flat=True)[:limit])
+
+    object_id = SearchDocument._meta.get_field('object_id')
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, kind, *scope_params, limit])
+        return [object_id.to_python(value) for value, in cursor.fetchall()]
+
+
+def _column(model, name):
+    return f"{connection.ops.quote_name(model._meta.db_table)}.{connection.ops.quote_name(model._meta.get_field(name).column)}"
+
+
+def _reindex_sources(apps):
+    """``(kind, {document column: source expression}, FROM/WHERE clause, params)`` per kind."""
+    Task, Project, Comment, ChatMessage = (
+        apps.get_model(label) for label in ('tasks.Task', 'projects.Project', 'tasks.Comment', 'chat.ChatMessage')
+    )
+    task, comment, message = Task._meta.db_table, Comment._meta.db_table, ChatMessage._meta.db_table
+    quote = connection.ops.quote_name
+    return (
+        ('task', {
+            'object_id': _column(Task, 'id'), 'title': _column(Task, 'title'), 'body': _column(Task, 'description'),
+            'project_id': _column(Task, 'project'), 'assignee_id': _column(Task, 'assigned_to'),
+        }, f'FROM {quote(task)}', []),
+        ('project', {
+            'object_id': _column(Project, 'id'), 'title': _column(Project, 'name'),
+            'body': _column(Project, 'description'), 'project_id': _column(Project, 'id'),
+        }, f'FROM {quote(Project._meta.db_table)}', []),
+        ('comment', {
+            'object_id': _column(Comment, 'id'), 'body': _column(Comment, 'content'),
+            'project_id': _column(Task, 'project'), 'assignee_id': _column(Task, 'assigned_to'),
+            'parent_id': _column(Task, 'id'),
+        }, f"FROM {quote(comment)} JOIN {quote(task)} ON {_column(Task, 'id')} = {_column(Comment, 'task')}", []),
+        ('message', {
+            'object_id': _column(ChatMessage, 'id'), 'body': _column(ChatMessage, 'content'),
+            'room_id': _column(ChatMessage, 'room'),
+        }, f"FROM {quote(message)} WHERE {_column(ChatMessage, 'is_deleted')} = %s", [False]),
+    )
+
+
+def reindex(apps=global_apps):
+    """
+    Rebuild every document from the source tables with one ``INSERT ... SELECT``
+    per kind, without loading any rows into Python; returns ``{kind: count}``.
+
+    ``apps`` is the model registry to read; the ``core`` migrations pass their
+    historical one to fill the index of an existing install.
+    """
+    SearchDocument = apps.get_model('core', 'SearchDocument')
+    documents = SearchDocument._meta.db_table
+    quote = connection.ops.quote_name
+    updated_at = SearchDocument._meta.get_field('updated_at').get_db_prep_value(timezone.now(), connection)
+    counts = {}
+    with transaction.atomic(), connection.cursor() as cursor:
+        SearchDocument.objects.all().delete()
+        for kind, columns, source, params in _reindex_sources(apps):
+            columns = {'title': "''", **columns}
+            targets = ', '.join(quote(name) for name in ['kind', 'updated_at', *columns])
+            cursor.execute(
+                f"INSERT INTO {quote(documents)} ({targets}) SELECT %s, %s, {', '.join(columns.values())} {source}",
+                [kind, updated_at, *params],
+            )
+            counts[kind] = cursor.rowcount
+        if connection.vendor == 'sqlite':
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return counts
@@ -11,3 +11,170 @@ class CoreAPITests(TestCase):
         # This test is for a placeholder endpoint that wasn't implemented
         pass
 
+
+
+class GlobalSearchTests(TestCase):
+    """Test the full-text index behind /api/search/ and its access scoping."""
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+        from rest_framework.test import APIClient
+        from chat.models import ChatRoom, ChatMessage
+        from projects.models import Project
+        from tasks.models import Task, Comment
+        User = get_user_model()
+        self.owner = User.objects.create_user(email='owner@example.com', password='testpass123')
+        self.outsider = User.objects.create_user(email='outsider@example.com', password='testpass123')
+        for user in (self.owner, self.outsider):
+            user.profile.role = 'developer'
+            user.profile.save()
+        self.project = Project.objects.create(name='Quarterly launch', description='Rollout plan', owner=self.owner)
+        self.task = Task.objects.create(title='Write launch checklist', description='Ölçüm notes', project=self.project)
+        self.comment = Comment.objects.create(task=self.task, author=self.owner, content='Checklist reviewed by legal')
+        room = ChatRoom.objects.create(name='Private', room_type='private', created_by=self.owner)
+        self.message = ChatMessage.objects.create(room=room, sender=self.owner, content='Launch moved to Friday')
+        self.client = APIClient()
+
+    def search(self, user, query, search_type='all'):
+        self.client.force_authenticate(user)
+        response = self.client.get('/api/search/', {'q': query, 'type': search_type})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def ids(self, results, key):
+        return [row['id'] for row in results[key]]
+
+    def test_ranked_scoped_and_kept_in_sync(self):
+        from core.search_index import reindex
+        from core.models import SearchDocument
+        results = self.search(self.owner, 'launc')
+        self.assertEqual(self.ids(results, 'tasks'), [str(self.task.pk)])
+        self.assertEqual(self.ids(results, 'projects'), [str(self.project.pk)])
+        self.assertEqual(self.ids(results, 'messages'), [str(self.message.pk)])
+        self.assertEqual(self.ids(self.search(self.owner, 'checklist legal'), 'comments'), [str(self.comment.pk)])
+        self.assertEqual(self.ids(self.search(self.owner, 'olcum'), 'tasks'), [str(self.task.pk)])
+        self.assertEqual(self.search(self.outsider, 'launch')['total'], 0)
+
+        # Assigning the task lets the assignee find it and its comments
+        self.task.assigned_to = self.outsider
+        self.task.title = 'Write release checklist'
+        self.task.save()
+        results = self.search(self.outsider, 'checklist')
+        self.assertEqual(self.ids(results, 'tasks'), [str(self.task.pk)])
+        self.assertEqual(self.ids(results, 'comments'), [str(self.comment.pk)])
+        self.assertEqual(self.search(self.owner, 'launch', 'task')['tasks'], [])
+
+        incremental = sorted(SearchDocument.objects.values_list('kind', 'object_id', 'title', 'project_id', 'assignee_id'))
+        reindex()
+        self.assertEqual(
+            sorted(SearchDocument.objects.values_list('kind', 'object_id', 'title', 'project_id', 'assignee_id')),
+            incremental,
+        )
+
+        self.message.is_deleted = True
+        self.message.save()
+        self.task.delete()
+        self.assertEqual(self.search(self.owner, 'checklist')['total'], 0)
+        self.assertEqual(self.search(self.owner, 'friday')['total'], 0)
+        self.assertEqual(list(SearchDocument.objects.values_list('kind', flat=True)), ['project'])
+
+
+class TypeaheadTests(TestCase):
+    """Test the prefix index behind /api/search/suggest/ and its invalidation."""
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+        from projects.models import Project
+        from tasks.models import Task
+        cache.clear()
+        User = get_user_model()
+        self.owner = User.objects.create_user(email='lead@example.com', password='testpass123', first_name='Wren')
+        self.outsider = User.objects.create_user(email='stranger@example.com', password='testpass123')
+        for user in (self.owner, self.outsider):
+            user.profile.role = 'developer'
+            user.profile.save()
+        self.project = Project.objects.create(name='Website refresh', owner=self.owner)
+        self.task = Task.objects.create(title='Write copy', project=self.project)
+        self.client = APIClient()
+
+    def suggest(self, user, query, **params):
+        self.client.force_authenticate(user)
+        response = self.client.get('/api/search/suggest/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def labels(self, body):
+        return [(row['type'], row['label']) for row in body['results']]
+
+    def test_scoped_prefix_suggestions_follow_changes(self):
+        from core.typeahead import suggest
+        body = self.suggest(self.owner, 'w', seq=7)
+        self.assertEqual(body['seq'], '7')
+        self.assertEqual(
+            sorted(self.labels(body)),
+            [('member', 'Wren'), ('project', 'Website refresh'), ('task', 'Write copy')],
+        )
+        self.assertEqual(self.labels(self.suggest(self.owner, 'wri co')), [('task', 'Write copy')])
+        self.assertEqual(self.suggest(self.outsider, 'w')['results'], [])
+        with self.assertNumQueries(0):
+            suggest(self.owner, 'web')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.title = 'Draft copy'
+            self.task.assigned_to = self.outsider
+            self.task.save()
+        self.assertEqual(self.labels(self.suggest(self.owner, 'wri')), [])
+        self.assertEqual(self.labels(self.suggest(self.outsider, 'dra')), [('task', 'Draft copy')])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.members.add(self.outsider)
+        self.assertIn(('project', 'Website refresh'), self.labels(self.suggest(self.outsider, 'web')))
+
+    def test_admins_share_one_workspace_scope(self):
+        from unittest import mock
+        from projects.models import Project
+        from tasks.models import Task
+        from core import typeahead
+        self.owner.profile.role = 'admin'
+        self.owner.profile.save()
+        self.assertEqual(typeahead.user_scopes(self.owner), [(typeahead.WORKSPACE, None)])
+        other = Project.objects.create(name='Warehouse', owner=self.outsider)
+        self.assertEqual(
+            sorted(self.labels(self.suggest(self.owner, 'w'))),
+            [('member', 'Wren'), ('project', 'Warehouse'), ('project', 'Website refresh'), ('task', 'Write copy')],
+        )
+        workspace = typeahead.registry.indexes[typeahead.WORKSPACE][1]
+
+        # Changes swap the entries of the projects they touch in the index already held
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(title='Wrap up', project=other)
+            self.project.members.add(self.outsider)
+        # The two changed projects are read in one query per table
+        with self.assertNumQueries(4):
+            found = typeahead.suggest(self.owner, 'wra')
+        self.assertEqual([(entry.kind, entry.label) for entry in found], [('task', 'Wrap up')])
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.create(name='Wharf', owner=self.outsider)
+            self.task.delete()
+        self.assertEqual(
+            sorted(self.labels(self.suggest(self.owner, 'w'))),
+            [
+                ('member', 'Wren'), ('project', 'Warehouse'), ('project', 'Website refresh'), ('project', 'Wharf'),
+                ('task', 'Wrap up'),
+            ],
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertEqual(self.labels(self.suggest(self.owner, 'wa')), [])
+        self.assertIs(typeahead.registry.indexes[typeahead.WORKSPACE][1], workspace)
+        self.assertEqual(
+            sorted(workspace.entries), sorted((entry.kind, entry.id) for entry in typeahead._build_workspace().entries.values())
+        )
+
+        # Least recently used indexes go once the process holds too many entries
+        with mock.patch.object(typeahead, 'MAX_ENTRIES', 3):
+            self.suggest(self.outsider, 'w')
+            self.assertNotIn(typeahead.WORKSPACE, typeahead.registry.indexes)
+            self.assertLessEqual(typeahead.registry.entries, 3)
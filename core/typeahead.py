@@ -0,0 +1,463 @@
+"""
+Prefix index behind the search box suggestions (``/api/search/suggest/``).
+
+Suggestions come from per-scope indexes held in process memory: one scope per
+project (its name, task titles and member names), one per assignee (the
+tasks assigned to them) and a single workspace scope for admins and managers,
+who see everything. A user's suggestions merge the scopes they can see, so the
+result respects the same visibility as the task and project views without
+filtering at query time. A process holds at most ``MAX_ENTRIES`` entries,
+dropping the least recently used indexes first.
+
+Each index is a sorted ``(word, entry)`` table searched with ``bisect``; the
+best entries of every prefix up to ``SHORT_PREFIX`` characters are
+precomputed, so the first keystrokes never walk a long range. Entries are
+ranked by recency.
+
+Changes bump a per-scope version in the shared cache (after commit) along with
+a global generation counter. A request compares one cache key against the
+generation it last saw; only when it moved are the versions of the scopes
+held in memory checked, and only stale scopes are rebuilt, each with a few
+queries. The workspace scope is never rebuilt for a change: it remembers the
+version of every project it was filled from and swaps the entries of the
+projects that moved, and of those created or deleted, in place.
+"""
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter, OrderedDict, namedtuple
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+from projects.models import Project
+from projects.utils import visible_project_ids
+from tasks.models import Task
+
+User = get_user_model()
+
+SHORT_PREFIX = 3
+MAX_LIMIT = 10
+MAX_ENTRIES = 200_000  # suggestions kept per process, least recently used indexes dropped first
+GENERATION_KEY = 'typeahead_generation'
+WORKSPACE = 'workspace'
+PROJECTS = 'projects'  # version of the set of projects, moved by creations and deletions
+
+Suggestion = namedtuple('Suggestion', 'kind id label url rank')
+
+_WORD = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Lowercased, without diacritics, so ``ol`` finds ``Ölçüm``."""
+    decomposed = unicodedata.normalize('NFKD', (text or '').lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def words(text):
+    return _WORD.findall(normalize(text))
+
+
+class PrefixIndex:
+    """Suggestions of one scope, searchable by word prefix."""
+
+    def __init__(self, suggestions=()):
+        self.entries = {}  # (kind, id) -> Suggestion
+        pairs, self.top = [], {}
+        for entry in sorted(suggestions, key=_order):
+            self.entries[(entry.kind, entry.id)] = entry
+            order = _order(entry)
+            for word in set(words(entry.label)):
+                pairs.append((word, order))
+                for size in range(1, SHORT_PREFIX + 1):
+                    best = self.top.setdefault(word[:size], [])
+                    if len(best) < MAX_LIMIT and (not best or best[-1] != order):
+                        best.append(order)
+        pairs.sort()
+        self.pairs = pairs
+
+    def add(self, entry):
+        """Index ``entry``, which must not be held yet."""
+        self.entries[(entry.kind, entry.id)] = entry
+        order = _order(entry)
+        for word in set(words(entry.label)):
+            insort(self.pairs, (word, order))
+            for size in range(1, SHORT_PREFIX + 1):
+                best = self.top.get(word[:size])
+                if best is not None and order not in best:
+                    insort(best, order)
+                    del best[MAX_LIMIT:]
+
+    def remove(self, key):
+        entry = self.entries.pop(key)
+        order = _order(entry)
+        for word in set(words(entry.label)):
+            del self.pairs[bisect_left(self.pairs, (word, order))]
+            for size in range(1, SHORT_PREFIX + 1):
+                # Refilled from the range on the next lookup
+                if order in self.top.get(word[:size], ()):
+                    del self.top[word[:size]]
+
+    def _range(self, prefix):
+        found = set()
+        for i in range(bisect_left(self.pairs, (prefix,)), len(self.pairs)):
+            word, order = self.pairs[i]
+            if not word.startswith(prefix):
+                break
+            found.add(order)
+        return sorted(found)
+
+    def suggest(self, terms, limit, kinds=None):
+        """The best ``limit`` entries having a word starting with each of ``terms``."""
+        if len(terms) == 1 and len(terms[0]) <= SHORT_PREFIX and kinds is None:
+            orders = self.top.get(terms[0])
+            if orders is None:
+                orders = self.top[terms[0]] = self._range(terms[0])[:MAX_LIMIT]
+        else:
+            # Walk the range of the most selective term, check the others per entry
+            orders = self._range(max(terms, key=len))
+        found = []
+        for order in orders:
+            entry = self.entries[order[2:]]
+            if kinds is not None and entry.kind not in kinds:
+                continue
+            if len(terms) > 1:
+                label = words(entry.label)
+                if not all(any(word.startswith(term) for word in label) for term in terms):
+                    continue
+            found.append(entry)
+            if len(found) == limit:
+                break
+        return found
+
+
+class WorkspaceIndex(PrefixIndex):
+    """
+    Every project's suggestions in one index, kept per project so a change
+    replaces the entries of the projects it touched only.
+    """
+
+    def __init__(self, segments, versions, projects_version):
+        self.segments = {
+            project_id: {(entry.kind, entry.id): entry for entry in suggestions}
+            for project_id, suggestions in segments.items()
+        }
+        # Members appear in every project they belong to and stay while one holds them
+        self.refs = Counter(key for segment in self.segments.values() for key in segment)
+        unique = {key: entry for segment in self.segments.values() for key, entry in segment.items()}
+        super().__init__(unique.values())
+        self.versions = versions  # project id -> version of its scope when last read
+        self.projects_version = projects_version
+        self.lock = threading.Lock()
+
+    def apply(self, segments, versions):
+        """Replace the entries of each project in ``segments`` (``[]`` once it is gone)."""
+        with self.lock:
+            for project_id, suggestions in segments.items():
+                new = {(entry.kind, entry.id): entry for entry in suggestions}
+                old = self.segments.pop(project_id, {})
+                for key, entry in old.items():
+                    if new.get(key) != entry:
+                        self._release(key)
+                for key, entry in new.items():
+                    if old.get(key) != entry:
+                        self._hold(entry)
+                if new:
+                    self.segments[project_id] = new
+                    self.versions[project_id] = versions.get(project_id, 0)
+                else:
+                    self.versions.pop(project_id, None)
+
+    def _hold(self, entry):
+        key = (entry.kind, entry.id)
+        self.refs[key] += 1
+        if self.entries.get(key) != entry:
+            if key in self.entries:
+                self.remove(key)
+            self.add(entry)
+
+    def _release(self, key):
+        self.refs[key] -= 1
+        if self.refs[key] <= 0:
+            del self.refs[key]
+            self.remove(key)
+
+    def suggest(self, terms, limit, kinds=None):
+        with self.lock:
+            return super().suggest(terms, limit, kinds)
+
+
+def _order(entry):
+    return entry.rank, entry.label, entry.kind, entry.id
+
+
+def _rank(moment):
+    return -moment.timestamp() if moment else 0
+
+
+def _member_label(first_name, last_name, email):
+    return f"{first_name} {last_name}".strip() or email
+
+
+def _member_suggestions(members):
+    return [
+        Suggestion('member', pk, _member_label(first_name, last_name, email), f'/profile/{email}/', _rank(joined))
+        for pk, first_name, last_name, email, joined in members.values_list(
+            'pk', 'first_name', 'last_name', 'email', 'date_joined'
+        )
+    ]
+
+
+def _project_suggestions(project_ids=None):
+    """``{project id: [suggestions]}`` for ``project_ids`` (every project when ``None``), ``[]`` for those gone."""
+    projects = Project.objects.all()
+    memberships = Project.members.through.objects.all()
+    tasks = Task.objects.order_by()
+    if project_ids is not None:
+        projects = projects.filter(pk__in=project_ids)
+        memberships = memberships.filter(project_id__in=project_ids)
+        tasks = tasks.filter(project_id__in=project_ids)
+    segments = {str(pk): [] for pk in project_ids or ()}
+    member_ids = {}
+    for pk, name, owner_id, updated_at in projects.values_list('pk', 'name', 'owner_id', 'updated_at'):
+        segments[str(pk)] = [Suggestion('project', str(pk), name, f'/projects/{pk}/', _rank(updated_at))]
+        member_ids[str(pk)] = {owner_id}
+    # Rows of a project deleted between these queries are skipped
+    for project_id, user_id in memberships.values_list('project_id', Project.members.field.m2m_reverse_name()):
+        if str(project_id) in member_ids:
+            member_ids[str(project_id)].add(user_id)
+    for pk, project_id, title, updated_at in tasks.values_list('pk', 'project_id', 'title', 'updated_at'):
+        if str(project_id) in member_ids:
+            segments[str(project_id)].append(
+                Suggestion('task', str(pk), title, f'/tasks/?task={pk}', _rank(updated_at))
+            )
+    if project_ids is None:
+        members = User.objects.filter(Q(projects_joined__isnull=False) | Q(projects__isnull=False)).distinct()
+    else:
+        members = User.objects.filter(pk__in=set().union(*member_ids.values()))
+    members = {entry.id: entry for entry in _member_suggestions(members)}
+    for project_id, user_ids in member_ids.items():
+        segments[project_id].extend(members[pk] for pk in user_ids if pk in members)
+    return segments
+
+
+def _build(scope):
+    kind, _, key = scope.partition(':')
+    if kind == 'project':
+        return PrefixIndex(_project_suggestions([key])[key])
+    tasks = Task.objects.filter(assigned_to_id=key)
+    return PrefixIndex(
+        Suggestion('task', str(pk), title, f'/tasks/?task={pk}', _rank(updated_at))
+        for pk, title, updated_at in tasks.values_list('pk', 'title', 'updated_at')
+    )
+
+
+def _build_workspace():
+    # Versions are read first so a change made while building is not missed
+    projects_version = cache.get(_version_key(PROJECTS), 0)
+    project_ids = [str(pk) for pk in Project.objects.values_list('pk', flat=True)]
+    versions = _project_versions(project_ids)
+    return WorkspaceIndex(_project_suggestions(), versions, projects_version)
+
+
+def _project_versions(project_ids):
+    current = cache.get_many([_version_key(f'project:{pk}') for pk in project_ids])
+    return {pk: current.get(_version_key(f'project:{pk}'), 0) for pk in project_ids}
+
+
+def _refresh_workspace(index):
+    """Bring the workspace up to date with the projects changed, created or deleted since it was read."""
+    projects_version = cache.get(_version_key(PROJECTS), 0)
+    project_ids = set(index.versions)
+    if projects_version != index.projects_version:
+        project_ids |= {str(pk) for pk in Project.objects.values_list('pk', flat=True)}
+    versions = _project_versions(project_ids)
+    stale = [pk for pk in project_ids if index.versions.get(pk) != versions[pk]]
+    if stale:
+        index.apply(_project_suggestions(stale), versions)
+    index.projects_version = projects_version
+    return len(stale)
+
+
+def _version_key(scope):
+    return f"typeahead_scope_{scope}"
+
+
+class _Registry:
+    """Process-local indexes, checked against the shared versions before use."""
+
+    def __init__(self):
+        self.indexes = OrderedDict()  # scope -> (version, PrefixIndex)
+        self.entries = 0  # held across all indexes
+        self.generation = None
+        self.lock = threading.Lock()
+
+    def _sync(self):
+        generation = cache.get(GENERATION_KEY)
+        if generation is None:
+            cache.add(GENERATION_KEY, time.time_ns(), None)
+            generation = cache.get(GENERATION_KEY)
+        if generation == self.generation:
+            return
+        with self.lock:
+            held = [scope for scope in self.indexes if scope != WORKSPACE]
+            versions = cache.get_many([_version_key(scope) for scope in held])
+            for scope in held:
+                if versions.get(_version_key(scope), 0) != self.indexes[scope][0]:
+                    self._drop(scope)
+            workspace = self.indexes.get(WORKSPACE, (None, None))[1]
+        if workspace is not None:
+            before = len(workspace.entries)
+            _refresh_workspace(workspace)
+            with self.lock:
+                if self.indexes.get(WORKSPACE, (None, None))[1] is workspace:
+                    self.entries += len(workspace.entries) - before
+        self.generation = generation
+
+    def _drop(self, scope):
+        _, index = self.indexes.pop(scope)
+        self.entries -= len(index.entries)
+
+    def get(self, scope):
+        with self.lock:
+            held = self.indexes.get(scope)
+            if held is not None:
+                self.indexes.move_to_end(scope)
+                return held[1]
+        if scope == WORKSPACE:
+            version, index = None, _build_workspace()
+        else:
+            # Read the version first so a change made while building is not missed
+            version = cache.get(_version_key(scope), 0)
+            index = _build(scope)
+        with self.lock:
+            if scope in self.indexes:
+                self._drop(scope)
+            self.indexes[scope] = (version, index)
+            self.entries += len(index.entries)
+            # The index just built stays even when it alone is over the budget
+            while self.entries > MAX_ENTRIES and len(self.indexes) > 1:
+                self._drop(next(iter(self.indexes)))
+        return index
+
+    def suggest(self, scopes, terms, limit):
+        self._sync()
+        found = [self.get(scope).suggest(terms, limit, kinds) for scope, kinds in scopes]
+        suggestions, seen = [], set()
+        for entry in heapq.merge(*found, key=lambda entry: (entry.rank, entry.label)):
+            if (entry.kind, entry.id) not in seen:
+                seen.add((entry.kind, entry.id))
+                suggestions.append(entry)
+                if len(suggestions) == limit:
+                    break
+        return suggestions
+
+
+registry = _Registry()
+
+
+def user_scopes(user):
+    """``[(scope, kinds or None for every kind), ...]`` the user may draw suggestions from."""
+    profile = getattr(user, 'profile', None)
+    if profile and profile.has_role('admin', 'manager'):
+        return [(WORKSPACE, None)]
+    visible = visible_project_ids(user)
+    if profile and profile.has_role('developer'):
+        return [(f'project:{pk}', None) for pk in visible] + [(f'assigned:{user.pk}', None)]
+    # Clients see the tasks of the projects they own only, as in global_search
+    owned = set(Project.objects.filter(owner=user).values_list('pk', flat=True))
+    return [(f'project:{pk}', None if pk in owned else {'project', 'member'}) for pk in visible]
+
+
+def suggest(user, query, limit=5):
+    terms = words(query)[:4]
+    if not terms:
+        return []
+    return registry.suggest(user_scopes(user), terms, min(limit, MAX_LIMIT))
+
+
+def invalidate(*scopes):
+    """Mark scopes stale in every process once the current transaction commits."""
+    scopes = {scope for scope in scopes if scope}
+    if scopes:
+        transaction.on_commit(lambda: _bump(scopes))
+
+
+def _bump(scopes):
+    # Counters start from the clock, so one evicted and recreated cannot
+    # come back to a value a process still holds
+    for key in [*(_version_key(scope) for scope in scopes), GENERATION_KEY]:
+        cache.add(key, time.time_ns(), None)
+        cache.incr(key)
+
+
+def _scope(kind, key):
+    return f'{kind}:{key}' if key is not None else None
+
+
+def tasks_changed(tasks, previous=None):
+    """Invalidate the scopes holding ``tasks``; ``previous`` maps pk to the old ``(project_id, assigned_to_id)``."""
+    scopes = set()
+    for task in tasks:
+        placements = [(task.project_id, task.assigned_to_id)]
+        if previous and task.pk in previous:
+            placements.append(previous[task.pk])
+        for project_id, assignee_id in placements:
+            scopes.update((_scope('project', project_id), _scope('assigned', assignee_id)))
+    invalidate(*scopes)
+
+
+def task_saved(sender, instance, **kwargs):
+    # Stashed by tasks.graph before the save
+    previous = (getattr(instance, '_previous_project_id', None), getattr(instance, '_previous_assignee_id', None))
+    tasks_changed([instance], {instance.pk: previous})
+
+
+def task_deleted(sender, instance, origin=None, **kwargs):
+    if (origin.model if isinstance(origin, QuerySet) else type(origin)) is Project:
+        # The project's own scope goes with it
+        invalidate(_scope('assigned', instance.assigned_to_id))
+    else:
+        tasks_changed([instance])
+
+
+def project_saved(sender, instance, created, **kwargs):
+    invalidate(_scope('project', instance.pk), PROJECTS if created else None)
+
+
+def project_deleted(sender, instance, **kwargs):
+    invalidate(_scope('project', instance.pk), PROJECTS)
+
+
+def members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        project_ids = [instance.pk]
+    elif action == 'post_clear':
+        # Captured by projects.signals before the rows went away
+        project_ids = getattr(instance, '_cleared_project_ids', ())
+    else:
+        project_ids = pk_set or ()
+    invalidate(*(_scope('project', pk) for pk in project_ids))
+
+
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    # Member names appear in the scope of every project the user belongs to
+    invalidate(*(_scope('project', pk) for pk in visible_project_ids(instance)))
+
+
+post_save.connect(task_saved, sender=Task, dispatch_uid='typeahead_task_saved')
+post_delete.connect(task_deleted, sender=Task, dispatch_uid='typeahead_task_deleted')
+post_save.connect(project_saved, sender=Project, dispatch_uid='typeahead_project_saved')
+post_delete.connect(project_deleted, sender=Project, dispatch_uid='typeahead_project_deleted')
+m2m_changed.connect(members_changed, sender=Project.members.through, dispatch_uid='typeahead_members_changed')
+post_save.connect(user_saved, sender=User, dispatch_uid='typeahead_user_saved')
@@ -11,9 +11,8 @@ from .serializers import (
 from users.permissions import RolePermission
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
-from projects.models import Project
-from tasks.models import Task
 from notifications.models import Notification
+from analytics.stats import workspace_stats, assignee_stats, owner_stats
 
 class DashboardViewSet(viewsets.ModelViewSet):
     """ViewSet للوحات التحكم"""
@@ -167,26 +166,21 @@ def dashboard_stats(request):
     """
     user = request.user if request.user.is_authenticated else None
     
-    # Get all tasks and projects (user can see all in their workspace)
-    # For a multi-tenant app, you'd filter by organization/team
-    tasks = Task.objects.all()
-    projects = Project.objects.all()
-    
-    # If user is authenticated, try to get their specific data first
-    # If they have no assigned tasks, show all tasks they can access
+    # The user's own tasks/projects when they have any, otherwise the whole
+    # workspace; all counts come from the shared stats service
+    tasks = projects = workspace_stats()
     if user:
-        user_tasks = Task.objects.filter(assigned_to=user)
-        user_projects = Project.objects.filter(owner=user)
-        # If user has their own tasks/projects, show those; otherwise show all
-        if user_tasks.exists():
+        user_tasks = assignee_stats(user)
+        user_projects = owner_stats(user)
+        if user_tasks['total']:
             tasks = user_tasks
-        if user_projects.exists():
+        if user_projects['projects']:
             projects = user_projects
     
-    total_tasks = tasks.count()
-    completed_tasks = tasks.filter(status='done').count()
-    in_progress_tasks = tasks.filter(status='in_progress').count()
-    pending_tasks = tasks.filter(status='todo').count()
+    total_tasks = tasks['total']
+    completed_tasks = tasks['completed']
+    in_progress_tasks = tasks['in_progress']
+    pending_tasks = tasks['pending']
     
     # For notifications
     notifications_unread = 0
@@ -198,10 +192,10 @@ def dashboard_stats(request):
         'completed_tasks': completed_tasks,
         'in_progress_tasks': in_progress_tasks,
         'pending_tasks': pending_tasks,
-        'total_projects': projects.count(),
+        'total_projects': projects['projects'],
         'notifications_unread': notifications_unread,
         # Legacy fields for compatibility
-        'projects': projects.count(),
+        'projects': projects['projects'],
         'tasks': total_tasks,
     }
     return Response(data)
@@ -21,6 +21,9 @@ class Notification(models.Model):
 
 	class Meta:
 		ordering = ['-created_at']
+		indexes = [
+			models.Index(fields=['user', '-created_at', '-id']),
+		]
 
 	def __str__(self):
 		return f"Notification({self.notification_type}) to {self.user.email}"[:80]
@@ -1,3 +1,77 @@
 from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from chat.models import ChatRoom, ChatMessage, ChatNotification
+from .models import Notification
 
-# Create your tests here.
+User = get_user_model()
+
+
+class NotificationCursorPaginationTest(TestCase):
+	"""Test that cursor mode merges task and chat notifications into one stream."""
+
+	def setUp(self):
+		self.user = User.objects.create_user(email='reader@example.com', password='testpass123')
+		sender = User.objects.create_user(email='sender@example.com', password='testpass123')
+		room = ChatRoom.objects.create(name='Room', created_by=sender)
+		for i in range(4):
+			Notification.objects.create(user=self.user, message=f'native {i}')
+			message = ChatMessage.objects.create(room=room, sender=sender, content=f'chat {i}')
+			ChatNotification.objects.create(user=self.user, room=room, message=message)
+		self.client.force_login(self.user)
+
+	def test_cursor_pages_cover_both_sources(self):
+		seen = []
+		url = '/notifications/?paginate=cursor&page_size=3&count=exact'
+		while url:
+			body = self.client.get(url).json()
+			self.assertEqual(body['count'], 8)
+			seen.extend(body['results'])
+			url = body['next']
+		self.assertEqual(len({row['id'] for row in seen}), 8)
+		self.assertEqual({row['type'] for row in seen}, {'notification', 'chat'})
+		stamps = [row['created_at'] for row in seen]
+		self.assertEqual(stamps, sorted(stamps, reverse=True))
+
+	def test_cursor_orders_rows_of_the_same_instant_by_source(self):
+		# Give the chat rows the ids of the task notifications, created at the same instant
+		native_ids = sorted(Notification.objects.values_list('pk', flat=True))
+		chat_ids = sorted(ChatNotification.objects.values_list('pk', flat=True))
+		for chat_id, native_id in zip(chat_ids, native_ids):
+			ChatNotification.objects.filter(pk=chat_id).update(id=native_id)
+		moment = timezone.now()
+		Notification.objects.update(created_at=moment)
+		ChatNotification.objects.update(created_at=moment)
+		seen = []
+		url = '/notifications/?paginate=cursor&page_size=3'
+		while url:
+			body = self.client.get(url).json()
+			seen.extend((row['type'], row['id']) for row in body['results'])
+			url = body['next']
+		self.assertEqual(len(seen), 8)
+		self.assertEqual(len(set(seen)), 8)
+
+	def test_default_response_is_unpaginated_list(self):
+		self.assertEqual(len(self.client.get('/notifications/').json()), 8)
+
+
+class NotificationConditionalGetTest(TestCase):
+	"""Test ETag revalidation on the notification list and unread count."""
+
+	def setUp(self):
+		self.user = User.objects.create_user(email='etag@example.com', password='testpass123')
+		self.notification = Notification.objects.create(user=self.user, message='hello')
+		self.client.force_login(self.user)
+
+	def test_unchanged_list_is_not_modified_until_read(self):
+		for url in ('/notifications/', '/notifications/count/'):
+			etag = self.client.get(url)['ETag']
+			response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+			self.assertEqual(response.status_code, 304)
+			self.assertEqual(response.content, b'')
+
+		etag = self.client.get('/notifications/')['ETag']
+		self.client.post(f'/notifications/{self.notification.pk}/')
+		response = self.client.get('/notifications/', HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 200)
+		self.assertTrue(response.json()[0]['is_read'])
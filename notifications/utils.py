@@ -1,5 +1,5 @@
-from django.core.mail import send_mail
 from django.conf import settings
+from smart_task_manager.mail import build_message, dispatch
 from pyfcm import FCMNotification
 from celery import shared_task
 import logging
@@ -11,17 +11,20 @@ def send_email_notification(subject, message, to_email):
     """
     Sends an email notification asynchronously.
     """
-    try:
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [to_email],
-            fail_silently=False,
-        )
+    report = dispatch([build_message(subject, message, to_email)])
+    if report['sent']:
         logger.info(f"Email notification sent to {to_email}")
-    except Exception as e:
-        logger.error(f"Failed to send email to {to_email}: {e}")
+
+@shared_task
+def send_email_notifications(emails):
+    """
+    Sends many email notifications in one task over pooled connections.
+
+    ``emails`` is a list of ``(subject, message, to_email)`` tuples.
+    """
+    report = dispatch(build_message(subject, message, to_email) for subject, message, to_email in emails)
+    logger.info(f"Email notifications sent: {report['sent']}, failed: {len(report['failed'])}")
+    return {'sent': report['sent'], 'failed': len(report['failed'])}
 
 @shared_task
 def send_push_notification(registration_id, message_title, message_body, data_message=None):
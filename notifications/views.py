@@ -10,6 +10,11 @@ from django.http import JsonResponse
 from .models import Notification, UserFCMToken
 from .serializers import NotificationSerializer, UserFCMTokenSerializer
 from chat.models import ChatNotification
+from smart_task_manager.pagination import KeysetPagination
+from smart_task_manager.conditional import conditional_response, fingerprint
+from django.db.models import Count, Q
+from django.db import transaction
+from sync.log import record, entry
 
 
 def _display_name(user):
@@ -27,50 +32,75 @@ def _display_name(user):
 	return username or 'Member'
 
 
+def _native_payload(n):
+	title = getattr(getattr(n, 'task', None), 'title', None) or 'Notification'
+	return {
+		'id': str(n.id),
+		'type': 'task' if n.task else 'notification',
+		'title': title,
+		'message': n.message,
+		'message_content': n.message,
+		'is_read': n.is_read,
+		'created_at': n.created_at.isoformat(),
+		'link': f"/tasks/{n.task.id}/" if n.task else '',
+	}
+
+
+def _chat_payload(cn):
+	msg = cn.message
+	return {
+		'id': str(cn.id),
+		'type': 'chat',
+		'room': str(cn.room_id),
+		'room_name': getattr(cn.room, 'name', ''),
+		'message': getattr(msg, 'content', ''),
+		'message_content': getattr(msg, 'content', ''),
+		'sender_name': _display_name(getattr(msg, 'sender', None)),
+		'is_read': cn.is_read,
+		'created_at': cn.created_at.isoformat(),
+		'link': f"/chat/rooms/{cn.room_id}/",
+	}
+
+
 class NotificationListView(generics.ListAPIView):
 	serializer_class = NotificationSerializer
 	permission_classes = [IsAuthenticated]
 	authentication_classes = [JWTAuthentication, SessionAuthentication]
+	pagination_class = KeysetPagination
 
 	def get_queryset(self):
 		return Notification.objects.filter(user=self.request.user).order_by('-created_at')
 
+	def get_list_fingerprints(self):
+		# Read state and the titles/messages shown in the payload live on related rows
+		user = self.request.user
+		unread = Count('pk', filter=Q(is_read=False))
+		return [
+			fingerprint(Notification.objects.filter(user=user), 'created_at', 'task__updated_at', unread=unread),
+			fingerprint(
+				ChatNotification.objects.filter(user=user),
+				'created_at', 'message__updated_at', 'room__updated_at', unread=unread
+			),
+		]
+
 	def list(self, request, *args, **kwargs):
+		return conditional_response(request, self.get_list_fingerprints(), lambda: self.build_list(request))
+
+	def build_list(self, request):
 		user = request.user
 		# Native task/notification objects
 		native = Notification.objects.filter(user=user).select_related('task').order_by('-created_at')
 		# Chat notifications for this user
 		chat_notes = ChatNotification.objects.filter(user=user).select_related('room', 'message', 'message__sender').order_by('-created_at')
 
-		payload = []
-		for n in native:
-			title = getattr(getattr(n, 'task', None), 'title', None) or 'Notification'
-			payload.append({
-				'id': str(n.id),
-				'type': 'task' if n.task else 'notification',
-				'title': title,
-				'message': n.message,
-				'message_content': n.message,
-				'is_read': n.is_read,
-				'created_at': n.created_at.isoformat(),
-				'link': f"/tasks/{n.task.id}/" if n.task else '',
-			})
-
-		for cn in chat_notes:
-			msg = cn.message
-			payload.append({
-				'id': str(cn.id),
-				'type': 'chat',
-				'room': str(cn.room_id),
-				'room_name': getattr(cn.room, 'name', ''),
-				'message': getattr(msg, 'content', ''),
-				'message_content': getattr(msg, 'content', ''),
-				'sender_name': _display_name(getattr(msg, 'sender', None)),
-				'is_read': cn.is_read,
-				'created_at': cn.created_at.isoformat(),
-				'link': f"/chat/rooms/{cn.room_id}/",
-			})
+		if self.paginator.use_keyset(request):
+			# Cursor mode: merge both sources page by page instead of loading everything
+			rows = self.paginator.paginate_sources([native, chat_notes], request)
+			payload = [_chat_payload(row) if isinstance(row, ChatNotification) else _native_payload(row) for row in rows]
+			return self.paginator.get_paginated_response(payload)
 
+		payload = [_native_payload(n) for n in native]
+		payload.extend(_chat_payload(cn) for cn in chat_notes)
 		payload.sort(key=lambda x: x.get('created_at') or '', reverse=True)
 		return Response(payload)
 
@@ -134,7 +164,11 @@ class MarkAllReadView(APIView):
 	permission_classes = [IsAuthenticated]
 
 	def post(self, request):
-		Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+		with transaction.atomic():
+			ids = list(Notification.objects.filter(user=request.user, is_read=False).values_list('id', flat=True))
+			Notification.objects.filter(pk__in=ids).update(is_read=True)
+			# UPDATE bypasses post_save, so log the read flags for the change feed here
+			record(entry('notification', pk, None, request.user.pk) for pk in ids)
 		ChatNotification.objects.filter(user=request.user, is_read=False).update(is_read=True)
 		return Response({'status': 'all_read'})
 
@@ -149,7 +183,10 @@ def notification_count(request):
 	count_native = Notification.objects.filter(user=request.user, is_read=False).count()
 	count_chat = ChatNotification.objects.filter(user=request.user, is_read=False).count()
 	count = count_native + count_chat
-	return JsonResponse({'count': count, 'unread_count': count})
+	# The counts are the whole payload, so they double as the validator
+	return conditional_response(
+		request, [(count_native, count_chat)], lambda: JsonResponse({'count': count, 'unread_count': count})
+	)
 
 def notifications_page_view(request):
 	from django.shortcuts import render, redirect
@@ -17,6 +17,7 @@ class Project(models.Model):
 	owner = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='projects', on_delete=models.CASCADE)
 	members = models.ManyToManyField(settings.AUTH_USER_MODEL, blank=True, related_name='projects_joined')
 	created_at = models.DateTimeField(auto_now_add=True)
+	updated_at = models.DateTimeField(auto_now=True)
 
 	def __str__(self):
 		return self.name
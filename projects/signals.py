@@ -0,0 +1,60 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Project
+from .utils import invalidate_visible_projects
+
+
+@receiver(pre_save, sender=Project)
+def remember_previous_owner(sender, instance, **kwargs):
+	"""Keep the stored owner so an ownership transfer invalidates both users."""
+	instance._previous_owner_id = None
+	if instance.pk and not instance._state.adding:
+		instance._previous_owner_id = (
+			Project.objects.filter(pk=instance.pk).values_list('owner_id', flat=True).first()
+		)
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, created, **kwargs):
+	previous_owner_id = getattr(instance, '_previous_owner_id', None)
+	if created:
+		invalidate_visible_projects(instance.owner_id)
+	elif previous_owner_id != instance.owner_id:
+		invalidate_visible_projects(instance.owner_id, previous_owner_id)
+
+
+@receiver(pre_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+	member_ids = list(instance.members.values_list('id', flat=True))
+	instance._deleted_member_ids = member_ids
+	invalidate_visible_projects(instance.owner_id, *member_ids)
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def project_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+	if action == 'pre_clear':
+		# pk_set is not provided for clear(), so capture the affected users now
+		# and invalidate once the rows are actually gone.
+		if reverse:
+			instance._cleared_member_ids = [instance.pk]
+			instance._cleared_project_ids = list(instance.projects_joined.values_list('id', flat=True))
+		else:
+			instance._cleared_member_ids = list(instance.members.values_list('id', flat=True))
+	elif action == 'post_clear':
+		invalidate_visible_projects(*getattr(instance, '_cleared_member_ids', ()))
+		touch_projects(*(getattr(instance, '_cleared_project_ids', ()) if reverse else [instance.pk]))
+	elif action in ('post_add', 'post_remove'):
+		if reverse:
+			# user.projects_joined.add(...): a single user gained/lost projects
+			invalidate_visible_projects(instance.pk)
+			touch_projects(*(pk_set or ()))
+		else:
+			invalidate_visible_projects(*(pk_set or ()))
+			touch_projects(instance.pk)
+
+
+def touch_projects(*project_ids):
+	"""Bump updated_at so list validators (ETags) see membership changes."""
+	if project_ids:
+		Project.objects.filter(pk__in=project_ids).update(updated_at=timezone.now())
@@ -0,0 +1,40 @@
+"""
+Per-user project visibility index.
+
+A user can see a project when they own it or are one of its members. Resolving
+that through ``Q(owner=user) | Q(members=user)`` joins the members M2M table and
+needs DISTINCT, so the set of visible project ids is computed once per user,
+cached, and invalidated from ``projects.signals`` whenever ownership or
+membership changes.
+"""
+from django.core.cache import cache
+from .models import Project
+
+VISIBLE_PROJECTS_TIMEOUT = 60 * 60  # 1 hour; signals invalidate on change
+
+
+def _visible_projects_key(user_id):
+	return f"visible_projects_{user_id}"
+
+
+def visible_project_ids(user):
+	"""Return the ids of every project the user owns or is a member of."""
+	if not user or not user.is_authenticated:
+		return []
+	key = _visible_projects_key(user.pk)
+	project_ids = cache.get(key)
+	if project_ids is None:
+		owned = Project.objects.filter(owner_id=user.pk).values_list('id', flat=True)
+		joined = Project.members.through.objects.filter(
+			**{Project.members.field.m2m_reverse_name(): user.pk}
+		).values_list('project_id', flat=True)
+		project_ids = sorted(set(owned) | set(joined))
+		cache.set(key, project_ids, VISIBLE_PROJECTS_TIMEOUT)
+	return project_ids
+
+
+def invalidate_visible_projects(*user_ids):
+	"""Drop the cached visibility sets for the given users."""
+	keys = [_visible_projects_key(user_id) for user_id in user_ids if user_id is not None]
+	if keys:
+		cache.delete_many(keys)
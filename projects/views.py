@@ -1,24 +1,65 @@
-from rest_framework import viewsets
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q
+from django.utils.dateparse import parse_date
+from tasks.graph import project_graph, DEFAULT_TASK_DURATION_DAYS
+from smart_task_manager.conditional import ConditionalListMixin, fingerprint
 from .models import Project
+from .utils import visible_project_ids
 from .serializers import ProjectSerializer
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
 from django.views.generic import ListView
 from django.contrib.auth.mixins import LoginRequiredMixin
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(ConditionalListMixin, viewsets.ModelViewSet):
 	serializer_class = ProjectSerializer
 	permission_classes = [IsAuthenticated]
 
 	def get_queryset(self):
 		user = self.request.user
-		return Project.objects.filter(Q(owner=user) | Q(members=user)).distinct().select_related('owner')
+		return Project.objects.filter(id__in=visible_project_ids(user)).select_related('owner')
+
+	def get_list_fingerprints(self):
+		# Membership changes bump updated_at (see projects.signals)
+		return [fingerprint(Project.objects.filter(id__in=visible_project_ids(self.request.user)), 'updated_at')]
 
 	def perform_create(self, serializer):
 		serializer.save(owner=self.request.user)
 
+	@action(detail=True, methods=['get'], url_path='task-order')
+	def task_order(self, request, pk=None):
+		"""Task ids ordered so every task comes after the task it depends on."""
+		graph = project_graph(self.get_object().pk)
+		order, cyclic = graph.topological_order()
+		return Response({'count': len(order), 'order': order, 'cyclic': cyclic})
+
+	@action(detail=True, methods=['get'], url_path='blocked-tasks')
+	def blocked_tasks(self, request, pk=None):
+		"""Open tasks split by whether their prerequisite is still unfinished."""
+		blocked, unblocked = project_graph(self.get_object().pk).blocked_sets()
+		return Response({'blocked': blocked, 'unblocked': unblocked})
+
+	@action(detail=True, methods=['get'], url_path='critical-path')
+	def critical_path(self, request, pk=None):
+		"""Longest chain of remaining work with earliest/latest dates."""
+		project = self.get_object()
+		start = request.query_params.get('start')
+		try:
+			start_date = parse_date(start) if start else None
+		except ValueError:
+			start_date = None
+		if start and start_date is None:
+			return Response({'error': 'start must be YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+		try:
+			duration_days = int(request.query_params.get('duration_days', DEFAULT_TASK_DURATION_DAYS))
+		except ValueError:
+			duration_days = 0
+		if duration_days < 1:
+			return Response({'error': 'duration_days must be a positive integer.'}, status=status.HTTP_400_BAD_REQUEST)
+		return Response(project_graph(project.pk).critical_path(start_date, duration_days))
+
 
 class ProjectListCreateView(ListCreateAPIView):
 	serializer_class = ProjectSerializer
@@ -26,7 +67,7 @@ class ProjectListCreateView(ListCreateAPIView):
 
 	def get_queryset(self):
 		user = self.request.user
-		return Project.objects.filter(Q(owner=user) | Q(members=user)).distinct().select_related('owner')
+		return Project.objects.filter(id__in=visible_project_ids(user)).select_related('owner')
 
 	def perform_create(self, serializer):
 		serializer.save(owner=self.request.user)
@@ -38,7 +79,7 @@ class ProjectDetailView(RetrieveUpdateDestroyAPIView):
 
 	def get_queryset(self):
 		user = self.request.user
-		return Project.objects.filter(Q(owner=user) | Q(members=user)).distinct().select_related('owner')
+		return Project.objects.filter(id__in=visible_project_ids(user)).select_related('owner')
 
 
 class ProjectsPageView(LoginRequiredMixin, ListView):
@@ -0,0 +1,77 @@
+"""
+Conditional GET support (ETag / Last-Modified) for API endpoints.
+
+Validators come from cheap aggregates over the data behind a response (row
+count plus latest timestamps, see ``fingerprint``) instead of from the
+rendered body, so an unchanged collection is answered with ``304 Not Modified``
+before anything is serialized.
+
+Only ``If-None-Match`` decides a 304. ``Last-Modified`` is sent for
+information, because a deleted row can leave the newest timestamp unchanged
+and ``If-Modified-Since`` alone would then serve stale data.
+"""
+import hashlib
+from datetime import datetime
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def fingerprint(queryset, *timestamp_fields, **extra_aggregates):
+    """
+    Summarise a queryset in one aggregate query.
+
+    Returns ``(count, max(field) for each timestamp field, extra aggregates...)``.
+    """
+    aggregates = {'count': Count('pk')}
+    aggregates.update({f'latest_{i}': Max(field) for i, field in enumerate(timestamp_fields)})
+    aggregates.update(extra_aggregates)
+    row = queryset.order_by().aggregate(**aggregates)
+    return tuple(row[key] for key in aggregates)
+
+
+def make_validators(request, *fingerprints):
+    """ETag and Last-Modified (epoch seconds or ``None``) for this URL, user and data."""
+    parts = [request.get_full_path(), getattr(request.user, 'pk', None), *fingerprints]
+    etag = quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+    timestamps = [value for part in fingerprints for value in part if isinstance(value, datetime)]
+    last_modified = int(max(timestamps).timestamp()) if timestamps else None
+    return etag, last_modified
+
+
+def conditional_response(request, fingerprints, build):
+    """
+    Return 304 when the client's ETag still matches, otherwise ``build()``.
+
+    Either way the response carries the validators and ``Cache-Control:
+    private, no-cache`` so browsers (and the service worker's fetches)
+    revalidate instead of re-downloading.
+    """
+    etag, last_modified = make_validators(request, *fingerprints)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = build()
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Cookie', 'Authorization'))
+    return response
+
+
+class ConditionalListMixin:
+    """
+    ViewSet/ListAPIView mixin answering ``list`` with 304 when nothing changed.
+
+    Views implement ``get_list_fingerprints()`` returning a sequence of
+    ``fingerprint(...)`` tuples that change whenever the list payload would.
+    """
+
+    def get_list_fingerprints(self):
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        return conditional_response(
+            request, self.get_list_fingerprints(), lambda: super(ConditionalListMixin, self).list(request, *args, **kwargs)
+        )
@@ -0,0 +1,109 @@
+"""
+Batched email dispatch for Smart Task Manager.
+
+``send_mail`` opens and closes a connection for every message. ``dispatch``
+instead takes any iterable of ``EmailMessage`` objects (typically a generator
+rendering them from a queryset iterator), groups them into chunks and sends
+each chunk over one persistent backend connection. Chunks are handed to a
+small thread pool, so large sweeps go out over a bounded number of parallel
+connections. Every message is sent individually on its connection, so a bad
+recipient is reported without aborting the rest of the chunk.
+
+Works with any Django email backend (SMTP, locmem, file, console).
+"""
+import logging
+import smtplib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+logger = logging.getLogger(__name__)
+
+# Messages sent per connection before it is closed and the next chunk starts
+EMAIL_BATCH_SIZE = getattr(settings, 'EMAIL_BATCH_SIZE', 200)
+# Parallel connections used for a single dispatch
+EMAIL_MAX_CONNECTIONS = getattr(settings, 'EMAIL_MAX_CONNECTIONS', 4)
+
+
+def build_message(subject, body, to_email, from_email=None):
+    """Plain-text message for one recipient."""
+    return EmailMessage(subject, body, from_email or settings.DEFAULT_FROM_EMAIL, [to_email])
+
+
+def _chunks(messages, size):
+    iterator = iter(messages)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _send_chunk(chunk, backend=None):
+    """Send a chunk over one connection; return ``(sent, failures)``."""
+    sent, failures = 0, []
+    connection = get_connection(backend=backend, fail_silently=False)
+    try:
+        connection.open()
+        for message in chunk:
+            message.connection = connection
+            try:
+                sent += connection.send_messages([message]) or 0
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped us mid-chunk: reconnect once and retry this message
+                try:
+                    connection.close()
+                    connection.open()
+                    sent += connection.send_messages([message]) or 0
+                except Exception as e:
+                    failures.append(_failure(message, e))
+            except Exception as e:
+                failures.append(_failure(message, e))
+    except Exception as e:
+        # Could not connect at all: every unsent message in the chunk failed
+        failures.extend(_failure(message, e) for message in chunk[sent + len(failures):])
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    return sent, failures
+
+
+def _failure(message, error):
+    return {'to': list(message.to), 'subject': message.subject, 'error': str(error), 'exception': error}
+
+
+def dispatch(messages, batch_size=None, max_connections=None, backend=None):
+    """
+    Send ``messages`` in chunks over pooled connections.
+
+    Messages are consumed lazily, and at most ``2 * max_connections`` chunks are
+    rendered ahead of the senders. Returns ``{'sent': int, 'failed': [...]}``
+    with one ``{'to', 'subject', 'error', 'exception'}`` entry per message that
+    could not be delivered.
+    """
+    batch_size = batch_size or EMAIL_BATCH_SIZE
+    max_connections = max_connections or EMAIL_MAX_CONNECTIONS
+    report = {'sent': 0, 'failed': []}
+
+    def collect(futures):
+        for future in futures:
+            sent, failures = future.result()
+            report['sent'] += sent
+            report['failed'].extend(failures)
+
+    with ThreadPoolExecutor(max_workers=max_connections) as pool:
+        in_flight = set()
+        for chunk in _chunks(messages, batch_size):
+            if len(in_flight) >= 2 * max_connections:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            in_flight.add(pool.submit(_send_chunk, chunk, backend))
+        collect(wait(in_flight).done)
+
+    for failure in report['failed']:
+        logger.error(f"Failed to send email to {', '.join(failure['to'])}: {failure['error']}")
+    return report
@@ -0,0 +1,225 @@
+"""
+Pagination classes for Smart Task Manager list endpoints.
+
+``CountModePagination`` behaves like DRF's ``PageNumberPagination`` but lets the
+client choose how the total is computed with ``?count=exact|estimate|none``.
+
+``KeysetPagination`` adds an opt-in cursor mode (``?paginate=cursor`` or any
+``?cursor=`` value) keyed on ``(created_at, id)``. Each page is a single indexed
+range scan with no OFFSET, so deep pages cost the same as the first one.
+"""
+import base64
+import json
+from collections import OrderedDict
+from heapq import merge
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+COUNT_EXACT = 'exact'
+COUNT_ESTIMATE = 'estimate'
+COUNT_NONE = 'none'
+COUNT_MODES = (COUNT_EXACT, COUNT_ESTIMATE, COUNT_NONE)
+
+# Upper bound for the capped COUNT used as an estimate on non-PostgreSQL databases.
+ESTIMATE_COUNT_CAP = 10000
+
+
+def estimate_count(queryset):
+    """
+    Cheap row-count estimate for a queryset.
+
+    PostgreSQL: the planner's row estimate from EXPLAIN (no table scan).
+    Other backends: a COUNT capped at ``ESTIMATE_COUNT_CAP`` rows.
+    """
+    queryset = queryset.order_by()
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    return queryset[:ESTIMATE_COUNT_CAP].count()
+
+
+class CountModePagination(PageNumberPagination):
+    """Page-number pagination with a client-selectable count strategy."""
+    page_size_query_param = 'page_size'
+    max_page_size = settings.REST_FRAMEWORK.get('MAX_PAGE_SIZE', 500)
+    count_query_param = 'count'
+    default_count_mode = COUNT_EXACT
+
+    def get_count_mode(self, request):
+        mode = request.query_params.get(self.count_query_param, self.default_count_mode)
+        return mode if mode in COUNT_MODES else self.default_count_mode
+
+    def get_count(self, queryset):
+        if self.count_mode == COUNT_NONE:
+            return None
+        if self.count_mode == COUNT_ESTIMATE:
+            return estimate_count(queryset)
+        return queryset.count()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.count_mode = self.get_count_mode(request)
+        if self.count_mode == COUNT_EXACT:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        try:
+            page_number = int(request.query_params.get(self.page_query_param, 1))
+        except (TypeError, ValueError):
+            page_number = 0
+        if page_number < 1:
+            raise NotFound('Invalid page.')
+
+        # Fetch one extra row to learn whether a next page exists without a COUNT.
+        offset = (page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        self.page_number = page_number
+        self.has_next = len(rows) > page_size
+        self.count = self.get_count(queryset)
+        return rows[:page_size]
+
+    def get_paginated_response(self, data):
+        if self.count_mode == COUNT_EXACT:
+            return super().get_paginated_response(data)
+        url = self.request.build_absolute_uri()
+        next_url = replace_query_param(url, self.page_query_param, self.page_number + 1) if self.has_next else None
+        previous_url = None
+        if self.page_number == 2:
+            previous_url = remove_query_param(url, self.page_query_param)
+        elif self.page_number > 2:
+            previous_url = replace_query_param(url, self.page_query_param, self.page_number - 1)
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', next_url),
+            ('previous', previous_url),
+            ('results', data),
+        ]))
+
+
+class KeysetPagination(CountModePagination):
+    """
+    Opt-in cursor pagination on ``(created_at, id)``, newest first.
+
+    Without ``?paginate=cursor``/``?cursor=`` the endpoint keeps its page-number
+    behaviour. In cursor mode the count defaults to ``none`` so infinite-scroll
+    clients never pay for it; pass ``?count=estimate`` or ``?count=exact`` to opt in.
+    """
+    cursor_query_param = 'cursor'
+    mode_query_param = 'paginate'
+    ordering = ('-created_at', '-id')
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+
+    def encode_cursor(self, obj, source=None):
+        position = [obj.created_at.isoformat()] + ([] if source is None else [str(source)]) + [str(obj.pk)]
+        return base64.urlsafe_b64encode('|'.join(position).encode()).decode()
+
+    def decode_cursor(self, request, sources=False):
+        """``(created_at, pk)``, or ``(created_at, source, pk)`` for ``paginate_sources``; ``None`` without a cursor."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = base64.urlsafe_b64decode(encoded.encode()).decode().split('|', 2 if sources else 1)
+            created_at, pk = parse_datetime(position[0]), position[-1]
+            source = int(position[1]) if sources else None
+        except (TypeError, ValueError, IndexError, UnicodeDecodeError):
+            created_at = None
+        if created_at is None or not pk:
+            raise NotFound('Invalid cursor.')
+        return (created_at, source, pk) if sources else (created_at, pk)
+
+    def _after_cursor(self, queryset, position, source=None):
+        queryset = queryset.order_by(*self.ordering)
+        if position is None:
+            return queryset
+        created_at, pk = position[0], position[-1]
+        try:
+            if source is not None and source != position[1]:
+                # Rows of another source at the cursor's instant sort wholly before or after it
+                if source < position[1]:
+                    return queryset.filter(created_at__lte=created_at)
+                return queryset.filter(created_at__lt=created_at)
+            return queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+        except ValidationError:
+            raise NotFound('Invalid cursor.')
+
+    def _start_keyset(self, request, sources=False):
+        self.request = request
+        self.keyset = True
+        self.count_mode = request.query_params.get(self.count_query_param, COUNT_NONE)
+        if self.count_mode not in COUNT_MODES:
+            self.count_mode = COUNT_NONE
+        return self.get_page_size(request), self.decode_cursor(request, sources)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = False
+        if not self.use_keyset(request):
+            return super().paginate_queryset(queryset, request, view)
+        page_size, position = self._start_keyset(request)
+        rows = list(self._after_cursor(queryset, position)[:page_size + 1])
+        self._finish_keyset(rows, page_size)
+        self.count = self.get_count(queryset)
+        return rows[:page_size]
+
+    def paginate_sources(self, querysets, request):
+        """
+        Keyset-paginate several querysets as one stream ordered by ``(created_at, source, id)``.
+
+        Ids of different tables can repeat, so rows created at the same instant
+        are ordered by their position in ``querysets`` first and the cursor
+        records that position. Each source contributes at most
+        ``page_size + 1`` rows after the cursor, so merging stays bounded
+        regardless of history size.
+        """
+        page_size, position = self._start_keyset(request, sources=True)
+        streams = [
+            [(source, obj) for obj in self._after_cursor(queryset, position, source)[:page_size + 1]]
+            for source, queryset in enumerate(querysets)
+        ]
+        sort_key = lambda row: (row[1].created_at, row[0], row[1].pk)
+        rows = list(merge(*streams, key=sort_key, reverse=True))[:page_size + 1]
+        self.next_cursor = None
+        if len(rows) > page_size:
+            source, last = rows[page_size - 1]
+            self.next_cursor = self.encode_cursor(last, source)
+        counts = [self.get_count(queryset) for queryset in querysets]
+        self.count = None if None in counts else sum(counts)
+        return [obj for _, obj in rows[:page_size]]
+
+    def _finish_keyset(self, rows, page_size):
+        self.next_cursor = self.encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+
+    def get_paginated_response(self, data):
+        if not getattr(self, 'keyset', False):
+            return super().get_paginated_response(data)
+        next_url = None
+        if self.next_cursor:
+            url = self.request.build_absolute_uri()
+            next_url = replace_query_param(url, self.cursor_query_param, self.next_cursor)
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', next_url),
+            ('previous', None),
+            ('results', data),
+        ]))
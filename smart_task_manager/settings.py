@@ -63,6 +63,8 @@ INSTALLED_APPS = [
     'dashboard',
     'ai_assistant',
     'frontend',
+    'sync',
+    'core',
 ]
 
 MIDDLEWARE = [
@@ -159,6 +161,12 @@ STATICFILES_DIRS = [
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Store each distinct attachment once under its SHA-256 digest (tasks.storage)
+DEDUPLICATE_ATTACHMENTS = True
+# Attachment downloads: '' streams from Django; 'nginx' (X-Accel-Redirect to an internal
+# location aliased to MEDIA_ROOT) or 'apache'/'lighttpd' (X-Sendfile) hand the transfer to the proxy
+SENDFILE_BACKEND = os.getenv('SENDFILE_BACKEND', '')
+SENDFILE_URL_PREFIX = os.getenv('SENDFILE_URL_PREFIX', '/protected-media/')
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -236,6 +244,29 @@ DATABASES['default']['OPTIONS'] = {
     'timeout': 20,
 }
 
+# Cache configuration
+# Project visibility, running timers, typeahead, mention and dashboard caches are
+# invalidated by the process that makes the change, so every web and Celery process
+# must share one cache: REDIS_URL (e.g. redis://localhost:6379/1) is required outside
+# DEBUG. The in-memory fallback is only correct for a single-process runserver.
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'smart_task_manager',
+        }
+    }
+elif DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    raise RuntimeError("REDIS_URL must be set via environment variable: caches must be shared between processes")
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
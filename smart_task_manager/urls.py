@@ -13,7 +13,8 @@ from users.views import (
     TeamPageView,
     InviteApiView,
 )
-from core.views import search_api, recent_activity_api
+from core.views import recent_activity_api
+from core.search import global_search, search_suggestions
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -53,13 +54,15 @@ urlpatterns = [
     path('api/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
     # Conventional /api/ endpoints (tasks, projects, comments, attachments)
     path('api/', include(api_router.urls)),
-    path('api/search/', search_api, name='api-search'),
+    path('api/search/suggest/', search_suggestions, name='api-search-suggest'),
+    path('api/search/', global_search, name='api-search'),
     path('api/activity/recent/', recent_activity_api, name='api-activity-recent'),
     path('api/dashboard/', include('dashboard.urls')),  # API dashboard endpoints
     path('projects/', include('projects.urls')),
     path('tasks/', include('tasks.urls')),
     path('analytics/', include('analytics.urls')),
     path('notifications/', include('notifications.urls')),
+    path('api/sync/', include('sync.urls')),  # Delta-sync change feed
     path('chat/', include('chat.urls')),
     path('payments/', include('payments.urls')),
     path('dashboard/', include('dashboard.urls')),  # HTML dashboard views
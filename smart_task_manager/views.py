@@ -4,7 +4,7 @@ from django.core.cache import cache
 from django.contrib.auth import get_user_model
 from projects.models import Project
 from tasks.models import Task
-from django.db.models import Count, Q
+from analytics.stats import user_stats
 from django.utils import timezone
 from django.contrib.auth import logout
 from django.shortcuts import redirect
@@ -23,21 +23,13 @@ def stats_api(request):
 
     Returns keys expected by the frontend:
     - total_tasks
-    - pending_tasks (maps to Task.status in ['todo'])
+    - pending_tasks (maps to Task.status in ['todo', 'pending'])
     - in_progress_tasks (Task.status == 'in_progress')
     - completed_tasks (Task.status in ['done', 'completed'])
     """
     try:
         user = request.user
 
-        # Build queryset based on role (mirror TaskViewSet logic roughly)
-        qs = Task.objects.all()
-
-        try:
-            profile = getattr(user, 'profile', None)
-        except Exception:
-            profile = None
-
         if not user.is_authenticated:
             # Try to authenticate via JWT (Authorization: Bearer ...)
             try:
@@ -45,7 +37,6 @@ def stats_api(request):
                 auth_result = jwt_auth.authenticate(request)
                 if auth_result is not None:
                     user, _token = auth_result
-                    profile = getattr(user, 'profile', None)
                 else:
                     return JsonResponse({
                         'total_tasks': 0,
@@ -60,26 +51,15 @@ def stats_api(request):
                     'in_progress_tasks': 0,
                     'completed_tasks': 0,
                 })
-        elif profile and hasattr(profile, 'has_role') and profile.has_role('admin', 'manager'):
-            # Admins and managers: all tasks
-            pass
-        elif profile and profile.has_role('developer'):
-            qs = Task.objects.filter(Q(assigned_to=user) | Q(project__owner=user)).distinct()
-        else:
-            # Clients or others: tasks in their projects
-            qs = Task.objects.filter(project__owner=user)
 
-        # Compute counts with status mapping
-        total_tasks = qs.count()
-        pending_tasks = qs.filter(status__in=['todo', 'pending']).count()
-        in_progress_tasks = qs.filter(status='in_progress').count()
-        completed_tasks = qs.filter(status__in=['done', 'completed']).count()
+        # Scoped by role as in TaskViewSet (see analytics.stats.user_stats)
+        stats = user_stats(user)
 
         return JsonResponse({
-            'total_tasks': total_tasks,
-            'pending_tasks': pending_tasks,
-            'in_progress_tasks': in_progress_tasks,
-            'completed_tasks': completed_tasks,
+            'total_tasks': stats['total'],
+            'pending_tasks': stats['pending'],
+            'in_progress_tasks': stats['in_progress'],
+            'completed_tasks': stats['completed'],
         })
     except Exception:
         # Safe fallback
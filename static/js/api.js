@@ -259,6 +259,13 @@ async function getTasks() {
     return await apiFetch('/tasks/api/tasks/');
 }
 
+// Kanban board: { limit, columns: [{ status, label, total, tasks }] } with at
+// most `limit` tasks per column; filters: { status, project }
+async function getTaskBoard(filters = {}, limit = 20) {
+    const params = new URLSearchParams({ ...filters, limit });
+    return await apiFetch(`/tasks/api/tasks/board/?${params.toString()}`);
+}
+
 async function getTaskById(taskId) {
     return await apiFetch(`/tasks/api/tasks/${taskId}/`);
 }
@@ -360,12 +367,60 @@ async function markAllNotificationsRead() {
     });
 }
 
+// Resumable attachment upload: sends the file in chunks and, after a dropped
+// connection, asks the server for its offset and carries on from there.
+async function uploadAttachment(taskId, file, { retries = 5, onProgress } = {}) {
+    const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+    const checksum = Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, '0')).join('');
+    const session = await apiFetch('/tasks/api/uploads/', {
+        method: 'POST',
+        body: JSON.stringify({ task: taskId, filename: file.name, size: file.size, checksum }),
+    });
+    let offset = 0;
+    let failures = 0;
+    while (offset < file.size) {
+        try {
+            const result = await apiFetch(`/tasks/api/uploads/${session.id}/chunk/`, {
+                method: 'PUT',
+                headers: { 'Content-Type': 'application/octet-stream', 'Upload-Offset': String(offset) },
+                body: file.slice(offset, offset + session.chunk_size),
+            });
+            offset = result.offset;
+            failures = 0;
+            if (onProgress) onProgress(offset, file.size);
+        } catch (error) {
+            // 400 means the file itself was rejected; retrying will not help
+            if (error.status === 400 || ++failures > retries) throw error;
+            await new Promise((resolve) => setTimeout(resolve, 1000 * failures));
+            offset = (await apiFetch(`/tasks/api/uploads/${session.id}/`)).offset;
+        }
+    }
+    return await apiFetch(`/tasks/api/uploads/${session.id}/complete/`, { method: 'POST' });
+}
+
+// Delta sync: call without a token after loading collections, then poll with
+// the returned token. Apply changes.<collection>.updated / .deleted; on
+// reset, reload the collections. Repeat while has_more is true.
+async function getChanges(since = null, limit = 500) {
+    const params = new URLSearchParams({ limit });
+    if (since) params.set('since', since);
+    return await apiFetch(`/api/sync/changes/?${params.toString()}`);
+}
+
 // Global Search
 async function globalSearch(query, type = 'all', limit = 5) {
     const params = new URLSearchParams({ q: query, type, limit }).toString();
     return await apiFetch(`/api/search/?${params}`);
 }
 
+// Typeahead suggestions: pass an AbortController signal so a newer keystroke
+// can cancel the request in flight; seq is echoed back to spot stale replies.
+async function suggestSearch(query, { limit = 5, seq = null, signal = undefined } = {}) {
+    const params = new URLSearchParams({ q: query, limit });
+    if (seq !== null) params.set('seq', seq);
+    return await apiFetch(`/api/search/suggest/?${params.toString()}`, { signal });
+}
+
 // Namespaced global API for templates using window.API
 window.API = {
     auth: {
@@ -420,11 +475,13 @@ window.API = {
     },
     tasks: {
         getAll: getTasks,
+        getBoard: getTaskBoard,
         getById: getTaskById,
         create: createTask,
         update: updateTask,
         patch: patchTask,
         delete: deleteTask,
+        uploadAttachment,
     },
     projects: {
         getAll: getProjects,
@@ -446,6 +503,10 @@ window.API = {
     },
     search: {
         global: globalSearch,
+        suggest: suggestSearch,
+    },
+    sync: {
+        getChanges,
     },
 };
 
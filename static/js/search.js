@@ -1,11 +1,15 @@
 /**
  * Global Search System
- * Real-time search with debouncing across tasks, projects, and users
+ * Typeahead suggestions while typing; full search across tasks, projects,
+ * comments, messages and users on Enter
  */
 
 let searchDebounceTimer = null;
-const SEARCH_DEBOUNCE_DELAY = 300; // ms
+let suggestController = null;
+let suggestSeq = 0;
+const SUGGEST_DEBOUNCE_DELAY = 120; // ms
 const MIN_SEARCH_LENGTH = 2;
+const SUGGESTION_ICONS = { task: 'fa-tasks', project: 'fa-folder', member: 'fa-user' };
 
 function initializeSearch() {
     const searchInput = document.getElementById('global-search-input') || document.getElementById('search-input');
@@ -16,27 +20,36 @@ function initializeSearch() {
         return;
     }
     
-    // Input event with debouncing
+    // Input event: debounced suggestions, superseded requests are cancelled
     searchInput.addEventListener('input', (e) => {
         const query = e.target.value.trim();
         
-        // Clear previous timer
         clearTimeout(searchDebounceTimer);
+        cancelSuggestions();
         
-        if (query.length < MIN_SEARCH_LENGTH) {
+        if (!query) {
             hideSearchResults();
             return;
         }
         
-        // Debounce search
         searchDebounceTimer = setTimeout(() => {
-            performSearch(query);
-        }, SEARCH_DEBOUNCE_DELAY);
+            performSuggest(query);
+        }, SUGGEST_DEBOUNCE_DELAY);
     });
     
-    // Close on Escape
+    // Full search on Enter, close on Escape
     searchInput.addEventListener('keydown', (e) => {
-        if (e.key === 'Escape') {
+        if (e.key === 'Enter') {
+            e.preventDefault();
+            const query = searchInput.value.trim();
+            clearTimeout(searchDebounceTimer);
+            cancelSuggestions();
+            if (query.length >= MIN_SEARCH_LENGTH) {
+                performSearch(query);
+            }
+        } else if (e.key === 'Escape') {
+            clearTimeout(searchDebounceTimer);
+            cancelSuggestions();
             hideSearchResults();
             searchInput.blur();
         }
@@ -52,6 +65,55 @@ function initializeSearch() {
     console.log('Search initialized');
 }
 
+function cancelSuggestions() {
+    if (suggestController) {
+        suggestController.abort();
+        suggestController = null;
+    }
+}
+
+async function performSuggest(query) {
+    const searchResults = document.getElementById('search-results');
+    if (!searchResults) return;
+    
+    const seq = ++suggestSeq;
+    suggestController = new AbortController();
+    try {
+        const data = await window.API.search.suggest(query, { seq, signal: suggestController.signal });
+        // A reply to an older keystroke that was not aborted in time
+        if (!data || String(data.seq) !== String(suggestSeq)) return;
+        displaySuggestions(data.results || []);
+    } catch (error) {
+        if (error.name !== 'AbortError') {
+            console.error('Suggestion error:', error);
+        }
+    }
+}
+
+function displaySuggestions(suggestions) {
+    const searchResults = document.getElementById('search-results');
+    if (!suggestions.length) {
+        hideSearchResults();
+        return;
+    }
+    
+    let html = '<div class="search-section">';
+    suggestions.forEach(suggestion => {
+        html += createSearchItem({
+            type: suggestion.type,
+            icon: SUGGESTION_ICONS[suggestion.type] || 'fa-search',
+            title: suggestion.label,
+            meta: 'Press Enter for full search',
+            url: suggestion.url
+        });
+    });
+    html += '</div>';
+    
+    searchResults.innerHTML = html;
+    searchResults.style.display = 'block';
+    bindSearchItems(searchResults);
+}
+
 async function performSearch(query) {
     const searchResults = document.getElementById('search-results');
     
@@ -121,6 +183,38 @@ function displaySearchResults(data, query) {
         html += '</div>';
     }
     
+    // Comments Section
+    if (data.comments && data.comments.length > 0) {
+        html += '<div class="search-section">';
+        html += '<div class="search-section-title">Comments</div>';
+        data.comments.forEach(comment => {
+            html += createSearchItem({
+                type: 'comment',
+                icon: 'fa-comment',
+                title: truncate(comment.content, 60),
+                meta: comment.task,
+                url: comment.url
+            });
+        });
+        html += '</div>';
+    }
+    
+    // Chat Messages Section
+    if (data.messages && data.messages.length > 0) {
+        html += '<div class="search-section">';
+        html += '<div class="search-section-title">Messages</div>';
+        data.messages.forEach(message => {
+            html += createSearchItem({
+                type: 'message',
+                icon: 'fa-comments',
+                title: truncate(message.content, 60),
+                meta: `${message.room} · ${message.sender}`,
+                url: message.url
+            });
+        });
+        html += '</div>';
+    }
+    
     // Users Section (admin/manager only)
     if (data.users && data.users.length > 0) {
         html += '<div class="search-section">';
@@ -139,8 +233,10 @@ function displaySearchResults(data, query) {
     
     searchResults.innerHTML = html;
     searchResults.style.display = 'block';
-    
-    // Add click handlers
+    bindSearchItems(searchResults);
+}
+
+function bindSearchItems(searchResults) {
     searchResults.querySelectorAll('.search-item').forEach(item => {
         item.addEventListener('click', (e) => {
             e.preventDefault();
@@ -0,0 +1,154 @@
+"""
+Delta-sync change feed.
+
+A client loads its collections once, then polls ``change_feed(user, token)``
+and applies what comes back: the current state of every task, project, comment
+and notification it can see that changed since ``token``, plus tombstone ids
+for those that were deleted or that it can no longer see. The cost of a poll
+follows the number of changes, not the size of the collections.
+
+Tokens are signed change-log cursors. Entries are scoped by project and by
+user, so a poll is an index range scan on ``(project_id, id)`` and
+``(user_id, id)``; several entries for one object collapse into one result.
+When the entries after a token have been pruned the feed answers with
+``reset``, and the client reloads its collections before continuing.
+
+Log ids are handed out when an entry is inserted, not when its transaction
+commits (on PostgreSQL a lower id can become visible after a higher one), so
+a token never moves past entries younger than ``SYNC_SETTLE_SECONDS``: they are
+listed as soon as they are seen and listed again until they settle. Applying a
+change twice is harmless since the feed always returns current state.
+
+A client that gains access to a project receives the project itself and should
+fetch that project's tasks; one that gets a project tombstone drops its tasks.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+
+from notifications.models import Notification
+from notifications.serializers import NotificationSerializer
+from projects.models import Project
+from projects.serializers import ProjectSerializer
+from projects.utils import visible_project_ids
+from tasks.models import Comment
+from tasks.serializers import TaskSerializer, CommentSerializer
+from tasks.utils import visible_tasks, annotate_task_counts
+from .models import ChangeLogEntry
+
+SYNC_PAGE_SIZE = getattr(settings, 'SYNC_PAGE_SIZE', 500)
+SYNC_MAX_PAGE_SIZE = 2000
+# Longer than any transaction that writes to the change log
+SYNC_SETTLE_SECONDS = getattr(settings, 'SYNC_SETTLE_SECONDS', 10)
+TOKEN_SALT = 'sync.change-feed'
+
+
+class InvalidSyncToken(Exception):
+    pass
+
+
+# kind -> (response key, visible queryset for a user, serializer)
+FEEDS = {
+    'task': (
+        'tasks',
+        lambda user: annotate_task_counts(visible_tasks(user).select_related('project', 'assigned_to')),
+        TaskSerializer,
+    ),
+    'project': (
+        'projects',
+        lambda user: Project.objects.filter(id__in=visible_project_ids(user)).select_related('owner'),
+        ProjectSerializer,
+    ),
+    'comment': (
+        'comments',
+        lambda user: Comment.objects.filter(task__in=visible_tasks(user)).select_related('author', 'task'),
+        CommentSerializer,
+    ),
+    'notification': (
+        'notifications',
+        lambda user: Notification.objects.filter(user=user),
+        NotificationSerializer,
+    ),
+}
+
+
+def make_token(cursor):
+    return signing.dumps(cursor, salt=TOKEN_SALT)
+
+
+def read_token(token):
+    try:
+        cursor = signing.loads(token, salt=TOKEN_SALT)
+    except signing.BadSignature:
+        raise InvalidSyncToken(token)
+    if not isinstance(cursor, int) or cursor < 0:
+        raise InvalidSyncToken(token)
+    return cursor
+
+
+def _empty_changes():
+    return {key: {'updated': [], 'deleted': []} for key, _, _ in FEEDS.values()}
+
+
+def change_feed(user, since=None, limit=SYNC_PAGE_SIZE, context=None):
+    """
+    Changes visible to ``user`` after the ``since`` token.
+
+    Returns ``{'token', 'has_more', 'reset', 'changes'}`` where ``changes`` maps
+    each collection to ``{'updated': [serialized rows], 'deleted': [ids]}``.
+    Without ``since`` (or after pruning) nothing is listed and ``reset`` is set:
+    the client loads its collections and continues from the returned token.
+    Raises ``InvalidSyncToken`` for a token this server did not issue.
+    """
+    settling = timezone.now() - timedelta(seconds=SYNC_SETTLE_SECONDS)
+    bounds = ChangeLogEntry.objects.aggregate(
+        latest=Max('id'), oldest=Min('id'), settled=Max('id', filter=Q(created_at__lte=settling)),
+    )
+    latest = bounds['latest'] or 0
+    # Entries up to here were written long enough ago for their transactions to have committed
+    settled = bounds['settled'] if bounds['settled'] is not None else (bounds['oldest'] or 1) - 1
+    cursor = read_token(since) if since else None
+    if cursor is None or (bounds['oldest'] is not None and cursor < bounds['oldest'] - 1):
+        return {'token': make_token(settled), 'has_more': False, 'reset': True, 'changes': _empty_changes()}
+
+    limit = max(1, min(limit, SYNC_MAX_PAGE_SIZE))
+    rows = list(
+        ChangeLogEntry.objects.filter(
+            Q(project_id__in=visible_project_ids(user)) | Q(user_id=user.pk),
+            id__gt=cursor,
+            id__lte=latest,
+        ).order_by('id').values_list('id', 'kind', 'object_id', 'deleted')[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    token = max(cursor, min(rows[-1][0] if has_more else latest, settled))
+    # A full page of unsettled entries is listed again on the next poll, not fetched in a loop
+    has_more = has_more and token > cursor
+
+    # The last entry for an object decides whether it is listed or tombstoned
+    state = {}
+    for _, kind, object_id, deleted in rows:
+        state[kind, object_id] = deleted
+
+    changes = _empty_changes()
+    for kind, (key, visible, serializer_class) in FEEDS.items():
+        ids = {object_id for (entry_kind, object_id), deleted in state.items() if entry_kind == kind and not deleted}
+        live = list(visible(user).filter(pk__in=ids)) if ids else []
+        found = {obj.pk for obj in live}
+        changes[key]['updated'] = serializer_class(live, many=True, context=context or {}).data
+        # Deleted, or changed in a way that took it out of this user's sight
+        changes[key]['deleted'] = sorted(
+            str(object_id)
+            for (entry_kind, object_id), deleted in state.items()
+            if entry_kind == kind and (deleted or object_id not in found)
+        )
+
+    return {
+        'token': make_token(token),
+        'has_more': has_more,
+        'reset': False,
+        'changes': changes,
+    }
@@ -0,0 +1,82 @@
+"""
+Writing the change log.
+
+Signal receivers in ``sync.signals`` record single saves and deletes. Code
+paths that bypass model signals (``bulk_create``, ``bulk_update``,
+``QuerySet.update``) call ``record`` themselves with the ``*_entries`` helpers.
+
+Entries are inserted inside the caller's transaction, so a rollback drops them
+together with the change they describe. Inside ``batched()`` they are buffered
+and written with one ``bulk_create`` when the block exits, which keeps bulk
+deletes (one ``post_delete`` per row) to a single insert.
+"""
+import threading
+from contextlib import contextmanager
+
+from .models import ChangeLogEntry
+
+CHANGE_LOG_BATCH_SIZE = 500
+
+_local = threading.local()
+
+
+def entry(kind, object_id, project_id=None, user_id=None, deleted=False):
+    return ChangeLogEntry(kind=kind, object_id=object_id, project_id=project_id, user_id=user_id, deleted=deleted)
+
+
+def record(entries):
+    """Insert change-log entries now, or queue them while ``batched()`` is active."""
+    entries = list(entries)
+    if not entries:
+        return
+    buffer = getattr(_local, 'buffer', None)
+    if buffer is not None:
+        buffer.extend(entries)
+    else:
+        ChangeLogEntry.objects.bulk_create(entries, batch_size=CHANGE_LOG_BATCH_SIZE)
+
+
+@contextmanager
+def batched():
+    """Collect entries recorded in the block and insert them with one query at the end."""
+    if getattr(_local, 'buffer', None) is not None:
+        yield  # already inside an outer batch
+        return
+    _local.buffer = []
+    try:
+        yield
+        entries = _local.buffer
+    finally:
+        _local.buffer = None
+    record(entries)
+
+
+def task_entries(task, deleted=False, previous_project_id=None, previous_assignee_id=None):
+    """
+    Entries for one task change.
+
+    A task that moved project or changed assignee also gets an entry scoped to
+    where it used to be, so whoever lost sight of it receives a tombstone.
+    """
+    yield entry('task', task.pk, task.project_id, task.assigned_to_id, deleted)
+    if previous_project_id not in (None, task.project_id):
+        yield entry('task', task.pk, previous_project_id, None, deleted)
+    if previous_assignee_id not in (None, task.assigned_to_id):
+        yield entry('task', task.pk, None, previous_assignee_id, deleted)
+
+
+def comment_entries(comment, deleted=False):
+    task = comment.task
+    yield entry('comment', comment.pk, task.project_id, task.assigned_to_id, deleted)
+
+
+def project_entries(project, deleted=False, user_ids=()):
+    """Entries for a project; ``user_ids`` are users who gained or lost access outside the project scope."""
+    yield entry('project', project.pk, project.pk, None, deleted)
+    for user_id in user_ids:
+        if user_id is not None:
+            yield entry('project', project.pk, None, user_id, deleted)
+
+
+def notification_entries(notification, deleted=False):
+    yield entry('notification', notification.pk, None, notification.user_id, deleted)
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-17 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('task', 'Task'), ('project', 'Project'), ('comment', 'Comment'), ('notification', 'Notification')], max_length=20)),
+                ('object_id', models.UUIDField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('project_id', models.UUIDField(blank=True, null=True)),
+                ('user_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['project_id', 'id'], name='sync_change_project_4d127c_idx'), models.Index(fields=['user_id', 'id'], name='sync_change_user_id_54cc24_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import models
+
+
+class ChangeLogEntry(models.Model):
+    """
+    One row per created, updated or deleted object.
+
+    The auto-increment ``id`` is the sync cursor. ``project_id``/``user_id``
+    record who may see the change; they are plain columns rather than foreign
+    keys so tombstones outlive the project or user they were scoped to.
+    """
+    KIND_CHOICES = [
+        ('task', 'Task'),
+        ('project', 'Project'),
+        ('comment', 'Comment'),
+        ('notification', 'Notification'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.UUIDField()
+    deleted = models.BooleanField(default=False)
+    project_id = models.UUIDField(blank=True, null=True)
+    user_id = models.BigIntegerField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['project_id', 'id']),
+            models.Index(fields=['user_id', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} {'deleted' if self.deleted else 'changed'} (#{self.id})"
@@ -0,0 +1,91 @@
+"""
+Change-log receivers for tasks, comments, projects and notifications.
+
+``tasks.graph`` and ``projects.signals`` already look up the stored project,
+assignee, owner and members before a change; the receivers here reuse what
+they stash on the instance instead of querying again.
+"""
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from notifications.models import Notification
+from projects.models import Project
+from tasks.models import Task, Comment
+from .log import record, task_entries, comment_entries, project_entries, notification_entries
+
+
+def _deleted_directly(origin, model):
+    """True unless the row went away as a cascade of its parent's deletion."""
+    if isinstance(origin, QuerySet):
+        return origin.model is model
+    return origin is None or isinstance(origin, model)
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, **kwargs):
+    record(task_entries(
+        instance,
+        previous_project_id=getattr(instance, '_previous_project_id', None),
+        previous_assignee_id=getattr(instance, '_previous_assignee_id', None),
+    ))
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    record(task_entries(instance, deleted=True))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, **kwargs):
+    record(comment_entries(instance))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, origin=None, **kwargs):
+    # Clients drop a task's comments with the task's own tombstone
+    if _deleted_directly(origin, Comment):
+        record(comment_entries(instance, deleted=True))
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, created, **kwargs):
+    previous_owner_id = getattr(instance, '_previous_owner_id', None)
+    user_ids = [instance.owner_id] if created else []
+    if previous_owner_id not in (None, instance.owner_id):
+        user_ids += [instance.owner_id, previous_owner_id]
+    record(project_entries(instance, user_ids=user_ids))
+
+
+@receiver(post_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    # The project is no longer visible to anyone, so scope the tombstone to its users
+    user_ids = [instance.owner_id, *getattr(instance, '_deleted_member_ids', ())]
+    record(project_entries(instance, deleted=True, user_ids=user_ids))
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def project_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if action == 'post_clear':
+        if reverse:
+            pk_set = getattr(instance, '_cleared_project_ids', ())
+        else:
+            pk_set = getattr(instance, '_cleared_member_ids', ())
+    if reverse:
+        # user.projects_joined.add(...): one user, several projects
+        projects = [Project(pk=pk) for pk in pk_set or ()]
+        record(entry for project in projects for entry in project_entries(project, user_ids=[instance.pk]))
+    else:
+        record(project_entries(instance, user_ids=pk_set or ()))
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, **kwargs):
+    record(notification_entries(instance))
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    record(notification_entries(instance, deleted=True))
@@ -0,0 +1,26 @@
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ChangeLogEntry
+
+logger = logging.getLogger(__name__)
+
+SYNC_RETENTION_DAYS = getattr(settings, 'SYNC_RETENTION_DAYS', 30)
+
+
+@shared_task
+def prune_change_log(retention_days=None):
+    """
+    Drop change-log entries older than the retention window.
+
+    Clients holding a token from before the cut are told to reset (see
+    ``sync.feed.change_feed``).
+    """
+    cutoff = timezone.now() - timedelta(days=retention_days or SYNC_RETENTION_DAYS)
+    deleted, _ = ChangeLogEntry.objects.filter(created_at__lt=cutoff).delete()
+    logger.info(f"Pruned {deleted} change log entries older than {cutoff:%Y-%m-%d}")
+    return deleted
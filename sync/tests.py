@@ -0,0 +1,111 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from notifications.models import Notification
+from projects.models import Project
+from tasks.models import Task, Comment
+from .feed import read_token
+from .models import ChangeLogEntry
+from .tasks import prune_change_log
+
+User = get_user_model()
+
+URL = '/api/sync/changes/'
+
+
+class ChangeFeedTest(TestCase):
+    """Test the delta-sync change feed."""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(email='sync-owner@example.com', password='testpass123')
+        self.member = User.objects.create_user(email='sync-member@example.com', password='testpass123')
+        self.project = Project.objects.create(name='Sync', owner=self.owner)
+        self.project.members.add(self.member)
+        self.kept = Task.objects.create(title='Kept', project=self.project)
+        self.removed = Task.objects.create(title='Removed', project=self.project)
+
+    def feed(self, user, since=None, **params):
+        self.client.force_login(user)
+        if since:
+            params['since'] = since
+        response = self.client.get(URL, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def settle(self):
+        # Age the log past SYNC_SETTLE_SECONDS, as if every writer had committed long ago
+        ChangeLogEntry.objects.update(created_at=timezone.now() - timedelta(minutes=1))
+
+    def test_changes_and_tombstones_since_token(self):
+        self.settle()
+        token = self.feed(self.member)['token']
+        self.kept.title = 'Renamed'
+        self.kept.save()
+        self.kept.status = 'done'
+        self.kept.save()
+        removed_id = str(self.removed.pk)
+        self.removed.delete()
+        comment = Comment.objects.create(task=self.kept, author=self.owner, content='hi')
+        Notification.objects.create(user=self.member, message='ping')
+        Notification.objects.create(user=self.owner, message='not for the member')
+
+        feed = self.feed(self.member, token)
+        changes = feed['changes']
+        self.assertFalse(feed['reset'])
+        self.assertEqual([(t['id'], t['status']) for t in changes['tasks']['updated']], [(str(self.kept.pk), 'done')])
+        self.assertEqual(changes['tasks']['deleted'], [removed_id])
+        self.assertEqual([c['id'] for c in changes['comments']['updated']], [str(comment.pk)])
+        self.assertEqual([n['message'] for n in changes['notifications']['updated']], ['ping'])
+
+        # Entries that may still have uncommitted neighbours are listed again until they settle
+        self.assertEqual(read_token(feed['token']), read_token(token))
+        self.assertEqual(self.feed(self.member, feed['token'])['changes'], changes)
+        self.settle()
+        feed = self.feed(self.member, token)
+        self.assertEqual(feed['changes'], changes)
+        # Nothing new since the returned token
+        later = self.feed(self.member, feed['token'])['changes']
+        self.assertFalse(any(group['updated'] or group['deleted'] for group in later.values()))
+
+    def test_lost_access_becomes_tombstone(self):
+        self.settle()
+        token = self.feed(self.member)['token']
+        self.project.members.remove(self.member)
+        changes = self.feed(self.member, token)['changes']
+        self.assertEqual(changes['projects']['deleted'], [str(self.project.pk)])
+
+        other = User.objects.create_user(email='sync-other@example.com', password='testpass123')
+        self.kept.assigned_to = other
+        self.kept.save()
+        self.settle()
+        token = self.feed(other)['token']
+        self.kept.assigned_to = self.owner
+        self.kept.save()
+        self.assertEqual(self.feed(other, token)['changes']['tasks']['deleted'], [str(self.kept.pk)])
+
+    def test_paging_pruning_and_bad_tokens(self):
+        self.settle()
+        token = self.feed(self.owner)['token']
+        for i in range(3):
+            Task.objects.create(title=f'New {i}', project=self.project)
+        unsettled = self.feed(self.owner, token, limit=2)
+        self.assertEqual((read_token(unsettled['token']), unsettled['has_more']), (read_token(token), False))
+        self.settle()
+        first = self.feed(self.owner, token, limit=2)
+        self.assertTrue(first['has_more'])
+        self.assertEqual(len(first['changes']['tasks']['updated']), 2)
+        second = self.feed(self.owner, first['token'], limit=2)
+        self.assertFalse(second['has_more'])
+        self.assertEqual(len(second['changes']['tasks']['updated']), 1)
+
+        ChangeLogEntry.objects.update(created_at=timezone.now() - timedelta(days=60))
+        Task.objects.create(title='After prune', project=self.project)
+        prune_change_log()
+        self.assertTrue(self.feed(self.owner, token)['reset'])
+        self.assertFalse(self.feed(self.owner, second['token'])['reset'])
+
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get(URL, {'since': 'forged'}).status_code, 400)
@@ -0,0 +1,32 @@
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework import status
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .feed import change_feed, InvalidSyncToken, SYNC_PAGE_SIZE
+
+
+class ChangeFeedView(APIView):
+    """
+    GET /api/sync/changes/?since=<token>&limit=<n>
+
+    Tasks, projects, comments and notifications changed since ``token``; see
+    ``sync.feed.change_feed`` for the response shape.
+    """
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication, SessionAuthentication]
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', SYNC_PAGE_SIZE))
+        except ValueError:
+            return Response({'error': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            feed = change_feed(
+                request.user, request.query_params.get('since'), limit, context={'request': request}
+            )
+        except InvalidSyncToken:
+            return Response({'error': 'Invalid sync token.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(feed)
@@ -1,7 +1,7 @@
 """
 Subtasks and Time Tracking Models
 """
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from tasks.models import Task
 from django.core.validators import MinValueValidator
@@ -40,6 +40,11 @@ class Subtask(models.Model):
     def __str__(self):
         return f"{self.parent_task.title} > {self.title}"
     
+    def save(self, *args, **kwargs):
+        # The parent task's rollups (tasks.progress) are updated in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
     @property
     def completion_percentage(self):
         """Calculate completion based on time"""
@@ -81,7 +86,9 @@ class TimeEntry(models.Model):
             delta = self.end_time - self.start_time
             self.duration_minutes = int(delta.total_seconds() / 60)
             self.is_running = False
-        super().save(*args, **kwargs)
+        # The task's logged_minutes rollup (tasks.progress) is updated in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
     
     def stop(self):
         """Stop the timer"""
@@ -123,25 +130,7 @@ class TaskTemplate(models.Model):
     
     def create_task_from_template(self, project, assigned_to=None, due_date=None):
         """Create a task from this template"""
-        task = Task.objects.create(
-            title=self.name,
-            description=self.description,
-            project=project,
-            assigned_to=assigned_to or self.created_by,
-            priority=self.default_priority,
-            due_date=due_date,
-            estimated_hours=self.estimated_hours or 0
-        )
-        
-        # Create subtasks from checklist
-        for i, item in enumerate(self.checklist_items):
-            Subtask.objects.create(
-                parent_task=task,
-                title=item,
-                order=i
-            )
-        
-        self.usage_count += 1
-        self.save(update_fields=['usage_count'])
-        
+        from .bulk import instantiate_template
+        task = instantiate_template(self, [project], assigned_to=assigned_to, due_date=due_date)[0]
+        self.refresh_from_db(fields=['usage_count'])
         return task
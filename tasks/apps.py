@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
+
+    def ready(self):
+        import tasks.graph
+        import tasks.blobs
+        import tasks.previews
+        import tasks.progress
+        import tasks.mentions
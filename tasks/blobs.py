@@ -0,0 +1,116 @@
+"""
+Reference counting and garbage collection for deduplicated attachment blobs.
+
+Every ``Attachment.file`` and ``ChatMessage.attachment`` that points into the
+content-addressed store (``tasks.storage``) holds one reference on its ``Blob``.
+Receivers keep ``Blob.ref_count`` current as rows are created, repointed and
+deleted; ``collect_orphan_blobs`` removes blobs nobody has used for a grace
+period. Files outside the store (uploaded before it existed) are not tracked.
+"""
+import logging
+from datetime import timedelta
+
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.utils import timezone
+
+from chat.models import ChatMessage
+from .models import Attachment, Blob
+from .storage import attachment_storage, is_blob
+
+logger = logging.getLogger(__name__)
+
+# Unreferenced blobs are kept this long, so an upload that has stored its file
+# but not yet saved its row does not lose the blob underneath it
+BLOB_GRACE_PERIOD = timedelta(hours=1)
+BLOB_GC_BATCH_SIZE = 500
+
+# model -> name of its file field
+BLOB_FIELDS = {
+    Attachment: 'file',
+    ChatMessage: 'attachment',
+}
+
+
+def _retain(name):
+    if is_blob(name):
+        Blob.objects.filter(name=name).update(ref_count=F('ref_count') + 1, last_used_at=timezone.now())
+
+
+def _release(name):
+    if is_blob(name):
+        Blob.objects.filter(name=name, ref_count__gt=0).update(
+            ref_count=F('ref_count') - 1, last_used_at=timezone.now()
+        )
+
+
+def remember_stored_file(sender, instance, **kwargs):
+    field = BLOB_FIELDS[sender]
+    instance._stored_file_name = None
+    if not instance._state.adding:
+        instance._stored_file_name = sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+
+
+def file_saved(sender, instance, created, **kwargs):
+    name = getattr(instance, BLOB_FIELDS[sender]).name or None
+    previous = None if created else getattr(instance, '_stored_file_name', None)
+    if name != previous:
+        _retain(name)
+        _release(previous)
+
+
+def file_deleted(sender, instance, **kwargs):
+    _release(getattr(instance, BLOB_FIELDS[sender]).name)
+
+
+for model in BLOB_FIELDS:
+    pre_save.connect(remember_stored_file, sender=model, dispatch_uid=f'blob_pre_save_{model.__name__}')
+    post_save.connect(file_saved, sender=model, dispatch_uid=f'blob_post_save_{model.__name__}')
+    post_delete.connect(file_deleted, sender=model, dispatch_uid=f'blob_post_delete_{model.__name__}')
+
+
+def referenced_blob_names(names):
+    """The subset of ``names`` still used by an attachment or chat message."""
+    used = set()
+    for model, field in BLOB_FIELDS.items():
+        used.update(model.objects.filter(**{f'{field}__in': names}).values_list(field, flat=True))
+    return used
+
+
+def collect_orphan_blobs(grace=BLOB_GRACE_PERIOD, batch_size=BLOB_GC_BATCH_SIZE):
+    """
+    Delete blobs with no references that have been idle for ``grace``.
+
+    Counts are re-checked against the attachment tables first; a blob that is
+    still referenced (a missed signal, a raw UPDATE) gets its count repaired
+    instead of being deleted. Returns the number of blobs removed.
+    """
+    storage = attachment_storage()
+    cutoff = timezone.now() - grace
+    removed = 0
+    last_name = ''
+    while True:
+        names = list(
+            Blob.objects.filter(ref_count=0, last_used_at__lt=cutoff, name__gt=last_name)
+            .order_by('name').values_list('name', flat=True)[:batch_size]
+        )
+        if not names:
+            break
+        last_name = names[-1]
+        used = referenced_blob_names(names)
+        for name in used:
+            count = sum(
+                model.objects.filter(**{field: name}).count() for model, field in BLOB_FIELDS.items()
+            )
+            Blob.objects.filter(name=name).update(ref_count=count)
+        for name in names:
+            if name in used:
+                continue
+            # Conditional delete: an upload that reused the blob meanwhile has touched last_used_at
+            deleted, _ = Blob.objects.filter(name=name, ref_count=0, last_used_at__lt=cutoff).delete()
+            if deleted:
+                storage.delete(name)
+                removed += 1
+    if removed:
+        logger.info(f"Removed {removed} orphaned attachment blobs")
+    return removed
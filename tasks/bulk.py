@@ -0,0 +1,421 @@
+"""
+Bulk task operations used by the TaskViewSet ``bulk_*`` actions.
+
+Each operation validates every item, persists the valid ones with a single
+``bulk_create``/``bulk_update``/``UPDATE``/``DELETE`` inside one transaction and
+reports a result per item, so one bad row does not sink the whole batch.
+Notification, audit, webhook and email fan-out runs once per batch after commit
+instead of once per row through model signals; ``tasks_written`` refreshes the
+search documents of the batch with one upsert, invalidates typeahead scopes,
+dashboard statistics and the assignees' productivity reports once and moves the
+leaderboard by the difference of the whole batch.
+"""
+
+import logging
+from collections import defaultdict
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework import serializers
+
+from core.search_index import index_tasks
+from core.typeahead import tasks_changed
+from analytics import leaderboard, productivity, rollups, stats
+from notifications.models import Notification, send_realtime_notification
+from sync.log import record, batched, task_entries, notification_entries
+from .models import DONE_STATUSES, Task, Tag, Subtask, TaskTemplate
+from .graph import invalidate_project_graphs, invalidate_task_graphs
+
+logger = logging.getLogger(__name__)
+
+BULK_MAX_ITEMS = 1000
+BULK_BATCH_SIZE = 500
+
+
+def _ok(index, task_id):
+    return {'index': index, 'id': str(task_id), 'success': True}
+
+
+def _error(index, errors, task_id=None):
+    result = {'index': index, 'success': False, 'errors': errors}
+    if task_id is not None:
+        result['id'] = str(task_id)
+    return result
+
+
+def tasks_written(tasks, previous=None, before=None):
+    """
+    Bring what is derived from ``tasks`` up to date after a write that skipped
+    the model signals (``bulk_create``, ``bulk_update``, ``UPDATE``).
+
+    ``previous`` maps the pk of an updated task to its old ``(project_id,
+    assigned_to_id)`` and ``before`` is the ``leaderboard.snapshot`` of the
+    updated tasks taken before the change. Call it inside the transaction of
+    the write.
+    """
+    index_tasks(tasks, previous)
+    tasks_changed(tasks, previous)
+    stats.tasks_changed(tasks, previous)
+    productivity.tasks_changed(tasks, previous)
+    leaderboard.tasks_changed(tasks, before)
+    rollups.tasks_changed(tasks, previous)
+
+
+def preload_related_objects(serializer, items):
+    """
+    Load every object referenced by primary key in ``items`` with one query per model.
+
+    Returns a ``{model: {str(pk): instance}}`` mapping for the serializer context key
+    ``related_objects``, which ``PrefetchedPrimaryKeyRelatedField`` reads instead of
+    issuing one ``get()`` per item and field.
+    """
+    wanted = defaultdict(set)
+    querysets = {}
+    for name, field in serializer.fields.items():
+        if field.read_only:
+            continue
+        child = getattr(field, 'child_relation', field)
+        queryset = getattr(child, 'queryset', None)
+        if queryset is None:
+            continue
+        querysets[queryset.model] = queryset
+        for item in items:
+            value = item.get(name) if isinstance(item, dict) else None
+            values = value if isinstance(value, (list, tuple)) else [value]
+            wanted[queryset.model].update(str(v) for v in values if v not in (None, ''))
+
+    related = {}
+    for model, pks in wanted.items():
+        valid_pks = []
+        for pk in pks:
+            try:
+                valid_pks.append(model._meta.pk.to_python(pk))
+            except Exception:
+                continue  # left for the field to reject with a proper error
+        related[model] = {str(obj.pk): obj for obj in querysets[model].filter(pk__in=valid_pks)}
+    return related
+
+
+def _validator(serializer_class, items, context, **kwargs):
+    """
+    One serializer instance reused for every item, as ``ListSerializer`` does.
+
+    Building a ModelSerializer's fields is the expensive part of validation, so
+    the batch pays for it once instead of once per item.
+    """
+    related_objects = {}
+    serializer = serializer_class(context={**context, 'related_objects': related_objects}, **kwargs)
+    related_objects.update(preload_related_objects(serializer, items))
+    return serializer
+
+
+def _validate(serializer, item, instance=None):
+    serializer.instance = instance
+    try:
+        return dict(serializer.run_validation(item)), None
+    except serializers.ValidationError as exc:
+        return None, exc.detail
+
+
+def bulk_create_tasks(serializer_class, items, context):
+    results = [None] * len(items)
+    serializer = _validator(serializer_class, items, context)
+    pending = []
+    for index, item in enumerate(items):
+        data, errors = _validate(serializer, item)
+        if errors:
+            results[index] = _error(index, errors)
+            continue
+        tags = data.pop('tag_ids', [])
+        task = Task(**data)
+        task.stamp_completion()
+        pending.append((index, task, tags))
+
+    with transaction.atomic():
+        created = Task.objects.bulk_create([task for _, task, _ in pending], batch_size=BULK_BATCH_SIZE)
+        through = Tag.tasks.through
+        through.objects.bulk_create([
+            through(tag_id=tag.pk, task_id=task.pk)
+            for _, task, tags in pending
+            for tag in tags
+        ], batch_size=BULK_BATCH_SIZE)
+        tasks_written(created)
+        record(entry for task in created for entry in task_entries(task))
+        transaction.on_commit(lambda: invalidate_project_graphs(*{task.project_id for task in created}))
+        transaction.on_commit(lambda: fan_out('created', created, context['request'].user))
+
+    for index, task, _ in pending:
+        results[index] = _ok(index, task.pk)
+    return results
+
+
+def bulk_update_tasks(serializer_class, queryset, items, context):
+    results = [None] * len(items)
+    ids = [item.get('id') for item in items if isinstance(item, dict)]
+    instances = {str(task.pk): task for task in queryset.filter(pk__in=_valid_pks(ids))}
+    pending_dependencies = {}
+    serializer = _validator(
+        serializer_class, items, {**context, 'pending_dependencies': pending_dependencies}, partial=True
+    )
+    previous = {task.pk: (task.project_id, task.assigned_to_id) for task in instances.values()}
+    project_ids = {project_id for project_id, _ in previous.values()}
+
+    now = timezone.now()
+    changed = []
+    fields = {'updated_at'}
+    tag_updates = {}
+    rows_before = []
+    for index, item in enumerate(items):
+        task = instances.get(str(item.get('id'))) if isinstance(item, dict) else None
+        if task is None:
+            results[index] = _error(index, {'id': ['Task not found.']}, item.get('id') if isinstance(item, dict) else None)
+            continue
+        data, errors = _validate(serializer, item, task)
+        if errors:
+            results[index] = _error(index, errors, task.pk)
+            continue
+        if 'tag_ids' in data:
+            tag_updates[task.pk] = data.pop('tag_ids')
+        if 'depends_on' in data:
+            depends_on = data['depends_on']
+            pending_dependencies[str(task.pk)] = str(depends_on.pk) if depends_on else None
+        rows_before.append(leaderboard.task_row(task))
+        for attr, value in data.items():
+            setattr(task, attr, value)
+        if 'status' in data:
+            task.stamp_completion(now)
+            fields.add('completed_at')
+        project_ids.add(task.project_id)
+        fields.update(data)
+        task.updated_at = now
+        changed.append((index, task))
+
+    with transaction.atomic():
+        tasks = [task for _, task in changed]
+        Task.objects.bulk_update(tasks, sorted(fields), batch_size=BULK_BATCH_SIZE)
+        if tag_updates:
+            through = Tag.tasks.through
+            through.objects.filter(task_id__in=tag_updates.keys()).delete()
+            through.objects.bulk_create([
+                through(tag_id=tag.pk, task_id=task_id)
+                for task_id, tags in tag_updates.items()
+                for tag in tags
+            ], batch_size=BULK_BATCH_SIZE)
+        tasks_written(tasks, previous, leaderboard.task_shares(rows_before))
+        record(entry for task in tasks for entry in task_entries(task, False, *previous[task.pk]))
+        transaction.on_commit(lambda: invalidate_task_graphs([task.pk for task in tasks], *project_ids))
+        transaction.on_commit(lambda: fan_out('updated', tasks, context['request'].user))
+
+    for index, task in changed:
+        results[index] = _ok(index, task.pk)
+    return results
+
+
+def bulk_set_fields(queryset, ids, user, event, **values):
+    """Apply the same field values to many tasks with a single UPDATE."""
+    tasks = list(queryset.filter(pk__in=_valid_pks(ids)).select_related('assigned_to', 'project'))
+    values['updated_at'] = now = timezone.now()
+    previous = {task.pk: (task.project_id, task.assigned_to_id) for task in tasks}
+    before = leaderboard.snapshot(tasks)
+    updates = dict(values)
+    if 'status' in values:
+        # Tasks that were already done keep their completion time
+        updates['completed_at'] = Coalesce('completed_at', Value(now)) if values['status'] in DONE_STATUSES else None
+    with transaction.atomic():
+        Task.objects.filter(pk__in=[task.pk for task in tasks]).update(**updates)
+        for task in tasks:
+            for attr, value in values.items():
+                setattr(task, attr, value)
+            if 'status' in values:
+                task.stamp_completion(now)
+        tasks_written(tasks, previous, before)
+        record(entry for task in tasks for entry in task_entries(task, False, *previous[task.pk]))
+        transaction.on_commit(lambda: invalidate_task_graphs([task.pk for task in tasks], *{task.project_id for task in tasks}))
+        transaction.on_commit(lambda: fan_out(event, tasks, user))
+    return _id_results(ids, tasks)
+
+
+def bulk_delete_tasks(queryset, ids, user):
+    tasks = list(queryset.filter(pk__in=_valid_pks(ids)).select_related('assigned_to', 'project'))
+    with transaction.atomic(), batched():
+        # post_delete receivers log one tombstone per task; batched() inserts them together
+        Task.objects.filter(pk__in=[task.pk for task in tasks]).delete()
+        transaction.on_commit(lambda: fan_out('deleted', tasks, user))
+    return _id_results(ids, tasks)
+
+
+def instantiate_template(template, projects, user=None, assigned_to=None, due_date=None):
+    """
+    Expand ``template`` into one task per project and return the tasks.
+
+    Tasks, their checklist subtasks and their tag links are each written with one
+    ``bulk_create``; ``usage_count`` goes up with a single ``F()`` update. The
+    subtask counter that ``tasks.progress`` would maintain is set on the tasks
+    up front, since bulk inserts skip its receivers.
+    """
+    checklist = [str(item) for item in template.checklist_items or []]
+    tasks = [
+        Task(
+            title=template.name,
+            description=template.description,
+            project=project,
+            assigned_to_id=assigned_to.pk if assigned_to else template.created_by_id,
+            due_date=due_date,
+            subtasks_total=len(checklist),
+        )
+        for project in projects
+    ]
+    if not tasks:
+        return []
+
+    with transaction.atomic():
+        created = Task.objects.bulk_create(tasks, batch_size=BULK_BATCH_SIZE)
+        Subtask.objects.bulk_create([
+            Subtask(parent_task=task, title=title, order=order)
+            for task in created
+            for order, title in enumerate(checklist)
+        ], batch_size=BULK_BATCH_SIZE)
+        tags = _template_tags(template)
+        through = Tag.tasks.through
+        through.objects.bulk_create([
+            through(tag_id=tag.pk, task_id=task.pk)
+            for task in created
+            for tag in tags
+        ], batch_size=BULK_BATCH_SIZE)
+        TaskTemplate.objects.filter(pk=template.pk).update(usage_count=F('usage_count') + len(created))
+        tasks_written(created)
+        record(entry for task in created for entry in task_entries(task))
+        transaction.on_commit(lambda: invalidate_project_graphs(*{task.project_id for task in created}))
+        transaction.on_commit(lambda: fan_out('created', created, user))
+    return created
+
+
+def bulk_instantiate_template(template, projects, ids, user, assigned_to=None, due_date=None):
+    """``instantiate_template`` for the projects in ``ids`` found in ``projects``, with a result per id."""
+    found = {str(project.pk): project for project in projects.filter(pk__in=_valid_pks(ids, projects.model))}
+    targets = [(index, found[str(pk)]) for index, pk in enumerate(ids) if str(pk) in found]
+    created = instantiate_template(template, [project for _, project in targets], user, assigned_to, due_date)
+    results = [
+        _error(index, {'project': ['Project not found.']}) for index, pk in enumerate(ids) if str(pk) not in found
+    ]
+    results.extend(_ok(index, task.pk) for (index, _), task in zip(targets, created))
+    return sorted(results, key=lambda result: result['index'])
+
+
+def _template_tags(template):
+    """The template's tags by name, creating missing ones with one insert."""
+    names = {str(name).strip() for name in template.tags or [] if str(name).strip()}
+    if not names:
+        return []
+    Tag.objects.bulk_create(
+        [Tag(name=name, created_by_id=template.created_by_id) for name in names], ignore_conflicts=True
+    )
+    return list(Tag.objects.filter(name__in=names))
+
+
+def _valid_pks(ids, model=Task):
+    valid = []
+    for pk in ids:
+        try:
+            valid.append(model._meta.pk.to_python(pk))
+        except Exception:
+            continue
+    return valid
+
+
+def _id_results(ids, tasks):
+    found = {str(task.pk) for task in tasks}
+    return [
+        _ok(index, pk) if str(pk) in found else _error(index, {'id': ['Task not found.']}, pk)
+        for index, pk in enumerate(ids)
+    ]
+
+
+# Webhook subscribers register for the per-task event names; bulk deliveries
+# reuse them with ``{'bulk': True, 'tasks': [...]}`` as the payload.
+WEBHOOK_EVENTS = {
+    'created': 'task.created',
+    'completed': 'task.completed',
+    'deleted': 'task.deleted',
+}
+
+EVENT_MESSAGES = {
+    'created': "{count} new task(s) were assigned to you.",
+    'updated': "{count} of your task(s) were updated.",
+    'completed': "{count} of your task(s) were marked as done.",
+    'status_changed': "{count} of your task(s) changed status.",
+    'assigned': "{count} task(s) were assigned to you.",
+    'deleted': "{count} of your task(s) were deleted.",
+}
+
+
+def fan_out(event, tasks, actor=None):
+    """
+    Emit one notification/audit/webhook/email round for a whole batch.
+
+    Assignees get a single summary notification (and email) per batch rather than
+    one per task; audit rows are written with one bulk insert; webhooks receive
+    one delivery listing every task.
+    """
+    if not tasks:
+        return
+    by_assignee = defaultdict(list)
+    for task in tasks:
+        if task.assigned_to_id:
+            by_assignee[task.assigned_to_id].append(task)
+
+    notifications = []
+    for user_id, user_tasks in by_assignee.items():
+        message = EVENT_MESSAGES.get(event, "{count} task(s) changed.").format(count=len(user_tasks))
+        notifications.append(Notification(
+            user_id=user_id,
+            message=message,
+            task=user_tasks[0] if len(user_tasks) == 1 and event != 'deleted' else None,
+            notification_type='web',
+        ))
+    Notification.objects.bulk_create(notifications)
+    record(entry for notification in notifications for entry in notification_entries(notification))
+    for notification in notifications:
+        send_realtime_notification(notification.user_id, notification.message)
+
+    if apps.is_installed('audit'):
+        from audit.models import AuditLog
+        action = 'Deleted' if event == 'deleted' else ('Created' if event == 'created' else 'Updated')
+        AuditLog.objects.bulk_create([
+            AuditLog(user=actor, action=action, model_name='Task', object_id=str(task.pk))
+            for task in tasks
+        ], batch_size=BULK_BATCH_SIZE)
+
+    if apps.is_installed('integrations'):
+        from integrations.webhooks import trigger_webhooks
+        trigger_webhooks(WEBHOOK_EVENTS.get(event, 'task.updated'), {
+            'bulk': True,
+            'tasks': [{'id': str(task.pk), 'title': task.title, 'status': task.status} for task in tasks],
+        })
+
+    _queue_summary_emails(event, by_assignee)
+
+
+def _queue_summary_emails(event, by_assignee):
+    emails = []
+    for user_tasks in by_assignee.values():
+        user = user_tasks[0].assigned_to
+        if not user.email:
+            continue
+        titles = '\n'.join(f"- {task.title}" for task in user_tasks)
+        emails.append((
+            f"Task Update: {len(user_tasks)} task(s)",
+            f"{EVENT_MESSAGES.get(event, '{count} task(s) changed.').format(count=len(user_tasks))}\n\n{titles}",
+            user.email,
+        ))
+    if not emails:
+        return
+    try:
+        from notifications.utils import send_email_notifications
+        # One mail task for the whole batch; it sends over pooled connections
+        send_email_notifications.delay(emails)
+    except Exception as e:
+        logger.warning(f"Could not queue bulk task emails: {e}")
@@ -0,0 +1,141 @@
+"""
+Attachment download responses.
+
+Views check access, then hand the file to ``serve_file``. It answers
+``If-None-Match`` with 304 and then does one of two things:
+
+* with ``SENDFILE_BACKEND`` set, it returns headers only and the front proxy
+  sends the bytes (and handles ``Range``) itself:
+  ``nginx`` uses ``X-Accel-Redirect: <SENDFILE_URL_PREFIX><name>`` (an
+  ``internal`` location aliased to ``MEDIA_ROOT``) and ``apache``/``lighttpd``
+  use ``X-Sendfile: <absolute path>``;
+* otherwise it streams from the worker. Whole files go through ``FileResponse``,
+  which the WSGI server's ``wsgi.file_wrapper`` turns into ``sendfile``. A single
+  ``Range`` (optionally guarded by ``If-Range``) is answered with 206 and only
+  the requested bytes are read.
+
+Either way the worker is released as soon as the headers are written (offload)
+or the bytes are on the socket (streaming); nothing is buffered in memory.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse, Http404
+from django.utils.cache import patch_cache_control
+from django.utils.http import content_disposition_header, http_date, quote_etag, parse_etags
+from urllib.parse import quote
+
+from .storage import is_blob
+
+RANGE_CHUNK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def file_etag(storage, name, size):
+    """Blobs are named by their SHA-256, so the digest is a strong validator for free."""
+    if is_blob(name):
+        return quote_etag(os.path.splitext(os.path.basename(name))[0])
+    return quote_etag(f"{int(storage.get_modified_time(name).timestamp()):x}-{size:x}")
+
+
+def _etag_matches(header, etag):
+    if not header:
+        return False
+    tags = parse_etags(header)
+    return '*' in tags or etag in tags
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` inclusive for a single ``bytes=`` range, ``None`` to send
+    the whole file (no header, or several ranges), or ``False`` if unsatisfiable.
+    """
+    if not header or ',' in header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    else:
+        start, end = max(size - int(last), 0), size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _read_range(handle, start, length, chunk_size=RANGE_CHUNK_SIZE):
+    try:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        handle.close()
+
+
+def _offload(storage, name):
+    backend = getattr(settings, 'SENDFILE_BACKEND', '')
+    if not backend:
+        return None
+    response = HttpResponse()
+    if backend == 'nginx':
+        prefix = getattr(settings, 'SENDFILE_URL_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(name)
+    elif backend in ('apache', 'lighttpd'):
+        response['X-Sendfile'] = storage.path(name)
+    else:
+        return None
+    return response
+
+
+def serve_file(request, storage, name, filename=None, content_type=None, as_attachment=True):
+    """Conditional, range-aware response for ``name`` in ``storage`` (see module docstring)."""
+    if not name or not storage.exists(name):
+        raise Http404('File not found.')
+    size = storage.size(name)
+    etag = file_etag(storage, name, size)
+    filename = filename or os.path.basename(name)
+    content_type = content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    if _etag_matches(request.headers.get('If-None-Match'), etag):
+        response = HttpResponse(status=304)
+    else:
+        response = _offload(storage, name)
+        if response is None:
+            response = _stream(request, storage, name, size, etag)
+            if response.status_code == 416:
+                return response
+        response['Content-Type'] = content_type
+        response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+
+    response['ETag'] = etag
+    response['Accept-Ranges'] = 'bytes'
+    response['Last-Modified'] = http_date(storage.get_modified_time(name).timestamp())
+    patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+    return response
+
+
+def _stream(request, storage, name, size, etag):
+    byte_range = parse_range(request.headers.get('Range'), size)
+    if_range = request.headers.get('If-Range')
+    if byte_range and if_range and if_range != etag:
+        byte_range = None  # the client's partial copy is stale: send everything
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None:
+        return FileResponse(storage.open(name, 'rb'))
+    start, end = byte_range
+    response = StreamingHttpResponse(_read_range(storage.open(name, 'rb'), start, end - start + 1), status=206)
+    response['Content-Length'] = str(end - start + 1)
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
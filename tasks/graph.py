@@ -0,0 +1,339 @@
+"""
+Per-project task dependency graph.
+
+``Task.depends_on`` points from a task to the task it waits for. A project's
+edges are loaded with one query (plus one for the status of prerequisites in
+other projects), kept in the cache as flat parallel lists (task ids, parent
+positions, done flags) that are cheap to pickle, and dropped whenever a task in
+the project, or a prerequisite in another project, is saved or deleted (bulk
+writes in ``tasks.bulk`` invalidate explicitly). Cycle checks, topological order,
+blocked sets and the critical path then run in memory in linear time.
+"""
+
+from collections import deque
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import CharField
+from django.db.models.functions import Cast
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import DONE_STATUSES, Task
+
+TASK_GRAPH_TIMEOUT = 60 * 60  # 1 hour; signals invalidate on change
+DEFAULT_TASK_DURATION_DAYS = 1
+
+NO_PARENT = -1
+
+
+def _task_graph_key(project_id):
+    # v2: the cached state gained the open external prerequisites
+    return f"task_graph_v2_{project_id}"
+
+
+def _node_key(task_id):
+    """Canonical in-graph form of a task id: 32 lowercase hex digits."""
+    return str(task_id).replace('-', '').lower() if task_id else None
+
+
+def _public_id(key):
+    return f"{key[:8]}-{key[8:12]}-{key[12:16]}-{key[16:20]}-{key[20:]}"
+
+
+class TaskGraph:
+    """
+    Dependency graph for one project.
+
+    Tasks are numbered by creation order: ``ids[i]`` is the task id as 32 hex digits,
+    ``parents[i]`` the position of the task it depends on (``NO_PARENT`` if none)
+    and ``done[i]`` whether it is finished. Prerequisites in another project are
+    kept in ``external`` (position -> task id) and treated as roots here;
+    ``waiting`` holds the positions whose external prerequisite is still open.
+
+    Ids are read as text straight from the database rather than as ``UUID``
+    objects; building 100k of those was most of the load time.
+    """
+
+    def __init__(self, project_id, ids, parents, done, external, waiting):
+        self.project_id = project_id
+        self.ids = ids
+        self.parents = parents
+        self.done = done
+        self.external = external
+        self.waiting = waiting
+
+    @classmethod
+    def load(cls, project_id):
+        rows = list(
+            Task.objects.filter(project_id=project_id)
+            .order_by('created_at', 'id')
+            .annotate(key=Cast('id', CharField()), parent_key=Cast('depends_on_id', CharField()))
+            .values_list('key', 'parent_key', 'status')
+        )
+        ids = [_node_key(key) for key, _, _ in rows]
+        position = {key: i for i, key in enumerate(ids)}
+        parents = [position.get(_node_key(parent_key), NO_PARENT) for _, parent_key, _ in rows]
+        external = {
+            i: _node_key(parent_key)
+            for i, (_, parent_key, _) in enumerate(rows)
+            if parent_key is not None and parents[i] == NO_PARENT
+        }
+        # A prerequisite that no longer exists counts as finished
+        open_keys = {
+            _node_key(key)
+            for key in Task.objects.filter(pk__in=[_public_id(key) for key in set(external.values())])
+            .exclude(status__in=DONE_STATUSES)
+            .annotate(key=Cast('id', CharField()))
+            .values_list('key', flat=True)
+        } if external else set()
+        return cls(
+            project_id,
+            ids,
+            parents,
+            bytes(status in DONE_STATUSES for _, _, status in rows),
+            external,
+            frozenset(i for i, key in external.items() if key in open_keys),
+        )
+
+    def state(self):
+        return self.ids, self.parents, self.done, self.external, self.waiting
+
+    @cached_property
+    def position(self):
+        return {task_id: i for i, task_id in enumerate(self.ids)}
+
+    @cached_property
+    def children(self):
+        children = [[] for _ in self.ids]
+        for i, parent in enumerate(self.parents):
+            if parent != NO_PARENT:
+                children[parent].append(i)
+        return children
+
+    def parent_of(self, key):
+        """Key of the task ``key`` depends on (possibly in another project), or ``None``."""
+        i = self.position[key]
+        parent = self.parents[i]
+        return self.ids[parent] if parent != NO_PARENT else self.external.get(i)
+
+    def _order(self):
+        children = self.children
+        queue = deque(i for i, parent in enumerate(self.parents) if parent == NO_PARENT)
+        order = []
+        while queue:
+            i = queue.popleft()
+            order.append(i)
+            queue.extend(children[i])
+        return order
+
+    def topological_order(self):
+        """
+        Return ``(order, cyclic)``: task ids with prerequisites first, and the ids
+        caught in cycles left over from before cycles were rejected on write.
+        """
+        order = self._order()
+        placed = bytearray(len(self.ids))
+        for i in order:
+            placed[i] = 1
+        return (
+            [_public_id(self.ids[i]) for i in order],
+            [_public_id(key) for i, key in enumerate(self.ids) if not placed[i]],
+        )
+
+    def blocked_sets(self):
+        """Split open tasks into those waiting on an unfinished prerequisite and the rest."""
+        blocked, unblocked = [], []
+        done, parents = self.done, self.parents
+        for i, key in enumerate(self.ids):
+            if done[i]:
+                continue
+            parent = parents[i]
+            if (not done[parent]) if parent != NO_PARENT else i in self.waiting:
+                blocked.append(_public_id(key))
+            else:
+                unblocked.append(_public_id(key))
+        return blocked, unblocked
+
+    def critical_path(self, start=None, duration_days=DEFAULT_TASK_DURATION_DAYS):
+        """
+        Critical path method over the remaining work.
+
+        Open tasks take ``duration_days`` each and finished tasks take none. An
+        open prerequisite in another project delays its dependent by one
+        ``duration_days``; its own chain is not followed. Returns the tasks on the longest chain with earliest and latest
+        start/finish dates counted from ``start`` (default today).
+        """
+        start = start or timezone.localdate()
+        order = self._order()
+        parents, children = self.parents, self.children
+        duration = [0 if flag else duration_days for flag in self.done]
+
+        waiting = self.waiting
+        earliest_finish = [0] * len(self.ids)
+        for i in order:
+            parent = parents[i]
+            if parent != NO_PARENT:
+                earliest_finish[i] = earliest_finish[parent] + duration[i]
+            else:
+                earliest_finish[i] = (duration_days if i in waiting else 0) + duration[i]
+        project_finish = max((earliest_finish[i] for i in order), default=0)
+
+        latest_finish = [project_finish] * len(self.ids)
+        for i in reversed(order):
+            for child in children[i]:
+                latest_finish[i] = min(latest_finish[i], latest_finish[child] - duration[child])
+
+        path = []
+        if project_finish:
+            # Walk back from the task that finishes last along its prerequisites
+            i = max(order, key=earliest_finish.__getitem__)
+            while i != NO_PARENT:
+                path.append(i)
+                i = parents[i]
+            path.reverse()
+
+        details = {
+            _node_key(pk): task
+            for pk, task in Task.objects.in_bulk([_public_id(self.ids[i]) for i in path]).items()
+        }
+
+        def day(offset):
+            return (start + timedelta(days=offset)).isoformat()
+
+        steps = []
+        for i in path:
+            task = details.get(self.ids[i])
+            steps.append({
+                'id': _public_id(self.ids[i]),
+                'title': task.title if task else None,
+                'status': task.status if task else None,
+                'due_date': task.due_date.isoformat() if task and task.due_date else None,
+                'earliest_start': day(earliest_finish[i] - duration[i]),
+                'earliest_finish': day(earliest_finish[i]),
+                'latest_start': day(latest_finish[i] - duration[i]),
+                'latest_finish': day(latest_finish[i]),
+                'slack_days': latest_finish[i] - earliest_finish[i],
+            })
+        return {
+            'start': start.isoformat(),
+            'finish': day(project_finish),
+            'duration_days': project_finish,
+            'path': steps,
+        }
+
+
+def project_graph(project_id):
+    """Return the cached dependency graph for a project, loading it on a miss."""
+    key = _task_graph_key(project_id)
+    state = cache.get(key)
+    if state is None:
+        graph = TaskGraph.load(project_id)
+        cache.set(key, graph.state(), TASK_GRAPH_TIMEOUT)
+        return graph
+    return TaskGraph(project_id, *state)
+
+
+def invalidate_project_graphs(*project_ids):
+    keys = [_task_graph_key(project_id) for project_id in project_ids if project_id is not None]
+    if keys:
+        cache.delete_many(keys)
+
+
+def _dependent_project_ids(task_ids, project_ids):
+    """Projects other than ``project_ids`` with tasks waiting on one of ``task_ids``."""
+    return set(
+        Task.objects.filter(depends_on_id__in=task_ids).exclude(project_id__in=project_ids)
+        .order_by().values_list('project_id', flat=True).distinct()
+    )
+
+
+def invalidate_task_graphs(task_ids, *project_ids):
+    """
+    Drop the graphs of ``project_ids`` and of the other projects whose tasks
+    depend on one of ``task_ids``: they cache whether that prerequisite is open.
+    """
+    project_ids = {project_id for project_id in project_ids if project_id is not None}
+    invalidate_project_graphs(*project_ids, *_dependent_project_ids(task_ids, project_ids))
+
+
+def creates_cycle(task_id, depends_on_id, project_id, pending=None, graphs=None):
+    """
+    Would pointing ``task_id`` at ``depends_on_id`` close a loop?
+
+    Follows the prerequisite chain upwards through the cached graphs of the
+    projects it crosses. ``pending`` maps task ids to not-yet-saved
+    ``depends_on`` ids (both as strings) so a bulk write is checked against its
+    own earlier items; ``graphs`` memoises loaded graphs across calls.
+    """
+    if depends_on_id is None or task_id is None:
+        return False
+    graphs = {} if graphs is None else graphs
+    pending = pending or {}
+
+    def graph_for(pid):
+        if pid not in graphs:
+            graphs[pid] = project_graph(pid)
+        return graphs[pid]
+
+    task_id, current = _node_key(task_id), _node_key(depends_on_id)
+    graph = graph_for(project_id)
+    seen = set()
+    while current is not None:
+        if current == task_id:
+            return True
+        if current in seen:
+            return False  # an existing loop that does not involve this task
+        seen.add(current)
+        if _public_id(current) in pending:
+            current = _node_key(pending[_public_id(current)])
+            continue
+        if current not in graph.position:
+            other_project = Task.objects.filter(pk=_public_id(current)).values_list('project_id', flat=True).first()
+            if other_project is None:
+                return False
+            graph = graph_for(other_project)
+            if current not in graph.position:
+                return False
+        current = graph.parent_of(current)
+    return False
+
+
+@receiver(pre_save, sender=Task)
+def remember_previous_placement(sender, instance, **kwargs):
+    """
+    Keep the stored project, assignee, status and completion time: moving a task
+    invalidates both graphs, the change feed (``sync.signals``) tells whoever
+    lost the task, and ``analytics.leaderboard`` moves its counts.
+    """
+    instance._previous_project_id = instance._previous_assignee_id = None
+    instance._previous_status = instance._previous_completed_at = None
+    if not instance._state.adding:
+        (
+            instance._previous_project_id, instance._previous_assignee_id,
+            instance._previous_status, instance._previous_completed_at,
+        ) = Task.objects.filter(pk=instance.pk).values_list(
+            'project_id', 'assigned_to_id', 'status', 'completed_at'
+        ).first() or (None, None, None, None)
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, **kwargs):
+    previous_status = getattr(instance, '_previous_status', None)
+    if not created and (instance.status in DONE_STATUSES) != (previous_status in DONE_STATUSES):
+        invalidate_task_graphs([instance.pk], instance.project_id, getattr(instance, '_previous_project_id', None))
+    else:
+        invalidate_project_graphs(instance.project_id, getattr(instance, '_previous_project_id', None))
+
+
+@receiver(pre_delete, sender=Task)
+def remember_dependent_projects(sender, instance, **kwargs):
+    # Read before ``depends_on`` is nulled on the dependents
+    instance._dependent_project_ids = _dependent_project_ids([instance.pk], [instance.project_id])
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    invalidate_project_graphs(instance.project_id, *getattr(instance, '_dependent_project_ids', ()))
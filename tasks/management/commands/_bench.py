@@ -0,0 +1,34 @@
+"""
+Shared helpers for the ``bench_*`` management commands.
+
+Benchmarks seed their own data inside a transaction that is always rolled back,
+so they can be pointed at a development database without leaving rows behind.
+"""
+import time
+from contextlib import contextmanager
+from django.db import transaction
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Run the block in a transaction and discard everything it wrote."""
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+def best_of(fn, repeat=5):
+    """Return the fastest of ``repeat`` runs of ``fn`` in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.utils import timezone
+from analytics.models import TimeTracking
+from analytics.serializers import TimeTrackingSerializer
+from analytics.timers import active_timer, reconcile_timers
+from projects.models import Project
+from tasks.models import Task
+from ._bench import rolled_back, best_of
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks one round of timer-widget polls: the active-tracking query per user vs the cached registry.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--running', type=float, default=0.1, help='share of users with a running timer')
+
+    def handle(self, *args, **options):
+        # The registry holds one entry per user; the default local-memory cache keeps only 300
+        caches = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': options['users'] * 2},
+        }}
+        with override_settings(CACHES=caches), rolled_back():
+            self._run(options)
+
+    def _run(self, options):
+        users = User.objects.bulk_create([
+            User(email=f'bench-timer-{i}@example.com') for i in range(options['users'])
+        ])
+        task = Task.objects.create(title='Bench timers', project=Project.objects.create(name='Bench', owner=users[0]))
+        now = timezone.now()
+        TimeTracking.objects.bulk_create([
+            TimeTracking(user=user, task=task, start_time=now, is_active=True)
+            for user in users[:int(len(users) * options['running'])]
+        ])
+        user_ids = [user.pk for user in users]
+
+        def database():
+            for user_id in user_ids:
+                tracking = TimeTracking.objects.filter(user_id=user_id, is_active=True).first()
+                if tracking:
+                    TimeTrackingSerializer(tracking).data
+
+        def registry():
+            for user_id in user_ids:
+                active_timer(user_id)
+
+        reconcile_ms = best_of(reconcile_timers)  # what the first poll after a cache flush pays
+        database_ms, registry_ms = best_of(database), best_of(registry)
+        self.stdout.write(f"{len(user_ids)} users polling, {options['running']:.0%} with a running timer")
+        self.stdout.write(f"database {database_ms:8.1f} ms per round, one query per user")
+        self.stdout.write(f"registry {registry_ms:8.1f} ms per round, no queries")
+        self.stdout.write(f"reconciling an empty cache from the database takes {reconcile_ms:.1f} ms")
+        self.stdout.write(self.style.SUCCESS(f"{database_ms / registry_ms:.0f}x faster"))
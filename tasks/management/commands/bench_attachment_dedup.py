@@ -0,0 +1,52 @@
+import os
+import shutil
+import tempfile
+import time
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from tasks.storage import ContentAddressedStorage
+from ._bench import rolled_back
+
+
+def _disk_usage(root):
+    return sum(
+        os.path.getsize(os.path.join(path, name)) for path, _, names in os.walk(root) for name in names
+    )
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks deduplicating attachment storage against plain file storage on repeated uploads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--distinct', type=int, default=5)
+        parser.add_argument('--repeats', type=int, default=20)
+        parser.add_argument('--size-kb', type=int, default=2048)
+
+    def handle(self, *args, **options):
+        payloads = [os.urandom(options['size_kb'] * 1024) for _ in range(options['distinct'])]
+        uploads = [
+            (f'file-{i}.pdf', payload) for _ in range(options['repeats']) for i, payload in enumerate(payloads)
+        ]
+        rows = []
+        for label, storage_class in (('plain', FileSystemStorage), ('dedup', ContentAddressedStorage)):
+            root = tempfile.mkdtemp()
+            try:
+                with override_settings(MEDIA_ROOT=root), rolled_back():
+                    storage = storage_class()
+                    start = time.perf_counter()
+                    for name, payload in uploads:
+                        storage.save(f'task_attachments/{name}', SimpleUploadedFile(name, payload))
+                    elapsed = (time.perf_counter() - start) * 1000
+                rows.append((label, elapsed, _disk_usage(root)))
+            finally:
+                shutil.rmtree(root, ignore_errors=True)
+
+        self.stdout.write(f"{len(uploads)} uploads of {options['size_kb']} KB, {options['distinct']} distinct")
+        for label, elapsed, used in rows:
+            self.stdout.write(f"{label:6} {elapsed:9.1f} ms {used / 1024 / 1024:9.1f} MB on disk")
+        (_, plain_ms, plain_bytes), (_, dedup_ms, dedup_bytes) = rows
+        self.stdout.write(self.style.SUCCESS(
+            f"disk: {plain_bytes / max(dedup_bytes, 1):.0f}x less, time: {plain_ms / dedup_ms:.1f}x"
+        ))
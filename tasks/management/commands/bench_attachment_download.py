@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import time
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from projects.models import Project
+from tasks.models import Task, Attachment
+from ._bench import rolled_back, best_of
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks how long an attachment download occupies a Django worker when streamed '
+        'versus offloaded to the proxy with X-Accel-Redirect.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=int, default=50)
+        parser.add_argument(
+            '--client-mbps', type=float, default=20.0,
+            help='simulated client bandwidth (MB/s) for the slow-client run',
+        )
+
+    def handle(self, *args, **options):
+        root = tempfile.mkdtemp()
+        try:
+            with override_settings(MEDIA_ROOT=root), rolled_back():
+                self._run(options)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+    def _run(self, options):
+        size = options['size_mb'] * 1024 * 1024
+        user = User.objects.create_user(email='bench-download@example.com', password='bench')
+        task = Task.objects.create(title='Bench download', project=Project.objects.create(name='Bench', owner=user))
+        attachment = Attachment.objects.create(
+            task=task, file=SimpleUploadedFile('big.zip', os.urandom(size)), original_filename='big.zip',
+            mime_type='application/zip', size=size, uploaded_by=user,
+        )
+        url = f'/tasks/api/attachments/{attachment.pk}/download/'
+        client = Client(SERVER_NAME='localhost')
+        client.force_login(user)
+
+        def download(bandwidth=None):
+            # The worker is busy until the last byte of the body has been handed over
+            response = client.get(url)
+            body = getattr(response, 'streaming_content', None) or [response.content]
+            for chunk in body:
+                if bandwidth:
+                    time.sleep(len(chunk) / bandwidth)
+
+        slow = options['client_mbps'] * 1024 * 1024
+        rows = []
+        for label, backend in (('streamed', ''), ('offloaded', 'nginx')):
+            with override_settings(SENDFILE_BACKEND=backend):
+                fast_ms = best_of(download)
+                start = time.perf_counter()
+                download(slow)
+                slow_ms = (time.perf_counter() - start) * 1000
+                rows.append((label, fast_ms, slow_ms))
+        etag = client.get(url)['ETag']
+        revalidate_ms = best_of(lambda: client.get(url, HTTP_IF_NONE_MATCH=etag))
+
+        self.stdout.write(
+            f"{options['size_mb']} MB attachment; worker time per download "
+            f"(local client / {options['client_mbps']:.0f} MB/s client):"
+        )
+        for label, fast_ms, slow_ms in rows:
+            self.stdout.write(f"{label:10} {fast_ms:9.1f} ms {slow_ms:10.1f} ms")
+        self.stdout.write(f"{'304':10} {revalidate_ms:9.1f} ms (If-None-Match revalidation)")
+        (_, stream_fast, stream_slow), (_, offload_fast, offload_slow) = rows
+        self.stdout.write(self.style.SUCCESS(
+            f"offload frees the worker {stream_fast / offload_fast:.0f}x sooner locally, "
+            f"{stream_slow / offload_slow:.0f}x sooner for the slow client"
+        ))
@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import wait
+from io import BytesIO
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from projects.models import Project
+from tasks import thumbnailer
+from tasks.models import Task, Attachment
+from tasks.previews import generate_previews, schedule_previews, existing_preview, PREVIEW_SIZES
+from ._bench import rolled_back
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks preview rendering (serial vs process pool) and the bytes an image list saves with thumbnails.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', type=int, default=24)
+        parser.add_argument('--width', type=int, default=2400)
+        parser.add_argument('--height', type=int, default=1600)
+
+    def handle(self, *args, **options):
+        if not thumbnailer.available('image'):
+            raise CommandError('Pillow is required for previews.')
+        for label in ('serial', 'pool'):
+            root = tempfile.mkdtemp()
+            try:
+                with override_settings(MEDIA_ROOT=root), rolled_back():
+                    attachments = self._seed(options)
+                    start = time.perf_counter()
+                    if label == 'serial':
+                        for attachment in attachments:
+                            generate_previews(attachment)
+                    else:
+                        wait([schedule_previews(attachment) for attachment in attachments])
+                        # Done callbacks write the files right after the results arrive
+                        while any(existing_preview(a, size) is None for a in attachments for size in PREVIEW_SIZES):
+                            time.sleep(0.01)
+                    elapsed = time.perf_counter() - start
+                    full = sum(attachment.size for attachment in attachments)
+                    small = sum(os.path.getsize(os.path.join(root, existing_preview(a))) for a in attachments)
+            finally:
+                shutil.rmtree(root, ignore_errors=True)
+            self.stdout.write(f"{label:6} render {len(attachments)} images: {elapsed * 1000:9.1f} ms")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"image list payload: {full / 1024:.0f} KB full-size vs {small / 1024:.0f} KB thumbnails "
+            f"({full / small:.0f}x less)"
+        ))
+
+    def _seed(self, options):
+        from PIL import Image
+
+        user = User.objects.create_user(email='bench-previews@example.com', password='bench')
+        task = Task.objects.create(title='Bench previews', project=Project.objects.create(name='Bench', owner=user))
+        attachments = []
+        for i in range(options['images']):
+            buffer = BytesIO()
+            Image.effect_mandelbrot((options['width'], options['height']), (-2 + i / 100, -1, 1, 1), 64) \
+                .convert('RGB').save(buffer, 'JPEG', quality=90)
+            data = buffer.getvalue()
+            attachments.append(Attachment.objects.create(
+                task=task, file=ContentFile(data, name=f'photo-{i}.jpg'), original_filename=f'photo-{i}.jpg',
+                mime_type='image/jpeg', size=len(data), uploaded_by=user,
+            ))
+        return attachments
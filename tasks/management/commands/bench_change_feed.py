@@ -0,0 +1,72 @@
+import random
+import uuid
+from datetime import timedelta
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.test import Client
+from django.utils import timezone
+from projects.models import Project
+from sync.models import ChangeLogEntry
+from tasks.models import Task
+from ._bench import rolled_back, best_of
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks a delta-sync poll against reloading the whole task collection.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=5_000)
+        parser.add_argument('--changes', type=int, default=20)
+        parser.add_argument('--noise', type=int, default=50_000, help='change-log entries from other projects')
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            user, tasks = self._seed(options)
+            client = Client(SERVER_NAME='localhost')
+            client.force_login(user)
+
+            token = client.get('/api/sync/changes/').json()['token']
+            for task in random.sample(tasks, options['changes']):
+                task.status = 'done'
+                task.save()
+
+            def full_reload():
+                url, size = '/tasks/api/tasks/?paginate=cursor&page_size=500', 0
+                while url:
+                    response = client.get(url)
+                    size += len(response.content)
+                    url = response.json()['next']
+                return size
+
+            def poll():
+                return len(client.get('/api/sync/changes/', {'since': token}).content)
+
+            full_bytes, poll_bytes = full_reload(), poll()
+            full_ms = best_of(full_reload, repeat=3)
+            poll_ms = best_of(poll)
+            cache.clear()
+
+        self.stdout.write(f"full reload ({options['tasks']} tasks): {full_ms:8.1f} ms {full_bytes:10d} bytes")
+        self.stdout.write(f"change feed ({options['changes']} changes): {poll_ms:8.1f} ms {poll_bytes:10d} bytes")
+        self.stdout.write(self.style.SUCCESS(
+            f"speedup: {full_ms / poll_ms:.1f}x, {full_bytes / poll_bytes:.0f}x fewer bytes"
+        ))
+
+    def _seed(self, options):
+        self.stdout.write('Seeding benchmark data...')
+        user = User.objects.create_user(email='bench-sync@example.com', password='bench')
+        project = Project.objects.create(name='Bench sync', owner=user)
+        tasks = Task.objects.bulk_create([
+            Task(title=f'Bench sync task {i}', project=project, assigned_to=user)
+            for i in range(options['tasks'])
+        ], batch_size=5000)
+        ChangeLogEntry.objects.bulk_create([
+            ChangeLogEntry(kind='task', object_id=uuid.uuid4(), project_id=uuid.uuid4())
+            for _ in range(options['noise'])
+        ], batch_size=5000)
+        # Settled, so the starting token is past the seed (see sync.feed.SYNC_SETTLE_SECONDS)
+        ChangeLogEntry.objects.update(created_at=timezone.now() - timedelta(minutes=1))
+        return user, tasks
@@ -0,0 +1,78 @@
+import random
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.test import Client
+from notifications.models import Notification
+from projects.models import Project
+from tasks.models import Task
+from ._bench import rolled_back, best_of
+
+User = get_user_model()
+
+ENDPOINTS = [
+    '/tasks/api/tasks/?page_size=100',
+    '/projects/api/projects/',
+    '/notifications/',
+    '/notifications/count/',
+    '/analytics/api/stats/',
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks full GETs against ETag revalidation (304) on the main list endpoints.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=5_000)
+        parser.add_argument('--projects', type=int, default=50)
+        parser.add_argument('--notifications', type=int, default=500)
+
+    def handle(self, *args, **options):
+        rows = []
+        with rolled_back():
+            user = self._seed(options)
+            client = Client(SERVER_NAME='localhost')
+            client.force_login(user)
+
+            for url in ENDPOINTS:
+                full = client.get(url)
+                assert full.status_code == 200, (url, full.status_code, full.content[:300])
+                etag = full['ETag']
+                revalidated = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                assert revalidated.status_code == 304, (url, revalidated.status_code)
+                full_ms = best_of(lambda: client.get(url))
+                revalidate_ms = best_of(lambda: client.get(url, HTTP_IF_NONE_MATCH=etag))
+                rows.append((url, len(full.content), len(revalidated.content), full_ms, revalidate_ms))
+            cache.clear()
+
+        self.stdout.write(f"{'endpoint':36} {'200 bytes':>10} {'304 bytes':>10} {'200 ms':>8} {'304 ms':>8} {'speedup':>8}")
+        for url, full_bytes, revalidated_bytes, full_ms, revalidate_ms in rows:
+            self.stdout.write(
+                f"{url:36} {full_bytes:10d} {revalidated_bytes:10d} {full_ms:8.1f} {revalidate_ms:8.1f} "
+                f"{full_ms / revalidate_ms:7.1f}x"
+            )
+        total_full = sum(row[1] for row in rows)
+        self.stdout.write(self.style.SUCCESS(
+            f"bytes saved per unchanged refresh of all endpoints: {total_full - sum(row[2] for row in rows)}"
+        ))
+
+    def _seed(self, options):
+        self.stdout.write('Seeding benchmark data...')
+        users = User.objects.bulk_create([User(email=f'bench-etag-{i}@example.com') for i in range(20)])
+        user = users[0]
+        projects = Project.objects.bulk_create([
+            Project(name=f'Bench ETag project {i}', owner=user) for i in range(options['projects'])
+        ])
+        Task.objects.bulk_create([
+            Task(
+                title=f'Bench ETag task {i}',
+                project=random.choice(projects),
+                assigned_to=random.choice(users),
+                status=random.choice(['todo', 'in_progress', 'done']),
+            )
+            for i in range(options['tasks'])
+        ], batch_size=5000)
+        Notification.objects.bulk_create([
+            Notification(user=user, message=f'Bench notification {i}') for i in range(options['notifications'])
+        ])
+        return user
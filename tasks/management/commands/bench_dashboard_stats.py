@@ -0,0 +1,112 @@
+import random
+import time
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from analytics import leaderboard, stats
+from analytics.utils import get_overall_stats
+from projects.models import Project
+from tasks.models import Task
+from ._bench import rolled_back, best_of
+
+User = get_user_model()
+
+STATUSES = ['todo', 'in_progress', 'done', 'pending', 'completed']
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks one dashboard load: per-view COUNT queries vs the shared analytics.stats service.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=500)
+        parser.add_argument('--tasks-per-project', type=int, default=100)
+        parser.add_argument('--users', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self._run(options)
+
+    def _run(self, options):
+        rng = random.Random(0)
+        users = [
+            User.objects.create_user(email=f'bench-stats-{i}@example.com', password='bench')
+            for i in range(options['users'])
+        ]
+        viewer = users[0]
+        viewer.profile.role = 'admin'
+        viewer.profile.save()
+        projects = Project.objects.bulk_create([
+            Project(name=f'Project {i}', owner=rng.choice(users), status=rng.choice(['active', 'completed']))
+            for i in range(options['projects'])
+        ])
+        today = timezone.localdate()
+        Task.objects.bulk_create([
+            Task(
+                title=f'Task {i}',
+                project=project,
+                assigned_to=rng.choice(users),
+                status=rng.choice(STATUSES),
+                due_date=today + timedelta(days=rng.randint(-30, 30)),
+            )
+            for project in projects
+            for i in range(options['tasks_per_project'])
+        ], batch_size=5000)
+        leaderboard.rebuild_leaderboard()
+
+        def legacy():
+            # What the stats API, the dashboard view, the analytics stats
+            # endpoint and the overall report each counted on their own
+            month_ago, two_months_ago = today - timedelta(days=30), today - timedelta(days=60)
+            done = ['done', 'completed']
+            tasks = Task.objects.all()
+            for qs in (tasks, tasks):
+                qs.count()
+                qs.filter(status__in=['todo', 'pending']).count()
+                qs.filter(status='in_progress').count()
+                qs.filter(status__in=done).count()
+            tasks.filter(due_date__lt=today).exclude(status__in=done).count()
+            tasks.filter(status__in=done, updated_at__date__range=[two_months_ago, month_ago]).count()
+            tasks.filter(status__in=done, updated_at__date__gte=month_ago).count()
+            Project.objects.count()
+            Project.objects.filter(status__in=['active', 'in_progress']).count()
+            for user in User.objects.filter(is_active=True)[:10]:
+                assigned = Task.objects.filter(assigned_to=user)
+                assigned.count()
+                assigned.filter(status__in=done).count()
+            for project in Project.objects.all():
+                in_project = Task.objects.filter(project=project)
+                in_project.count()
+                in_project.filter(status='done').count()
+                in_project.filter(status='todo', due_date__lt=timezone.now()).count()
+
+        def shared():
+            stats.user_stats(viewer)
+            stats.workspace_stats()
+            leaderboard.top('all', order='rate', user__is_active=True, tasks_assigned__gt=0)
+            get_overall_stats()
+
+        def cold():
+            cache.clear()
+            shared()
+
+        with CaptureQueriesContext(connection) as legacy_queries:
+            legacy()
+        with CaptureQueriesContext(connection) as shared_queries:
+            cold()
+
+        self.stdout.write(
+            f"{Task.objects.count()} tasks in {len(projects)} projects; "
+            f"queries per load: {len(legacy_queries)} before, {len(shared_queries)} cold"
+        )
+        legacy_ms, cold_ms = best_of(legacy), best_of(cold)
+        started = time.perf_counter()
+        shared()
+        warm_ms = (time.perf_counter() - started) * 1000
+        self.stdout.write(
+            f"per-view counts {legacy_ms:8.1f} ms, stats service {cold_ms:6.1f} ms cold, {warm_ms:6.2f} ms cached"
+        )
+        self.stdout.write(self.style.SUCCESS(f"{legacy_ms / cold_ms:.1f}x faster cold, {legacy_ms / warm_ms:.0f}x cached"))
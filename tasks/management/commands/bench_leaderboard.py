@@ -0,0 +1,91 @@
+import random
+import time
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Avg
+from django.utils import timezone
+from analytics import leaderboard
+from analytics.models import ProductivityMetrics
+from projects.models import Project
+from tasks.models import Task
+from ._bench import rolled_back, best_of
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks team top-5 lookups: per-user COUNTs and an all-history Avg vs the precomputed leaderboard.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=3000)
+        parser.add_argument('--tasks-per-member', type=int, default=30)
+        parser.add_argument('--days', type=int, default=30)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self._run(options)
+
+    def _run(self, options):
+        rng = random.Random(0)
+        members = User.objects.bulk_create([
+            User(email=f'bench-leaderboard-{i}@example.com') for i in range(options['members'])
+        ])
+        projects = Project.objects.bulk_create([
+            Project(name=f'Team {i}', owner=members[i]) for i in range(0, len(members), 10)
+        ])
+        today = timezone.localdate()
+        Task.objects.bulk_create([
+            Task(
+                title=f'Task {i}', project=rng.choice(projects), assigned_to=member,
+                status=rng.choice(['todo', 'in_progress', 'done']),
+            )
+            for member in members
+            for i in range(options['tasks_per_member'])
+        ], batch_size=5000)
+        ProductivityMetrics.objects.bulk_create([
+            ProductivityMetrics(user=member, date=today - timedelta(days=day), productivity_score=rng.uniform(0, 100))
+            for member in members
+            for day in range(options['days'])
+        ], batch_size=5000)
+        started = time.perf_counter()
+        rows = leaderboard.rebuild_leaderboard()
+        rebuild_ms = (time.perf_counter() - started) * 1000
+
+        def per_user():
+            # A correct top 5 by completion rate the way the dashboard counted it
+            ranked = []
+            for member in User.objects.filter(is_active=True):
+                assigned = Task.objects.filter(assigned_to=member)
+                total = assigned.count()
+                if total:
+                    ranked.append((assigned.filter(status__in=['done', 'completed']).count() / total, member.pk))
+            sorted(ranked, reverse=True)[:5]
+
+        def all_history():
+            list(User.objects.annotate(
+                productivity=Avg('productivitymetrics__productivity_score')
+            ).order_by('-productivity')[:5])
+
+        def from_leaderboard():
+            leaderboard.top('all', order='rate', user__is_active=True, tasks_assigned__gt=0)
+            leaderboard.top('month', order='productivity', score_count__gt=0)
+
+        count_ms, avg_ms = best_of(per_user, repeat=1), best_of(all_history)
+        top_ms = best_of(from_leaderboard)
+        self.stdout.write(
+            f"{len(members)} members, {Task.objects.count()} tasks; rebuilt {rows} leaderboard rows in {rebuild_ms:.0f} ms"
+        )
+        self.stdout.write(
+            f"per-user counts {count_ms:8.1f} ms + all-history Avg {avg_ms:6.1f} ms, "
+            f"leaderboard top 5 (both) {top_ms:6.2f} ms"
+        )
+
+        task = Task.objects.filter(assigned_to=members[0], status='todo').first()
+
+        def status_change():
+            task.status = 'done' if task.status == 'todo' else 'todo'
+            task.save()
+
+        self.stdout.write(f"one status change, leaderboard upsert included: {best_of(status_change, repeat=10):.2f} ms")
+        self.stdout.write(self.style.SUCCESS(f"{(count_ms + avg_ms) / top_ms:.0f}x faster"))
@@ -0,0 +1,56 @@
+import re
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from notifications.models import Notification
+from projects.models import Project
+from tasks.models import Task
+from tasks.utils import handle_mentions_in_comment
+from ._bench import rolled_back, best_of
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks a comment that mentions a whole team: one lookup and insert per mention vs the batched engine.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mentions', type=int, default=30)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self._run(options)
+
+    def _run(self, options):
+        author = User.objects.create_user(email='bench-mentions@example.com', password='bench')
+        team = User.objects.bulk_create([
+            User(email=f'bench-mention-{i}@example.com') for i in range(options['mentions'])
+        ])
+        task = Task.objects.create(title='Bench mentions', project=Project.objects.create(name='Bench', owner=author))
+        text = 'Heads up ' + ' '.join(f'@{user.email}' for user in team) + ' @unknown@example.com'
+
+        def per_mention():
+            # What handle_mentions_in_comment did before: a get() and a create() per mention
+            for email in re.findall(r'@([A-Za-z0-9_\.@]+)', text):
+                try:
+                    user = User.objects.get(email=email)
+                except User.DoesNotExist:
+                    continue
+                Notification.objects.create(user=user, message='mentioned', task=task, notification_type='web')
+
+        def batched():
+            with TestCase.captureOnCommitCallbacks(execute=True):
+                handle_mentions_in_comment(text, task, author)
+
+        per_mention_ms = best_of(per_mention)
+        cache.clear()
+        with CaptureQueriesContext(connection) as cold:
+            batched()
+        batched_ms = best_of(batched)
+        self.stdout.write(f"comment mentioning {options['mentions']} users (+1 unknown address)")
+        self.stdout.write(f"per mention {per_mention_ms:8.2f} ms, {2 * options['mentions'] + 1} queries")
+        self.stdout.write(f"batched     {batched_ms:8.2f} ms, {len(cold.captured_queries)} queries with a cold index")
+        self.stdout.write(self.style.SUCCESS(f"{per_mention_ms / batched_ms:.1f}x faster"))
@@ -0,0 +1,89 @@
+import random
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Sum
+from django.utils import timezone
+from analytics import productivity
+from analytics.models import ProductivityMetrics
+from projects.models import Project
+from tasks.models import Task
+from ._bench import rolled_back, best_of
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks productivity reports over overlapping ranges: per-range queries vs cached per-day partials.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--tasks', type=int, default=20000)
+        parser.add_argument('--ranges', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self._run(options)
+
+    def _run(self, options):
+        rng = random.Random(0)
+        user = User.objects.create_user(email='bench-productivity@example.com', password='bench')
+        project = Project.objects.create(name='Bench productivity', owner=user)
+        today = timezone.localdate()
+        ProductivityMetrics.objects.bulk_create([
+            ProductivityMetrics(
+                user=user, project=project, date=today - timedelta(days=day),
+                tasks_completed=rng.randint(0, 8), time_spent=timedelta(minutes=rng.randint(0, 480)),
+                productivity_score=rng.uniform(0, 100),
+            )
+            for day in range(options['days'])
+        ])
+        created = Task.objects.bulk_create([
+            Task(title=f'Task {i}', project=project, assigned_to=user, status=rng.choice(['todo', 'done']))
+            for i in range(options['tasks'])
+        ], batch_size=5000)
+        # Spread creation and completion over the period
+        for task in created:
+            task.created_at = task.updated_at = timezone.now() - timedelta(days=rng.randrange(options['days']))
+        Task.objects.bulk_update(created, ['created_at', 'updated_at'], batch_size=5000)
+
+        # Dashboards asking for "the last N days", each a new cache key before
+        ranges = [
+            (today - timedelta(days=rng.randint(7, options['days'] - 1)), today)
+            for _ in range(options['ranges'])
+        ]
+
+        def per_range():
+            for start, end in ranges:
+                metrics = ProductivityMetrics.objects.filter(user=user, date__range=[start, end])
+                metrics.aggregate(total=Sum('tasks_completed'))
+                metrics.aggregate(total=Sum('time_spent'))
+                metrics.aggregate(avg=Avg('productivity_score'))
+                assigned = Task.objects.filter(assigned_to=user)
+                assigned.filter(status='completed', updated_at__date__range=[start, end]).count()
+                assigned.filter(created_at__date__range=[start, end]).count()
+                assigned.filter(
+                    status='completed', updated_at__date__range=[today - timedelta(days=60), today - timedelta(days=30)]
+                ).count()
+
+        def partials():
+            last_month = (today - timedelta(days=60), today - timedelta(days=30))
+            for start, end in ranges:
+                productivity.totals(user.pk, start, end)
+                productivity.totals(user.pk, *last_month)
+
+        def cold():
+            cache.clear()
+            partials()
+
+        per_range_ms, cold_ms, warm_ms = best_of(per_range), best_of(cold), best_of(partials)
+        count = len(ranges)
+        self.stdout.write(
+            f"{options['tasks']} tasks, {options['days']} days of metrics, {count} distinct ranges"
+        )
+        self.stdout.write(
+            f"per-range queries {per_range_ms / count:7.2f} ms/report, partials {cold_ms / count:6.2f} ms/report "
+            f"from a cold cache, {warm_ms / count:6.3f} ms/report warm"
+        )
+        self.stdout.write(self.style.SUCCESS(f"{per_range_ms / cold_ms:.1f}x faster cold, {per_range_ms / warm_ms:.0f}x warm"))
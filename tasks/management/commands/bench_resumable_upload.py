@@ -0,0 +1,80 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from projects.models import Project
+from tasks.models import Task
+from tasks.uploads import UPLOAD_CHUNK_SIZE
+from ._bench import rolled_back
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares a one-shot multipart attachment upload with the chunked resumable protocol: '
+        'worker time per request and bytes resent after a dropped connection.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=float, default=9.5)
+        parser.add_argument('--fail-at', type=float, default=0.8, help='fraction sent when the connection drops')
+
+    def handle(self, *args, **options):
+        root = tempfile.mkdtemp()
+        try:
+            with override_settings(MEDIA_ROOT=root), rolled_back():
+                self._run(options)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+    def _run(self, options):
+        size = int(options['size_mb'] * 1024 * 1024)
+        content = b'%PDF-1.7\n' + os.urandom(size - 9)
+        user = User.objects.create_user(email='bench-uploads@example.com', password='bench')
+        task = Task.objects.create(title='Bench uploads', project=Project.objects.create(name='Bench', owner=user))
+        client = Client(SERVER_NAME='localhost')
+        client.force_login(user)
+
+        start = time.perf_counter()
+        response = client.post('/tasks/api/attachments/', {
+            'task': str(task.pk), 'file': SimpleUploadedFile('report.pdf', content),
+        })
+        multipart_ms = (time.perf_counter() - start) * 1000
+        assert response.status_code == 201, response.content
+
+        response = client.post('/tasks/api/uploads/', {
+            'task': str(task.pk), 'filename': 'report-2.pdf', 'size': size,
+            'checksum': hashlib.sha256(content).hexdigest(),
+        }, content_type='application/json')
+        url = f"/tasks/api/uploads/{response.json()['id']}/"
+        chunk_timings = []
+        for offset in range(0, size, UPLOAD_CHUNK_SIZE):
+            start = time.perf_counter()
+            client.put(
+                f'{url}chunk/', content[offset:offset + UPLOAD_CHUNK_SIZE],
+                content_type='application/octet-stream', headers={'Upload-Offset': str(offset)},
+            )
+            chunk_timings.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        assert client.post(f'{url}complete/').status_code == 201
+        complete_ms = (time.perf_counter() - start) * 1000
+
+        dropped_at = int(size * options['fail_at'])
+        multipart_resent = dropped_at + size
+        resumable_resent = size + dropped_at % UPLOAD_CHUNK_SIZE
+        self.stdout.write(f"{options['size_mb']} MB attachment, {UPLOAD_CHUNK_SIZE // 1024} KB chunks")
+        self.stdout.write(f"multipart  one request   {multipart_ms:8.1f} ms")
+        self.stdout.write(
+            f"resumable  {len(chunk_timings)} chunks  longest {max(chunk_timings):6.1f} ms, "
+            f"total {sum(chunk_timings):7.1f} ms, complete {complete_ms:6.1f} ms"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"connection lost at {options['fail_at']:.0%}: multipart sends {multipart_resent / 1024 / 1024:.1f} MB in "
+            f"total, resumable {resumable_resent / 1024 / 1024:.1f} MB"
+        ))
@@ -0,0 +1,76 @@
+import random
+import string
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from core.search_index import Scope, reindex, search
+from projects.models import Project
+from projects.utils import visible_project_ids
+from tasks.models import Task
+from tasks.utils import visible_tasks
+from ._bench import rolled_back, best_of
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks global task search: icontains over the tasks table vs the full-text index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=100_000)
+        parser.add_argument('--projects', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self._run(options)
+
+    def _run(self, options):
+        rng = random.Random(0)
+        vocabulary = [''.join(rng.choices(string.ascii_lowercase, k=7)) for _ in range(5000)]
+        owner = User.objects.create_user(email='bench-search@example.com', password='bench')
+        developer = User.objects.create_user(email='bench-search-dev@example.com', password='bench')
+        projects = Project.objects.bulk_create([
+            Project(name=f'Bench search {i}', owner=owner) for i in range(options['projects'])
+        ])
+        for project in projects[::20]:
+            project.members.add(developer)
+
+        batch = []
+        for i in range(options['documents']):
+            batch.append(Task(
+                title=' '.join(rng.choices(vocabulary, k=5)),
+                description=' '.join(rng.choices(vocabulary, k=30)),
+                project=projects[i % len(projects)],
+            ))
+            if len(batch) == 5000:
+                Task.objects.bulk_create(batch)
+                batch = []
+        Task.objects.bulk_create(batch)
+
+        started = time.perf_counter()
+        counts = reindex()
+        reindex_s = time.perf_counter() - started
+        query = f'{vocabulary[42]} {vocabulary[7][:4]}'
+        scopes = {
+            'admin': (Task.objects.all(), Scope(project_ids=None)),
+            'developer': (
+                visible_tasks(developer),
+                Scope(project_ids=visible_project_ids(developer), assignee_id=developer.pk),
+            ),
+        }
+
+        self.stdout.write(f"{sum(counts.values())} indexed documents (reindex {reindex_s:.1f} s), query {query!r}")
+        for role, (tasks, scope) in scopes.items():
+            def scan():
+                found = tasks
+                for term in query.split():
+                    found = found.filter(Q(title__icontains=term) | Q(description__icontains=term))
+                return list(found.values_list('pk', flat=True)[:5])
+
+            def indexed():
+                return search(query, 'task', scope, 5)
+
+            scan_ms, indexed_ms = best_of(scan), best_of(indexed)
+            self.stdout.write(f"{role:<9} icontains {scan_ms:9.2f} ms, full-text {indexed_ms:7.2f} ms")
+            self.stdout.write(self.style.SUCCESS(f"{role:<9} {scan_ms / indexed_ms:.1f}x faster"))
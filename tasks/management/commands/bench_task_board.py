@@ -0,0 +1,62 @@
+import random
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client
+from projects.models import Project
+from tasks.models import Task
+from ._bench import rolled_back, best_of
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks loading a Kanban board: full task list grouped client-side vs the windowed board endpoint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10000)
+        parser.add_argument('--limit', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self._run(options)
+
+    def _run(self, options):
+        user = User.objects.create_user(email='bench-board@example.com', password='bench')
+        project = Project.objects.create(name='Bench board', owner=user)
+        statuses = [value for value, _ in Task.STATUS_CHOICES]
+        Task.objects.bulk_create(
+            [Task(title=f'Card {i}', project=project, status=random.choice(statuses)) for i in range(options['tasks'])],
+            batch_size=1000,
+        )
+        client = Client(SERVER_NAME='localhost')
+        client.force_login(user)
+        project_id = str(project.pk)
+
+        def full_list():
+            # What the tasks page does today: every page of the list, grouped in the browser
+            responses, page = [], 1
+            while page:
+                response = client.get('/tasks/api/tasks/', {'project': project_id, 'page': page, 'page_size': 500})
+                responses.append(response)
+                page = page + 1 if response.json().get('next') else None
+            return responses
+
+        def board():
+            return [client.get('/tasks/api/tasks/board/', {'project': project_id, 'limit': options['limit']})]
+
+        rows = []
+        for label, load in (('full list', full_list), ('board', board)):
+            cache.clear()
+            responses = load()
+            size = sum(len(response.content) for response in responses)
+            elapsed = best_of(lambda: (cache.clear(), load()), repeat=3)
+            rows.append((label, len(responses), size, elapsed))
+
+        self.stdout.write(f"{options['tasks']} tasks, {options['limit']} per column:")
+        for label, requests, size, elapsed in rows:
+            self.stdout.write(f"{label:10} {requests:3} requests {size / 1024:9.1f} KB {elapsed:9.1f} ms")
+        (_, _, full_size, full_ms), (_, _, board_size, board_ms) = rows
+        self.stdout.write(self.style.SUCCESS(
+            f"board is {full_ms / board_ms:.0f}x faster with a {full_size / board_size:.0f}x smaller payload"
+        ))
@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+from projects.models import Project
+from tasks import bulk
+from tasks.models import Task
+from tasks.views import TaskViewSet
+from ._bench import rolled_back, best_of
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks creating a batch of tasks one request at a time vs. the bulk-create endpoint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1_000)
+        parser.add_argument('--assignees', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        # Throttling is disabled so the per-row baseline is not capped at the hourly rate.
+        create_one = TaskViewSet.as_view({'post': 'create'}, throttle_classes=[])
+        create_many = TaskViewSet.as_view({'post': 'bulk_create'}, throttle_classes=[])
+
+        with rolled_back():
+            user, payload = self._seed(options)
+
+            def post(view, data):
+                request = factory.post('/api/tasks/', data, format='json')
+                force_authenticate(request, user=user)
+                return view(request)
+
+            def per_row():
+                # One request per task, with the per-row fan-out the task signals perform.
+                with TestCase.captureOnCommitCallbacks(execute=True):
+                    for item in payload:
+                        response = post(create_one, item)
+                        bulk.fan_out('created', [Task.objects.get(pk=response.data['id'])], user)
+
+            def batched():
+                with TestCase.captureOnCommitCallbacks(execute=True):
+                    response = post(create_many, {'tasks': payload})
+                assert response.data['failed'] == 0, response.data
+
+            per_row_ms = best_of(per_row, options['repeat'])
+            batched_ms = best_of(batched, options['repeat'])
+
+        count = len(payload)
+        self.stdout.write(f"one request per task : {per_row_ms:9.1f} ms ({count / per_row_ms * 1000:8.0f} tasks/s)")
+        self.stdout.write(f"bulk-create          : {batched_ms:9.1f} ms ({count / batched_ms * 1000:8.0f} tasks/s)")
+        self.stdout.write(self.style.SUCCESS(f"speedup              : {per_row_ms / batched_ms:9.1f}x"))
+
+    def _seed(self, options):
+        users = User.objects.bulk_create([
+            User(email=f'bench-bulk-{i}@example.com') for i in range(options['assignees'] + 1)
+        ])
+        project = Project.objects.create(name='Bench bulk project', owner=users[0])
+        payload = [
+            {
+                'title': f'Bench bulk task {i}',
+                'project': str(project.pk),
+                'assigned_to': users[1 + i % options['assignees']].pk,
+                'status': 'todo',
+            }
+            for i in range(options['tasks'])
+        ]
+        return users[0], payload
@@ -0,0 +1,66 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from projects.models import Project
+from tasks.graph import project_graph, invalidate_project_graphs, creates_cycle
+from tasks.models import Task
+from ._bench import rolled_back, best_of
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the task dependency graph (load, topological order, blocked sets, critical path).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=50_000)
+        parser.add_argument('--dependency-ratio', type=float, default=0.8,
+                            help='Share of tasks that depend on an earlier task.')
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            project = self._seed(options)
+            graph = project_graph(project.pk)
+
+            def cold_load():
+                invalidate_project_graphs(project.pk)
+                project_graph(project.pk)
+
+            project_graph(project.pk)
+            timings = [
+                ('cold load (1 query)', best_of(cold_load)),
+                ('cached load', best_of(lambda: project_graph(project.pk))),
+                ('topological order', best_of(graph.topological_order)),
+                ('blocked / unblocked', best_of(graph.blocked_sets)),
+                ('critical path', best_of(graph.critical_path)),
+            ]
+            leaf = graph.topological_order()[0][-1]
+            root = graph.topological_order()[0][0]
+            timings.append(('cycle check', best_of(lambda: creates_cycle(root, leaf, project.pk))))
+            path = graph.critical_path()
+            invalidate_project_graphs(project.pk)
+
+        for label, ms in timings:
+            self.stdout.write(f"{label:22}: {ms:8.1f} ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['tasks']} tasks, critical path of {len(path['path'])} tasks over {path['duration_days']} days"
+        ))
+
+    def _seed(self, options):
+        self.stdout.write('Seeding benchmark data...')
+        owner = User.objects.create(email='bench-graph@example.com')
+        project = Project.objects.create(name='Bench graph project', owner=owner)
+        tasks = []
+        for i in range(options['tasks']):
+            depends_on = random.choice(tasks) if tasks and random.random() < options['dependency_ratio'] else None
+            tasks.append(Task(
+                title=f'Bench graph task {i}',
+                project=project,
+                depends_on=depends_on,
+                status=random.choice(['todo', 'in_progress', 'done']),
+            ))
+        start = time.perf_counter()
+        Task.objects.bulk_create(tasks, batch_size=5000)
+        self.stdout.write(f"seeded in {time.perf_counter() - start:.1f} s")
+        return project
@@ -0,0 +1,76 @@
+import random
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from projects.models import Project
+from tasks.models import Task, Subtask, TimeEntry
+from tasks.progress import ROLLUP_FIELDS, recompute_progress
+from ._bench import rolled_back, best_of
+
+User = get_user_model()
+
+
+def _aggregate(model, task_field, expression):
+    rows = model.objects.filter(**{task_field: OuterRef('pk')}).values(task_field).order_by()
+    return Coalesce(Subquery(rows.annotate(total=expression).values('total'), output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks a page of task progress figures: aggregated per request vs read from the rollup columns.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=2000)
+        parser.add_argument('--subtasks', type=int, default=10)
+        parser.add_argument('--entries', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self._run(options)
+
+    def _run(self, options):
+        user = User.objects.create_user(email='bench-progress@example.com', password='bench')
+        project = Project.objects.create(name='Bench progress', owner=user)
+        tasks = Task.objects.bulk_create(
+            [Task(title=f'Task {i}', project=project) for i in range(options['tasks'])], batch_size=1000
+        )
+        now = timezone.now()
+        Subtask.objects.bulk_create([
+            Subtask(
+                parent_task=task, title=f'Step {i}', estimated_minutes=30,
+                status=random.choice(['pending', 'completed']), actual_minutes=random.randint(0, 40),
+            )
+            for task in tasks for i in range(options['subtasks'])
+        ], batch_size=2000)
+        TimeEntry.objects.bulk_create([
+            TimeEntry(task=task, user=user, start_time=now, duration_minutes=random.randint(5, 90))
+            for task in tasks for _ in range(options['entries'])
+        ], batch_size=2000)
+        # bulk_create skips the receivers; this is what the management command is for
+        drifted = len(recompute_progress())
+
+        page = options['page_size']
+        base = Task.objects.filter(project=project).order_by('-created_at')
+
+        def aggregated():
+            return list(base.annotate(
+                total=_aggregate(Subtask, 'parent_task', Count('pk')),
+                completed=_aggregate(Subtask, 'parent_task', Count('pk', filter=Q(status='completed'))),
+                estimated=_aggregate(Subtask, 'parent_task', Sum('estimated_minutes')),
+                actual=_aggregate(Subtask, 'parent_task', Sum('actual_minutes')),
+                logged=_aggregate(TimeEntry, 'task', Sum('duration_minutes')),
+            )[:page])
+
+        def denormalized():
+            return list(base.only('pk', 'title', *ROLLUP_FIELDS)[:page])
+
+        aggregated_ms, denormalized_ms = best_of(aggregated), best_of(denormalized)
+        self.stdout.write(
+            f"{options['tasks']} tasks x {options['subtasks']} subtasks x {options['entries']} time entries "
+            f"(recompute fixed {drifted})"
+        )
+        self.stdout.write(f"aggregated    {aggregated_ms:8.2f} ms per page of {page}")
+        self.stdout.write(f"rollup fields {denormalized_ms:8.2f} ms per page of {page}")
+        self.stdout.write(self.style.SUCCESS(f"{aggregated_ms / denormalized_ms:.0f}x faster"))
@@ -0,0 +1,76 @@
+import random
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from projects.models import Project
+from tasks.models import Task
+from tasks.utils import visible_tasks
+from ._bench import rolled_back, best_of
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks task list visibility filtering (OR-join + DISTINCT vs. cached project index).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=100_000)
+        parser.add_argument('--projects', type=int, default=1_000)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--members', type=int, default=8, help='Members per project.')
+        parser.add_argument('--page-size', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            user = self._seed(options)
+            page = options['page_size']
+
+            def legacy():
+                qs = Task.objects.filter(
+                    Q(assigned_to=user) | Q(project__owner=user) | Q(project__members=user)
+                ).select_related('project', 'assigned_to').distinct()
+                qs.count()
+                list(qs[:page])
+
+            def indexed():
+                qs = visible_tasks(user).select_related('project', 'assigned_to')
+                qs.count()
+                list(qs[:page])
+
+            visible_tasks(user).exists()  # warm the visibility cache
+            legacy_ms = best_of(legacy)
+            indexed_ms = best_of(indexed)
+
+        self.stdout.write(f"OR-join + DISTINCT : {legacy_ms:8.1f} ms per page")
+        self.stdout.write(f"project index      : {indexed_ms:8.1f} ms per page")
+        self.stdout.write(self.style.SUCCESS(f"speedup            : {legacy_ms / indexed_ms:8.1f}x"))
+
+    def _seed(self, options):
+        self.stdout.write('Seeding benchmark data...')
+        users = User.objects.bulk_create([
+            User(email=f'bench-visibility-{i}@example.com') for i in range(options['users'])
+        ])
+        projects = Project.objects.bulk_create([
+            Project(name=f'Bench project {i}', owner=random.choice(users))
+            for i in range(options['projects'])
+        ])
+        through = Project.members.through
+        memberships = {
+            (project.id, member.id)
+            for project in projects
+            for member in random.sample(users, options['members'])
+        }
+        through.objects.bulk_create([
+            through(project_id=project_id, customuser_id=user_id)
+            for project_id, user_id in memberships
+        ])
+        Task.objects.bulk_create([
+            Task(
+                title=f'Bench task {i}',
+                project=random.choice(projects),
+                assigned_to=random.choice(users),
+                status=random.choice(['todo', 'in_progress', 'done']),
+            )
+            for i in range(options['tasks'])
+        ], batch_size=5000)
+        return users[0]
@@ -0,0 +1,63 @@
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import TestCase
+from projects.models import Project
+from tasks.bulk import instantiate_template
+from tasks.models import Task, Subtask, Tag, TaskTemplate
+from ._bench import rolled_back
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks instantiating a template into many projects: one create per row vs bulk instantiation.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=200)
+        parser.add_argument('--checklist', type=int, default=10)
+        parser.add_argument('--tags', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self._run(options)
+
+    def _run(self, options):
+        user = User.objects.create_user(email='bench-templates@example.com', password='bench')
+        projects = Project.objects.bulk_create([
+            Project(name=f'Onboarding {i}', owner=user) for i in range(options['projects'])
+        ])
+        template = TaskTemplate.objects.create(
+            name='Kickoff', description='Start the project', created_by=user,
+            checklist_items=[f'Step {i}' for i in range(options['checklist'])],
+            tags=[f'bench-tag-{i}' for i in range(options['tags'])],
+        )
+
+        def one_by_one():
+            # The old create_task_from_template path, once per project
+            tags = [Tag.objects.get_or_create(name=name)[0] for name in template.tags]
+            for project in projects:
+                task = Task.objects.create(
+                    title=template.name, description=template.description, project=project, assigned_to=user
+                )
+                for order, title in enumerate(template.checklist_items):
+                    Subtask.objects.create(parent_task=task, title=title, order=order)
+                task.tags.add(*tags)
+                template.usage_count += 1
+                template.save(update_fields=['usage_count'])
+
+        def bulk():
+            instantiate_template(template, projects, user)
+
+        timings = {}
+        for label, run in (('one by one', one_by_one), ('bulk', bulk)):
+            start = time.perf_counter()
+            with TestCase.captureOnCommitCallbacks(execute=True):
+                run()
+            timings[label] = (time.perf_counter() - start) * 1000
+        self.stdout.write(
+            f"{options['projects']} projects x {options['checklist']} checklist items, {options['tags']} tags"
+        )
+        for label, elapsed in timings.items():
+            self.stdout.write(f"{label:10} {elapsed:9.1f} ms")
+        self.stdout.write(self.style.SUCCESS(f"{timings['one by one'] / timings['bulk']:.0f}x faster"))
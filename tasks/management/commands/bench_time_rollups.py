@@ -0,0 +1,88 @@
+import random
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+from analytics.models import TimeRollup, TimeTracking
+from analytics.rollups import rebuild_rollups, time_report
+from projects.models import Project
+from tasks.models import Task, TimeEntry
+from ._bench import rolled_back, best_of
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks a year-long per-user time report: summing raw time records vs reading the daily rollups.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--per-day', type=int, default=80, help='time records per day, split across both sources')
+        parser.add_argument('--tasks', type=int, default=25)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self._run(options)
+
+    def _run(self, options):
+        user = User.objects.create_user(email='bench-rollups@example.com', password='bench')
+        project = Project.objects.create(name='Bench rollups', owner=user)
+        tasks = Task.objects.bulk_create([Task(title=f'Task {i}', project=project) for i in range(options['tasks'])])
+        end = timezone.now().replace(minute=0, second=0, microsecond=0)
+        start = end - timedelta(days=options['days'])
+        entries, trackings = [], []
+        for day in range(options['days']):
+            for slot in range(options['per_day']):
+                began = start + timedelta(days=day, minutes=slot * 1440 // options['per_day'])
+                minutes = random.randint(5, 15)
+                task = random.choice(tasks)
+                if slot % 2:
+                    entries.append(TimeEntry(
+                        task=task, user=user, start_time=began,
+                        end_time=began + timedelta(minutes=minutes), duration_minutes=minutes,
+                    ))
+                else:
+                    trackings.append(TimeTracking(
+                        task=task, user=user, start_time=began, end_time=began + timedelta(minutes=minutes),
+                        duration=timedelta(minutes=minutes), is_active=False,
+                    ))
+        TimeEntry.objects.bulk_create(entries, batch_size=2000)
+        TimeTracking.objects.bulk_create(trackings, batch_size=2000)
+        # bulk_create skips the receivers; this is what backfill_time_rollups is for
+        rebuild_rollups()
+        day_rows = TimeRollup.objects.filter(user=user, granularity='day').count()
+
+        def raw():
+            per_day = {}
+            sources = (
+                (TimeEntry.objects.filter(user=user, start_time__range=(start, end)), Sum('duration_minutes')),
+                (TimeTracking.objects.filter(user=user, start_time__range=(start, end)), Sum('duration')),
+            )
+            for rows, total in sources:
+                for row in rows.annotate(day=TruncDay('start_time')).values('day').order_by('day').annotate(total=total):
+                    value = row['total']
+                    minutes = value.total_seconds() / 60 if isinstance(value, timedelta) else value
+                    per_day[row['day']] = per_day.get(row['day'], 0) + minutes
+            return per_day
+
+        def rollups():
+            return time_report(start, end, 'day', 'period', user=user)
+
+        raw_ms, rollup_ms = best_of(raw), best_of(rollups)
+        tracking = TimeTracking.objects.create(user=user, task=tasks[0], start_time=end - timedelta(hours=3))
+
+        def stop_timer():
+            tracking.end_time = end
+            tracking.duration = tracking.end_time - tracking.start_time
+            tracking.save()
+
+        stop_ms = best_of(stop_timer)
+        self.stdout.write(
+            f"{options['days']} days, {len(entries) + len(trackings)} time records -> {day_rows} daily rollup rows"
+        )
+        self.stdout.write(f"raw records {raw_ms:8.2f} ms per yearly report")
+        self.stdout.write(f"rollups     {rollup_ms:8.2f} ms per yearly report")
+        self.stdout.write(f"stopping a timer updates its rollups in {stop_ms:.2f} ms")
+        self.stdout.write(self.style.SUCCESS(f"{raw_ms / rollup_ms:.0f}x faster"))
@@ -0,0 +1,83 @@
+import random
+import string
+import time
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from core import typeahead
+from projects.models import Project
+from tasks.models import Task
+from tasks.utils import visible_tasks
+from ._bench import rolled_back, best_of
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks search box keystrokes: icontains over tasks and projects vs the typeahead prefix index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=200)
+        parser.add_argument('--tasks-per-project', type=int, default=500)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self._run(options)
+
+    def _run(self, options):
+        rng = random.Random(0)
+        vocabulary = [''.join(rng.choices(string.ascii_lowercase, k=7)) for _ in range(5000)]
+        owner = User.objects.create_user(email='bench-typeahead@example.com', password='bench')
+        developer = User.objects.create_user(email='bench-typeahead-dev@example.com', password='bench')
+        for user, role in ((owner, 'admin'), (developer, 'developer')):
+            user.profile.role = role
+            user.profile.save()
+        projects = Project.objects.bulk_create([
+            Project(name=' '.join(rng.choices(vocabulary, k=2)), owner=owner) for _ in range(options['projects'])
+        ])
+        for project in projects[::20]:
+            project.members.add(developer)
+        Task.objects.bulk_create([
+            Task(title=' '.join(rng.choices(vocabulary, k=5)), project=project)
+            for project in projects
+            for _ in range(options['tasks_per_project'])
+        ], batch_size=5000)
+
+        keystrokes = [vocabulary[42][:size] for size in range(1, 6)]
+        cache.clear()
+        self.stdout.write(f"{Task.objects.count()} tasks in {len(projects)} projects, typing {vocabulary[42][:5]!r}")
+        for user, tasks in ((owner, Task.objects.all()), (developer, visible_tasks(developer))):
+            role = user.profile.role
+
+            def scan():
+                # What each keystroke cost when the box called global_search
+                for query in keystrokes:
+                    found = tasks.filter(Q(title__icontains=query) | Q(description__icontains=query))
+                    list(found.values_list('pk', flat=True)[:5])
+                    list(Project.objects.filter(name__icontains=query).values_list('pk', flat=True)[:5])
+
+            started = time.perf_counter()
+            typeahead.suggest(user, keystrokes[0])
+            cold_ms = (time.perf_counter() - started) * 1000
+
+            def suggest():
+                for query in keystrokes:
+                    typeahead.suggest(user, query)
+
+            scan_ms, suggest_ms = best_of(scan) / len(keystrokes), best_of(suggest) / len(keystrokes)
+            self.stdout.write(
+                f"{role:<9} icontains {scan_ms:8.2f} ms/keystroke, prefix index {suggest_ms:6.3f} ms/keystroke "
+                f"(first build {cold_ms:.0f} ms)"
+            )
+            self.stdout.write(self.style.SUCCESS(f"{role:<9} {scan_ms / suggest_ms:.0f}x faster"))
+
+        task = Task.objects.filter(project=projects[0]).first()
+
+        def rename():
+            Task.objects.filter(pk=task.pk).update(title=' '.join(rng.choices(vocabulary, k=5)))
+            # What the on_commit callback does; it never runs in the rolled back transaction
+            typeahead._bump({f'project:{task.project_id}'})
+            typeahead.suggest(owner, keystrokes[0])
+
+        self.stdout.write(f"admin     task rename, then a keystroke {best_of(rename):.1f} ms (workspace patched in place)")
@@ -0,0 +1,51 @@
+import time
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.exceptions import APIException
+from tasks.models import Attachment
+from tasks.upload_handlers import AttachmentUploadHandler
+from tasks.validators import validate_attachment
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks rejecting bad attachment uploads after the full body is read versus while it streams.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        limit = Attachment.MAX_FILE_SIZE
+        cases = (
+            ('disguised pdf', 'photo.png', b'%PDF-1.7\n' + b'0' * (limit - 1024)),
+            # Rejected at the chunk that crosses the limit, so the whole allowed size is still read
+            ('just over', 'notes.txt', b'a' * (limit + 1)),
+            # Rejected from Content-Length before the body is read
+            ('far over', 'notes.txt', b'a' * (limit * 3)),
+        )
+        factory = RequestFactory()
+        for label, name, content in cases:
+            row = []
+            for streaming in (False, True):
+                timings = []
+                for _ in range(options['repeat']):
+                    request = factory.post('/tasks/api/attachments/', {'file': SimpleUploadedFile(name, content)})
+                    start = time.perf_counter()
+                    self._parse_and_validate(request, streaming)
+                    timings.append(time.perf_counter() - start)
+                row.append(min(timings) * 1000)
+            after, streamed = row
+            self.stdout.write(
+                f"{label:14} {len(content) / (1024 * 1024):5.1f} MB: "
+                f"after full read {after:8.1f} ms, while streaming {streamed:6.2f} ms ({after / streamed:.0f}x)"
+            )
+
+    def _parse_and_validate(self, request, streaming):
+        if streaming:
+            request.upload_handlers.insert(0, AttachmentUploadHandler(request))
+        try:
+            validate_attachment(request.FILES['file'])
+        except (ValidationError, APIException):
+            return
+        raise AssertionError('upload was not rejected')
@@ -0,0 +1,27 @@
+from concurrent.futures import wait
+from django.core.management.base import BaseCommand
+from tasks.models import Attachment
+from tasks.previews import schedule_previews
+
+
+class Command(BaseCommand):
+    help = 'Renders missing thumbnails/previews for existing image and PDF attachments in the preview process pool.'
+
+    def handle(self, *args, **options):
+        attachments = Attachment.objects.filter(
+            file__startswith='blobs/', mime_type__in=['application/pdf']
+        ) | Attachment.objects.filter(file__startswith='blobs/', mime_type__startswith='image/')
+        seen, futures = set(), []
+        for attachment in attachments.only('id', 'file', 'mime_type').iterator(chunk_size=2000):
+            # Identical content shares one set of previews
+            if attachment.file.name in seen:
+                continue
+            seen.add(attachment.file.name)
+            future = schedule_previews(attachment)
+            if future is not None:
+                futures.append(future)
+        wait(futures)
+        failed = sum(1 for future in futures if future.exception() is not None)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered previews for {len(futures) - failed} file(s); {failed} failed."
+        ))
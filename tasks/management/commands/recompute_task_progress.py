@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from tasks.progress import recompute_progress
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the subtask and time-entry rollups on every task and reports the ones that had drifted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='report drift without fixing it')
+        parser.add_argument('--show', type=int, default=20, help='drifted tasks to list')
+
+    def handle(self, *args, **options):
+        drift = recompute_progress(dry_run=options['dry_run'])
+        for task_id, changes in list(drift.items())[:options['show']]:
+            details = ', '.join(f"{field} {stored} -> {actual}" for field, (stored, actual) in changes.items())
+            self.stdout.write(f"{task_id}: {details}")
+        verb = 'would be corrected' if options['dry_run'] else 'corrected'
+        self.stdout.write(self.style.SUCCESS(f"{len(drift)} task(s) had drifted and {verb}."))
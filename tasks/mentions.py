@@ -0,0 +1,116 @@
+"""
+@mention resolution and notification, shared by task comments and chat messages.
+
+Mentions are email addresses (``@jane@example.com``). Each lowercased address
+maps to a user id in the cache, so text full of mentions costs at most one
+``LOWER(email) IN (...)`` query for the addresses not seen before and one
+query to load the users. Addresses that belong to nobody are only remembered
+for a minute: a lookup racing the creation of that account in another process
+would otherwise hide it for a day. Notifications go in with a single
+``bulk_create``; realtime pushes and one batched email job leave after the
+transaction commits.
+"""
+import logging
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.db.models.signals import post_save, post_delete
+
+from notifications.models import Notification, send_realtime_notification
+from sync.log import record, notification_entries
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+MENTION_PATTERN = re.compile(r'@([A-Za-z0-9_\.@+-]+)')
+MENTION_INDEX_TIMEOUT = 60 * 60 * 24  # 1 day; user saves drop their entry
+NOBODY = ''  # cached for addresses without an account
+NOBODY_TIMEOUT = 60  # 1 minute; new accounts become mentionable after it
+
+
+def _index_key(email):
+    return f"mention_email_{email}"
+
+
+def extract_mentions(text):
+    """Mentioned email addresses, lowercased, in order of appearance and without repeats."""
+    emails = {}
+    for match in MENTION_PATTERN.findall(text or ''):
+        email = match.strip('.').lower()
+        if '@' in email:
+            emails.setdefault(email, None)
+    return list(emails)
+
+
+def resolve_mentions(text):
+    """Users mentioned in ``text``, in order of first mention."""
+    emails = extract_mentions(text)
+    if not emails:
+        return []
+    keys = {_index_key(email): email for email in emails}
+    ids = {keys[key]: user_id for key, user_id in cache.get_many(keys).items()}
+    missing = [email for email in emails if email not in ids]
+    if missing:
+        found = dict(
+            User.objects.annotate(email_lower=Lower('email'))
+            .filter(email_lower__in=missing)
+            .values_list('email_lower', 'pk')
+        )
+        resolved = {email: found.get(email, NOBODY) for email in missing}
+        cache.set_many({_index_key(email): found[email] for email in found}, MENTION_INDEX_TIMEOUT)
+        cache.set_many({_index_key(email): NOBODY for email in missing if email not in found}, NOBODY_TIMEOUT)
+        ids.update(resolved)
+
+    user_ids = [ids[email] for email in emails if ids[email] != NOBODY]
+    if not user_ids:
+        return []
+    users = User.objects.in_bulk(user_ids)
+    mentioned, stale = [], []
+    for email in emails:
+        if ids[email] == NOBODY:
+            continue
+        user = users.get(ids[email])
+        if user is None or user.email.lower() != email:
+            # Deleted or changed address since it was indexed
+            stale.append(_index_key(email))
+        elif user not in mentioned:
+            mentioned.append(user)
+    if stale:
+        cache.delete_many(stale)
+    return mentioned
+
+
+def notify_mentions(users, message, task=None, subject=None):
+    """One web notification per user in a single insert; pushes and emails go out after commit."""
+    notifications = Notification.objects.bulk_create([
+        Notification(user=user, message=message, task=task, notification_type='web') for user in users
+    ])
+    record(entry for notification in notifications for entry in notification_entries(notification))
+    emails = [(subject or message, message, user.email) for user in users if user.email]
+    transaction.on_commit(lambda: _fan_out(notifications, emails))
+    return notifications
+
+
+def _fan_out(notifications, emails):
+    for notification in notifications:
+        send_realtime_notification(notification.user_id, notification.message)
+    if not emails:
+        return
+    try:
+        from notifications.utils import send_email_notifications
+        send_email_notifications.delay(emails)
+    except Exception as e:
+        logger.warning(f"Could not queue mention emails: {e}")
+
+
+def forget_user_email(sender, instance, **kwargs):
+    if instance.email:
+        cache.delete(_index_key(instance.email.lower()))
+
+
+post_save.connect(forget_user_email, sender=User, dispatch_uid='mention_index_user_saved')
+post_delete.connect(forget_user_email, sender=User, dispatch_uid='mention_index_user_deleted')
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:42
+
+import django.core.validators
+import django.utils.timezone
+import tasks.models
+import tasks.storage
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_task_recurrence_series'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attachment',
+            name='file',
+            field=models.FileField(storage=tasks.storage.attachment_storage, upload_to='task_attachments/', validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['png', 'jpg', 'jpeg', 'pdf', 'txt', 'docx', 'doc', 'zip', 'xlsx', 'xls']), tasks.models.validate_file_size, tasks.models.validate_file_extension_secure]),
+        ),
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('digest', models.CharField(db_index=True, max_length=64)),
+                ('size', models.PositiveBigIntegerField()),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ref_count', 'last_used_at'], name='tasks_blob_ref_cou_781d3b_idx')],
+            },
+        ),
+    ]
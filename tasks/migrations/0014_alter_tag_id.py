@@ -0,0 +1,74 @@
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_tags(apps, schema_editor):
+    """Copy every tag and its task links into the UUID-keyed table, giving each tag a new key."""
+    Tag = apps.get_model('tasks', 'Tag')
+    NewTag = apps.get_model('tasks', 'NewTag')
+    new_ids = {}
+    tags = []
+    for tag in Tag.objects.order_by('pk').iterator():
+        new_ids[tag.pk] = uuid.uuid4()
+        tags.append(NewTag(
+            id=new_ids[tag.pk], name=tag.name, color=tag.color, created_by_id=tag.created_by_id,
+            created_at=tag.created_at,
+        ))
+    NewTag.objects.bulk_create(tags, batch_size=1000)
+    Link = NewTag.tasks.through
+    links = Tag.tasks.through.objects.values_list('tag_id', 'task_id').iterator()
+    Link.objects.bulk_create(
+        [Link(newtag_id=new_ids[tag_id], task_id=task_id) for tag_id, task_id in links], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0013_task_progress_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # The model switched to a UUID key without a migration, so every tag insert failed.
+    # A primary key can't change type in place on every backend, so the tags and their
+    # task links are copied into a new table that then takes the old one's name.
+    operations = [
+        migrations.CreateModel(
+            name='NewTag',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('color', models.CharField(default='#06b6d4', max_length=20)),
+                # Copied as is; auto_now_add is restored below
+                ('created_at', models.DateTimeField()),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('tasks', models.ManyToManyField(blank=True, related_name='+', to='tasks.task')),
+            ],
+        ),
+        migrations.RunPython(copy_tags, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='Tag',
+        ),
+        migrations.RenameModel(
+            old_name='NewTag',
+            new_name='Tag',
+        ),
+        migrations.AlterField(
+            model_name='tag',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name='tag',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='created_tags', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='tag',
+            name='tasks',
+            field=models.ManyToManyField(blank=True, related_name='tags', to='tasks.task'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:37
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_completed_at(apps, schema_editor):
+    # The last update is the best record of when finished tasks were completed
+    Task = apps.get_model('tasks', 'Task')
+    Task.objects.filter(status__in=('done', 'completed')).update(completed_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0014_alter_tag_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_completed_at, migrations.RunPython.noop),
+    ]
@@ -5,12 +5,20 @@ from django.core.validators import FileExtensionValidator
 from django.core.exceptions import ValidationError
 from projects.models import Project
 from django.utils import timezone
+from .storage import attachment_storage
+
+
+MAX_ATTACHMENT_SIZE = 10 * 1024 * 1024  # 10MB
+ATTACHMENT_EXTENSIONS = ['png', 'jpg', 'jpeg', 'pdf', 'txt', 'docx', 'doc', 'zip', 'xlsx', 'xls']
+# Statuses that count as finished ('completed' is left over from older data)
+DONE_STATUSES = ('done', 'completed')
+# Counters owned by tasks.progress, which updates them in place
+ROLLUP_FIELDS = ('subtasks_total', 'subtasks_completed', 'estimated_minutes', 'actual_minutes', 'logged_minutes')
 
 
 def validate_file_size(value):
     """Validate file size is under 10MB"""
-    limit = 10 * 1024 * 1024  # 10MB
-    if value.size > limit:
+    if value.size > MAX_ATTACHMENT_SIZE:
         raise ValidationError('File size cannot exceed 10MB.')
 
 
@@ -44,6 +52,16 @@ class Task(models.Model):
     assigned_to = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='assigned_tasks', on_delete=models.SET_NULL, blank=True, null=True)
     depends_on = models.ForeignKey('self', related_name='dependents', on_delete=models.SET_NULL, blank=True, null=True)
     recurrence = models.CharField(max_length=10, choices=RECURRENCE_CHOICES, default='none')
+    # Set on occurrences generated from a recurring task (see tasks.recurrence)
+    recurrence_series = models.ForeignKey('self', related_name='occurrences', on_delete=models.SET_NULL, blank=True, null=True)
+    # Rollups of the task's subtasks and time entries, kept current by tasks.progress
+    subtasks_total = models.PositiveIntegerField(default=0, editable=False)
+    subtasks_completed = models.PositiveIntegerField(default=0, editable=False)
+    estimated_minutes = models.PositiveIntegerField(default=0, editable=False)
+    actual_minutes = models.PositiveIntegerField(default=0, editable=False)
+    logged_minutes = models.PositiveIntegerField(default=0, editable=False)
+    # When the task last entered a done status; cleared when it leaves it
+    completed_at = models.DateTimeField(blank=True, null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -56,19 +74,58 @@ class Task(models.Model):
             models.Index(fields=['assigned_to', 'status']),
             models.Index(fields=['project', 'status']),
             models.Index(fields=['-created_at']),
+            models.Index(fields=['-created_at', '-id']),
+        ]
+        constraints = [
+            # One occurrence per series and due date, so re-running the generator is a no-op
+            models.UniqueConstraint(fields=['recurrence_series', 'due_date'], name='unique_recurrence_occurrence'),
         ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.stamp_completion()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None and not self._state.adding and not kwargs.get('force_insert'):
+            # Writing back the rollups loaded with this instance would undo the
+            # deltas tasks.progress applied since; they are only saved by name
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ROLLUP_FIELDS and field.attname not in deferred
+            ]
+        elif update_fields is not None and 'status' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'completed_at'}
+        super().save(*args, **kwargs)
+
+    def stamp_completion(self, now=None):
+        """Set ``completed_at`` when the task is done and clear it when it is not."""
+        if self.status not in DONE_STATUSES:
+            self.completed_at = None
+        elif self.completed_at is None:
+            self.completed_at = now or timezone.now()
+
     @property
     def comments_count(self):
+        # List querysets annotate the total (see tasks.utils.annotate_task_counts)
+        if hasattr(self, 'comments_total'):
+            return self.comments_total
         return self.comments.count()
 
     @property
     def attachments_count(self):
+        if hasattr(self, 'attachments_total'):
+            return self.attachments_total
         return self.attachments.count()
 
+    @property
+    def progress(self):
+        """Percentage of subtasks completed, from the rollup counters."""
+        if not self.subtasks_total:
+            return 0
+        return round(100 * self.subtasks_completed / self.subtasks_total)
+
 
 class Comment(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -94,12 +151,16 @@ class Comment(models.Model):
 
 
 class Attachment(models.Model):
+    MAX_FILE_SIZE = MAX_ATTACHMENT_SIZE
+    ALLOWED_EXTENSIONS = ATTACHMENT_EXTENSIONS
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     task = models.ForeignKey(Task, related_name='attachments', on_delete=models.CASCADE)
     file = models.FileField(
         upload_to='task_attachments/',
+        storage=attachment_storage,
         validators=[
-            FileExtensionValidator(allowed_extensions=['png','jpg','jpeg','pdf','txt','docx','doc','zip','xlsx','xls']),
+            FileExtensionValidator(allowed_extensions=ATTACHMENT_EXTENSIONS),
             validate_file_size,
             validate_file_extension_secure
         ]
@@ -134,6 +195,46 @@ class Attachment(models.Model):
         return self.mime_type in doc_types if self.mime_type else False
 
 
+class Blob(models.Model):
+    """A stored file shared by every attachment with the same content (see ``tasks.storage``)."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=255, unique=True)
+    digest = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ref_count', 'last_used_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+
+class UploadSession(models.Model):
+    """An attachment being uploaded in chunks (see ``tasks.uploads``)."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    task = models.ForeignKey(Task, related_name='upload_sessions', on_delete=models.CASCADE)
+    uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='upload_sessions', on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveIntegerField()
+    checksum = models.CharField(max_length=64, help_text='SHA-256 of the whole file, hex encoded')
+    offset = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size} bytes)"
+
+
 class Tag(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=50, unique=True)
@@ -144,3 +245,7 @@ class Tag(models.Model):
 
     def __str__(self):
         return self.name
+
+
+# Subtasks, time entries and templates live in their own module
+from .advanced_models import Subtask, TimeEntry, TaskTemplate  # noqa: E402
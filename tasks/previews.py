@@ -0,0 +1,144 @@
+"""
+Background thumbnails and first-page previews for attachments.
+
+When an image or PDF attachment is saved, its previews are rendered after
+commit in a small process pool (``tasks.thumbnailer``), never in the request
+thread. Each size bucket is written once to ``previews/ab/<sha256>-<bucket>.jpg``
+in the default storage. Because the key is the content hash, identical
+uploads share previews and re-running generation is a no-op.
+
+Previews need the content hash, so they cover attachments stored by
+``tasks.storage`` (every upload since deduplication was enabled); older files
+simply have no ``thumbnail_url``.
+"""
+import logging
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from . import thumbnailer
+from .models import Attachment
+from .storage import is_blob
+
+logger = logging.getLogger(__name__)
+
+# Bucket -> longest edge in pixels
+PREVIEW_SIZES = {
+    'small': 160,
+    'medium': 480,
+}
+DEFAULT_PREVIEW_SIZE = 'small'
+PREVIEW_PREFIX = 'previews'
+PREVIEW_WORKERS = getattr(settings, 'PREVIEW_WORKERS', 2)
+
+_pool = None
+
+
+def preview_kind(mime_type):
+    if not mime_type:
+        return None
+    if mime_type.startswith('image/') and mime_type != 'image/svg+xml':
+        return 'image'
+    if mime_type == 'application/pdf':
+        return 'pdf'
+    return None
+
+
+def content_digest(name):
+    """SHA-256 of a content-addressed file, read from its name; ``None`` for other files."""
+    return os.path.basename(name).split('.', 1)[0] if is_blob(name) else None
+
+
+def preview_name(digest, size):
+    return f"{PREVIEW_PREFIX}/{digest[:2]}/{digest}-{size}.jpg"
+
+
+def existing_preview(attachment, size=DEFAULT_PREVIEW_SIZE):
+    """Storage name of an already rendered preview, or ``None``."""
+    digest = content_digest(attachment.file.name)
+    if not digest or size not in PREVIEW_SIZES or not preview_kind(attachment.mime_type):
+        return None
+    name = preview_name(digest, size)
+    return name if default_storage.exists(name) else None
+
+
+def _missing_sizes(digest):
+    return {
+        size: edge for size, edge in PREVIEW_SIZES.items()
+        if not default_storage.exists(preview_name(digest, size))
+    }
+
+
+def _store(digest, rendered):
+    for size, data in rendered.items():
+        path = default_storage.path(preview_name(digest, size))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so readers never see a partial image
+        temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temporary, 'wb') as handle:
+            handle.write(data)
+        os.replace(temporary, path)
+
+
+def _preview_job(attachment):
+    """``(digest, source path, kind, missing sizes)``, or ``None`` if nothing needs rendering."""
+    kind = preview_kind(attachment.mime_type)
+    digest = content_digest(attachment.file.name)
+    if not kind or not digest or not thumbnailer.available(kind):
+        return None
+    sizes = _missing_sizes(digest)
+    if not sizes:
+        return None
+    return digest, attachment.file.path, kind, sizes
+
+
+def generate_previews(attachment):
+    """Render missing previews in the current process; return how many were written."""
+    job = _preview_job(attachment)
+    if job is None:
+        return 0
+    digest, path, kind, sizes = job
+    rendered = thumbnailer.render(path, kind, sizes)
+    _store(digest, rendered)
+    return len(rendered)
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # spawn: forking a threaded web worker is not safe
+        _pool = ProcessPoolExecutor(
+            max_workers=PREVIEW_WORKERS, mp_context=multiprocessing.get_context('spawn')
+        )
+    return _pool
+
+
+def schedule_previews(attachment):
+    """Queue preview rendering in the process pool and return immediately."""
+    job = _preview_job(attachment)
+    if job is None:
+        return None
+    digest, path, kind, sizes = job
+
+    def done(future):
+        try:
+            _store(digest, future.result())
+        except Exception as e:
+            logger.warning(f"Preview generation failed for attachment {attachment.pk}: {e}")
+
+    future = _get_pool().submit(thumbnailer.render, path, kind, sizes)
+    future.add_done_callback(done)
+    return future
+
+
+@receiver(post_save, sender=Attachment)
+def attachment_saved(sender, instance, created, **kwargs):
+    if created and preview_kind(instance.mime_type):
+        transaction.on_commit(lambda: schedule_previews(instance))
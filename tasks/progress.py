@@ -0,0 +1,140 @@
+"""
+Denormalized progress rollups on ``Task``.
+
+``subtasks_total``, ``subtasks_completed``, ``estimated_minutes`` and
+``actual_minutes`` sum the task's subtasks; ``logged_minutes`` sums the
+``duration_minutes`` of its time entries. Receivers turn every subtask or
+time entry save/delete into a delta and apply it with ``F()`` expressions in
+a single UPDATE of the parent task. That UPDATE runs inside the same
+transaction as the row change, so list endpoints can show progress without
+touching either table; ``Task.save`` leaves the counters out unless they are
+named in ``update_fields``. ``recompute_progress`` rebuilds the counters in bulk
+and reports any drift (raw SQL, ``QuerySet.update`` and other writes that
+skip signals).
+"""
+from django.db.models import Count, F, Q, QuerySet, Sum
+from django.db.models.functions import Coalesce
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.utils import timezone
+
+from projects.models import Project
+from sync.log import entry, record
+from .models import ROLLUP_FIELDS, Task, Subtask, TimeEntry
+
+RECOMPUTE_BATCH_SIZE = 1000
+
+
+def subtask_contribution(subtask):
+    return {
+        'subtasks_total': 1,
+        'subtasks_completed': int(subtask.status == 'completed'),
+        'estimated_minutes': subtask.estimated_minutes or 0,
+        'actual_minutes': subtask.actual_minutes or 0,
+    }
+
+
+def time_entry_contribution(time_entry):
+    return {'logged_minutes': time_entry.duration_minutes or 0}
+
+
+# model -> (field holding the task id, contribution function)
+ROLLUP_SOURCES = {
+    Subtask: ('parent_task_id', subtask_contribution),
+    TimeEntry: ('task_id', time_entry_contribution),
+}
+
+
+def apply_deltas(task_id, deltas):
+    """Add ``deltas`` (field -> signed amount) to one task's counters in a single UPDATE."""
+    changes = {field: F(field) + amount for field, amount in deltas.items() if amount}
+    if task_id is None or not changes:
+        return
+    if Task.objects.filter(pk=task_id).update(**changes, updated_at=timezone.now()):
+        # update() skips the Task signals, so tell sync clients about the new figures here
+        placement = Task.objects.filter(pk=task_id).values_list('project_id', 'assigned_to_id').first()
+        if placement:
+            record([entry('task', task_id, *placement)])
+
+
+def _negated(contribution):
+    return {field: -amount for field, amount in contribution.items()}
+
+
+def remember_contribution(sender, instance, **kwargs):
+    instance._previous_rollup = None
+    if not instance._state.adding:
+        previous = sender.objects.filter(pk=instance.pk).first()
+        if previous is not None:
+            task_field, contribution = ROLLUP_SOURCES[sender]
+            instance._previous_rollup = (getattr(previous, task_field), contribution(previous))
+
+
+def contribution_saved(sender, instance, created, **kwargs):
+    task_field, contribution = ROLLUP_SOURCES[sender]
+    task_id, current = getattr(instance, task_field), contribution(instance)
+    previous = None if created else getattr(instance, '_previous_rollup', None)
+    if previous is None:
+        apply_deltas(task_id, current)
+    elif previous[0] == task_id:
+        apply_deltas(task_id, {field: current[field] - previous[1][field] for field in current})
+    else:
+        # Moved to another task
+        apply_deltas(previous[0], _negated(previous[1]))
+        apply_deltas(task_id, current)
+
+
+def contribution_deleted(sender, instance, origin=None, **kwargs):
+    # Nothing to update when the task itself is being deleted
+    if (origin.model if isinstance(origin, QuerySet) else type(origin)) in (Task, Project):
+        return
+    task_field, contribution = ROLLUP_SOURCES[sender]
+    apply_deltas(getattr(instance, task_field), _negated(contribution(instance)))
+
+
+for model in ROLLUP_SOURCES:
+    pre_save.connect(remember_contribution, sender=model, dispatch_uid=f'progress_pre_save_{model.__name__}')
+    post_save.connect(contribution_saved, sender=model, dispatch_uid=f'progress_post_save_{model.__name__}')
+    post_delete.connect(contribution_deleted, sender=model, dispatch_uid=f'progress_post_delete_{model.__name__}')
+
+
+def computed_rollups():
+    """``{task_id: {field: value}}`` aggregated from the source tables, for tasks that have any."""
+    rollups = {}
+    subtasks = Subtask.objects.values('parent_task_id').order_by().annotate(
+        subtasks_total=Count('pk'),
+        subtasks_completed=Count('pk', filter=Q(status='completed')),
+        estimated_minutes=Coalesce(Sum('estimated_minutes'), 0),
+        actual_minutes=Coalesce(Sum('actual_minutes'), 0),
+    )
+    for row in subtasks:
+        rollups[row.pop('parent_task_id')] = row
+    entries = TimeEntry.objects.values('task_id').order_by().annotate(logged_minutes=Coalesce(Sum('duration_minutes'), 0))
+    for row in entries:
+        rollups.setdefault(row['task_id'], {})['logged_minutes'] = row['logged_minutes']
+    return rollups
+
+
+def recompute_progress(dry_run=False, batch_size=RECOMPUTE_BATCH_SIZE):
+    """
+    Compare every task's counters with its subtasks and time entries.
+
+    Tasks that drifted are corrected with ``bulk_update`` unless ``dry_run``.
+    Returns ``{task_id: {field: (stored, actual)}}`` for the tasks that drifted.
+    """
+    expected = computed_rollups()
+    drift, fixed = {}, []
+    # Every task: one with stored counters but nothing left to count must drop back to zero
+    for task in Task.objects.only('pk', *ROLLUP_FIELDS).iterator(chunk_size=batch_size):
+        actual = expected.get(task.pk, {})
+        changes = {
+            field: (getattr(task, field), actual.get(field, 0))
+            for field in ROLLUP_FIELDS if getattr(task, field) != actual.get(field, 0)
+        }
+        if changes:
+            drift[task.pk] = changes
+            for field, (_, value) in changes.items():
+                setattr(task, field, value)
+            fixed.append(task)
+    if not dry_run:
+        Task.objects.bulk_update(fixed, ROLLUP_FIELDS, batch_size=batch_size)
+    return drift
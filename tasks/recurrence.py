@@ -0,0 +1,126 @@
+"""
+Recurring task expansion.
+
+A task with ``recurrence`` set to daily/weekly/monthly is the root of a series.
+Each run works out, in memory, every occurrence a series is missing up to and
+including the first one due after ``today`` (so missed days are caught up
+after downtime) and inserts them for all series with chunked ``bulk_create``.
+
+Generated occurrences point back to their root through ``recurrence_series``
+and are unique per ``(recurrence_series, due_date)``; inserts ignore
+conflicts, so re-runs and overlapping workers do not create duplicates.
+"""
+
+import calendar
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from sync.log import record, task_entries
+from .models import Task, Tag
+from .bulk import tasks_written
+from .graph import invalidate_project_graphs
+
+logger = logging.getLogger(__name__)
+
+RECURRING = ('daily', 'weekly', 'monthly')
+RECURRENCE_CHUNK_SIZE = 500
+# Upper bound on occurrences generated for one series in a single run
+MAX_CATCH_UP = 400
+
+
+def _add_months(day, months, anchor_day):
+    """Move ``day`` forward by whole months, keeping ``anchor_day`` where the month allows."""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return day.replace(year=year, month=month, day=min(anchor_day, calendar.monthrange(year, month)[1]))
+
+
+def next_due_date(recurrence, due_date, anchor_day=None):
+    if recurrence == 'daily':
+        return due_date + timedelta(days=1)
+    if recurrence == 'weekly':
+        return due_date + timedelta(weeks=1)
+    if recurrence == 'monthly':
+        return _add_months(due_date, 1, anchor_day or due_date.day)
+    return None
+
+
+def missing_due_dates(series, last_due, today, limit=MAX_CATCH_UP):
+    """
+    Due dates owed by ``series`` after ``last_due``.
+
+    Covers every missed date up to ``today`` plus the next upcoming one; nothing
+    is owed while the latest occurrence is still in the future.
+    """
+    dates = []
+    due = last_due
+    while due <= today and len(dates) < limit:
+        due = next_due_date(series.recurrence, due, series.due_date.day)
+        dates.append(due)
+    if due <= today:
+        logger.warning(f"Recurring task {series.pk} hit the catch-up limit of {limit} occurrences")
+    return dates
+
+
+def _occurrence(series, due_date):
+    return Task(
+        project_id=series.project_id,
+        title=series.title,
+        description=series.description,
+        assigned_to_id=series.assigned_to_id,
+        due_date=due_date,
+        recurrence_series=series,
+    )
+
+
+def generate_occurrences(today=None, chunk_size=RECURRENCE_CHUNK_SIZE):
+    """
+    Create every missing occurrence for all recurring tasks; return how many were inserted.
+
+    Query count is independent of how many days were missed: one query for the
+    series (plus their tags), one for the latest occurrence of each series, and
+    a fixed number per chunk of inserted occurrences (``tasks_written`` included).
+    """
+    today = today or timezone.localdate()
+    series_list = list(
+        Task.objects.filter(recurrence__in=RECURRING, recurrence_series__isnull=True, due_date__lte=today)
+        .prefetch_related('tags')
+    )
+    if not series_list:
+        return 0
+    latest = dict(
+        Task.objects.filter(recurrence_series__recurrence__in=RECURRING)
+        .values_list('recurrence_series')
+        .annotate(last=Max('due_date'))
+    )
+
+    pending = []
+    for series in series_list:
+        last_due = max(series.due_date, latest.get(series.pk) or series.due_date)
+        for due_date in missing_due_dates(series, last_due, today):
+            pending.append((series, _occurrence(series, due_date)))
+
+    created = 0
+    through = Tag.tasks.through
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        with transaction.atomic():
+            Task.objects.bulk_create([task for _, task in chunk], ignore_conflicts=True)
+            # Occurrences another worker already inserted were skipped; only tag ours
+            inserted = set(Task.objects.filter(pk__in=[task.pk for _, task in chunk]).values_list('pk', flat=True))
+            through.objects.bulk_create([
+                through(tag_id=tag.pk, task_id=task.pk)
+                for series, task in chunk
+                if task.pk in inserted
+                for tag in series.tags.all()
+            ], ignore_conflicts=True)
+            ours = [task for _, task in chunk if task.pk in inserted]
+            tasks_written(ours)
+            record(entry for task in ours for entry in task_entries(task))
+        created += len(inserted)
+    invalidate_project_graphs(*{series.project_id for series, _ in pending})
+    return created
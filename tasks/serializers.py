@@ -1,7 +1,11 @@
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Task, Comment, Attachment, Tag
-from .validators import validate_attachment
-from .utils import handle_mentions_in_comment
+from .models import Task, Comment, Attachment, Tag, UploadSession
+from .validators import validate_attachment, validate_extension
+from .utils import handle_mentions_in_comment, attach_tag_task_counts, visible_tasks
+from .graph import creates_cycle
+from .previews import existing_preview
+from .uploads import UPLOAD_CHUNK_SIZE
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -13,6 +17,9 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_by', 'created_at']
     
     def get_tasks_count(self, obj):
+        # Set by TagViewSet annotation or TaskListSerializer's grouped query
+        if hasattr(obj, 'tasks_total'):
+            return obj.tasks_total
         return obj.tasks.count()
     
     def create(self, validated_data):
@@ -20,12 +27,33 @@ class TagSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves pks from ``context['related_objects']`` when a bulk request preloaded them."""
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get('related_objects', {}).get(self.get_queryset().model)
+        if preloaded is not None and str(data) in preloaded:
+            return preloaded[str(data)]
+        return super().to_internal_value(data)
+
+
+class TaskListSerializer(serializers.ListSerializer):
+    """Resolves tag task counts for a whole page of tasks in one query."""
+
+    def to_representation(self, data):
+        tasks = list(data.all() if hasattr(data, 'all') else data)
+        attach_tag_task_counts(tag for task in tasks for tag in task.tags.all())
+        return super().to_representation(tasks)
+
+
 class TaskSerializer(serializers.ModelSerializer):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
     depends_on_title = serializers.CharField(source='depends_on.title', read_only=True)
     comments_count = serializers.IntegerField(read_only=True)
     attachments_count = serializers.IntegerField(read_only=True)
+    progress = serializers.IntegerField(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
-    tag_ids = serializers.PrimaryKeyRelatedField(
+    tag_ids = PrefetchedPrimaryKeyRelatedField(
         many=True, 
         queryset=Tag.objects.all(), 
         write_only=True, 
@@ -35,8 +63,20 @@ class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = '__all__'
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'recurrence_series']
+        list_serializer_class = TaskListSerializer
     
+    def validate(self, attrs):
+        depends_on = attrs.get('depends_on')
+        if depends_on is not None:
+            task_id = self.instance.pk if self.instance else None
+            project = attrs.get('project') or getattr(self.instance, 'project', None)
+            pending = self.context.get('pending_dependencies')
+            graphs = self.context.setdefault('dependency_graphs', {})
+            if depends_on.pk == task_id or creates_cycle(task_id, depends_on.pk, project.pk, pending, graphs):
+                raise serializers.ValidationError({'depends_on': 'This dependency would create a cycle.'})
+        return attrs
+
     def create(self, validated_data):
         tag_ids = validated_data.pop('tag_ids', [])
         task = super().create(validated_data)
@@ -92,13 +132,14 @@ class AttachmentSerializer(serializers.ModelSerializer):
     file_size_mb = serializers.ReadOnlyField()
     is_image = serializers.ReadOnlyField()
     is_document = serializers.ReadOnlyField()
+    thumbnail_url = serializers.SerializerMethodField()
     
     class Meta:
         model = Attachment
         fields = [
             'id', 'file', 'original_filename', 'mime_type', 'size', 'file_size_mb',
             'uploaded_by', 'uploaded_by_email', 'uploaded_by_name',
-            'task', 'task_title', 'created_at', 'is_image', 'is_document'
+            'task', 'task_title', 'created_at', 'is_image', 'is_document', 'thumbnail_url'
         ]
         read_only_fields = [
             'id', 'uploaded_by', 'original_filename', 'mime_type', 'size', 'created_at'
@@ -107,13 +148,68 @@ class AttachmentSerializer(serializers.ModelSerializer):
     def get_uploaded_by_name(self, obj):
         return f"{obj.uploaded_by.first_name} {obj.uploaded_by.last_name}".strip() or obj.uploaded_by.email
     
+    def get_thumbnail_url(self, obj):
+        """Small preview once the background pipeline has rendered it, else ``None``."""
+        if not existing_preview(obj):
+            return None
+        url = reverse('api-attachments-thumbnail', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+    
     def validate_file(self, value):
-        """Validate file size and type."""
-        validate_attachment(value)
+        """Validate file size and type; the type is sniffed from the file's header."""
+        self._detected_mime_type = validate_attachment(value)
         return value
     
+    def _set_file_metadata(self, validated_data):
+        # Never trust the client for these
+        upload = validated_data.get('file')
+        if upload is not None:
+            validated_data['original_filename'] = upload.name
+            validated_data['mime_type'] = self._detected_mime_type
+            validated_data['size'] = upload.size
+    
     def create(self, validated_data):
         # Set uploaded_by from request user
         validated_data['uploaded_by'] = self.context['request'].user
+        self._set_file_metadata(validated_data)
         
         return super().create(validated_data)
+    
+    def update(self, instance, validated_data):
+        self._set_file_metadata(validated_data)
+        return super().update(instance, validated_data)
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'task', 'filename', 'size', 'checksum', 'offset', 'chunk_size', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'offset', 'created_at', 'updated_at']
+    
+    def get_chunk_size(self, obj):
+        return UPLOAD_CHUNK_SIZE
+    
+    def validate_task(self, value):
+        if not visible_tasks(self.context['request'].user).filter(pk=value.pk).exists():
+            raise serializers.ValidationError('Task not found.')
+        return value
+    
+    def validate_filename(self, value):
+        validate_extension(value)
+        return value
+    
+    def validate_size(self, value):
+        if not 0 < value <= Attachment.MAX_FILE_SIZE:
+            raise serializers.ValidationError(
+                f'Size must be between 1 byte and {Attachment.MAX_FILE_SIZE // (1024 * 1024)} MB.'
+            )
+        return value
+    
+    def validate_checksum(self, value):
+        value = value.lower()
+        if len(value) != 64 or any(c not in '0123456789abcdef' for c in value):
+            raise serializers.ValidationError('Expected a hex-encoded SHA-256 digest.')
+        return value
@@ -0,0 +1,80 @@
+"""
+Content-addressed, deduplicating storage for uploaded attachments.
+
+``ContentAddressedStorage`` hashes each upload chunk by chunk while reading it
+(the file is never held in memory as a whole) and stores it once under its
+SHA-256 digest, ``blobs/ab/cd/<digest><ext>``. Uploading content that is
+already stored writes nothing: the new row simply points at the existing blob.
+
+Each stored blob has a ``Blob`` row whose ``ref_count`` tracks how many
+``Attachment``/``ChatMessage`` rows use it (see ``tasks.blobs``). Blobs that
+drop to zero references are removed later by ``collect_orphan_blobs``.
+
+Task and chat attachment fields use ``attachment_storage``. Setting
+``DEDUPLICATE_ATTACHMENTS = False`` switches them back to the default storage.
+"""
+import hashlib
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils import timezone
+
+BLOB_PREFIX = 'blobs'
+HASH_CHUNK_SIZE = 256 * 1024
+
+
+def hash_file(content, chunk_size=HASH_CHUNK_SIZE):
+    """Return ``(sha256 hex digest, size)`` of a Django ``File``, read in chunks."""
+    digest, size = hashlib.sha256(), 0
+    for chunk in content.chunks(chunk_size):
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def blob_name(digest, original_name=''):
+    ext = os.path.splitext(original_name)[1].lower()[:10]
+    return f"{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(f"{BLOB_PREFIX}/")
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """``FileSystemStorage`` that keeps one copy of each distinct upload."""
+
+    def _save(self, name, content):
+        from .models import Blob
+
+        digest, size = hash_file(content)
+        name = blob_name(digest, name)
+        now = timezone.now()
+        # Touching the row first keeps the garbage collector off a blob we are about to reuse
+        if Blob.objects.filter(name=name).update(last_used_at=now) and self.exists(name):
+            return name
+
+        content.seek(0)
+        # Write under a unique name, then rename into place, so a concurrent
+        # upload of the same content never sees a half-written blob
+        temporary = super()._save(f"{BLOB_PREFIX}/tmp/{uuid.uuid4().hex}", content)
+        os.makedirs(os.path.dirname(self.path(name)), exist_ok=True)
+        os.replace(self.path(temporary), self.path(name))
+        Blob.objects.update_or_create(
+            name=name, defaults={'digest': digest, 'size': size, 'last_used_at': now}
+        )
+        return name
+
+
+_storage = ContentAddressedStorage()
+
+
+def attachment_storage():
+    """Storage for task and chat attachments (see module docstring)."""
+    if getattr(settings, 'DEDUPLICATE_ATTACHMENTS', True):
+        return _storage
+    return default_storage
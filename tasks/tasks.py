@@ -1,14 +1,19 @@
 from celery import shared_task
 from celery.schedules import crontab
 from .models import Task
-from datetime import date, timedelta
+from .recurrence import generate_occurrences
+from .blobs import collect_orphan_blobs
+from .uploads import expire_sessions
+from datetime import timedelta
 from django.utils import timezone
-from django.core.mail import send_mail
-from django.conf import settings
+from smart_task_manager.mail import build_message, dispatch
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched per round trip while rendering reminder sweeps
+REMINDER_QUERY_CHUNK = 2000
+
 CELERY_BEAT_SCHEDULE = {
     'generate-recurring-tasks-everyday': {
         'task': 'tasks.tasks.generate_recurring_tasks',
@@ -22,19 +27,43 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'tasks.tasks.send_overdue_reminders',
         'schedule': crontab(hour=10, minute=0),  # كل يوم 10 صباحاً
     },
+    'collect-orphan-blobs': {
+        'task': 'tasks.tasks.collect_orphan_attachment_blobs',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'expire-upload-sessions': {
+        'task': 'tasks.tasks.expire_upload_sessions',
+        'schedule': crontab(minute=15),
+    },
+    'prune-sync-change-log': {
+        'task': 'sync.tasks.prune_change_log',
+        'schedule': crontab(hour=4, minute=0),
+    },
 }
 
 @shared_task
 def generate_recurring_tasks():
-    today = date.today()
-    tasks_to_recreate = Task.objects.filter(recurrence__in=['daily', 'weekly', 'monthly'], due_date__lte=today)
-    created_count = 0
-    for task in tasks_to_recreate:
-        if task.create_next_recurrence():
-            created_count += 1
+    created_count = generate_occurrences()
+    logger.info(f"Generated {created_count} recurring task occurrences")
     return f"{created_count} recurring tasks generated."
 
 
+@shared_task
+def collect_orphan_attachment_blobs():
+    removed = collect_orphan_blobs()
+    return f"{removed} orphaned attachment blobs removed."
+
+
+@shared_task
+def expire_upload_sessions():
+    removed = expire_sessions()
+    return f"{removed} abandoned upload sessions removed."
+
+
+# Days before the due date at which a reminder goes out
+REMINDER_WINDOWS = {0: 'today', 1: '1 day', 3: '3 days'}
+
+
 @shared_task
 def check_due_date_reminders():
     """
@@ -42,49 +71,56 @@ def check_due_date_reminders():
     Run daily to check tasks due in 1 day, 3 days, or today.
     """
     now = timezone.now().date()
-    
-    # Tasks due today
-    tasks_due_today = Task.objects.filter(
-        due_date=now,
-        status__in=['todo', 'in_progress'],
-        assigned_to__isnull=False
-    ).select_related('assigned_to', 'project')
-    
-    # Tasks due in 1 day
-    tasks_due_1day = Task.objects.filter(
-        due_date=now + timedelta(days=1),
-        status__in=['todo', 'in_progress'],
-        assigned_to__isnull=False
-    ).select_related('assigned_to', 'project')
-    
-    # Tasks due in 3 days
-    tasks_due_3days = Task.objects.filter(
-        due_date=now + timedelta(days=3),
+    windows = {now + timedelta(days=days): timeframe for days, timeframe in REMINDER_WINDOWS.items()}
+
+    tasks_due = Task.objects.filter(
+        due_date__in=windows,
         status__in=['todo', 'in_progress'],
         assigned_to__isnull=False
-    ).select_related('assigned_to', 'project')
-    
-    sent_count = 0
-    
-    # Send reminders for tasks due today (urgent)
-    for task in tasks_due_today:
-        if send_task_reminder(task, 'today'):
-            sent_count += 1
-    
-    # Send reminders for tasks due in 1 day
-    for task in tasks_due_1day:
-        if send_task_reminder(task, '1 day'):
-            sent_count += 1
-    
-    # Send reminders for tasks due in 3 days
-    for task in tasks_due_3days:
-        if send_task_reminder(task, '3 days'):
-            sent_count += 1
-    
-    logger.info(f"Sent {sent_count} due date reminder emails")
+    ).select_related('assigned_to', 'project').order_by('due_date')
+
+    # Messages are rendered lazily in chunks and sent over pooled connections
+    report = dispatch(
+        render_task_reminder(task, windows[task.due_date])
+        for task in tasks_due.iterator(chunk_size=REMINDER_QUERY_CHUNK)
+    )
+    sent_count = report['sent']
+
+    logger.info(f"Sent {sent_count} due date reminder emails ({len(report['failed'])} failed)")
     return f"{sent_count} due date reminders sent"
 
 
+def _greeting_name(user):
+    # CustomUser has no get_full_name()
+    return f"{user.first_name} {user.last_name}".strip() or user.email
+
+
+def render_task_reminder(task, timeframe):
+    """Build the reminder email for a task due within ``timeframe``."""
+    subject = f"⏰ Task Due {timeframe.title()}: {task.title}"
+
+    message = f"""
+Hello {_greeting_name(task.assigned_to)},
+
+This is a reminder that the following task is due {timeframe}:
+
+Task: {task.title}
+Project: {task.project.name}
+Due Date: {task.due_date.strftime('%B %d, %Y')}
+Status: {task.get_status_display()}
+
+Description:
+{task.description or 'No description provided'}
+
+Please make sure to complete this task on time.
+
+---
+Smart Task Manager
+This is an automated message, please do not reply.
+        """
+    return build_message(subject, message, task.assigned_to.email)
+
+
 def send_task_reminder(task, timeframe):
     """
     Send email reminder for a specific task.
@@ -96,44 +132,32 @@ def send_task_reminder(task, timeframe):
     Returns:
         bool: True if email sent successfully
     """
-    try:
-        subject = f"⏰ Task Due {timeframe.title()}: {task.title}"
-        
-        message = f"""
-Hello {task.assigned_to.get_full_name() or task.assigned_to.email},
+    report = dispatch([render_task_reminder(task, timeframe)])
+    if report['sent']:
+        logger.info(f"Sent reminder to {task.assigned_to.email} for task {task.id}")
+    return report['sent'] == 1
 
-This is a reminder that the following task is due {timeframe}:
+
+def render_overdue_reminder(task, today):
+    days_overdue = (today - task.due_date).days
+    subject = f"🚨 OVERDUE: {task.title} ({days_overdue} days)"
+
+    message = f"""
+Hello {_greeting_name(task.assigned_to)},
+
+This task is now OVERDUE by {days_overdue} day(s):
 
 Task: {task.title}
 Project: {task.project.name}
-Due Date: {task.due_date.strftime('%B %d, %Y')}
-Priority: {task.get_priority_display()}
+Was Due: {task.due_date.strftime('%B %d, %Y')}
 Status: {task.get_status_display()}
 
-Description:
-{task.description or 'No description provided'}
-
-Please make sure to complete this task on time.
+Please complete this task as soon as possible or update its status.
 
 ---
 Smart Task Manager
-This is an automated message, please do not reply.
-        """
-        
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[task.assigned_to.email],
-            fail_silently=False,
-        )
-        
-        logger.info(f"Sent reminder to {task.assigned_to.email} for task {task.id}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Failed to send reminder for task {task.id}: {str(e)}")
-        return False
+            """
+    return build_message(subject, message, task.assigned_to.email)
 
 
 @shared_task
@@ -150,44 +174,11 @@ def send_overdue_reminders():
         assigned_to__isnull=False
     ).select_related('assigned_to', 'project')
     
-    sent_count = 0
-    
-    for task in overdue_tasks:
-        days_overdue = (now - task.due_date).days
-        
-        try:
-            subject = f"🚨 OVERDUE: {task.title} ({days_overdue} days)"
-            
-            message = f"""
-Hello {task.assigned_to.get_full_name() or task.assigned_to.email},
-
-This task is now OVERDUE by {days_overdue} day(s):
-
-Task: {task.title}
-Project: {task.project.name}
-Was Due: {task.due_date.strftime('%B %d, %Y')}
-Priority: {task.get_priority_display()}
-Status: {task.get_status_display()}
-
-Please complete this task as soon as possible or update its status.
+    report = dispatch(
+        render_overdue_reminder(task, now)
+        for task in overdue_tasks.iterator(chunk_size=REMINDER_QUERY_CHUNK)
+    )
+    sent_count = report['sent']
 
----
-Smart Task Manager
-            """
-            
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[task.assigned_to.email],
-                fail_silently=False,
-            )
-            
-            sent_count += 1
-            logger.info(f"Sent overdue reminder to {task.assigned_to.email} for task {task.id}")
-            
-        except Exception as e:
-            logger.error(f"Failed to send overdue reminder for task {task.id}: {str(e)}")
-    
-    logger.info(f"Sent {sent_count} overdue reminder emails")
+    logger.info(f"Sent {sent_count} overdue reminder emails ({len(report['failed'])} failed)")
     return f"{sent_count} overdue reminders sent"
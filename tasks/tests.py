@@ -1,3 +1,840 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import smtplib
+import socketserver
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from io import BytesIO
+from unittest import skipUnless
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.utils import timezone
+from projects.models import Project
+from notifications.models import Notification
+from chat.models import ChatRoom, ChatMessage
+from core.models import SearchDocument
+from .models import Task, Comment, Attachment, Blob, Tag, UploadSession, Subtask, TimeEntry, TaskTemplate
+from .blobs import collect_orphan_blobs
+from .previews import generate_previews, existing_preview
+from .uploads import UPLOAD_CHUNK_SIZE, SessionGone, complete, expire_sessions, partial_path, write_chunk
+from .progress import recompute_progress
+from .mentions import resolve_mentions
+from . import thumbnailer
+from .utils import visible_tasks
+from .recurrence import generate_occurrences, next_due_date
+from .tasks import check_due_date_reminders
+from smart_task_manager.mail import build_message, dispatch
 
-# Create your tests here.
+User = get_user_model()
+
+
+class TaskVisibilityTest(TestCase):
+    """Test the cached project visibility index behind visible_tasks()."""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(email='owner@example.com', password='testpass123')
+        self.member = User.objects.create_user(email='member@example.com', password='testpass123')
+        self.outsider = User.objects.create_user(email='outsider@example.com', password='testpass123')
+        self.project = Project.objects.create(name='Visible', owner=self.owner)
+        self.task = Task.objects.create(title='Shared task', project=self.project)
+
+    def test_owner_and_assignee_see_task(self):
+        self.assertIn(self.task, visible_tasks(self.owner))
+        self.assertNotIn(self.task, visible_tasks(self.outsider))
+        self.task.assigned_to = self.outsider
+        self.task.save()
+        self.assertIn(self.task, visible_tasks(self.outsider))
+
+    def test_membership_changes_invalidate_cache(self):
+        self.assertNotIn(self.task, visible_tasks(self.member))
+        self.project.members.add(self.member)
+        self.assertIn(self.task, visible_tasks(self.member))
+        self.member.projects_joined.remove(self.project)
+        self.assertNotIn(self.task, visible_tasks(self.member))
+        self.project.members.add(self.member)
+        self.project.members.clear()
+        self.assertNotIn(self.task, visible_tasks(self.member))
+
+    def test_ownership_transfer_invalidates_both_users(self):
+        self.assertIn(self.task, visible_tasks(self.owner))
+        self.project.owner = self.member
+        self.project.save()
+        self.assertNotIn(self.task, visible_tasks(self.owner))
+        self.assertIn(self.task, visible_tasks(self.member))
+
+    def test_list_has_no_duplicates(self):
+        self.project.members.add(self.owner)
+        self.task.assigned_to = self.owner
+        self.task.save()
+        self.client.force_login(self.owner)
+        response = self.client.get('/tasks/api/tasks/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+
+
+class TaskCursorPaginationTest(TestCase):
+    """Test opt-in keyset pagination and count modes on the task list."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='pager@example.com', password='testpass123')
+        self.project = Project.objects.create(name='Paged', owner=self.user)
+        Task.objects.bulk_create([
+            Task(title=f'Task {i}', project=self.project) for i in range(7)
+        ])
+        self.client.force_login(self.user)
+
+    def test_cursor_walks_all_rows_once(self):
+        seen = []
+        url = '/tasks/api/tasks/?paginate=cursor&page_size=3'
+        while url:
+            body = self.client.get(url).json()
+            self.assertIsNone(body['count'])
+            seen.extend(row['id'] for row in body['results'])
+            url = body['next']
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+
+    def test_count_modes(self):
+        body = self.client.get('/tasks/api/tasks/?page_size=5&count=none').json()
+        self.assertIsNone(body['count'])
+        self.assertIn('page=2', body['next'])
+        self.assertEqual(self.client.get('/tasks/api/tasks/?count=estimate').json()['count'], 7)
+        self.assertEqual(self.client.get('/tasks/api/tasks/').json()['count'], 7)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/tasks/api/tasks/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+
+class TaskListQueryBudgetTest(TestCase):
+    """A task page costs the same number of queries whatever its size."""
+
+    def setUp(self):
+        from .models import Comment
+        cache.clear()
+        self.user = User.objects.create_user(email='budget@example.com', password='testpass123')
+        project = Project.objects.create(name='Budget', owner=self.user)
+        dependency = Task.objects.create(title='Dependency', project=project)
+        tags = [Tag.objects.create(name='budget-a'), Tag.objects.create(name='budget-b')]
+        for i in range(30):
+            task = Task.objects.create(title=f'Task {i}', project=project, depends_on=dependency)
+            Comment.objects.create(task=task, author=self.user, content='note')
+            task.tags.add(*tags[:i % 3])
+        self.client.force_login(self.user)
+        self.client.get('/tasks/api/tasks/')  # warm the visibility cache
+
+    def test_page_size_does_not_change_query_count(self):
+        # session + user, 3 ETag aggregates (tasks, comments, attachments), COUNT, page, tags prefetch,
+        # tag task counts
+        for page_size in (5, 25):
+            with self.assertNumQueries(9):
+                response = self.client.get(f'/tasks/api/tasks/?page_size={page_size}')
+            self.assertEqual(len(response.json()['results']), page_size)
+
+    def test_counts_are_correct(self):
+        rows = self.client.get('/tasks/api/tasks/?page_size=50').json()['results']
+        task = next(row for row in rows if row['title'] == 'Task 3')
+        self.assertEqual(task['comments_count'], 1)
+        self.assertEqual(task['attachments_count'], 0)
+        self.assertEqual(task['depends_on_title'], 'Dependency')
+        self.assertEqual(len(task['tags']), 0)
+        self.assertEqual(len(next(row for row in rows if row['title'] == 'Task 5')['tags']), 2)
+
+
+class BulkTaskOperationsTest(TestCase):
+    """Test the TaskViewSet bulk endpoints and their batched fan-out."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='bulk@example.com', password='testpass123')
+        self.assignee = User.objects.create_user(email='assignee@example.com', password='testpass123')
+        self.project = Project.objects.create(name='Bulk', owner=self.user)
+        self.client.force_login(self.user)
+
+    def post(self, action, data):
+        return self.client.post(f'/tasks/api/tasks/{action}/', data, content_type='application/json')
+
+    def test_bulk_create_reports_partial_failures(self):
+        items = [
+            {'title': f'Task {i}', 'project': str(self.project.pk), 'assigned_to': self.assignee.pk}
+            for i in range(3)
+        ] + [{'title': 'No project'}]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post('bulk-create', {'tasks': items})
+        self.assertEqual(response.status_code, 207)
+        body = response.json()
+        self.assertEqual((body['succeeded'], body['failed']), (3, 1))
+        self.assertIn('project', body['results'][3]['errors'])
+        self.assertEqual(Task.objects.filter(project=self.project).count(), 3)
+        # One summary notification for the batch, not one per task
+        self.assertEqual(Notification.objects.filter(user=self.assignee).count(), 1)
+
+    def test_bulk_update_status_and_reassign(self):
+        tasks = [Task.objects.create(title=f'Task {i}', project=self.project) for i in range(3)]
+        ids = [str(task.pk) for task in tasks]
+        response = self.post('bulk-update', {'tasks': [{'id': ids[0], 'title': 'Renamed'}]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Task.objects.get(pk=ids[0]).title, 'Renamed')
+
+        response = self.post('bulk-status', {'ids': ids, 'status': 'done'})
+        self.assertEqual(response.json()['succeeded'], 3)
+        self.assertEqual(Task.objects.filter(pk__in=ids, status='done').count(), 3)
+
+        response = self.post('bulk-reassign', {'ids': ids, 'assigned_to': self.assignee.pk})
+        self.assertEqual(Task.objects.filter(pk__in=ids, assigned_to=self.assignee).count(), 3)
+
+    def test_bulk_payloads_must_have_the_expected_shape(self):
+        ids = [str(Task.objects.create(title='Task', project=self.project).pk)]
+        for action in ('bulk-status', 'bulk-reassign', 'from-template'):
+            self.assertEqual(self.post(action, ids).status_code, 400)
+        for action in ('bulk-create', 'bulk-delete'):
+            self.assertEqual(self.post(action, 'not a list').status_code, 400)
+        self.assertEqual(self.post('bulk-delete', ids).status_code, 200)
+
+    def test_bulk_delete_skips_invisible_tasks(self):
+        other = Project.objects.create(name='Other', owner=self.assignee)
+        mine = Task.objects.create(title='Mine', project=self.project)
+        theirs = Task.objects.create(title='Theirs', project=other)
+        response = self.post('bulk-delete', {'ids': [str(mine.pk), str(theirs.pk)]})
+        self.assertEqual(response.status_code, 207)
+        self.assertFalse(Task.objects.filter(pk=mine.pk).exists())
+        self.assertTrue(Task.objects.filter(pk=theirs.pk).exists())
+
+    def test_template_instantiated_into_many_projects(self):
+        projects = [Project.objects.create(name=f'Onboarding {i}', owner=self.user) for i in range(5)]
+        other = Project.objects.create(name='Other', owner=self.assignee)
+        template = TaskTemplate.objects.create(
+            name='Kickoff', description='Start the project', created_by=self.user,
+            checklist_items=['Invite team', 'Set milestones'], tags=['onboarding'],
+        )
+        # The first use creates the tag and caches the user's projects
+        self.post('from-template', {'template': template.pk, 'projects': [str(projects[0].pk)]})
+        with CaptureQueriesContext(connection) as one:
+            self.post('from-template', {'template': template.pk, 'projects': [str(projects[1].pk)]})
+        ids = [str(project.pk) for project in projects[2:]] + [str(other.pk)]
+        # Constant in the number of projects: one insert each for tasks, subtasks, tags, links, search documents,
+        # sync log and leaderboard
+        with CaptureQueriesContext(connection) as many:
+            response = self.post('from-template', {'template': template.pk, 'projects': ids})
+        self.assertEqual(len(many), len(one))
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.json()['succeeded'], 3)
+        tasks = Task.objects.filter(title='Kickoff')
+        self.assertEqual(sorted(task.project_id for task in tasks), sorted(project.pk for project in projects))
+        self.assertEqual(Subtask.objects.filter(parent_task__in=tasks).count(), 10)
+        self.assertEqual(Tag.objects.get(name='onboarding').tasks.count(), 5)
+        self.assertEqual([task.subtasks_total for task in tasks], [2] * 5)
+        template.refresh_from_db()
+        self.assertEqual(template.usage_count, 5)
+
+        task = template.create_task_from_template(projects[0], due_date=date(2026, 1, 5))
+        self.assertEqual((task.assigned_to, task.subtasks.count(), template.usage_count), (self.user, 2, 6))
+
+
+class MentionTest(TestCase):
+    """Test batched @mention resolution for comments and chat messages."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(email='author@example.com', password='testpass123')
+        self.team = [User.objects.create_user(email=f'Member{i}@example.com', password='testpass123') for i in range(5)]
+        self.task = Task.objects.create(title='Launch', project=Project.objects.create(name='Mentions', owner=self.author))
+        self.text = ' '.join(f'@{user.email.lower()}' for user in self.team) + ' @nobody@example.com @author@example.com.'
+
+    def test_mentions_resolved_in_one_batch(self):
+        with self.assertNumQueries(2):  # unseen addresses, then the users
+            self.assertEqual(resolve_mentions(self.text), self.team + [self.author])
+        with self.assertNumQueries(1):  # every address is indexed now
+            resolve_mentions(self.text)
+
+        self.client.force_login(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/tasks/api/comments/', {
+                'task': str(self.task.pk), 'content': self.text,
+            }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Notification.objects.filter(user__in=self.team, task=self.task).count(), 5)
+        self.assertFalse(Notification.objects.filter(user=self.author).exists())
+
+        # A renamed user stops matching their old address
+        self.team[0].email = 'renamed@example.com'
+        self.team[0].save()
+        self.assertNotIn(self.team[0], resolve_mentions('@member0@example.com'))
+
+    def test_chat_mentions_notify_room_members(self):
+        room = ChatRoom.objects.create(name='Launch room', room_type='private', created_by=self.author)
+        room.members.add(self.author, self.team[0])
+        self.client.force_login(self.author)
+        response = self.client.post('/chat/api/messages/', {
+            'room': str(room.pk), 'content': '@member0@example.com @member1@example.com ready?',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        # member1 cannot read the private room, so only member0 hears about it
+        self.assertEqual(
+            list(Notification.objects.filter(message__contains='Launch room').values_list('user', flat=True)),
+            [self.team[0].pk]
+        )
+
+
+class TaskDependencyGraphTest(TestCase):
+    """Test cycle rejection and the project dependency graph endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='graph@example.com', password='testpass123')
+        self.project = Project.objects.create(name='Graph', owner=self.user)
+        self.design = Task.objects.create(title='Design', project=self.project, status='done')
+        self.build = Task.objects.create(title='Build', project=self.project, depends_on=self.design)
+        self.test = Task.objects.create(title='Test', project=self.project, depends_on=self.build)
+        self.docs = Task.objects.create(title='Docs', project=self.project)
+        self.client.force_login(self.user)
+
+    def url(self, action):
+        return f'/projects/api/projects/{self.project.pk}/{action}/'
+
+    def test_cycles_are_rejected(self):
+        response = self.client.patch(
+            f'/tasks/api/tasks/{self.design.pk}/', {'depends_on': str(self.test.pk)},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('depends_on', response.json()['error']['detail'])
+        response = self.client.post('/tasks/api/tasks/bulk-update/', {'tasks': [
+            {'id': str(self.docs.pk), 'depends_on': str(self.test.pk)},
+            {'id': str(self.design.pk), 'depends_on': str(self.docs.pk)},
+        ]}, content_type='application/json')
+        self.assertEqual(response.status_code, 207)
+        self.assertIn('depends_on', response.json()['results'][1]['errors'])
+
+    def test_order_blocked_sets_and_critical_path(self):
+        order = self.client.get(self.url('task-order')).json()['order']
+        self.assertLess(order.index(str(self.design.pk)), order.index(str(self.build.pk)))
+        self.assertLess(order.index(str(self.build.pk)), order.index(str(self.test.pk)))
+
+        sets = self.client.get(self.url('blocked-tasks')).json()
+        self.assertEqual(sets['blocked'], [str(self.test.pk)])
+        self.assertCountEqual(sets['unblocked'], [str(self.build.pk), str(self.docs.pk)])
+
+        plan = self.client.get(self.url('critical-path'), {'start': '2025-01-06'}).json()
+        self.assertEqual(plan['duration_days'], 2)
+        self.assertEqual(plan['finish'], '2025-01-08')
+        self.assertEqual([step['title'] for step in plan['path']], ['Design', 'Build', 'Test'])
+        self.assertEqual(plan['path'][-1]['earliest_start'], '2025-01-07')
+
+    def test_saving_a_task_invalidates_the_graph(self):
+        self.client.get(self.url('blocked-tasks'))
+        self.build.status = 'done'
+        self.build.save()
+        sets = self.client.get(self.url('blocked-tasks')).json()
+        self.assertEqual(sets['blocked'], [])
+
+    def test_prerequisite_in_another_project(self):
+        other = Project.objects.create(name='Vendor', owner=self.user)
+        delivery = Task.objects.create(title='Delivery', project=other)
+        self.docs.depends_on = delivery
+        self.docs.save()
+        sets = self.client.get(self.url('blocked-tasks')).json()
+        self.assertCountEqual(sets['blocked'], [str(self.test.pk), str(self.docs.pk)])
+        plan = self.client.get(self.url('critical-path'), {'start': '2025-01-06'}).json()
+        self.assertEqual(plan['duration_days'], 2)
+
+        # Finishing it in its own project refreshes this project's cached graph
+        delivery.status = 'completed'
+        delivery.save()
+        sets = self.client.get(self.url('blocked-tasks')).json()
+        self.assertEqual(sets['blocked'], [str(self.test.pk)])
+        self.assertCountEqual(sets['unblocked'], [str(self.build.pk), str(self.docs.pk)])
+
+
+class RecurringTaskGenerationTest(TestCase):
+    """Test batched, idempotent expansion of recurring tasks."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='recurring@example.com', password='testpass123')
+        self.project = Project.objects.create(name='Recurring', owner=self.user)
+
+    def test_catches_up_missed_days_once(self):
+        series = Task.objects.create(
+            title='Standup', project=self.project, assigned_to=self.user,
+            recurrence='daily', due_date=date(2025, 3, 1)
+        )
+        self.assertEqual(generate_occurrences(today=date(2025, 3, 4)), 4)
+        self.assertEqual(
+            list(series.occurrences.order_by('due_date').values_list('due_date', flat=True)),
+            [date(2025, 3, 2), date(2025, 3, 3), date(2025, 3, 4), date(2025, 3, 5)],
+        )
+        self.assertTrue(all(task.assigned_to == self.user for task in series.occurrences.all()))
+        # Inserted with bulk_create, so tasks_written indexes them
+        self.assertEqual(
+            SearchDocument.objects.filter(kind='task', object_id__in=series.occurrences.values('pk')).count(), 4
+        )
+        # Re-running, even for a later day that is already covered, creates nothing
+        self.assertEqual(generate_occurrences(today=date(2025, 3, 4)), 0)
+        self.assertEqual(generate_occurrences(today=date(2025, 3, 5)), 1)
+
+    def test_monthly_keeps_day_of_month(self):
+        self.assertEqual(next_due_date('monthly', date(2025, 1, 31)), date(2025, 2, 28))
+        self.assertEqual(next_due_date('monthly', date(2025, 2, 28), anchor_day=31), date(2025, 3, 31))
+
+    def test_api_create_with_due_date(self):
+        self.client.force_login(self.user)
+        response = self.client.post('/tasks/api/tasks/', {
+            'title': 'Plain', 'project': str(self.project.pk), 'due_date': '2025-03-01'
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+
+
+class _StubSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept mail; rejects recipients at reject.example.com."""
+
+    def handle(self):
+        self.server.connections += 1
+        self.wfile.write(b'220 stub\r\n')
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.wfile.write(b'221 bye\r\n')
+                return
+            if command in ('EHLO', 'HELO'):
+                self.wfile.write(b'250 stub\r\n')
+            elif command == 'RCPT' and 'reject.example.com' in line:
+                self.wfile.write(b'550 no such user\r\n')
+            elif command == 'DATA':
+                self.wfile.write(b'354 go ahead\r\n')
+                while self.rfile.readline().rstrip(b'\r\n') != b'.':
+                    pass
+                self.server.delivered += 1
+                self.wfile.write(b'250 queued\r\n')
+            else:
+                self.wfile.write(b'250 ok\r\n')
+
+
+class ReminderEmailDispatchTest(TestCase):
+    """Test reminder sweeps and the pooled mail dispatch layer."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='remind@example.com', password='testpass123')
+        self.project = Project.objects.create(name='Reminders', owner=self.user)
+
+    def test_due_date_sweep_sends_one_mail_per_task(self):
+        today = timezone.now().date()
+        for days in (0, 1, 2, 3):
+            Task.objects.create(
+                title=f'Due in {days}', project=self.project, assigned_to=self.user,
+                due_date=today + timedelta(days=days)
+            )
+        self.assertEqual(check_due_date_reminders(), '3 due date reminders sent')
+        self.assertEqual(sorted(m.subject for m in mail.outbox), [
+            '⏰ Task Due 1 Day: Due in 1', '⏰ Task Due 3 Days: Due in 3', '⏰ Task Due Today: Due in 0',
+        ])
+
+    def test_smtp_connections_are_reused_and_failures_reported(self):
+        server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _StubSMTPHandler)
+        server.daemon_threads = True
+        server.connections = server.delivered = 0
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        messages = [build_message('Hi', 'Body', f'user{i}@example.com') for i in range(10)]
+        messages.append(build_message('Hi', 'Body', 'nobody@reject.example.com'))
+        with self.settings(EMAIL_HOST='127.0.0.1', EMAIL_PORT=server.server_address[1]):
+            report = dispatch(
+                messages, batch_size=4, max_connections=2,
+                backend='django.core.mail.backends.smtp.EmailBackend'
+            )
+        self.assertEqual(report['sent'], 10)
+        self.assertEqual([f['to'] for f in report['failed']], [['nobody@reject.example.com']])
+        self.assertIsInstance(report['failed'][0]['exception'], smtplib.SMTPRecipientsRefused)
+        self.assertEqual(server.delivered, 10)
+        self.assertEqual(server.connections, 3)  # one per chunk of four, not one per message
+
+
+class TaskConditionalGetTest(TestCase):
+    """Test ETag revalidation on the task and project lists."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='etag-tasks@example.com', password='testpass123')
+        self.project = Project.objects.create(name='ETag', owner=self.user)
+        self.task = Task.objects.create(title='Cached', project=self.project)
+        self.client.force_login(self.user)
+
+    def assertRevalidates(self, url, change):
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        change()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_task_list(self):
+        self.assertRevalidates('/tasks/api/tasks/', lambda: Comment.objects.create(
+            task=self.task, author=self.user, content='new comment'
+        ))
+        self.assertRevalidates('/tasks/api/tasks/', self.task.delete)
+
+    def test_project_list(self):
+        member = User.objects.create_user(email='etag-member@example.com', password='testpass123')
+        self.assertRevalidates('/projects/api/projects/', lambda: self.project.members.add(member))
+
+
+class TaskBoardTest(TestCase):
+    """Test the Kanban board endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='board@example.com', password='testpass123')
+        self.project = Project.objects.create(name='Board', owner=self.user)
+        other = Project.objects.create(name='Other board', owner=self.user)
+        now = timezone.now()
+        for i, task_status in enumerate(['todo', 'todo', 'todo', 'done', 'done']):
+            task = Task.objects.create(title=f'Card {i}', project=self.project, status=task_status)
+            Task.objects.filter(pk=task.pk).update(created_at=now - timedelta(minutes=i))
+        Task.objects.create(title='Elsewhere', project=other, status='in_progress')
+        self.client.force_login(self.user)
+
+    def test_columns_are_limited_and_totalled(self):
+        columns = self.client.get(
+            '/tasks/api/tasks/board/', {'project': str(self.project.pk), 'limit': 2}
+        ).json()['columns']
+        self.assertEqual(
+            [(c['status'], c['total'], [t['title'] for t in c['tasks']]) for c in columns],
+            [('todo', 3, ['Card 0', 'Card 1']), ('in_progress', 0, []), ('done', 2, ['Card 3', 'Card 4'])],
+        )
+
+    def test_filters_match_the_task_list(self):
+        columns = self.client.get('/tasks/api/tasks/board/', {'status': 'in_progress'}).json()['columns']
+        self.assertEqual([c['total'] for c in columns], [0, 1, 0])
+
+
+class ProgressRollupTest(TestCase):
+    """Test the denormalized subtask and time-entry counters on Task."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='progress@example.com', password='testpass123')
+        project = Project.objects.create(name='Progress', owner=self.user)
+        self.task = Task.objects.create(title='Parent', project=project)
+        self.other = Task.objects.create(title='Other parent', project=project)
+
+    def rollups(self, task):
+        task.refresh_from_db()
+        return (
+            task.subtasks_total, task.subtasks_completed, task.estimated_minutes,
+            task.actual_minutes, task.logged_minutes,
+        )
+
+    def test_counters_follow_changes(self):
+        first = Subtask.objects.create(parent_task=self.task, title='First', estimated_minutes=30)
+        second = Subtask.objects.create(parent_task=self.task, title='Second', estimated_minutes=60, actual_minutes=20)
+        start = timezone.now()
+        entry = TimeEntry.objects.create(
+            task=self.task, user=self.user, start_time=start, end_time=start + timedelta(minutes=45)
+        )
+        self.assertEqual(self.rollups(self.task), (2, 0, 90, 20, 45))
+
+        first.status = 'completed'
+        first.actual_minutes = 25
+        first.save()
+        second.parent_task = self.other
+        second.save()
+        entry.end_time = start + timedelta(minutes=50)
+        entry.save()
+        self.assertEqual(self.rollups(self.task), (1, 1, 30, 25, 50))
+        self.assertEqual(self.rollups(self.other), (1, 0, 60, 20, 0))
+
+        first.delete()
+        entry.delete()
+        self.assertEqual(self.rollups(self.task), (0, 0, 0, 0, 0))
+        self.assertEqual(recompute_progress(), {})
+
+        self.client.force_login(self.user)
+        listed = {t['title']: t for t in self.client.get('/tasks/api/tasks/').json()['results']}
+        self.assertEqual((listed['Other parent']['subtasks_total'], listed['Other parent']['progress']), (1, 0))
+
+    def test_saving_a_stale_task_keeps_the_counters(self):
+        stale = Task.objects.get(pk=self.task.pk)
+        Subtask.objects.create(parent_task=self.task, title='Added elsewhere', estimated_minutes=15)
+        stale.title = 'Renamed'
+        stale.save()
+        self.assertEqual(self.rollups(self.task), (1, 0, 15, 0, 0))
+        self.assertEqual(self.task.title, 'Renamed')
+
+    def test_recompute_reports_and_fixes_drift(self):
+        Subtask.objects.create(parent_task=self.task, title='Done', status='completed')
+        Task.objects.filter(pk=self.task.pk).update(subtasks_completed=0, logged_minutes=7)
+        drift = recompute_progress(dry_run=True)
+        self.assertEqual(drift, {self.task.pk: {'subtasks_completed': (0, 1), 'logged_minutes': (7, 0)}})
+        self.assertEqual(self.rollups(self.task)[1], 0)
+        recompute_progress()
+        self.assertEqual(self.rollups(self.task), (1, 1, 0, 0, 0))
+        self.assertEqual(self.task.progress, 100)
+
+
+def use_temporary_media_root(test):
+    """Point MEDIA_ROOT at a throwaway directory for the duration of ``test``."""
+    test.media_root = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, test.media_root, ignore_errors=True)
+    settings_override = override_settings(MEDIA_ROOT=test.media_root)
+    settings_override.enable()
+    test.addCleanup(settings_override.disable)
+
+
+class AttachmentDeduplicationTest(TestCase):
+    """Test content-addressed attachment storage and blob garbage collection."""
+
+    def setUp(self):
+        use_temporary_media_root(self)
+        self.user = User.objects.create_user(email='blobs@example.com', password='testpass123')
+        self.task = Task.objects.create(title='Files', project=Project.objects.create(name='Blobs', owner=self.user))
+
+    def attach(self, content, name='report.pdf'):
+        return Attachment.objects.create(
+            task=self.task, file=ContentFile(content, name=name), original_filename=name,
+            mime_type='application/pdf', size=len(content), uploaded_by=self.user,
+        )
+
+    def stored_files(self):
+        return sorted(
+            name for _, _, names in os.walk(os.path.join(self.media_root, 'blobs')) for name in names
+        )
+
+    def test_identical_uploads_share_one_blob(self):
+        first, second = self.attach(b'same bytes'), self.attach(b'same bytes', name='copy.pdf')
+        room = ChatRoom.objects.create(name='Files', created_by=self.user)
+        message = ChatMessage.objects.create(
+            room=room, sender=self.user, content='see attached', attachment=ContentFile(b'same bytes', name='chat.pdf')
+        )
+        other = self.attach(b'different bytes')
+
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(first.file.name, message.attachment.name)
+        self.assertEqual(len(self.stored_files()), 2)
+        self.assertEqual(Blob.objects.get(name=first.file.name).ref_count, 3)
+        with first.file.open('rb') as f:
+            self.assertEqual(f.read(), b'same bytes')
+
+        first.delete()
+        message.delete()
+        other.delete()
+        self.assertEqual(Blob.objects.get(name=second.file.name).ref_count, 1)
+
+    def test_orphans_are_collected_after_grace_period(self):
+        kept, dropped = self.attach(b'kept'), self.attach(b'dropped')
+        dropped_name = dropped.file.name
+        dropped.delete()
+        self.assertEqual(collect_orphan_blobs(), 0)  # still within the grace period
+        self.assertEqual(collect_orphan_blobs(grace=timedelta(0)), 1)
+        self.assertFalse(Blob.objects.filter(name=dropped_name).exists())
+        self.assertEqual(self.stored_files(), [os.path.basename(kept.file.name)])
+
+
+class AttachmentDownloadTest(TestCase):
+    """Test the conditional, range-capable attachment download endpoint."""
+
+    def setUp(self):
+        use_temporary_media_root(self)
+        cache.clear()
+        self.user = User.objects.create_user(email='download@example.com', password='testpass123')
+        task = Task.objects.create(title='Files', project=Project.objects.create(name='Downloads', owner=self.user))
+        self.attachment = Attachment.objects.create(
+            task=task, file=ContentFile(b'0123456789', name='digits.txt'), original_filename='digits.txt',
+            mime_type='text/plain', size=10, uploaded_by=self.user,
+        )
+        self.url = f'/tasks/api/attachments/{self.attachment.pk}/download/'
+        self.client.force_login(self.user)
+
+    def test_full_conditional_and_range_requests(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertIn('digits.txt', response['Content-Disposition'])
+        etag = response['ETag']
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        partial = self.client.get(self.url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(b''.join(partial.streaming_content), b'2345')
+        self.assertEqual(b''.join(self.client.get(self.url, HTTP_RANGE='bytes=-3').streaming_content), b'789')
+        stale = self.client.get(self.url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=50-').status_code, 416)
+
+    def test_offload_and_access_check(self):
+        with self.settings(SENDFILE_BACKEND='nginx', SENDFILE_URL_PREFIX='/protected-media/'):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.attachment.file.name}')
+        self.assertEqual(response.content, b'')
+
+        outsider = User.objects.create_user(email='download-outsider@example.com', password='testpass123')
+        self.client.force_login(outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class AttachmentUploadValidationTest(TestCase):
+    """Test that uploads are typed by their contents and size-checked while streaming."""
+
+    def setUp(self):
+        use_temporary_media_root(self)
+        self.user = User.objects.create_user(email='uploads@example.com', password='testpass123')
+        self.task = Task.objects.create(title='Files', project=Project.objects.create(name='Uploads', owner=self.user))
+        self.client.force_login(self.user)
+
+    def upload(self, name, content, content_type='application/octet-stream'):
+        return self.client.post('/tasks/api/attachments/', {
+            'task': str(self.task.pk), 'file': SimpleUploadedFile(name, content, content_type=content_type),
+        })
+
+    def test_metadata_comes_from_the_file_not_the_client(self):
+        response = self.upload('notes.txt', b'plain notes\n', content_type='application/x-msdownload')
+        self.assertEqual(response.status_code, 201)
+        attachment = Attachment.objects.get()
+        self.assertEqual(
+            (attachment.original_filename, attachment.mime_type, attachment.size),
+            ('notes.txt', 'text/plain', 12),
+        )
+
+    def test_contents_must_match_extension(self):
+        self.assertEqual(self.upload('photo.png', b'%PDF-1.7\n' + b'0' * 100).status_code, 400)
+        self.assertEqual(self.upload('readme.txt', b'MZ\x90\x00\x03\x00\x00\x00').status_code, 400)
+        self.assertEqual(self.upload('setup.exe', b'MZ').status_code, 400)
+        self.assertFalse(Attachment.objects.exists())
+
+    def test_oversized_uploads_are_rejected(self):
+        just_over = b'a' * (Attachment.MAX_FILE_SIZE + 1)  # caught while streaming
+        far_over = b'a' * (Attachment.MAX_FILE_SIZE * 2)  # caught by Content-Length
+        self.assertEqual(self.upload('big.txt', just_over).status_code, 413)
+        self.assertEqual(self.upload('big.txt', far_over).status_code, 413)
+        self.assertFalse(Attachment.objects.exists())
+
+
+class ResumableUploadTest(TestCase):
+    """Test the chunked, resumable attachment upload protocol."""
+
+    def setUp(self):
+        use_temporary_media_root(self)
+        self.user = User.objects.create_user(email='resumable@example.com', password='testpass123')
+        self.task = Task.objects.create(title='Files', project=Project.objects.create(name='Resumable', owner=self.user))
+        self.client.force_login(self.user)
+        self.content = b'%PDF-1.7\n' + os.urandom(20000)
+
+    def start(self, checksum=None):
+        response = self.client.post('/tasks/api/uploads/', {
+            'task': str(self.task.pk), 'filename': 'report.pdf', 'size': len(self.content),
+            'checksum': checksum or hashlib.sha256(self.content).hexdigest(),
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        return f"/tasks/api/uploads/{response.json()['id']}/"
+
+    def put(self, url, offset, data):
+        return self.client.put(
+            f'{url}chunk/', data, content_type='application/octet-stream', headers={'Upload-Offset': str(offset)}
+        )
+
+    def test_chunks_resume_and_complete(self):
+        url = self.start()
+        self.assertEqual(self.put(url, 0, self.content[:9000]).json()['offset'], 9000)
+        # A retried chunk the server already has is answered with where to resume
+        conflict = self.put(url, 0, self.content[:9000])
+        self.assertEqual((conflict.status_code, conflict['Upload-Offset']), (409, '9000'))
+        self.assertEqual(self.client.get(url).json()['offset'], 9000)
+        self.put(url, 9000, self.content[9000:])
+
+        session = UploadSession.objects.get()
+        response = self.client.post(f'{url}complete/')
+        self.assertEqual(response.status_code, 201)
+        attachment = Attachment.objects.get(pk=response.json()['id'])
+        self.assertEqual((attachment.mime_type, attachment.size), ('application/pdf', len(self.content)))
+        with attachment.file.open('rb') as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertFalse(UploadSession.objects.exists())
+        # A request that raced the first one finds the session completed and its file gone
+        with self.assertRaisesMessage(ValidationError, 'already been completed'):
+            complete(session)
+        self.assertEqual(Attachment.objects.count(), 1)
+
+    def test_chunk_for_a_session_finished_meanwhile(self):
+        self.start()
+        session = UploadSession.objects.get()
+        UploadSession.objects.all().delete()
+        with self.assertRaises(SessionGone):
+            write_chunk(session, 0, self.content[:9000])
+        self.assertFalse(os.path.exists(partial_path(session)))
+
+    def test_rejected_chunks_and_checksum_mismatch(self):
+        url = self.start(checksum='0' * 64)
+        self.assertEqual(self.put(url, 0, b'a' * (UPLOAD_CHUNK_SIZE + 1)).status_code, 413)
+        self.assertEqual(self.put(url, 0, b'PK\x03\x04' + self.content[4:9000]).status_code, 400)
+        self.put(url, 0, self.content)
+        response = self.client.post(f'{url}complete/')
+        self.assertEqual((response.status_code, response.json()['offset']), (400, 0))
+        self.assertFalse(Attachment.objects.exists())
+
+    def test_abandoned_sessions_expire(self):
+        url = self.start()
+        self.put(url, 0, self.content[:9000])
+        session = UploadSession.objects.get()
+        self.assertEqual(expire_sessions(), 0)
+        UploadSession.objects.update(updated_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(expire_sessions(), 1)
+        self.assertFalse(os.path.exists(partial_path(session)))
+
+
+@skipUnless(thumbnailer.available('image'), 'Pillow is not installed')
+class AttachmentPreviewTest(TestCase):
+    """Test background thumbnail generation for image attachments."""
+
+    def setUp(self):
+        use_temporary_media_root(self)
+        cache.clear()
+        self.user = User.objects.create_user(email='previews@example.com', password='testpass123')
+        self.task = Task.objects.create(title='Images', project=Project.objects.create(name='Previews', owner=self.user))
+
+    def attach_png(self, name='photo.png'):
+        from PIL import Image
+        buffer = BytesIO()
+        Image.new('RGB', (1200, 800), 'teal').save(buffer, 'PNG')
+        return Attachment.objects.create(
+            task=self.task, file=ContentFile(buffer.getvalue(), name=name), original_filename=name,
+            mime_type='image/png', size=len(buffer.getvalue()), uploaded_by=self.user,
+        )
+
+    def test_previews_are_bucketed_idempotent_and_shared(self):
+        from PIL import Image
+        attachment = self.attach_png()
+        self.assertIsNone(existing_preview(attachment))  # nothing rendered in the request thread
+        self.assertEqual(generate_previews(attachment), 2)
+        self.assertEqual(generate_previews(attachment), 0)
+        self.assertEqual(generate_previews(self.attach_png(name='copy.png')), 0)
+        with Image.open(os.path.join(self.media_root, existing_preview(attachment, 'small'))) as small:
+            self.assertEqual(small.size, (160, 107))
+
+        self.client.force_login(self.user)
+        data = self.client.get(f'/tasks/api/attachments/{attachment.pk}/').json()
+        self.assertTrue(data['thumbnail_url'].endswith(f'/tasks/api/attachments/{attachment.pk}/thumbnail/'))
+        response = self.client.get(data['thumbnail_url'])
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response.status_code, 200)
+
+    def test_upload_schedules_rendering_in_process_pool(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            attachment = self.attach_png()
+        deadline = time.monotonic() + 30
+        while existing_preview(attachment, 'medium') is None and time.monotonic() < deadline:
+            time.sleep(0.1)
+        self.assertIsNotNone(existing_preview(attachment, 'medium'))
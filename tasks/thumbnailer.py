@@ -0,0 +1,68 @@
+"""
+Thumbnail rendering, run inside the preview process pool (``tasks.previews``).
+
+This module deliberately imports nothing from Django so spawned worker
+processes can load it without setting up the project. Images need Pillow,
+PDF first pages additionally need PyMuPDF; both are optional and
+imported only when a preview is rendered.
+"""
+import importlib.util
+import io
+
+PREVIEW_QUALITY = 80
+# Render PDF pages at a resolution that covers the largest bucket
+PDF_RENDER_DPI = 96
+
+
+def _installed(name):
+    return importlib.util.find_spec(name) is not None
+
+
+def available(kind):
+    """Whether the libraries needed to preview ``kind`` ('image' or 'pdf') are installed."""
+    if not _installed('PIL'):
+        return False
+    # PyMuPDF is importable as ``pymupdf`` since 1.24 and as ``fitz`` before
+    return kind != 'pdf' or _installed('pymupdf') or _installed('fitz')
+
+
+def _open_image(path, kind, largest):
+    from PIL import Image, ImageOps
+
+    if kind == 'pdf':
+        try:
+            import pymupdf
+        except ImportError:
+            import fitz as pymupdf
+
+        with pymupdf.open(path) as document:
+            pixmap = document[0].get_pixmap(dpi=PDF_RENDER_DPI)
+            return Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+    image = Image.open(path)
+    # JPEG can decode at a reduced scale, which is much cheaper for large photos
+    image.draft('RGB', (largest, largest))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'L'):
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.convert('RGBA').getchannel('A'))
+        image = background
+    return image
+
+
+def render(path, kind, sizes):
+    """
+    Render JPEG previews of the file at ``path``.
+
+    ``sizes`` maps bucket names to the longest edge in pixels; returns
+    ``{bucket: jpeg bytes}``. Buckets are rendered largest first, each from
+    the previous result, so the source is decoded only once.
+    """
+    buckets = sorted(sizes.items(), key=lambda item: item[1], reverse=True)
+    image = _open_image(path, kind, buckets[0][1])
+    rendered = {}
+    for bucket, edge in buckets:
+        image.thumbnail((edge, edge))
+        buffer = io.BytesIO()
+        image.convert('RGB').save(buffer, 'JPEG', quality=PREVIEW_QUALITY, optimize=True)
+        rendered[bucket] = buffer.getvalue()
+    return rendered
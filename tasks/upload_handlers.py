@@ -0,0 +1,77 @@
+"""
+Upload handler that validates attachments while the request body streams in.
+
+Django only hands a file to the view once the whole body has been read and
+spooled. ``AttachmentUploadHandler`` sits in front of the default handlers and
+rejects an upload as soon as it is known to be invalid: an oversized
+Content-Length before any byte is read, a disallowed extension when the part
+starts, a wrong type once the first ``HEADER_SIZE`` bytes have arrived, and a
+body that grows past the limit on the chunk that crosses it. Chunks are passed
+through untouched, so accepted uploads are stored exactly as before.
+"""
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.uploadhandler import FileUploadHandler
+from rest_framework import exceptions, serializers, status
+
+from .models import Attachment
+from .validators import HEADER_SIZE, detect_content_type, validate_extension
+
+# Room for the multipart boundaries, part headers and the other form fields
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(exceptions.APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = f'File size cannot exceed {Attachment.MAX_FILE_SIZE // (1024 * 1024)} MB.'
+    default_code = 'upload_too_large'
+
+
+def _invalid(error):
+    return serializers.ValidationError({'file': error.messages})
+
+
+class AttachmentUploadHandler(FileUploadHandler):
+    """Validate the ``file`` part of an attachment upload chunk by chunk."""
+
+    field_name = 'file'
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length > Attachment.MAX_FILE_SIZE + MULTIPART_OVERHEAD:
+            raise UploadTooLarge()
+        # Let the regular multipart parser do the work
+        return None
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        self.validating = field_name == self.field_name
+        self.header = b''
+        self.header_checked = False
+        if self.validating:
+            try:
+                validate_extension(file_name)
+            except DjangoValidationError as e:
+                raise _invalid(e)
+
+    def _check_header(self):
+        try:
+            detect_content_type(self.file_name, self.header)
+        except DjangoValidationError as e:
+            raise _invalid(e)
+        self.header_checked = True
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.validating:
+            return raw_data
+        if start + len(raw_data) > Attachment.MAX_FILE_SIZE:
+            raise UploadTooLarge()
+        if not self.header_checked:
+            self.header += raw_data[:HEADER_SIZE - len(self.header)]
+            if len(self.header) == HEADER_SIZE:
+                self._check_header()
+        return raw_data
+
+    def file_complete(self, file_size):
+        # Files shorter than the header are checked once they have fully arrived
+        if self.validating and not self.header_checked:
+            self._check_header()
+        return None
@@ -0,0 +1,157 @@
+"""
+Resumable, chunked attachment uploads.
+
+A client that may lose its connection uploads in bounded pieces instead of
+one multipart POST:
+
+1. ``POST /tasks/api/uploads/`` with ``task``, ``filename``, ``size`` and the
+   SHA-256 ``checksum`` of the whole file opens a session.
+2. ``PUT /tasks/api/uploads/<id>/chunk/`` sends raw bytes with an
+   ``Upload-Offset`` header, at most ``UPLOAD_CHUNK_SIZE`` per request.
+   After a failure, ``GET /tasks/api/uploads/<id>/`` tells where to resume.
+3. ``POST /tasks/api/uploads/<id>/complete/`` verifies the checksum and
+   creates the ``Attachment``.
+
+Chunks are written at their offset into a partial file under
+``MEDIA_ROOT/upload_sessions/``, so resending a chunk just overwrites it.
+Sessions idle for ``UPLOAD_SESSION_TTL`` are removed by
+``expire_upload_sessions``.
+"""
+import contextlib
+import logging
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Attachment, UploadSession
+from .storage import hash_file
+from .validators import HEADER_SIZE, detect_content_type
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = getattr(settings, 'ATTACHMENT_UPLOAD_CHUNK_SIZE', 1024 * 1024)
+UPLOAD_SESSION_TTL = timedelta(hours=24)
+PARTIAL_PREFIX = 'upload_sessions'
+
+
+class OffsetMismatch(Exception):
+    """A chunk was sent for an offset other than the session's current one."""
+
+    def __init__(self, offset):
+        super().__init__(f'Expected a chunk at offset {offset}.')
+        self.offset = offset
+
+
+class SessionGone(Exception):
+    """The session was completed or discarded while a chunk was being written."""
+
+    def __init__(self):
+        super().__init__('Upload session no longer exists.')
+
+
+def partial_path(session):
+    return default_storage.path(f"{PARTIAL_PREFIX}/{session.pk}.part")
+
+
+def _remove_partial(session):
+    # Already gone when a concurrent or retried request cleaned up first
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(partial_path(session))
+
+
+def write_chunk(session, offset, data):
+    """
+    Store ``data`` at ``offset`` and advance the session past it.
+
+    Raises ``OffsetMismatch`` if ``offset`` is not where the session stands
+    (including when a concurrent request got there first), ``SessionGone`` if
+    the session was completed or discarded meanwhile, and ``ValidationError`` for a chunk past the declared size or a first chunk
+    whose contents do not match the file name.
+    """
+    if offset != session.offset:
+        raise OffsetMismatch(session.offset)
+    end = offset + len(data)
+    if end > session.size:
+        raise ValidationError('Chunk runs past the declared file size.')
+    # Reject a wrong file type on the first chunk rather than after the whole upload
+    if offset == 0 and len(data) >= min(HEADER_SIZE, session.size):
+        detect_content_type(session.filename, data[:HEADER_SIZE])
+
+    path = partial_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # O_CREAT without truncation: retries and late duplicates rewrite their own range only
+    with open(os.open(path, os.O_RDWR | os.O_CREAT, 0o600), 'r+b') as handle:
+        handle.seek(offset)
+        handle.write(data)
+
+    advanced = UploadSession.objects.filter(pk=session.pk, offset=offset).update(
+        offset=end, updated_at=timezone.now()
+    )
+    if not advanced:
+        current = UploadSession.objects.filter(pk=session.pk).values_list('offset', flat=True).first()
+        if current is None:
+            # The write above recreated the partial file of a finished session
+            _remove_partial(session)
+            raise SessionGone()
+        raise OffsetMismatch(current)
+    session.offset = end
+
+
+def complete(session):
+    """
+    Verify a fully received upload and turn it into an ``Attachment``.
+
+    A checksum mismatch rewinds the session to offset 0 so the client can
+    send the file again. The session row is locked while it is assembled, so
+    a concurrent or retried request waits and then finds it completed.
+    """
+    with transaction.atomic():
+        locked = UploadSession.objects.select_for_update().filter(pk=session.pk).first()
+        if locked is None:
+            raise ValidationError('Upload has already been completed.')
+        session.offset = locked.offset
+        if locked.offset != locked.size:
+            raise ValidationError(f'Upload is incomplete: {locked.offset} of {locked.size} bytes received.')
+        with open(partial_path(session), 'rb') as handle:
+            upload = File(handle, name=session.filename)
+            digest, _ = hash_file(upload)
+            verified = digest == session.checksum.lower()
+            if verified:
+                upload.seek(0)
+                mime_type = detect_content_type(session.filename, upload.read(HEADER_SIZE))
+                upload.seek(0)
+                attachment = Attachment.objects.create(
+                    task=session.task, file=upload, original_filename=session.filename,
+                    mime_type=mime_type, size=session.size, uploaded_by=session.uploaded_by,
+                )
+                locked.delete()
+            else:
+                UploadSession.objects.filter(pk=session.pk).update(offset=0, updated_at=timezone.now())
+    if not verified:
+        session.offset = 0
+        raise ValidationError('Checksum mismatch; the upload has been reset, please send it again.')
+    _remove_partial(session)
+    return attachment
+
+
+def discard(session):
+    """Abort an upload and remove what was received."""
+    _remove_partial(session)
+    session.delete()
+
+
+def expire_sessions(ttl=UPLOAD_SESSION_TTL):
+    """Remove sessions that have received nothing for ``ttl``; return how many."""
+    expired = list(UploadSession.objects.filter(updated_at__lt=timezone.now() - ttl))
+    for session in expired:
+        _remove_partial(session)
+    UploadSession.objects.filter(pk__in=[session.pk for session in expired]).delete()
+    if expired:
+        logger.info(f"Removed {len(expired)} abandoned upload sessions")
+    return len(expired)
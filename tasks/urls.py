@@ -7,6 +7,7 @@ router = DefaultRouter()
 router.register(r'tasks', views.TaskViewSet, basename='api-tasks')
 router.register(r'comments', views.CommentViewSet, basename='api-comments')
 router.register(r'attachments', views.AttachmentViewSet, basename='api-attachments')
+router.register(r'uploads', views.UploadSessionViewSet, basename='api-uploads')
 router.register(r'tags', views.TagViewSet, basename='api-tags')
 
 # Important: Do NOT include frontend views here to avoid mixing HTML under /api/
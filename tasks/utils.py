@@ -4,15 +4,141 @@ Utility functions for task management, including mention handling.
 
 import re
 from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Q, Subquery, Window
+from django.db.models.functions import Coalesce, RowNumber
 from notifications.models import Notification
+from projects.utils import visible_project_ids
+from .models import Task, Comment, Attachment, Tag
+from .mentions import resolve_mentions, notify_mentions
 
 User = get_user_model()
 
+# Tasks returned per Kanban column unless the client asks for another limit
+BOARD_COLUMN_LIMIT = 20
+BOARD_MAX_COLUMN_LIMIT = 100
+
+
+def visible_tasks(user):
+    """
+    Tasks the user can see: assigned to them, or in a project they own or belong to.
+
+    Membership is resolved through the cached project visibility index, so the
+    filter is a plain ``project_id IN (...)`` with no M2M join and no DISTINCT.
+
+    Args:
+        user: User instance
+
+    Returns:
+        QuerySet: Task queryset scoped to the user
+    """
+    return Task.objects.filter(
+        Q(project_id__in=visible_project_ids(user)) | Q(assigned_to=user)
+    )
+
+
+def _task_count_subquery(model):
+    """Correlated COUNT of ``model`` rows pointing at the outer task."""
+    counts = (
+        model.objects.filter(task=OuterRef('pk'))
+        .order_by()
+        .values('task')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def annotate_task_counts(queryset):
+    """
+    Prepare a task queryset for list serialization.
+
+    Comment and attachment totals are annotated as subqueries (so they do not
+    multiply each other's joins), ``depends_on`` is joined and tags are
+    prefetched. ``Task.comments_count``/``attachments_count`` and
+    ``TaskSerializer`` pick the annotations up instead of counting per row.
+
+    Args:
+        queryset: Task queryset
+
+    Returns:
+        QuerySet: Annotated task queryset
+    """
+    return queryset.select_related('depends_on').prefetch_related('tags').annotate(
+        comments_total=_task_count_subquery(Comment),
+        attachments_total=_task_count_subquery(Attachment),
+    )
+
+
+def attach_tag_task_counts(tags):
+    """
+    Set ``tasks_total`` on every tag with one grouped query.
+
+    Args:
+        tags: Iterable of Tag instances (duplicates allowed)
+    """
+    tags = [tag for tag in tags if not hasattr(tag, 'tasks_total')]
+    if not tags:
+        return
+    counts = dict(
+        Tag.tasks.through.objects.filter(tag_id__in={tag.pk for tag in tags})
+        .values('tag_id')
+        .annotate(total=Count('pk'))
+        .values_list('tag_id', 'total')
+    )
+    for tag in tags:
+        tag.tasks_total = counts.get(tag.pk, 0)
+
+
+def board_columns(queryset, limit=BOARD_COLUMN_LIMIT):
+    """
+    Group tasks into Kanban columns by status.
+
+    One windowed query numbers the tasks within their status, newest first
+    (``ROW_NUMBER() OVER (PARTITION BY status)``) and counts each status, and
+    returns only the ids of the first ``limit`` per column with those totals.
+    The full rows are then loaded for just those ids, so the work and the
+    payload stay bounded however many tasks the board holds.
+
+    Args:
+        queryset: Filtered task queryset
+        limit: Maximum tasks per column
+
+    Returns:
+        list: ``{'status', 'label', 'total', 'tasks'}`` per column, in ``STATUS_CHOICES`` order
+    """
+    by_status = [F('status')]
+    ranked = list(
+        queryset.order_by()
+        .annotate(
+            column_position=Window(RowNumber(), partition_by=by_status, order_by=[F('created_at').desc(), F('pk').desc()]),
+            column_total=Window(Count('pk'), partition_by=by_status),
+        )
+        .filter(column_position__lte=limit)
+        .order_by('column_position')
+        .values_list('pk', 'status', 'column_total')
+    )
+    tasks = {
+        task.pk: task for task in annotate_task_counts(
+            Task.objects.filter(pk__in=[pk for pk, _, _ in ranked]).select_related('project', 'assigned_to')
+        )
+    }
+    columns = {
+        value: {'status': value, 'label': label, 'total': 0, 'tasks': []} for value, label in Task.STATUS_CHOICES
+    }
+    for pk, status, total in ranked:
+        column = columns.setdefault(status, {'status': status, 'label': status, 'total': 0, 'tasks': []})
+        column['total'] = total
+        if pk in tasks:  # unless deleted in between
+            column['tasks'].append(tasks[pk])
+    return list(columns.values())
+
 
 def handle_mentions_in_comment(comment_content, task, author):
     """
     Detect mentions in comment content and create notifications for mentioned users.
     
+    Mentions are resolved in one batch and notified with one insert (see tasks.mentions).
+    
     Args:
         comment_content (str): The content of the comment
         task: Task instance
@@ -21,35 +147,15 @@ def handle_mentions_in_comment(comment_content, task, author):
     Returns:
         list: List of mentioned users
     """
-    # Regex pattern to find mentions: @username (including @ in email)
-    mention_pattern = r'@([A-Za-z0-9_\.@]+)'
-    mentions = re.findall(mention_pattern, comment_content)
-    
-    mentioned_users = []
-    
-    for username in mentions:
-        try:
-            # Try to find user by email (assuming username is email)
-            user = User.objects.get(email=username)
-            
-            # Don't notify the author of the comment
-            if user != author:
-                # Create notification for mentioned user
-                message = f"You were mentioned in a comment on task '{task.title}' by {author.email}"
-                
-                Notification.objects.create(
-                    user=user,
-                    message=message,
-                    task=task,
-                    notification_type='web'
-                )
-                
-                mentioned_users.append(user)
-                
-        except User.DoesNotExist:
-            # User not found, skip this mention
-            continue
-    
+    # Don't notify the author of the comment
+    mentioned_users = [user for user in resolve_mentions(comment_content) if user != author]
+    if mentioned_users:
+        notify_mentions(
+            mentioned_users,
+            f"You were mentioned in a comment on task '{task.title}' by {author.email}",
+            task=task,
+            subject=f"Mentioned on: {task.title}",
+        )
     return mentioned_users
 
 
@@ -77,17 +183,7 @@ def get_mentioned_users(text):
     Returns:
         list: List of User objects that were mentioned
     """
-    mentions = extract_mentions_from_text(text)
-    users = []
-    
-    for username in mentions:
-        try:
-            user = User.objects.get(email=username)
-            users.append(user)
-        except User.DoesNotExist:
-            continue
-    
-    return users
+    return resolve_mentions(text)
 
 
 def create_task_notification(user, task, message, notification_type='web'):
@@ -1,23 +1,91 @@
 """
 File validation utilities for task attachments.
+
+The real type of an upload is sniffed from its first ``HEADER_SIZE`` bytes
+(magic numbers), never from the client's Content-Type, so only the header is
+ever read no matter how large the file is.
 """
+import os
 
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
+# Bytes of the file inspected to detect its type
+HEADER_SIZE = 8 * 1024
+
+OLE_CONTAINER = 'application/x-ole-storage'
+
+# Leading bytes -> detected type; Office Open XML files are zip archives and
+# legacy Office files are OLE compound documents
+SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'%PDF-', 'application/pdf'),
+    (b'PK\x03\x04', 'application/zip'),
+    (b'PK\x05\x06', 'application/zip'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', OLE_CONTAINER),
+)
+
+# extension -> (stored mime type, type the header must be detected as)
+EXTENSION_TYPES = {
+    'png': ('image/png', 'image/png'),
+    'jpg': ('image/jpeg', 'image/jpeg'),
+    'jpeg': ('image/jpeg', 'image/jpeg'),
+    'pdf': ('application/pdf', 'application/pdf'),
+    'txt': ('text/plain', 'text/plain'),
+    'zip': ('application/zip', 'application/zip'),
+    'docx': ('application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'application/zip'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'application/zip'),
+    'doc': ('application/msword', OLE_CONTAINER),
+    'xls': ('application/vnd.ms-excel', OLE_CONTAINER),
+}
+
+# Bytes that may appear in plain text (any encoding), as used by file(1)
+_TEXT_BYTES = bytes({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7f})
+
+
+def file_extension(name):
+    return os.path.splitext(name)[1].lower().lstrip('.')
+
+
+def sniff_content_type(header):
+    """
+    Detect a file's type from its leading bytes.
+
+    Args:
+        header: The first ``HEADER_SIZE`` bytes (or the whole file if shorter)
+
+    Returns:
+        str: Detected mime type, or ``None`` for unrecognised binary data
+    """
+    for signature, content_type in SIGNATURES:
+        if header.startswith(signature):
+            return content_type
+    if not header.translate(None, _TEXT_BYTES):
+        return 'text/plain'
+    return None
+
+
+def read_header(file_obj):
+    """Read the first ``HEADER_SIZE`` bytes of an uploaded file and rewind it."""
+    file_obj.seek(0)
+    header = file_obj.read(HEADER_SIZE)
+    file_obj.seek(0)
+    return header
+
 
 def validate_file_size(file_obj):
     """
     Validate that file size is within allowed limits.
-    
+
     Args:
         file_obj: Django UploadedFile object
-        
+
     Raises:
         ValidationError: If file size exceeds limit
     """
     from .models import Attachment
-    
+
     if file_obj.size > Attachment.MAX_FILE_SIZE:
         max_size_mb = Attachment.MAX_FILE_SIZE / (1024 * 1024)
         raise ValidationError(
@@ -29,42 +97,82 @@ def validate_file_size(file_obj):
         )
 
 
-def validate_content_type(file_obj):
+def validate_extension(name):
     """
-    Validate that file type is allowed.
-    
+    Validate that a file name has an allowed extension.
+
     Args:
-        file_obj: Django UploadedFile object
-        
+        name: Client-supplied file name
+
     Raises:
-        ValidationError: If file type is not allowed
+        ValidationError: If the extension is not allowed
     """
     from .models import Attachment
-    
-    # Get file extension
-    import os
-    file_extension = os.path.splitext(file_obj.name)[1].lower().lstrip('.')
-    
-    if file_extension not in Attachment.ALLOWED_EXTENSIONS:
+
+    extension = file_extension(name)
+    if extension not in Attachment.ALLOWED_EXTENSIONS:
         raise ValidationError(
             _('File type "%(file_type)s" is not allowed. Allowed types: %(allowed_types)s'),
             params={
-                'file_type': file_extension,
+                'file_type': extension,
                 'allowed_types': ', '.join(Attachment.ALLOWED_EXTENSIONS)
             }
         )
 
 
+def detect_content_type(name, header):
+    """
+    Check that a file's contents match its extension.
+
+    Args:
+        name: Client-supplied file name
+        header: Leading bytes of the file
+
+    Returns:
+        str: The mime type to store for the file
+
+    Raises:
+        ValidationError: If the extension is not allowed or the contents are of another type
+    """
+    validate_extension(name)
+    extension = file_extension(name)
+    content_type, expected = EXTENSION_TYPES[extension]
+    if sniff_content_type(header) != expected:
+        raise ValidationError(
+            _('File contents do not match the "%(file_type)s" extension.'),
+            params={'file_type': extension}
+        )
+    return content_type
+
+
+def validate_content_type(file_obj):
+    """
+    Validate that file type is allowed, judging by the file's contents.
+
+    Args:
+        file_obj: Django UploadedFile object
+
+    Returns:
+        str: The detected mime type
+
+    Raises:
+        ValidationError: If file type is not allowed
+    """
+    return detect_content_type(file_obj.name, read_header(file_obj))
+
+
 def validate_attachment(file_obj):
     """
     Combined validation for file size and content type.
-    
+
     Args:
         file_obj: Django UploadedFile object
-        
+
+    Returns:
+        str: The detected mime type
+
     Raises:
         ValidationError: If file doesn't meet requirements
     """
     validate_file_size(file_obj)
-    validate_content_type(file_obj)
-
+    return validate_content_type(file_obj)
@@ -1,30 +1,203 @@
-from rest_framework import viewsets, status
+import uuid
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db import models
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.http import Http404
+from django.utils.dateparse import parse_date
 from rest_framework.permissions import IsAuthenticated
-from .models import Task, Comment, Attachment, Tag
+from .models import Task, Comment, Attachment, Tag, UploadSession, TaskTemplate
 from .serializers import (
-	TaskSerializer, CommentSerializer, AttachmentSerializer, TagSerializer
+	TaskSerializer, CommentSerializer, AttachmentSerializer, TagSerializer, UploadSessionSerializer
 )
+from .utils import visible_tasks, annotate_task_counts, board_columns, BOARD_COLUMN_LIMIT, BOARD_MAX_COLUMN_LIMIT
+from . import bulk, uploads
+from .downloads import serve_file
+from .upload_handlers import AttachmentUploadHandler
+from .previews import existing_preview, DEFAULT_PREVIEW_SIZE
+from django.contrib.auth import get_user_model
+from projects.models import Project
+from projects.utils import visible_project_ids
+from smart_task_manager.pagination import KeysetPagination
+from smart_task_manager.conditional import ConditionalListMixin, conditional_response, fingerprint
 from django.views.generic import ListView
 from django.contrib.auth.mixins import LoginRequiredMixin
 
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(ConditionalListMixin, viewsets.ModelViewSet):
 	serializer_class = TaskSerializer
 	permission_classes = [IsAuthenticated]
+	pagination_class = KeysetPagination
 
-	def get_queryset(self):
-		user = self.request.user
-		qs = Task.objects.filter(
-			models.Q(assigned_to=user) | models.Q(project__owner=user) | models.Q(project__members=user)
-		).select_related('project', 'assigned_to').distinct()
+	def filter_tasks(self):
+		qs = visible_tasks(self.request.user)
 		status_param = self.request.query_params.get('status')
 		if status_param:
 			qs = qs.filter(status=status_param)
+		project_param = self.request.query_params.get('project')
+		if project_param:
+			try:
+				qs = qs.filter(project_id=uuid.UUID(project_param))
+			except ValueError:
+				qs = qs.none()
 		return qs
 
+	def get_queryset(self):
+		return annotate_task_counts(self.filter_tasks().select_related('project', 'assigned_to'))
+
+	def get_list_fingerprints(self):
+		# Task edits bump updated_at; comments and attachments change the listed counts
+		tasks = self.filter_tasks()
+		return [
+			fingerprint(tasks, 'updated_at'),
+			fingerprint(Comment.objects.filter(task__in=tasks), 'created_at', 'edited_at'),
+			fingerprint(Attachment.objects.filter(task__in=tasks), 'created_at'),
+		]
+
+	@action(detail=False, methods=['get'])
+	def board(self, request):
+		"""Kanban board: the newest ``?limit=`` tasks of each status column plus every column's total."""
+		try:
+			limit = int(request.query_params.get('limit', BOARD_COLUMN_LIMIT))
+		except ValueError:
+			return Response({'error': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+		limit = min(max(limit, 1), BOARD_MAX_COLUMN_LIMIT)
+
+		def build():
+			columns = board_columns(self.filter_tasks(), limit)
+			for column in columns:
+				column['tasks'] = self.get_serializer(column['tasks'], many=True).data
+			return Response({'limit': limit, 'columns': columns})
+
+		return conditional_response(request, self.get_list_fingerprints(), build)
+
+	def _bulk_items(self, request, key, bare_list=True):
+		"""
+		Return the list payload for a bulk action, or an error Response.
+
+		Actions that read other keys of the body pass ``bare_list=False``, so the
+		list must come wrapped in an object.
+		"""
+		if isinstance(request.data, list):
+			if not bare_list:
+				return None, Response({'error': 'Expected a JSON object.'}, status=status.HTTP_400_BAD_REQUEST)
+			items = request.data
+		elif isinstance(request.data, dict):
+			items = request.data.get(key)
+		else:
+			items = None
+		if not isinstance(items, list) or not items:
+			return None, Response({'error': f'Provide a non-empty "{key}" list.'}, status=status.HTTP_400_BAD_REQUEST)
+		if len(items) > bulk.BULK_MAX_ITEMS:
+			return None, Response(
+				{'error': f'At most {bulk.BULK_MAX_ITEMS} items per request.'},
+				status=status.HTTP_400_BAD_REQUEST
+			)
+		return items, None
+
+	def _bulk_response(self, results, success_status=status.HTTP_200_OK):
+		failed = sum(1 for result in results if not result['success'])
+		if not failed:
+			code = success_status
+		elif failed == len(results):
+			code = status.HTTP_400_BAD_REQUEST
+		else:
+			code = status.HTTP_207_MULTI_STATUS
+		return Response({
+			'succeeded': len(results) - failed,
+			'failed': failed,
+			'results': results,
+		}, status=code)
+
+	@action(detail=False, methods=['post'], url_path='bulk-create')
+	def bulk_create(self, request):
+		"""Create many tasks at once: ``{"tasks": [{...}, ...]}``."""
+		items, error = self._bulk_items(request, 'tasks')
+		if error:
+			return error
+		results = bulk.bulk_create_tasks(self.get_serializer_class(), items, self.get_serializer_context())
+		return self._bulk_response(results, status.HTTP_201_CREATED)
+
+	@action(detail=False, methods=['post'], url_path='bulk-update')
+	def bulk_update(self, request):
+		"""Partially update many tasks: ``{"tasks": [{"id": ..., ...}, ...]}``."""
+		items, error = self._bulk_items(request, 'tasks')
+		if error:
+			return error
+		results = bulk.bulk_update_tasks(
+			self.get_serializer_class(), visible_tasks(request.user), items, self.get_serializer_context()
+		)
+		return self._bulk_response(results)
+
+	@action(detail=False, methods=['post'], url_path='bulk-status')
+	def bulk_status(self, request):
+		"""Move many tasks to one status: ``{"ids": [...], "status": "done"}``."""
+		ids, error = self._bulk_items(request, 'ids', bare_list=False)
+		if error:
+			return error
+		new_status = request.data.get('status')
+		if new_status not in dict(Task.STATUS_CHOICES):
+			return Response({'error': 'Invalid status.'}, status=status.HTTP_400_BAD_REQUEST)
+		event = 'completed' if new_status == 'done' else 'status_changed'
+		results = bulk.bulk_set_fields(visible_tasks(request.user), ids, request.user, event, status=new_status)
+		return self._bulk_response(results)
+
+	@action(detail=False, methods=['post'], url_path='bulk-reassign')
+	def bulk_reassign(self, request):
+		"""Assign many tasks to one user (or nobody): ``{"ids": [...], "assigned_to": id}``."""
+		ids, error = self._bulk_items(request, 'ids', bare_list=False)
+		if error:
+			return error
+		assignee = None
+		assignee_id = request.data.get('assigned_to')
+		if assignee_id is not None:
+			try:
+				assignee = get_user_model().objects.get(pk=assignee_id)
+			except (get_user_model().DoesNotExist, ValueError, TypeError):
+				return Response({'error': 'User not found.'}, status=status.HTTP_400_BAD_REQUEST)
+		results = bulk.bulk_set_fields(visible_tasks(request.user), ids, request.user, 'assigned', assigned_to=assignee)
+		return self._bulk_response(results)
+
+	@action(detail=False, methods=['post'], url_path='bulk-delete')
+	def bulk_delete(self, request):
+		"""Delete many tasks: ``{"ids": [...]}``."""
+		ids, error = self._bulk_items(request, 'ids')
+		if error:
+			return error
+		results = bulk.bulk_delete_tasks(visible_tasks(request.user), ids, request.user)
+		return self._bulk_response(results)
+
+
+	@action(detail=False, methods=['post'], url_path='from-template')
+	def from_template(self, request):
+		"""Instantiate a template in many projects: ``{"template": id, "projects": [...], "assigned_to": id, "due_date": "YYYY-MM-DD"}``."""
+		project_ids, error = self._bulk_items(request, 'projects', bare_list=False)
+		if error:
+			return error
+		templates = TaskTemplate.objects.filter(models.Q(is_public=True) | models.Q(created_by=request.user))
+		try:
+			template = templates.get(pk=request.data.get('template'))
+		except (TaskTemplate.DoesNotExist, ValueError, TypeError):
+			return Response({'error': 'Template not found.'}, status=status.HTTP_400_BAD_REQUEST)
+		assignee = None
+		assignee_id = request.data.get('assigned_to')
+		if assignee_id is not None:
+			try:
+				assignee = get_user_model().objects.get(pk=assignee_id)
+			except (get_user_model().DoesNotExist, ValueError, TypeError, ValidationError):
+				return Response({'error': 'User not found.'}, status=status.HTTP_400_BAD_REQUEST)
+		due_date = request.data.get('due_date')
+		if due_date is not None:
+			due_date = parse_date(str(due_date))
+			if due_date is None:
+				return Response({'error': 'due_date must be YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+		results = bulk.bulk_instantiate_template(
+			template, Project.objects.filter(pk__in=visible_project_ids(request.user)), project_ids,
+			request.user, assignee, due_date
+		)
+		return self._bulk_response(results, status.HTTP_201_CREATED)
 
 class CommentViewSet(viewsets.ModelViewSet):
 	serializer_class = CommentSerializer
@@ -32,7 +205,7 @@ class CommentViewSet(viewsets.ModelViewSet):
 
 	def get_queryset(self):
 		user = self.request.user
-		return Comment.objects.filter(task__in=Task.objects.filter(models.Q(assigned_to=user) | models.Q(project__owner=user) | models.Q(project__members=user))).select_related('task','author').distinct()
+		return Comment.objects.filter(task__in=visible_tasks(user)).select_related('task','author')
 
 
 class AttachmentViewSet(viewsets.ModelViewSet):
@@ -41,7 +214,33 @@ class AttachmentViewSet(viewsets.ModelViewSet):
 
 	def get_queryset(self):
 		user = self.request.user
-		return Attachment.objects.filter(task__in=Task.objects.filter(models.Q(assigned_to=user) | models.Q(project__owner=user) | models.Q(project__members=user))).select_related('task','uploaded_by').distinct()
+		return Attachment.objects.filter(task__in=visible_tasks(user)).select_related('task','uploaded_by')
+
+	def initialize_request(self, request, *args, **kwargs):
+		request = super().initialize_request(request, *args, **kwargs)
+		if self.action in ('create', 'update', 'partial_update'):
+			# Must be installed before anything (authentication's CSRF check included) reads the body
+			request.upload_handlers.insert(0, AttachmentUploadHandler(request._request))
+		return request
+
+	@action(detail=True, methods=['get'])
+	def download(self, request, pk=None):
+		"""Send the file: offloaded to the proxy when configured, with Range/ETag support either way."""
+		attachment = self.get_object()
+		return serve_file(
+			request, attachment.file.storage, attachment.file.name,
+			filename=attachment.original_filename or None,
+			content_type=attachment.mime_type or None,
+			as_attachment=request.query_params.get('inline') != '1',
+		)
+
+	@action(detail=True, methods=['get'])
+	def thumbnail(self, request, pk=None):
+		"""Rendered preview (``?size=small|medium``); 404 until the background pipeline has made it."""
+		name = existing_preview(self.get_object(), request.query_params.get('size', DEFAULT_PREVIEW_SIZE))
+		if name is None:
+			raise Http404('Preview not available.')
+		return serve_file(request, default_storage, name, content_type='image/jpeg', as_attachment=False)
 
 	@action(detail=False, methods=['get'])
 	def images(self, request):
@@ -67,13 +266,70 @@ class AttachmentViewSet(viewsets.ModelViewSet):
 		return Response(serializer.data)
 
 
+class UploadSessionViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
+	"""Resumable chunked attachment uploads; the protocol is described in ``tasks.uploads``."""
+	serializer_class = UploadSessionSerializer
+	permission_classes = [IsAuthenticated]
+
+	def get_queryset(self):
+		return UploadSession.objects.filter(uploaded_by=self.request.user).select_related('task')
+
+	def perform_create(self, serializer):
+		serializer.save(uploaded_by=self.request.user)
+
+	def perform_destroy(self, instance):
+		uploads.discard(instance)
+
+	def retrieve(self, request, *args, **kwargs):
+		response = super().retrieve(request, *args, **kwargs)
+		response['Upload-Offset'] = str(response.data['offset'])
+		return response
+
+	@action(detail=True, methods=['put'])
+	def chunk(self, request, pk=None):
+		"""Write the raw request body at the ``Upload-Offset`` header's position."""
+		session = self.get_object()
+		# Checked before the body is read, so a worker never buffers more than one chunk
+		if int(request.META.get('CONTENT_LENGTH') or 0) > uploads.UPLOAD_CHUNK_SIZE:
+			return Response(
+				{'error': f'Chunks are limited to {uploads.UPLOAD_CHUNK_SIZE} bytes.'},
+				status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+			)
+		try:
+			offset = int(request.headers['Upload-Offset'])
+		except (KeyError, ValueError):
+			return Response({'error': 'An integer Upload-Offset header is required.'}, status=status.HTTP_400_BAD_REQUEST)
+		try:
+			uploads.write_chunk(session, offset, request.body)
+		except uploads.OffsetMismatch as e:
+			return Response({'error': str(e), 'offset': e.offset}, status=status.HTTP_409_CONFLICT, headers={'Upload-Offset': str(e.offset)})
+		except uploads.SessionGone as e:
+			return Response({'error': str(e)}, status=status.HTTP_410_GONE)
+		except ValidationError as e:
+			return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+		return Response({'offset': session.offset, 'size': session.size}, headers={'Upload-Offset': str(session.offset)})
+
+	@action(detail=True, methods=['post'])
+	def complete(self, request, pk=None):
+		"""Verify the checksum and create the attachment."""
+		session = self.get_object()
+		try:
+			attachment = uploads.complete(session)
+		except ValidationError as e:
+			return Response({'error': e.messages[0], 'offset': session.offset}, status=status.HTTP_400_BAD_REQUEST)
+		serializer = AttachmentSerializer(attachment, context=self.get_serializer_context())
+		return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
 class TagViewSet(viewsets.ModelViewSet):
 	serializer_class = TagSerializer
 	permission_classes = [IsAuthenticated]
 
 	def get_queryset(self):
 		user = self.request.user
-		return Tag.objects.filter(tasks__in=Task.objects.filter(models.Q(assigned_to=user) | models.Q(project__owner=user) | models.Q(project__members=user))).distinct()
+		# Semi-join through the tag/task table so tags on many tasks are not duplicated
+		tagged = Tag.tasks.through.objects.filter(task__in=visible_tasks(user)).values('tag_id')
+		return Tag.objects.filter(id__in=tagged).annotate(tasks_total=models.Count('tasks'))
 
 
 class TasksPageView(LoginRequiredMixin, ListView):
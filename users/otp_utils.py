@@ -4,7 +4,7 @@ OTP (One-Time Password) utilities for password reset
 import random
 import string
 from django.core.cache import cache
-from django.core.mail import send_mail
+from smart_task_manager.mail import build_message, dispatch
 from django.conf import settings
 from datetime import timedelta
 import logging
@@ -36,13 +36,9 @@ Best regards,
 Smart Task Manager Team
         """
         
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[email],
-            fail_silently=False,
-        )
+        report = dispatch([build_message(subject, message, email)])
+        if report['failed']:
+            raise report['failed'][0]['exception']
         logger.info(f"OTP email sent successfully to {email}")
         return True
     except Exception as e: